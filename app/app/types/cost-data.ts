@@ -48,11 +48,20 @@ export interface MtdWorkload {
   prior_partial_cost_usd: number;
 }
 
+export interface StorageLensBreakdownEntry {
+  name: string;
+  total_bytes: number;
+  object_count: number;
+}
+
 export interface StorageLens {
   total_bytes: number;
   object_count: number;
   storage_lens_date: string;
   config_id: string;
+  by_storage_class?: StorageLensBreakdownEntry[];
+  by_region?: StorageLensBreakdownEntry[];
+  by_account?: StorageLensBreakdownEntry[];
 }
 
 export interface StorageMetrics {
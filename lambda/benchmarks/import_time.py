@@ -0,0 +1,91 @@
+"""Report per-module import cost of the Lambda package (cold-start init time).
+
+Each target module is imported in a fresh interpreter with ``python -X importtime``
+so no module is shared between measurements. The cumulative import time of each
+target is reported as the minimum over ``--repeat`` runs, followed by the
+heaviest individual imports pulled in by the first target.
+
+Usage (from lambda/):
+    uv run python benchmarks/import_time.py
+    uv run python benchmarks/import_time.py dapanoskop.handler --top 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "dapanoskop.handler",
+    "dapanoskop.collector",
+    "dapanoskop.processor",
+    "dapanoskop.storage_lens",
+    "boto3",
+    "pyarrow.parquet",
+]
+
+# Heavy dependencies that must not be loaded just by importing the handler.
+LAZY_MODULES = ["pyarrow", "pyarrow.parquet"]
+
+
+def _import_times(module: str) -> tuple[dict[str, tuple[int, int]], set[str]]:
+    """Import ``module`` in a fresh interpreter.
+
+    Returns ({imported module: (self_us, cumulative_us)}, loaded module names).
+    """
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times, set(proc.stdout.split())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module")
+    parser.add_argument(
+        "--top", type=int, default=15, help="heaviest imports to list (by self time)"
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<28} {'cumulative [ms]':>16}")
+    first_times: dict[str, tuple[int, int]] = {}
+    first_loaded: set[str] = set()
+    for i, module in enumerate(args.modules):
+        best: int | None = None
+        for _ in range(args.repeat):
+            times, loaded = _import_times(module)
+            cumulative = times[module][1]
+            if best is None or cumulative < best:
+                best = cumulative
+                if i == 0:
+                    first_times, first_loaded = times, loaded
+        print(f"{module:<28} {best / 1000:>16.1f}")
+
+    first = args.modules[0]
+    print(f"\nHeaviest imports under {first} (self time):")
+    heaviest = sorted(first_times.items(), key=lambda kv: kv[1][0], reverse=True)
+    for name, (self_us, cumulative_us) in heaviest[: args.top]:
+        print(f"  {name:<44} {self_us / 1000:>8.1f} ms  ({cumulative_us / 1000:.1f})")
+
+    eager = [m for m in LAZY_MODULES if m in first_loaded]
+    if eager:
+        print(f"\nWARNING: {first} eagerly imports {', '.join(eager)}")
+        return 1
+    print(f"\n{first} does not load {', '.join(LAZY_MODULES)} at import time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Micro-benchmarks for the processor's hot functions, compared to a baseline.
+
+Each function runs on fixed inputs derived from a seeded
+``dapanoskop.synthetic.SyntheticOrg`` (one month of 10,000 App × USAGE_TYPE
+groups, 25 cost centers, 3 split charge rules), so every run measures the
+same work. The per-call time of a benchmark is the minimum over ``--repeat``
+timing rounds, each calibrated to last roughly ``--min-time`` seconds.
+
+Results are compared with ``benchmarks/baseline.json``; any benchmark slower
+than its baseline by more than ``--threshold`` (relative) is flagged and the
+script exits 1. Baselines are machine-specific: record one on the machine you
+compare on with ``--save`` before starting an optimization, then rerun.
+
+Usage (from lambda/):
+    uv run python benchmarks/micro.py
+    uv run python benchmarks/micro.py --save
+    uv run python benchmarks/micro.py --threshold 0.10 _aggregate_period
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from dapanoskop.categories import categorize
+from dapanoskop.collector import get_cost_and_usage
+from dapanoskop.processor import (
+    _aggregate_period,
+    _apply_split_charge_plan,
+    _compile_split_charge_plan,
+    _compute_mtd_comparison,
+    _compute_storage_metrics,
+    _volume_kinds,
+)
+from dapanoskop.synthetic import SyntheticCostExplorer, SyntheticOrg
+
+BASELINE = Path(__file__).with_name("baseline.json")
+NOW = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _benchmarks() -> dict[str, Callable[[], Any]]:
+    """Build the fixed inputs and return {name: zero-argument callable}."""
+    org = SyntheticOrg(
+        workloads=200, usage_types=50, cost_centers=25, split_rules=3, now=NOW
+    )
+    ce = SyntheticCostExplorer(org)
+    current = get_cost_and_usage(ce, "2026-01-01", "2026-02-01")
+    prev = get_cost_and_usage(ce, "2025-12-01", "2026-01-01")
+    partial = get_cost_and_usage(ce, "2026-01-01", "2026-01-10")
+    usage_types = [g["Keys"][1] for g in current]
+
+    kinds = _volume_kinds(include_efs=True, include_ebs=True)
+    current_agg = _aggregate_period(current, kinds)
+    prev_agg = _aggregate_period(prev, kinds)
+    partial_costs = _aggregate_period(partial, kinds)["workloads"]
+
+    rules = org.split_charge_rules
+    cc_mapping = dict(org.mapping)
+    cc_groups: dict[str, list[str]] = {}
+    for wl, cc in cc_mapping.items():
+        cc_groups.setdefault(cc, []).append(wl)
+    allocated: dict[str, float] = {}
+    for wl, cost in partial_costs.items():
+        allocated[cc_mapping[wl]] = allocated.get(cc_mapping[wl], 0.0) + cost
+    split_charge_cats = [r["Source"] for r in rules]
+    plan = _compile_split_charge_plan(rules)
+
+    return {
+        "categorize": lambda: [categorize(ut) for ut in usage_types],
+        "_aggregate_period": lambda: _aggregate_period(current, kinds, "2026-01"),
+        "_compute_storage_metrics": lambda: _compute_storage_metrics(
+            current_agg, prev_agg
+        ),
+        "_apply_split_charge_plan": lambda: _apply_split_charge_plan(plan, allocated),
+        "_compute_mtd_comparison": lambda: _compute_mtd_comparison(
+            partial_costs,
+            ("2026-01-01", "2026-01-10"),
+            allocated,
+            cc_groups,
+            cc_mapping,
+            split_charge_cats,
+            plan,
+        ),
+    }
+
+
+def _time_per_call(fn: Callable[[], Any], repeat: int, min_time: float) -> float:
+    """Return the best per-call time in seconds over ``repeat`` rounds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="relative slowdown vs baseline that counts as a regression",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="write results as the new baseline"
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = _benchmarks()
+    unknown = set(args.names) - set(benchmarks)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    names = args.names or list(benchmarks)
+
+    baseline: dict[str, float] = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["per_call_us"]
+
+    results: dict[str, float] = {}
+    regressions = []
+    print(f"{'benchmark':<36} {'per call [us]':>14} {'baseline':>10} {'change':>8}")
+    for name in names:
+        per_call_us = _time_per_call(benchmarks[name], args.repeat, args.min_time) * 1e6
+        results[name] = round(per_call_us, 2)
+        line = f"{name:<36} {per_call_us:>14.1f}"
+        if name in baseline:
+            change = per_call_us / baseline[name] - 1
+            line += f" {baseline[name]:>10.1f} {change:>+8.1%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "per_call_us": {**baseline, **results},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} benchmark(s) slower than baseline by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Measure how the pipeline stages scale with organization size.
+
+Drives the daily (month-to-date) path — collect → process → write_outputs,
+plus the Storage Lens query — end to end against a seeded
+``dapanoskop.synthetic.SyntheticOrg`` (Cost Explorer, STS, S3 Control and
+CloudWatch stand-ins), for a series of sizes measured in App × USAGE_TYPE
+groups per monthly query. Outputs go to in-memory storage so serialization is
+measured without S3 round trips. Every stand-in API call (and paginator call)
+waits ``--api-latency`` seconds, so stages bound by AWS round trips, such as
+the Storage Lens query, scale with their number of calls. For every stage it
+reports wall time and peak traced memory (from a separate tracemalloc pass so
+tracing overhead does not distort timings), plus the bytes written per output
+file.
+
+A warm-up run at the smallest size first pays one-time costs (lazy imports
+such as pyarrow, first-use caches), and each stage's time is the best of
+``--repeat`` runs. Module-level caches of the collector and the Storage Lens
+reader are cleared before every run, so each run measures a cold invocation.
+
+The complexity check fits the slope of log(time) over log(size) per stage and
+exits 1 if any stage grows faster than linearly (slope > 1 + tolerance).
+
+Usage (from lambda/):
+    uv run python benchmarks/scaling.py
+    uv run python benchmarks/scaling.py --sizes 1000 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable
+from unittest.mock import patch
+
+from dapanoskop.collector import clear_category_cache, collect
+from dapanoskop.processor import process, write_outputs
+from dapanoskop.storage import MemoryStorage
+from dapanoskop.storage_lens import clear_discovery_cache, get_storage_lens_metrics
+from dapanoskop.synthetic import COST_CATEGORY_NAME, SyntheticOrg
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+STAGES = ["collect", "process", "serialize", "storage-lens"]
+
+
+def _org(size: int, seed: int) -> SyntheticOrg:
+    """Build an org with ``size`` App × USAGE_TYPE groups per month."""
+    usage_types = min(size, 100)
+    return SyntheticOrg(
+        workloads=max(size // usage_types, 1),
+        usage_types=usage_types,
+        cost_centers=max(size // 1000, 5),
+        split_rules=3,
+        storage_lens_series=max(size // 100, 1),
+        seed=seed,
+    )
+
+
+class _Latent:
+    """Proxy a stand-in client, waiting ``latency`` seconds before every call."""
+
+    def __init__(self, target: Any, latency: float) -> None:
+        self._target = target
+        self._latency = latency
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            time.sleep(self._latency)
+            result = attr(*args, **kwargs)
+            return _Latent(result, self._latency) if name == "get_paginator" else result
+
+        return call
+
+
+def _run_pipeline(
+    org: SyntheticOrg,
+    measure: Callable[[str, Callable[[], Any]], Any],
+    latency: float = 0.0,
+) -> dict[str, int]:
+    """Run every stage once through ``measure``; return output sizes in bytes."""
+    clear_category_cache()
+    clear_discovery_cache()
+    storage = MemoryStorage()
+
+    def client(service_name: str, **kwargs: Any) -> Any:
+        return _Latent(org.client(service_name, **kwargs), latency)
+
+    with patch("boto3.client", client):
+        collected = measure(
+            "collect", lambda: collect(cost_category_name=COST_CATEGORY_NAME)
+        )
+        processed = measure("process", lambda: process(collected))
+        measure("serialize", lambda: write_outputs(processed, storage))
+        end = datetime.now()
+        measure(
+            "storage-lens",
+            lambda: get_storage_lens_metrics(
+                start_time=end - timedelta(days=7), end_time=end
+            ),
+        )
+
+    return {key: len(body) for key, (body, _) in storage.objects.items()}
+
+
+def _measure_size(size: int, seed: int, repeat: int, latency: float) -> dict[str, Any]:
+    """Best-of-``repeat`` stage timings, traced peaks and output sizes."""
+    timings: dict[str, float] = {}
+    peaks: dict[str, int] = {}
+
+    def timed(stage: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        timings[stage] = min(timings.get(stage, elapsed), elapsed)
+        return result
+
+    def traced(stage: str, fn: Callable[[], Any]) -> Any:
+        tracemalloc.start()
+        try:
+            return fn()
+        finally:
+            peaks[stage] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    for _ in range(repeat):
+        outputs = _run_pipeline(_org(size, seed), timed, latency)
+    _run_pipeline(_org(size, seed), traced)
+    return {"timings": timings, "peaks": peaks, "outputs": outputs}
+
+
+def _slope(points: list[tuple[int, float]]) -> float:
+    """Least-squares slope of log(value) over log(size)."""
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(max(value, 1e-9)) for _, value in points]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    return num / den
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="App x USAGE_TYPE groups per monthly query",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per size; best time counts"
+    )
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0.05,
+        help="simulated seconds per AWS API call",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed log-log slope above 1 before a stage counts as superlinear",
+    )
+    args = parser.parse_args(argv)
+
+    # Warm-up: lazy imports and first-use caches are not part of any size
+    _run_pipeline(_org(min(args.sizes), args.seed), lambda _, fn: fn())
+
+    results: dict[int, dict[str, Any]] = {}
+    for size in args.sizes:
+        results[size] = _measure_size(
+            size, args.seed, max(args.repeat, 1), args.api_latency
+        )
+        res = results[size]
+        print(f"\n{size:,} groups")
+        print(f"  {'stage':<14} {'wall [s]':>10} {'peak [MiB]':>12}")
+        for stage in STAGES:
+            print(
+                f"  {stage:<14} {res['timings'][stage]:>10.3f} "
+                f"{res['peaks'][stage] / 2**20:>12.1f}"
+            )
+        for key, nbytes in sorted(res["outputs"].items()):
+            print(f"  {key:<44} {nbytes / 1024:>10.1f} KiB")
+
+    if len(args.sizes) < 2:
+        return 0
+
+    print(f"\nComplexity (log-log slope, limit {1 + args.tolerance:.2f}):")
+    failed = []
+    for stage in STAGES:
+        slope = _slope([(size, results[size]["timings"][stage]) for size in results])
+        superlinear = slope > 1 + args.tolerance
+        if superlinear:
+            failed.append(stage)
+        print(f"  {stage:<14} {slope:>6.2f}{'  SUPERLINEAR' if superlinear else ''}")
+
+    if failed:
+        print(f"\nFAILED: {', '.join(failed)} grow faster than linearly")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Run the pipeline locally, writing outputs to a directory instead of S3.
+
+Runs the Lambda handler's daily or backfill mode against one of three
+backends for the Cost Explorer / Storage Lens data:
+
+  aws        the AWS account of the current credentials (optionally recorded
+             to a cassette with --record)
+  replay     a cassette recorded earlier, at the time it was recorded
+  synthetic  a seeded synthetic organization (dapanoskop.synthetic)
+
+The handler's stage functions are wrapped so every phase (collect, process,
+storage-lens, write) can be timed (--timings), memory-traced (--tracemalloc)
+and profiled (--profile). Outputs are written through the local storage
+backend (DATA_BUCKET=file://<--out>), so the files are byte-identical to what
+the Lambda writes to S3.
+
+Usage (from lambda/):
+    uv run python -m dapanoskop daily --backend synthetic --timings
+    uv run python -m dapanoskop daily --backend aws --record run.cassette.json.gz
+    uv run python -m dapanoskop daily --backend replay \\
+        --cassette run.cassette.json.gz --profile run.pstats
+    uv run python -m dapanoskop backfill --months 3 --backend synthetic --out out
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import boto3
+
+from dapanoskop import collector
+from dapanoskop import handler as handler_module
+from dapanoskop.cassette import Cassette, record, replay
+from dapanoskop.collector import DEFAULT_RESTATEMENT_DAYS
+from dapanoskop.synthetic import COST_CATEGORY_NAME, SyntheticOrg
+
+logger = logging.getLogger(__name__)
+
+# Handler module attribute → phase it is reported under
+PHASES = {
+    "collect": "collect",
+    "collect_from_export": "collect",
+    "probe_freshness": "collect",
+    "process": "process",
+    "_fetch_storage_lens": "storage-lens",
+    "_fetch_storage_lens_history": "storage-lens",
+    "_update_storage_lens_series": "storage-lens",
+    "write_to_s3": "write",
+    "update_index": "write",
+}
+# Collector attributes of a daily run's per-period tasks (see submit_collect())
+COLLECTOR_PHASES = {
+    "_resolve_cost_categories": "collect",
+    "_collect_period": "collect",
+}
+
+
+@contextmanager
+def _override(target: Any, name: str, value: Any) -> Iterator[None]:
+    """Temporarily replace an attribute of a module."""
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+
+def _frozen_datetime(now: datetime) -> type[datetime]:
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz: Any = None) -> datetime:  # type: ignore[override]
+            return now.astimezone(tz) if tz else now.replace(tzinfo=None)
+
+    return FrozenDatetime
+
+
+class _PhaseStats:
+    """Per-phase call count, wall time and traced memory peak.
+
+    A call made from within a call of the same phase (e.g. collect()'s own
+    category lookup) is counted as part of the outer one only.
+    """
+
+    def __init__(self, trace_memory: bool) -> None:
+        self.trace_memory = trace_memory
+        self.stats: dict[str, dict[str, float]] = {}
+        self._active = threading.local()
+
+    def wrap(self, phase: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            active = self._active.__dict__.setdefault("phases", set())
+            if phase in active:
+                return fn(*args, **kwargs)
+            entry = self.stats.setdefault(
+                phase, {"calls": 0, "seconds": 0.0, "peak_bytes": 0}
+            )
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+            active.add(phase)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                active.discard(phase)
+                entry["seconds"] += time.perf_counter() - start
+                entry["calls"] += 1
+                if self.trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+        return wrapper
+
+    def report(self) -> str:
+        lines = [f"{'phase':<14} {'calls':>6} {'wall [s]':>10} {'peak [MiB]':>12}"]
+        for phase, entry in self.stats.items():
+            peak = f"{entry['peak_bytes'] / 2**20:>12.1f}" if self.trace_memory else ""
+            lines.append(
+                f"{phase:<14} {entry['calls']:>6} {entry['seconds']:>10.3f} {peak}"
+            )
+        return "\n".join(lines)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m dapanoskop", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("mode", choices=["daily", "backfill"])
+    parser.add_argument("--months", type=int, default=13, help="backfill months")
+    parser.add_argument(
+        "--force",
+        nargs="?",
+        const=True,
+        default=False,
+        choices=["auto"],
+        help="backfill: overwrite (auto: only months restated in Cost Explorer)",
+    )
+    parser.add_argument(
+        "--backend", choices=["aws", "replay", "synthetic"], default="aws"
+    )
+    parser.add_argument("--cassette", type=Path, help="cassette to replay")
+    parser.add_argument("--record", type=Path, help="aws: record calls to cassette")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.0,
+        help="replay: simulate recorded latency times this factor",
+    )
+    parser.add_argument("--out", type=Path, default=Path("out"), help="output dir")
+    parser.add_argument("--cost-category", default=None)
+    parser.add_argument("--include-efs", action="store_true")
+    parser.add_argument("--include-ebs", action="store_true")
+    parser.add_argument("--storage-lens-config-id", default="")
+    parser.add_argument("--storage-lens-breakdown", action="store_true")
+    parser.add_argument(
+        "--cost-export-location",
+        default="",
+        help="collect from this CUR 2.0 / FOCUS export data directory",
+    )
+    parser.add_argument(
+        "--cost-export-format", choices=["cur2", "focus"], default="cur2"
+    )
+    parser.add_argument(
+        "--mtd-restatement-days",
+        type=int,
+        default=DEFAULT_RESTATEMENT_DAYS,
+        help="recent days the daily cost cubes re-fetch on each run",
+    )
+    parser.add_argument(
+        "--workload-dimensions",
+        default="",
+        help="dimensions that define a workload, e.g. TAG:Team,LINKED_ACCOUNT",
+    )
+    parser.add_argument(
+        "--cost-filter",
+        default="",
+        help="Cost Explorer filter, e.g. RECORD_TYPE!=Tax,Credit,Refund",
+    )
+
+    synthetic = parser.add_argument_group("synthetic backend")
+    synthetic.add_argument("--workloads", type=int, default=100)
+    synthetic.add_argument("--usage-types", type=int, default=50)
+    synthetic.add_argument("--cost-centers", type=int, default=10)
+    synthetic.add_argument("--split-rules", type=int, default=2)
+    synthetic.add_argument("--seed", type=int, default=0)
+
+    diagnostics = parser.add_argument_group("diagnostics")
+    diagnostics.add_argument(
+        "--profile", type=Path, help="write cProfile stats here, print hot functions"
+    )
+    diagnostics.add_argument("--profile-top", type=int, default=25)
+    diagnostics.add_argument(
+        "--tracemalloc", action="store_true", help="report peak memory per phase"
+    )
+    diagnostics.add_argument(
+        "--timings", action="store_true", help="report wall time per phase"
+    )
+
+    args = parser.parse_args(argv)
+    if args.backend == "replay" and args.cassette is None:
+        parser.error("--backend replay requires --cassette")
+    return args
+
+
+def _backend(args: argparse.Namespace, stack: ExitStack) -> str:
+    """Enter the data backend; return the default cost category name."""
+    if args.backend == "replay":
+        cassette = Cassette.load(args.cassette)
+        frozen = _frozen_datetime(cassette.recorded_at)
+        stack.enter_context(_override(handler_module, "datetime", frozen))
+        stack.enter_context(_override(collector, "datetime", frozen))
+        stack.enter_context(replay(args.cassette, latency_scale=args.latency_scale))
+        return ""
+    if args.backend == "synthetic":
+        org = SyntheticOrg(
+            workloads=args.workloads,
+            usage_types=args.usage_types,
+            cost_centers=args.cost_centers,
+            split_rules=args.split_rules,
+            seed=args.seed,
+        )
+        stack.enter_context(_override(boto3, "client", org.client))
+        return COST_CATEGORY_NAME
+    if args.record is not None:
+        stack.enter_context(record(args.record))
+    return ""
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    phases = _PhaseStats(trace_memory=args.tracemalloc)
+    profiler = cProfile.Profile() if args.profile else None
+
+    with ExitStack() as stack:
+        default_category = _backend(args, stack)
+        cost_category = (
+            default_category if args.cost_category is None else args.cost_category
+        )
+        os.environ.update(
+            {
+                "DATA_BUCKET": f"file://{args.out.resolve()}",
+                "COST_CATEGORY_NAME": cost_category,
+                "INCLUDE_EFS": str(args.include_efs).lower(),
+                "INCLUDE_EBS": str(args.include_ebs).lower(),
+                "STORAGE_LENS_CONFIG_ID": args.storage_lens_config_id,
+                "STORAGE_LENS_BREAKDOWN": str(args.storage_lens_breakdown).lower(),
+                "COST_EXPORT_LOCATION": args.cost_export_location,
+                "COST_EXPORT_FORMAT": args.cost_export_format,
+                "MTD_RESTATEMENT_DAYS": str(args.mtd_restatement_days),
+                "WORKLOAD_DIMENSIONS": args.workload_dimensions,
+                "COST_FILTER": args.cost_filter,
+            }
+        )
+        for name, phase in PHASES.items():
+            fn = phases.wrap(phase, getattr(handler_module, name))
+            stack.enter_context(_override(handler_module, name, fn))
+        for name, phase in COLLECTOR_PHASES.items():
+            fn = phases.wrap(phase, getattr(collector, name))
+            stack.enter_context(_override(collector, name, fn))
+
+        event: dict[str, Any] = {}
+        if args.mode == "backfill":
+            event = {"backfill": True, "months": args.months, "force": args.force}
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with profiler or nullcontext():
+            result = handler_module.handler(event, None)
+        elapsed = time.perf_counter() - start
+        if args.tracemalloc:
+            tracemalloc.stop()
+
+    print(f"\n{result['statusCode']} {result['body']}")
+    print(f"Outputs written to {args.out} in {elapsed:.2f}s")
+    if args.timings or args.tracemalloc:
+        print(f"\n{phases.report()}")
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile}")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(
+            args.profile_top
+        )
+    return 0 if result["statusCode"] == 200 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
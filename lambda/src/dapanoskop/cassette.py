@@ -0,0 +1,275 @@
+"""Record and replay the pipeline's AWS API calls.
+
+Hooks into botocore's event system on the boto3 default session, so every
+client the pipeline creates with ``boto3.client(...)`` inside a ``record()`` or
+``replay()`` block is covered without changes to the calling code. Only Cost
+Explorer, S3 Control, CloudWatch and STS calls are captured; S3 reads and
+writes of the output bucket are left alone.
+
+A cassette is a gzip-compressed JSON file holding the recording time and the
+ordered request/response interactions. 12-digit account IDs are replaced with
+salted placeholders while recording (the salt is not stored, so the mapping
+cannot be reversed), keeping distinct accounts distinct.
+
+Replay serves responses by (service, operation, request parameters), in
+recorded order for repeated identical requests, and raises CassetteMissError
+for requests that were never recorded. Because the pipeline derives its query
+periods from the current date, replay runs should pass the cassette's
+``recorded_at`` as ``now`` to ``collect()``.
+
+Usage:
+    with record("run.cassette.json.gz"):
+        collected = collect(cost_category_name="CostCenter")
+
+    with replay("run.cassette.json.gz") as cassette:
+        collected = collect(cost_category_name="CostCenter", now=cassette.recorded_at)
+"""
+
+from __future__ import annotations
+
+import base64
+import copy
+import gzip
+import hashlib
+import json
+import logging
+import re
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+logger = logging.getLogger(__name__)
+
+SERVICES = frozenset({"ce", "s3control", "cloudwatch", "sts"})
+CASSETTE_VERSION = 1
+
+_ACCOUNT_ID = re.compile(r"(?<![\d.])\d{12}(?![\d.])")
+# Placeholders start with four zeros; such IDs are treated as already redacted
+_PLACEHOLDER_PREFIX = "0000"
+_HANDLER_ID = "dapanoskop-cassette"
+
+
+class CassetteMissError(LookupError):
+    """Raised on replay when a request has no recorded response."""
+
+
+def _redact(value: Any, salt: bytes) -> Any:
+    """Replace 12-digit account IDs in all strings of a nested structure."""
+
+    def placeholder(match: re.Match[str]) -> str:
+        account_id = match.group(0)
+        if account_id.startswith(_PLACEHOLDER_PREFIX):
+            return account_id
+        digest = hashlib.sha256(salt + account_id.encode()).hexdigest()
+        return f"{_PLACEHOLDER_PREFIX}{int(digest, 16) % 10**8:08d}"
+
+    if isinstance(value, str):
+        return _ACCOUNT_ID.sub(placeholder, value)
+    if isinstance(value, dict):
+        return {_redact(k, salt): _redact(v, salt) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(v, salt) for v in value]
+    return value
+
+
+def _encode(value: Any) -> Any:
+    """Convert a botocore structure to JSON-compatible types."""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """Inverse of _encode."""
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _request_key(service: str, operation: str, params: dict[str, Any]) -> str:
+    return json.dumps([service, operation, _encode(params)], sort_keys=True)
+
+
+class Cassette:
+    """Interactions of one recording, plus when it was made."""
+
+    def __init__(
+        self,
+        interactions: list[dict[str, Any]] | None = None,
+        recorded_at: datetime | None = None,
+    ) -> None:
+        self.interactions = interactions if interactions is not None else []
+        self.recorded_at = recorded_at or datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Cassette:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+        return cls(
+            interactions=data["interactions"],
+            recorded_at=datetime.fromisoformat(data["recorded_at"]),
+        )
+
+    def save(self, path: str | Path) -> None:
+        payload = {
+            "version": CASSETTE_VERSION,
+            "recorded_at": self.recorded_at.isoformat(),
+            "interactions": self.interactions,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+
+
+def _service(model: Any) -> str:
+    return model.service_model.service_name
+
+
+@contextmanager
+def record(path: str | Path) -> Iterator[Cassette]:
+    """Record AWS calls made inside the block and save them to ``path``.
+
+    The cassette is written on exit, also when the block raises, so a failed
+    production run can be reproduced offline.
+    """
+    cassette = Cassette()
+    salt = secrets.token_bytes(16)
+    events = boto3._get_default_session().events
+
+    def before_parameter_build(
+        params: dict[str, Any], model: Any, context: dict[str, Any], **kwargs: Any
+    ) -> None:
+        if _service(model) in SERVICES:
+            context["dapanoskop_params"] = copy.deepcopy(params)
+
+    def before_call(model: Any, context: dict[str, Any], **kwargs: Any) -> None:
+        if _service(model) in SERVICES:
+            context["dapanoskop_started"] = time.perf_counter()
+
+    def after_call(
+        http_response: Any,
+        parsed: dict[str, Any],
+        model: Any,
+        context: dict[str, Any],
+        **kwargs: Any,
+    ) -> None:
+        service = _service(model)
+        if service not in SERVICES:
+            return
+        response = {k: v for k, v in parsed.items() if k != "ResponseMetadata"}
+        cassette.interactions.append(
+            {
+                "service": service,
+                "operation": model.name,
+                "params": _encode(_redact(context["dapanoskop_params"], salt)),
+                "status": http_response.status_code,
+                "response": _encode(_redact(response, salt)),
+                "duration": round(
+                    time.perf_counter() - context["dapanoskop_started"], 6
+                ),
+            }
+        )
+
+    handlers = [
+        ("before-parameter-build", before_parameter_build),
+        ("before-call", before_call),
+        ("after-call", after_call),
+    ]
+    for event, handler in handlers:
+        events.register(event, handler, unique_id=f"{_HANDLER_ID}-{event}")
+    try:
+        yield cassette
+    finally:
+        for event, _ in handlers:
+            events.unregister(event, unique_id=f"{_HANDLER_ID}-{event}")
+        cassette.save(path)
+        logger.info(
+            "Recorded %d AWS calls to %s", len(cassette.interactions), str(path)
+        )
+
+
+@contextmanager
+def replay(path: str | Path, latency_scale: float = 0.0) -> Iterator[Cassette]:
+    """Serve AWS calls made inside the block from the cassette at ``path``.
+
+    Args:
+        path: Cassette file written by record()
+        latency_scale: Sleep for the recorded call duration times this factor
+            before each response (0 = no simulated latency, 1 = as recorded)
+    """
+    cassette = Cassette.load(path)
+    queues: dict[str, deque[dict[str, Any]]] = {}
+    for interaction in cassette.interactions:
+        key = _request_key(
+            interaction["service"],
+            interaction["operation"],
+            _decode(interaction["params"]),
+        )
+        queues.setdefault(key, deque()).append(interaction)
+    events = boto3._get_default_session().events
+
+    def before_parameter_build(
+        params: dict[str, Any], model: Any, context: dict[str, Any], **kwargs: Any
+    ) -> None:
+        if _service(model) in SERVICES:
+            context["dapanoskop_params"] = copy.deepcopy(params)
+
+    def before_call(
+        model: Any, context: dict[str, Any], **kwargs: Any
+    ) -> tuple[AWSResponse, dict[str, Any]] | None:
+        service = _service(model)
+        if service not in SERVICES:
+            return None
+        key = _request_key(service, model.name, context["dapanoskop_params"])
+        queue = queues.get(key)
+        if not queue:
+            raise CassetteMissError(
+                f"No recorded response for {service}.{model.name} with "
+                f"{context['dapanoskop_params']!r}"
+            )
+        # Repeated identical requests get their responses in recorded order;
+        # the last one keeps being served once the others are used up.
+        interaction = queue.popleft() if len(queue) > 1 else queue[0]
+        if latency_scale > 0:
+            time.sleep(interaction["duration"] * latency_scale)
+        parsed = _decode(interaction["response"])
+        parsed["ResponseMetadata"] = {
+            "RequestId": "replayed",
+            "HTTPStatusCode": interaction["status"],
+            "HTTPHeaders": {},
+            "RetryAttempts": 0,
+        }
+        http = AWSResponse(f"replay://{service}", interaction["status"], {}, None)
+        return http, parsed
+
+    handlers = [
+        ("before-parameter-build", before_parameter_build),
+        ("before-call", before_call),
+    ]
+    for event, handler in handlers:
+        events.register(event, handler, unique_id=f"{_HANDLER_ID}-{event}")
+    try:
+        yield cassette
+    finally:
+        for event, _ in handlers:
+            events.unregister(event, unique_id=f"{_HANDLER_ID}-{event}")
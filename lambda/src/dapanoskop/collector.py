@@ -1,17 +1,66 @@
-"""Cost Explorer API data collection."""
+"""Cost Explorer API data collection.
+
+Cost Category definitions change rarely, so what collect() resolves from them
+(the auto-discovered category name, the split charge rules and the
+workload -> cost center mappings of closed periods) is cached at module level
+for CATEGORY_CACHE_TTL_SECONDS and reused by warm Lambda invocations. After the
+TTL an entry is revalidated with one list_cost_category_definitions call: it is
+kept while the definition's EffectiveStart is unchanged and dropped otherwise.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable, Iterable
 
 import boto3
 
-logger = logging.getLogger(__name__)
+from dapanoskop.processor import workload_name
+from dapanoskop.storage import Storage
 
+logger = logging.getLogger(__name__)
 
-def _month_range(year: int, month: int) -> tuple[str, str]:
+# Daily App x USAGE_TYPE rows per month (incremental MTD, cost-by-day.parquet)
+DAILY_CUBE_PREFIX = "cost-cube/"
+# Recent days a daily cube re-fetches, because CE still revises them
+DEFAULT_RESTATEMENT_DAYS = 3
+
+# Workload grouping: GroupBy definitions whose values name a workload
+DEFAULT_GROUP_BY = [{"Type": "TAG", "Key": "App"}]
+WORKLOAD_DIMENSIONS = ("SERVICE", "LINKED_ACCOUNT", "REGION")
+# GetCostAndUsage accepts at most two GroupBy definitions per query
+_MAX_GROUP_BY = 2
+# Concurrent GetCostAndUsage queries of one planned cube
+_MAX_CONCURRENT_QUERIES = 4
+# Dimensions a cost filter can include or exclude (see parse_cost_filter())
+FILTER_DIMENSIONS = ("RECORD_TYPE", "LINKED_ACCOUNT", "REGION", "SERVICE")
+
+CATEGORY_CACHE_TTL_SECONDS = 3600
+
+# discovery period (start, end) -> {"name", "expires_at"}
+_CATEGORY_NAMES: dict[tuple[str, str], dict[str, Any]] = {}
+# category name -> {"arn", "effective_start", "versions", "mappings",
+# "expires_at"}; versions are the fetched definition versions, each
+# {"start", "end" (None while current), "split_charge"}
+_CATEGORY_CACHE: dict[str, dict[str, Any]] = {}
+# Guards both caches; daily runs look up categories from several threads
+_CATEGORY_LOCK = threading.RLock()
+
+
+def clear_category_cache() -> None:
+    """Forget all cached Cost Category names, definitions and mappings."""
+    with _CATEGORY_LOCK:
+        _CATEGORY_NAMES.clear()
+        _CATEGORY_CACHE.clear()
+
+
+def month_range(year: int, month: int) -> tuple[str, str]:
     """Return (start, end) date strings for a month (CE API uses exclusive end)."""
     start = f"{year:04d}-{month:02d}-01"
     # CE end date is exclusive — first day of next month
@@ -61,7 +110,7 @@ def _get_prior_partial_period(
     return prior_month_start.isoformat(), prior_partial_end.isoformat()
 
 
-def _get_periods(
+def get_periods(
     now: datetime,
     target_year: int | None = None,
     target_month: int | None = None,
@@ -87,15 +136,15 @@ def _get_periods(
         cur_year = target_year
         cur_month = target_month
 
-        current_start, current_end = _month_range(cur_year, cur_month)
+        current_start, current_end = month_range(cur_year, cur_month)
 
         # Previous month relative to target
         pm_month = cur_month - 1 if cur_month > 1 else 12
         pm_year = cur_year if cur_month > 1 else cur_year - 1
-        pm_start, pm_end = _month_range(pm_year, pm_month)
+        pm_start, pm_end = month_range(pm_year, pm_month)
 
         # Year-over-year
-        yoy_start, yoy_end = _month_range(cur_year - 1, cur_month)
+        yoy_start, yoy_end = month_range(cur_year - 1, cur_month)
 
         return {
             "current": (current_start, current_end),
@@ -112,15 +161,15 @@ def _get_periods(
     # Most recently completed calendar month
     prev_year = year if month > 1 else year - 1
     prev_month = month - 1 if month > 1 else 12
-    prev_complete_start, prev_complete_end = _month_range(prev_year, prev_month)
+    prev_complete_start, prev_complete_end = month_range(prev_year, prev_month)
 
     # Month before the most recently completed month (for prev_month comparison)
     pm2_month = prev_month - 1 if prev_month > 1 else 12
     pm2_year = prev_year if prev_month > 1 else prev_year - 1
-    pm2_start, pm2_end = _month_range(pm2_year, pm2_month)
+    pm2_start, pm2_end = month_range(pm2_year, pm2_month)
 
     # Year-over-year for the prev_complete month
-    yoy_pc_start, yoy_pc_end = _month_range(prev_year - 1, prev_month)
+    yoy_pc_start, yoy_pc_end = month_range(prev_year - 1, prev_month)
 
     # On the 1st of the month, mtd_start == mtd_end (zero-width window).
     # Skip the MTD period entirely and only produce prev_complete.
@@ -132,7 +181,7 @@ def _get_periods(
         }
 
     # Year-over-year (same month last year) — based on current in-progress month
-    yoy_start, yoy_end = _month_range(year - 1, month)
+    yoy_start, yoy_end = month_range(year - 1, month)
 
     # Prior partial period for like-for-like MTD comparison
     prior_partial_start, prior_partial_end = _get_prior_partial_period(
@@ -149,7 +198,7 @@ def _get_periods(
     }
 
 
-def _period_label(start: str) -> str:
+def period_label(start: str) -> str:
     """Extract YYYY-MM label from a start date string."""
     return start[:7]
 
@@ -158,12 +207,14 @@ def get_cost_forecast(
     ce_client: Any,
     start: str,
     end: str,
+    cost_filter: dict[str, Any] | None = None,
 ) -> float | None:
     """Call GetCostForecast to get the full month-end cost projection.
 
     Args:
         start: Start date string "YYYY-MM-DD" (today — CE requires start >= today).
         end: Exclusive end date string "YYYY-MM-DD" (first day of next month).
+        cost_filter: Forecast only the costs this filter selects
 
     Returns:
         Forecasted total month-end cost as a float, or None on failure.
@@ -175,6 +226,7 @@ def get_cost_forecast(
             TimePeriod={"Start": start, "End": end},
             Metric="NET_AMORTIZED_COST",
             Granularity="MONTHLY",
+            **({"Filter": cost_filter} if cost_filter else {}),
         )
         return float(response["Total"]["Amount"])
     except Exception:
@@ -182,58 +234,519 @@ def get_cost_forecast(
         return None
 
 
-def get_cost_and_usage(
+def parse_group_by(spec: str) -> list[dict[str, str]]:
+    """Parse a workload dimension list into CE GroupBy definitions.
+
+    spec is comma-separated, each entry "TAG:<key>" or one of
+    WORKLOAD_DIMENSIONS, e.g. "TAG:Team,LINKED_ACCOUNT". An empty spec is
+    DEFAULT_GROUP_BY (the App tag).
+
+    Raises:
+        ValueError: On an unknown or repeated dimension.
+    """
+    group_by: list[dict[str, str]] = []
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        tag_key = entry.removeprefix("TAG:")
+        if tag_key != entry and tag_key:
+            definition = {"Type": "TAG", "Key": tag_key}
+        elif entry in WORKLOAD_DIMENSIONS:
+            definition = {"Type": "DIMENSION", "Key": entry}
+        else:
+            raise ValueError(f"Unsupported workload dimension: {entry!r}")
+        if definition in group_by:
+            raise ValueError(f"Repeated workload dimension: {entry!r}")
+        group_by.append(definition)
+    return group_by or [dict(d) for d in DEFAULT_GROUP_BY]
+
+
+def parse_cost_filter(spec: str) -> dict[str, Any] | None:
+    """Parse a cost filter spec into a CE filter expression.
+
+    spec is semicolon-separated, each clause "<dimension>=<values>" to include
+    or "<dimension>!=<values>" to exclude the comma-separated values of one of
+    FILTER_DIMENSIONS, e.g. "RECORD_TYPE!=Tax,Credit,Refund;REGION=eu-west-1".
+    Clauses are combined with And. An empty spec is None (no filter).
+
+    Raises:
+        ValueError: On a malformed clause or an unknown or repeated dimension.
+    """
+    expressions: list[dict[str, Any]] = []
+    keys: list[str] = []
+    for clause in filter(None, (c.strip() for c in spec.split(";"))):
+        key, sep, values = clause.partition("=")
+        exclude = key.endswith("!")
+        key = key.removesuffix("!").strip()
+        value_list = [v.strip() for v in values.split(",") if v.strip()]
+        if not sep or not value_list:
+            raise ValueError(f"Malformed cost filter clause: {clause!r}")
+        if key not in FILTER_DIMENSIONS:
+            raise ValueError(f"Unsupported cost filter dimension: {key!r}")
+        if key in keys:
+            raise ValueError(f"Repeated cost filter dimension: {key!r}")
+        keys.append(key)
+        expression: dict[str, Any] = {"Dimensions": {"Key": key, "Values": value_list}}
+        expressions.append({"Not": expression} if exclude else expression)
+    return _and_filter(*expressions)
+
+
+def _and_filter(*expressions: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Combine filter expressions with And (None if there are none)."""
+    terms: list[dict[str, Any]] = []
+    for expression in expressions:
+        if expression:
+            terms.extend(expression["And"] if "And" in expression else [expression])
+    if len(terms) <= 1:
+        return terms[0] if terms else None
+    return {"And": terms}
+
+
+def plan_queries(value_counts: list[int]) -> tuple[list[int], list[int]]:
+    """Plan the queries of a cube over len(value_counts) dimensions.
+
+    The two dimensions with the most values are grouped by, and the others
+    are filtered on, one query per combination of their values. That is the
+    fewest two-GroupBy queries that cover the cube exactly.
+
+    Returns:
+        (grouped, filtered) dimension indices, each in dimension order.
+    """
+    ranked = sorted(range(len(value_counts)), key=lambda i: -value_counts[i])
+    return sorted(ranked[:_MAX_GROUP_BY]), sorted(ranked[_MAX_GROUP_BY:])
+
+
+def _dimension_values(
     ce_client: Any,
+    definition: dict[str, str],
     start: str,
     end: str,
-) -> list[dict[str, Any]]:
-    """Query GetCostAndUsage with pagination, grouped by App tag + USAGE_TYPE."""
-    results: list[dict[str, Any]] = []
-    kwargs: dict[str, Any] = {
-        "TimePeriod": {"Start": start, "End": end},
-        "Granularity": "MONTHLY",
-        "Metrics": ["NetAmortizedCost", "UsageQuantity"],
-        "GroupBy": [
-            {"Type": "TAG", "Key": "App"},
-            {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
-        ],
-    }
+    cost_filter: dict[str, Any] | None = None,
+) -> list[str]:
+    """List a GroupBy definition's values in [start, end) (paginated).
 
+    Tag and cost category values include "" for resources without one, once
+    even if CE lists it too. With cost_filter, only values of the costs it
+    selects are listed.
+    """
+    period = {"Start": start, "End": end}
+    kind, key = definition["Type"], definition["Key"]
+    if kind == "DIMENSION":
+        kwargs: dict[str, Any] = {"TimePeriod": period, "Dimension": key}
+        method, field = ce_client.get_dimension_values, "DimensionValues"
+    elif kind == "TAG":
+        kwargs = {"TimePeriod": period, "TagKey": key}
+        method, field = ce_client.get_tags, "Tags"
+    else:
+        kwargs = {"TimePeriod": period, "CostCategoryName": key}
+        method, field = ce_client.get_cost_categories, "CostCategoryValues"
+    if cost_filter:
+        kwargs["Filter"] = cost_filter
+
+    values: list[str] = [] if kind == "DIMENSION" else [""]
     while True:
-        response = ce_client.get_cost_and_usage(**kwargs)
-        for result_by_time in response.get("ResultsByTime", []):
-            for group in result_by_time.get("Groups", []):
-                results.append(group)
+        response = method(**kwargs)
+        for value in response.get(field, []):
+            values.append(value["Value"] if kind == "DIMENSION" else value)
         token = response.get("NextPageToken")
         if not token:
             break
         kwargs["NextPageToken"] = token
+    return list(dict.fromkeys(values))
+
 
+def _value_filter(definition: dict[str, str], value: str) -> dict[str, Any]:
+    """Return the CE filter expression selecting one value of a definition."""
+    kind, key = definition["Type"], definition["Key"]
+    if kind == "DIMENSION":
+        return {"Dimensions": {"Key": key, "Values": [value]}}
+    field = "Tags" if kind == "TAG" else "CostCategories"
+    if not value:
+        return {field: {"Key": key, "MatchOptions": ["ABSENT"]}}
+    return {field: {"Key": key, "Values": [value]}}
+
+
+def _query(ce_client: Any, kwargs: dict[str, Any]) -> list[dict[str, Any]]:
+    """Run one paginated GetCostAndUsage query; return its ResultsByTime."""
+    kwargs = dict(kwargs)
+    results: list[dict[str, Any]] = []
+    while True:
+        response = ce_client.get_cost_and_usage(**kwargs)
+        results.extend(response.get("ResultsByTime", []))
+        token = response.get("NextPageToken")
+        if not token:
+            break
+        kwargs["NextPageToken"] = token
     return results
 
 
+def query_cube(
+    ce_client: Any,
+    start: str,
+    end: str,
+    group_by: list[dict[str, str]],
+    metrics: list[str],
+    granularity: str = "MONTHLY",
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Query GetCostAndUsage grouped by any number of GroupBy definitions.
+
+    Up to two definitions are one query. For more, the values of every
+    definition are listed and the cube is split per plan_queries(); the
+    planned queries run concurrently. Each group's Keys are then extended
+    to all definitions in order, filtered ones in the form CE returns them
+    ("Key$value" for tags and cost categories). cost_filter (see
+    parse_cost_filter()) is applied to every query.
+
+    Returns:
+        Groups per time period start: {"YYYY-MM-DD": groups}.
+    """
+    base: dict[str, Any] = {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": granularity,
+        "Metrics": metrics,
+    }
+    if cost_filter:
+        base["Filter"] = cost_filter
+    if len(group_by) <= _MAX_GROUP_BY:
+        plans = [({**base, "GroupBy": group_by}, {})]
+    else:
+        values = [
+            _dimension_values(ce_client, d, start, end, cost_filter) for d in group_by
+        ]
+        grouped, filtered = plan_queries([len(v) for v in values])
+        combinations: list[dict[int, str]] = [{}]
+        for i in filtered:
+            combinations = [{**c, i: v} for c in combinations for v in values[i]]
+        plans = []
+        for combination in combinations:
+            expressions = [
+                _value_filter(group_by[i], v) for i, v in combination.items()
+            ]
+            plans.append(
+                (
+                    {
+                        **base,
+                        "GroupBy": [group_by[i] for i in grouped],
+                        "Filter": _and_filter(cost_filter, *expressions),
+                    },
+                    {
+                        i: v
+                        if group_by[i]["Type"] == "DIMENSION"
+                        else f"{group_by[i]['Key']}${v}"
+                        for i, v in combination.items()
+                    },
+                )
+            )
+        logger.info(
+            "Cube %s: %d queries grouped by %s",
+            [d["Key"] for d in group_by],
+            len(plans),
+            [group_by[i]["Key"] for i in grouped],
+        )
+
+    if len(plans) <= 1:
+        results = [_query(ce_client, plan[0]) for plan in plans]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(len(plans), _MAX_CONCURRENT_QUERIES)
+        ) as pool:
+            results = list(pool.map(lambda plan: _query(ce_client, plan[0]), plans))
+
+    cube: dict[str, list[dict[str, Any]]] = {}
+    for (_kwargs, fixed), results_by_time in zip(plans, results):
+        for result_by_time in results_by_time:
+            period_start = result_by_time.get("TimePeriod", {}).get("Start", start)
+            groups = cube.setdefault(period_start, [])
+            for group in result_by_time.get("Groups", []):
+                if fixed:
+                    keys = iter(group.get("Keys", []))
+                    group = {
+                        **group,
+                        "Keys": [
+                            fixed[i] if i in fixed else next(keys, "")
+                            for i in range(len(group_by))
+                        ],
+                    }
+                groups.append(group)
+    return cube
+
+
+def _workload_groups(
+    groups: list[dict[str, Any]], group_by: list[dict[str, str]] | None
+) -> list[dict[str, Any]]:
+    """Reduce cube groups to [workload key, last key] groups.
+
+    With one workload definition its key is kept as returned by CE. Several
+    are joined into one workload name, "Untagged" standing in for empty
+    values, and keyed like a tag by the joined definition keys, e.g.
+    "Team/LINKED_ACCOUNT$web / 111", so workload_name() returns it whole.
+    """
+    if group_by is None or len(group_by) == 1:
+        return groups
+    prefix = "/".join(definition["Key"] for definition in group_by)
+    return [
+        {
+            **group,
+            "Keys": [
+                prefix
+                + "$"
+                + " / ".join(
+                    (
+                        key
+                        if definition["Type"] == "DIMENSION"
+                        else key.partition("$")[2]
+                    )
+                    or "Untagged"
+                    for definition, key in zip(group_by, group["Keys"][:-1])
+                ),
+                group["Keys"][-1],
+            ],
+        }
+        for group in groups
+    ]
+
+
+def get_cost_and_usage(
+    ce_client: Any,
+    start: str,
+    end: str,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Query GetCostAndUsage with pagination, grouped by workload + USAGE_TYPE.
+
+    Workloads are App tag values, or with group_by the values of those
+    GroupBy definitions (see parse_group_by() and query_cube()). cost_filter
+    restricts the query server-side (see parse_cost_filter()).
+    """
+    cube = query_cube(
+        ce_client,
+        start,
+        end,
+        [*(group_by or DEFAULT_GROUP_BY), {"Type": "DIMENSION", "Key": "USAGE_TYPE"}],
+        ["NetAmortizedCost", "UsageQuantity"],
+        cost_filter=cost_filter,
+    )
+    return _workload_groups(
+        [group for groups in cube.values() for group in groups], group_by
+    )
+
+
+def get_daily_cost_and_usage(
+    ce_client: Any,
+    start: str,
+    end: str,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Like get_cost_and_usage() with DAILY granularity: {"YYYY-MM-DD": groups}."""
+    cube = query_cube(
+        ce_client,
+        start,
+        end,
+        [*(group_by or DEFAULT_GROUP_BY), {"Type": "DIMENSION", "Key": "USAGE_TYPE"}],
+        ["NetAmortizedCost", "UsageQuantity"],
+        granularity="DAILY",
+        cost_filter=cost_filter,
+    )
+    return {day: _workload_groups(groups, group_by) for day, groups in cube.items()}
+
+
+def _metric(group: dict[str, Any], name: str) -> float:
+    return float(group.get("Metrics", {}).get(name, {}).get("Amount", 0))
+
+
+def update_daily_cube(
+    ce_client: Any,
+    storage: Storage,
+    start: str,
+    end: str,
+    restatement_days: int,
+    today: date,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, list[list[Any]]]:
+    """Bring the daily cube of the month starting at start up to end.
+
+    The cube (cost-cube/YYYY-MM.json) holds the month's
+    [workload key, usage type, cost, quantity] rows per day. Only the days not
+    yet in the cube and the restatement_days days before them (which CE may
+    still have revised) are queried, with DAILY granularity, and replace
+    those days in the cube. Once a completed month was last fetched
+    restatement_days after its end, it is settled and no longer queried.
+    A cube built with other workload dimensions (group_by) or another
+    cost_filter is rebuilt.
+
+    Returns {"YYYY-MM-DD": rows} for the days in [start, end).
+    """
+    key = f"{DAILY_CUBE_PREFIX}{start[:7]}.json"
+    body = storage.get(key)
+    cube = json.loads(body) if body is not None else {}
+    days: dict[str, list[list[Any]]] = {}
+    covered, fetched_on = start, ""
+    group_by = group_by or DEFAULT_GROUP_BY
+    if (
+        cube.get("start") == start
+        and cube.get("group_by", DEFAULT_GROUP_BY) == group_by
+        and cube.get("cost_filter") == cost_filter
+    ):
+        days, covered, fetched_on = cube["days"], cube["end"], cube["fetched_on"]
+
+    settled_on = date.fromisoformat(end) + timedelta(days=restatement_days)
+    restate_from = date.fromisoformat(min(covered, end)) - timedelta(
+        days=restatement_days
+    )
+    fetch_start = max(start, restate_from.isoformat())
+    if not (covered >= end and fetched_on >= settled_on.isoformat()):
+        fetched = get_daily_cost_and_usage(
+            ce_client, fetch_start, end, group_by, cost_filter
+        )
+        days = {day: rows for day, rows in days.items() if day < fetch_start}
+        for day, groups in fetched.items():
+            days[day] = [
+                [
+                    *g["Keys"],
+                    _metric(g, "NetAmortizedCost"),
+                    _metric(g, "UsageQuantity"),
+                ]
+                for g in groups
+            ]
+        logger.info("Daily cube %s: fetched %s to %s", start[:7], fetch_start, end)
+        cube = {
+            "start": start,
+            "end": max(covered, end),
+            "fetched_on": today.isoformat(),
+            "group_by": group_by,
+            "cost_filter": cost_filter,
+            "days": days,
+        }
+        storage.put(key, json.dumps(cube).encode(), content_type="application/json")
+
+    return {day: rows for day, rows in sorted(days.items()) if day < end}
+
+
+def sum_daily_cube(days: dict[str, list[list[Any]]]) -> list[dict[str, Any]]:
+    """Sum daily cube rows into groups shaped like get_cost_and_usage()."""
+    sums: dict[tuple[str, str], list[float]] = {}
+    for rows in days.values():
+        for app, usage_type, cost, quantity in rows:
+            entry = sums.setdefault((app, usage_type), [0.0, 0.0])
+            entry[0] += cost
+            entry[1] += quantity
+    return [
+        {
+            "Keys": [app, usage_type],
+            "Metrics": {
+                "NetAmortizedCost": {"Amount": str(cost), "Unit": "USD"},
+                "UsageQuantity": {"Amount": str(quantity), "Unit": "N/A"},
+            },
+        }
+        for (app, usage_type), (cost, quantity) in sorted(sums.items())
+    ]
+
+
+def _category_entry(ce_client: Any, category_name: str) -> dict[str, Any] | None:
+    """Return the cache entry for a Cost Category definition.
+
+    Within the TTL the entry is returned without any API call. Afterwards the
+    definition is looked up with list_cost_category_definitions (paginated);
+    the cached definition versions and mappings survive only if its ARN and
+    EffectiveStart are unchanged. Errors propagate to the caller. Thread-safe:
+    concurrent callers wait for one lookup.
+
+    Returns:
+        The entry, or None if no definition has this name.
+    """
+    with _CATEGORY_LOCK:
+        return _category_entry_locked(ce_client, category_name)
+
+
+def _category_entry_locked(ce_client: Any, category_name: str) -> dict[str, Any] | None:
+    entry = _CATEGORY_CACHE.get(category_name)
+    if entry is not None and entry["expires_at"] > time.monotonic():
+        return entry
+
+    reference = None
+    list_kwargs: dict[str, Any] = {}
+    while reference is None:
+        resp = ce_client.list_cost_category_definitions(**list_kwargs)
+        for defn in resp.get("CostCategoryReferences", []):
+            if defn.get("Name") == category_name:
+                reference = defn
+                break
+        token = resp.get("NextToken")
+        if not token:
+            break
+        list_kwargs["NextToken"] = token
+
+    if reference is None:
+        _CATEGORY_CACHE.pop(category_name, None)
+        return None
+
+    version = (reference["CostCategoryArn"], reference.get("EffectiveStart", ""))
+    if entry is None or (entry["arn"], entry["effective_start"]) != version:
+        entry = {
+            "arn": version[0],
+            "effective_start": version[1],
+            "versions": [],
+            "mappings": {},
+        }
+        _CATEGORY_CACHE[category_name] = entry
+    entry["expires_at"] = time.monotonic() + CATEGORY_CACHE_TTL_SECONDS
+    return entry
+
+
 def get_cost_categories(
     ce_client: Any,
     category_name: str,
     start: str,
     end: str,
+    closed: bool = False,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
 ) -> tuple[str, dict[str, str]]:
     """Get Cost Category mapping: workload -> cost center name.
 
     If category_name is empty, auto-discovers the first category returned by the API.
     Returns a tuple of (resolved_category_name, mapping) where mapping is a dict
-    mapping App tag values to cost center names. When no categories are found,
-    returns ("", {}).
+    mapping App tag values (or the workloads of group_by, as named by
+    get_cost_and_usage()) to cost center names, from the costs cost_filter
+    selects. When no categories are found, returns ("", {}).
+
+    Discovered names are cached per period. Set closed for periods that ended
+    before the current month: their mapping no longer changes and is cached
+    with the category definition (see _category_entry()).
     """
     if not category_name:
-        # Discover the first cost category
-        resp = ce_client.get_cost_categories(
-            TimePeriod={"Start": start, "End": end},
-        )
-        names = resp.get("CostCategoryNames", [])
-        if not names:
-            return "", {}
-        category_name = names[0]
+        with _CATEGORY_LOCK:
+            cached = _CATEGORY_NAMES.get((start, end))
+            if cached is not None and cached["expires_at"] > time.monotonic():
+                category_name = cached["name"]
+            else:
+                # Discover the first cost category
+                resp = ce_client.get_cost_categories(
+                    TimePeriod={"Start": start, "End": end},
+                )
+                names = resp.get("CostCategoryNames", [])
+                if not names:
+                    return "", {}
+                category_name = names[0]
+                _CATEGORY_NAMES[(start, end)] = {
+                    "name": category_name,
+                    "expires_at": time.monotonic() + CATEGORY_CACHE_TTL_SECONDS,
+                }
+
+    entry = None
+    if closed:
+        try:
+            entry = _category_entry(ce_client, category_name)
+        except Exception:
+            logger.warning("Failed to list cost category definitions", exc_info=True)
+    mapping_key = (start, end, json.dumps([group_by, cost_filter], sort_keys=True))
+    if entry is not None:
+        with _CATEGORY_LOCK:
+            cached_mapping = entry["mappings"].get(mapping_key)
+        if cached_mapping is not None:
+            return category_name, dict(cached_mapping)
 
     # Get the values (cost center names) for this category
     resp = ce_client.get_cost_categories(
@@ -243,42 +756,111 @@ def get_cost_categories(
     # The CE API doesn't directly return the rule mapping; we use the category
     # in a GetCostAndUsage query with GroupBy COST_CATEGORY to get the mapping.
     mapping: dict[str, str] = {}
-
-    kwargs: dict[str, Any] = {
-        "TimePeriod": {"Start": start, "End": end},
-        "Granularity": "MONTHLY",
-        "Metrics": ["NetAmortizedCost"],
-        "GroupBy": [
-            {"Type": "TAG", "Key": "App"},
+    cube = query_cube(
+        ce_client,
+        start,
+        end,
+        [
+            *(group_by or DEFAULT_GROUP_BY),
             {"Type": "COST_CATEGORY", "Key": category_name},
         ],
-    }
+        ["NetAmortizedCost"],
+        cost_filter=cost_filter,
+    )
+    for groups in cube.values():
+        for group in _workload_groups(groups, group_by):
+            keys = group.get("Keys", [])
+            if len(keys) == 2:
+                cost_center = keys[1].removeprefix(f"{category_name}$")
+                if cost_center:
+                    workload_key = workload_name(keys[0])
+                    mapping[workload_key] = cost_center
+
+    if entry is not None:
+        with _CATEGORY_LOCK:
+            entry["mappings"][mapping_key] = dict(mapping)
+    return category_name, mapping
 
-    while True:
-        response = ce_client.get_cost_and_usage(**kwargs)
-        for result_by_time in response.get("ResultsByTime", []):
-            for group in result_by_time.get("Groups", []):
-                keys = group.get("Keys", [])
-                if len(keys) == 2:
-                    app_tag = keys[0].removeprefix("App$")
-                    cost_center = keys[1].removeprefix(f"{category_name}$")
-                    if cost_center:
-                        workload_key = app_tag if app_tag else "Untagged"
-                        mapping[workload_key] = cost_center
-        token = response.get("NextPageToken")
-        if not token:
-            break
-        kwargs["NextPageToken"] = token
 
-    return category_name, mapping
+def _definition_version(
+    ce_client: Any,
+    entry: dict[str, Any],
+    effective_on: str | None,
+) -> dict[str, Any]:
+    """Return the cached definition version effective on a date.
+
+    Without a date the current version is returned. A version not cached yet
+    is fetched with describe_cost_category_definition (EffectiveOn for a past
+    date) and cached together with its EffectiveStart / EffectiveEnd range, so
+    each version is described once however many periods fall into it. Errors
+    propagate to the caller. Thread-safe like _category_entry().
+    """
+    with _CATEGORY_LOCK:
+        return _definition_version_locked(ce_client, entry, effective_on)
+
+
+def _definition_version_locked(
+    ce_client: Any,
+    entry: dict[str, Any],
+    effective_on: str | None,
+) -> dict[str, Any]:
+    for version in entry["versions"]:
+        if effective_on is None:
+            if version["end"] is None:
+                return version
+        elif version["start"] <= effective_on and (
+            version["end"] is None or effective_on < version["end"]
+        ):
+            return version
+
+    describe_kwargs: dict[str, Any] = {"CostCategoryArn": entry["arn"]}
+    if effective_on is not None:
+        describe_kwargs["EffectiveOn"] = effective_on
+    defn_resp = ce_client.describe_cost_category_definition(**describe_kwargs)
+    cost_category = defn_resp.get("CostCategory", {})
+    split_charge_rules = cost_category.get("SplitChargeRules", [])
+
+    # Extract source values and full rules
+    sources: set[str] = set()
+    rules: list[dict[str, Any]] = []
+    for rule in split_charge_rules:
+        source = rule.get("Source")
+        if source:
+            sources.add(source)
+            rules.append(
+                {
+                    "Source": source,
+                    "Targets": rule.get("Targets", []),
+                    "Method": rule.get("Method", "PROPORTIONAL"),
+                    "Parameters": rule.get("Parameters", []),
+                }
+            )
+    logger.info(
+        "Split charge sources (effective %s): %s",
+        cost_category.get("EffectiveStart", effective_on or "now"),
+        sources,
+    )
+
+    # Effective dates are ISO timestamps at month starts; compare the dates
+    version = {
+        "start": (cost_category.get("EffectiveStart") or "")[:10],
+        "end": (cost_category.get("EffectiveEnd") or "")[:10] or None,
+        "split_charge": (sorted(sources), rules),
+    }
+    entry["versions"].append(version)
+    return version
 
 
 def get_split_charge_categories(
     ce_client: Any,
     category_name: str,
+    effective_on: str | None = None,
 ) -> tuple[list[str], list[dict[str, Any]]]:
     """Detect split charge source categories by inspecting the Cost Category definition.
 
+    Reads the current definition, or with effective_on ("YYYY-MM-DD") the
+    version that was effective on that date.
+
     Returns a tuple of:
     - list of category values that are split charge sources (their costs
       are allocated to other categories and should not be displayed directly)
@@ -287,59 +869,63 @@ def get_split_charge_categories(
     if not category_name:
         return [], []
 
-    # Find the category ARN from its name (paginated)
+    # Find the category definition from its name (cached, see _category_entry())
     try:
-        target_arn = None
-        list_kwargs: dict[str, Any] = {}
-        while True:
-            resp = ce_client.list_cost_category_definitions(**list_kwargs)
-            for defn in resp.get("CostCategoryReferences", []):
-                if defn.get("Name") == category_name:
-                    target_arn = defn["CostCategoryArn"]
-                    break
-            if target_arn is not None:
-                break
-            token = resp.get("NextToken")
-            if not token:
-                break
-            list_kwargs["NextToken"] = token
+        entry = _category_entry(ce_client, category_name)
     except Exception:
         logger.warning("Failed to list cost category definitions", exc_info=True)
         return [], []
 
-    if not target_arn:
+    if entry is None:
         return [], []
 
     # Get the full definition including split charge rules
     try:
-        defn_resp = ce_client.describe_cost_category_definition(
-            CostCategoryArn=target_arn
-        )
+        version = _definition_version(ce_client, entry, effective_on)
     except Exception:
         logger.warning("Failed to describe cost category definition", exc_info=True)
         return [], []
 
-    cost_category = defn_resp.get("CostCategory", {})
-    split_charge_rules = cost_category.get("SplitChargeRules", [])
+    sources, rules = version["split_charge"]
+    return list(sources), list(rules)
 
-    # Extract source values and full rules
-    sources: set[str] = set()
-    rules: list[dict[str, Any]] = []
-    for rule in split_charge_rules:
-        source = rule.get("Source")
-        if source:
-            sources.add(source)
-            rules.append(
-                {
-                    "Source": source,
-                    "Targets": rule.get("Targets", []),
-                    "Method": rule.get("Method", "PROPORTIONAL"),
-                    "Parameters": rule.get("Parameters", []),
-                }
-            )
 
-    logger.info("Split charge sources: %s", sources)
-    return sorted(sources), rules
+def get_split_charge_rules_by_period(
+    ce_client: Any,
+    category_name: str,
+    periods: dict[str, tuple[str, str]],
+) -> dict[str, list[dict[str, Any]]]:
+    """Return the split charge rules effective in each period.
+
+    Cost Category definitions are versioned by month, so each period gets the
+    rules of the version effective on its start date. Only distinct versions
+    are described (see _definition_version()). Periods whose version cannot
+    be read (e.g. before the category existed) are left out, as are all
+    periods without a category.
+    """
+    if not category_name:
+        return {}
+    try:
+        entry = _category_entry(ce_client, category_name)
+    except Exception:
+        logger.warning("Failed to list cost category definitions", exc_info=True)
+        return {}
+    if entry is None:
+        return {}
+
+    rules_by_period: dict[str, list[dict[str, Any]]] = {}
+    for period_key, (start, _end) in periods.items():
+        try:
+            version = _definition_version(ce_client, entry, start)
+        except Exception:
+            logger.warning(
+                "Failed to describe cost category definition effective on %s",
+                start,
+                exc_info=True,
+            )
+            continue
+        rules_by_period[period_key] = list(version["split_charge"][1])
+    return rules_by_period
 
 
 def get_allocated_costs_by_category(
@@ -347,12 +933,14 @@ def get_allocated_costs_by_category(
     category_name: str,
     start: str,
     end: str,
+    cost_filter: dict[str, Any] | None = None,
 ) -> dict[str, float]:
     """Get total allocated cost per cost category value using NetAmortizedCost.
 
     Uses NetAmortizedCost to match the AWS Cost Category console's
-    "Total allocated cost" column. Queries CE grouped by COST_CATEGORY only
-    (no App tag) to get the true allocated totals.
+    "Total allocated cost" column (for the costs cost_filter selects). Queries
+    CE grouped by COST_CATEGORY only (no App tag) to get the true allocated
+    totals.
     """
     if not category_name:
         return {}
@@ -366,6 +954,8 @@ def get_allocated_costs_by_category(
             {"Type": "COST_CATEGORY", "Key": category_name},
         ],
     }
+    if cost_filter:
+        kwargs["Filter"] = cost_filter
 
     while True:
         response = ce_client.get_cost_and_usage(**kwargs)
@@ -388,10 +978,351 @@ def get_allocated_costs_by_category(
     return totals
 
 
+def get_monthly_totals(
+    ce_client: Any,
+    start: str,
+    end: str,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, float]:
+    """Ungrouped NetAmortizedCost per calendar month in [start, end).
+
+    A single MONTHLY query without GroupBy covers the whole range (paginated
+    only for very long ranges). cost_filter must be the one the stored
+    months were collected with. Returns {"YYYY-MM": total}.
+    """
+    totals: dict[str, float] = {}
+    kwargs: dict[str, Any] = {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": "MONTHLY",
+        "Metrics": ["NetAmortizedCost"],
+    }
+    if cost_filter:
+        kwargs["Filter"] = cost_filter
+    while True:
+        response = ce_client.get_cost_and_usage(**kwargs)
+        for result in response.get("ResultsByTime", []):
+            label = period_label(result["TimePeriod"]["Start"])
+            totals[label] = float(
+                result.get("Total", {}).get("NetAmortizedCost", {}).get("Amount", 0)
+            )
+        token = response.get("NextPageToken")
+        if not token:
+            break
+        kwargs["NextPageToken"] = token
+    return totals
+
+
+def daily_output_labels(periods: dict[str, tuple[str, str]]) -> list[str]:
+    """Labels of the periods a daily run writes: MTD (if any), prev_complete."""
+    return [
+        period_label(periods[k][0])
+        for k in ("current", "prev_complete")
+        if k in periods
+    ]
+
+
+def probe_freshness(
+    now: datetime | None = None,
+    cost_filter: dict[str, Any] | None = None,
+    settings: dict[str, Any] | None = None,
+    ce_client: Any = None,
+) -> dict[str, Any]:
+    """Fingerprint the latest Cost Explorer data with one ungrouped query.
+
+    Queries the monthly totals of the periods a daily run writes, the most
+    recently completed month through the end of the MTD window, without
+    GroupBy. CE's totals change whenever a data refresh lands new costs or
+    restates the completed month, so an unchanged fingerprint means a daily
+    run would produce the same figures. With cost_filter, the query is filtered and the filter
+    is part of the fingerprint. So are settings, the run configuration the
+    outputs depend on (workload dimensions, cost category, ...): changing
+    either triggers a full run. ce_client defaults to a new boto3 client.
+
+    Returns:
+        Dict with checked_at (ISO time), labels (the periods a daily run
+        writes: MTD and most recently completed month) and fingerprint.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    periods = get_periods(now)
+    key = "current" if "current" in periods else "prev_complete"
+    start, end = periods["prev_complete"][0], periods[key][1]
+    if ce_client is None:
+        ce_client = boto3.client("ce")
+    response = ce_client.get_cost_and_usage(
+        TimePeriod={"Start": start, "End": end},
+        Granularity="MONTHLY",
+        Metrics=["NetAmortizedCost", "UsageQuantity"],
+        **({"Filter": cost_filter} if cost_filter else {}),
+    )
+    totals = [
+        {
+            "start": result.get("TimePeriod", {}).get("Start"),
+            "estimated": result.get("Estimated"),
+            "total": {
+                metric: value.get("Amount")
+                for metric, value in result.get("Total", {}).items()
+            },
+        }
+        for result in response.get("ResultsByTime", [])
+    ]
+    fingerprinted: dict[str, Any] = {"periods": periods, "totals": totals}
+    if cost_filter:
+        fingerprinted["cost_filter"] = cost_filter
+    if settings:
+        fingerprinted["settings"] = settings
+    payload = json.dumps(fingerprinted, sort_keys=True)
+    return {
+        "checked_at": now.isoformat(),
+        "labels": daily_output_labels(periods),
+        "fingerprint": hashlib.sha256(payload.encode()).hexdigest(),
+    }
+
+
+def _resolve_cost_categories(
+    ce_client: Any,
+    cost_category_name: str,
+    periods: dict[str, tuple[str, str]],
+    now: datetime,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Resolve the cost category and its split charge rules for periods.
+
+    The category name is discovered once from the primary period (current if
+    available, otherwise prev_complete for 1st-of-month runs). Returns the
+    resolved name ("" without a category), the discovery period's key and
+    mapping, and the split charge categories and rules.
+    """
+    discovery_key = "current" if "current" in periods else "prev_complete"
+    discovery_start, discovery_end = periods[discovery_key]
+    resolved_cc_name, discovery_cc_mapping = get_cost_categories(
+        ce_client,
+        cost_category_name,
+        discovery_start,
+        discovery_end,
+        closed=discovery_end <= _month_start(now),
+        group_by=group_by,
+        cost_filter=cost_filter,
+    )
+    logger.info(
+        "Cost category mapping (%s): %d entries",
+        discovery_key,
+        len(discovery_cc_mapping),
+    )
+
+    # Detect split charge categories using the resolved name so
+    # auto-discovered categories are handled correctly.
+    split_charge_categories, split_charge_rules = get_split_charge_categories(
+        ce_client, resolved_cc_name
+    )
+    return {
+        "name": resolved_cc_name,
+        "discovery_key": discovery_key,
+        "cc_mapping": discovery_cc_mapping,
+        "split_charge_categories": split_charge_categories,
+        "split_charge_rules": split_charge_rules,
+        "split_charge_rules_by_period": get_split_charge_rules_by_period(
+            ce_client, resolved_cc_name, periods
+        ),
+    }
+
+
+def _month_start(now: datetime) -> str:
+    """First day of now's month; periods ending by then are closed."""
+    return now.date().replace(day=1).isoformat()
+
+
+def _period_costs(
+    ce_client: Any,
+    period_key: str,
+    periods: dict[str, tuple[str, str]],
+    now: datetime,
+    is_mtd: bool = True,
+    daily_cube: Storage | None = None,
+    restatement_days: int = DEFAULT_RESTATEMENT_DAYS,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Collect one period's cost "groups" (and its cube's "daily" days)."""
+    start, end = periods[period_key]
+    result: dict[str, Any] = {}
+    if daily_cube is not None and period_key in ("current", "prev_complete"):
+        result["daily"] = update_daily_cube(
+            ce_client,
+            daily_cube,
+            start,
+            end,
+            restatement_days,
+            now.date(),
+            group_by=group_by,
+            cost_filter=cost_filter,
+        )
+    if period_key == "current" and is_mtd and daily_cube is not None:
+        groups = sum_daily_cube(result["daily"])
+    else:
+        groups = get_cost_and_usage(ce_client, start, end, group_by, cost_filter)
+    logger.info("Period %s: %d groups collected", period_key, len(groups))
+    result["groups"] = groups
+    return result
+
+
+def _period_mapping(
+    ce_client: Any,
+    period_key: str,
+    periods: dict[str, tuple[str, str]],
+    now: datetime,
+    categories: dict[str, Any],
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, str] | None:
+    """Return a period's workload -> cost center mapping.
+
+    Each period is queried independently so that workload-to-cost-center
+    assignments reflect the CC rules that were active during that period.
+    prev_month_partial (partial window within the prior month; used only for
+    MTD comparison aggregates, not CC assignment) gets None.
+    """
+    if period_key == categories["discovery_key"]:
+        return categories["cc_mapping"]
+    if not categories["name"]:
+        # No CC configured — every period gets the empty mapping
+        return {}
+    if period_key == "prev_month_partial":
+        return None
+    start, end = periods[period_key]
+    _, mapping = get_cost_categories(
+        ce_client,
+        categories["name"],
+        start,
+        end,
+        closed=end <= _month_start(now),
+        group_by=group_by,
+        cost_filter=cost_filter,
+    )
+    logger.info("Cost category mapping (%s): %d entries", period_key, len(mapping))
+    return mapping
+
+
+def _mtd_forecast(
+    ce_client: Any,
+    periods: dict[str, tuple[str, str]],
+    cost_filter: dict[str, Any] | None = None,
+) -> float | None:
+    """Forecast the rest of the MTD month.
+
+    The forecast covers today → first-of-next-month (remaining days). CE
+    requires Start >= today, so we use mtd_end (today) as the start.
+    """
+    mtd_start_str, mtd_end_str = periods["current"]
+    mtd_start_date = date.fromisoformat(mtd_start_str)
+    # End is the first day of the month after the current MTD month
+    if mtd_start_date.month == 12:
+        month_end_exclusive = f"{mtd_start_date.year + 1:04d}-01-01"
+    else:
+        month_end_exclusive = (
+            f"{mtd_start_date.year:04d}-{mtd_start_date.month + 1:02d}-01"
+        )
+    forecast = get_cost_forecast(
+        ce_client, mtd_end_str, month_end_exclusive, cost_filter
+    )
+    logger.info("Cost forecast for remaining period: %s", forecast)
+    return forecast
+
+
+def _collect_period(
+    ce_client: Any,
+    period_key: str,
+    periods: dict[str, tuple[str, str]],
+    now: datetime,
+    categories: Callable[[], dict[str, Any]],
+    daily_cube: Storage | None = None,
+    restatement_days: int = DEFAULT_RESTATEMENT_DAYS,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Collect everything of one daily-run period.
+
+    categories returns _resolve_cost_categories()'s result. It is only called
+    once the period's costs are in, so a future's result() lets the category
+    lookup run meanwhile. The result has the period's "groups" and, where
+    they apply, its "daily" cube days, "cc_mapping", "allocated_costs" and
+    (MTD period) "forecast".
+    """
+    result = _period_costs(
+        ce_client,
+        period_key,
+        periods,
+        now,
+        daily_cube=daily_cube,
+        restatement_days=restatement_days,
+        group_by=group_by,
+        cost_filter=cost_filter,
+    )
+    resolved = categories()
+    mapping = _period_mapping(
+        ce_client, period_key, periods, now, resolved, group_by, cost_filter
+    )
+    if mapping is not None:
+        result["cc_mapping"] = mapping
+    if resolved["name"]:
+        start, end = periods[period_key]
+        result["allocated_costs"] = get_allocated_costs_by_category(
+            ce_client, resolved["name"], start, end, cost_filter
+        )
+    if period_key == "current":
+        result["forecast"] = _mtd_forecast(ce_client, periods, cost_filter)
+    return result
+
+
+def _assemble_collected(
+    now: datetime,
+    is_mtd: bool,
+    periods: dict[str, tuple[str, str]],
+    categories: dict[str, Any],
+    results: dict[str, dict[str, Any]],
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Combine _collect_period() results into collect()'s result dict."""
+    collected = {
+        "now": now,
+        "is_mtd": is_mtd,
+        "periods": periods,
+        "period_labels": {k: period_label(v[0]) for k, v in periods.items()},
+        "raw_data": {k: r["groups"] for k, r in results.items()},
+        # For backward compatibility, expose discovery period's mapping
+        "cc_mapping": categories["cc_mapping"],
+        "cc_mappings": {
+            k: r["cc_mapping"] for k, r in results.items() if "cc_mapping" in r
+        },
+        "split_charge_categories": categories["split_charge_categories"],
+        "split_charge_rules": categories["split_charge_rules"],
+        "split_charge_rules_by_period": categories["split_charge_rules_by_period"],
+        "allocated_costs": {
+            k: r["allocated_costs"]
+            for k, r in results.items()
+            if "allocated_costs" in r
+        },
+        "forecast": results.get("current", {}).get("forecast"),
+    }
+    daily = {k: r["daily"] for k, r in results.items() if "daily" in r}
+    if daily:
+        collected["daily"] = daily
+    if cost_filter:
+        collected["cost_filter"] = cost_filter
+    return collected
+
+
 def collect(
     cost_category_name: str = "",
     target_year: int | None = None,
     target_month: int | None = None,
+    now: datetime | None = None,
+    daily_cube: Storage | None = None,
+    restatement_days: int = DEFAULT_RESTATEMENT_DAYS,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+    ce_client: Any = None,
 ) -> dict[str, Any]:
     """Main collection entry point. Returns raw data for processing.
 
@@ -399,6 +1330,19 @@ def collect(
         cost_category_name: AWS Cost Category name for workload grouping
         target_year: Optional target year for backfill (uses current if not provided)
         target_month: Optional target month for backfill (uses current if not provided)
+        now: Reference time for period computation (defaults to the current
+            time; set when replaying a recorded run)
+        daily_cube: Keep daily cubes of the current and most recently
+            completed month in this storage (see update_daily_cube()). The
+            MTD period is then collected incrementally, and the result has
+            their days under "daily".
+        restatement_days: Recent days re-fetched on each incremental run
+        group_by: GroupBy definitions that define workloads (see
+            parse_group_by(); default: the App tag)
+        cost_filter: CE filter expression applied to every cost, mapping,
+            allocation and forecast query (see parse_cost_filter()); recorded
+            in the result under "cost_filter"
+        ce_client: Cost Explorer client (default: a new boto3 client)
 
     When called without target_year/target_month (normal daily run), the result
     includes is_mtd=True and additional keys:
@@ -409,119 +1353,122 @@ def collect(
       - period_labels["prev_complete"]: label for the completed month
       - period_labels["yoy_prev_complete"]: label for prev_complete's YoY
       - period_labels["prev_month_partial"]: label for the prior partial period
+
+    The periods are collected one after another; submit_collect() collects
+    them concurrently.
     """
     is_mtd = target_year is None and target_month is None
 
-    ce_client = boto3.client("ce")
-    now = datetime.now(timezone.utc)
-    periods = _get_periods(now, target_year, target_month)
-
-    period_labels = {k: _period_label(v[0]) for k, v in periods.items()}
-    logger.info("Collecting data for periods: %s", period_labels)
-
-    # Collect cost data for all periods
-    # For the prior_month_partial period, only collect when is_mtd (it's a partial date
-    # range within the prior month and not meaningful for completed backfill months).
-    raw_data: dict[str, list[dict[str, Any]]] = {}
-    for period_key, (start, end) in periods.items():
-        groups = get_cost_and_usage(ce_client, start, end)
-        logger.info("Period %s: %d groups collected", period_key, len(groups))
-        raw_data[period_key] = groups
-
-    # Collect cost category mappings per period.
-    # Discover the category name once from the primary period (current if available,
-    # otherwise prev_complete for 1st-of-month runs), then query each period
-    # independently so that workload-to-cost-center assignments reflect the CC
-    # rules that were active during that period.
-    discovery_key = "current" if "current" in periods else "prev_complete"
-    discovery_start, discovery_end = periods[discovery_key]
-    resolved_cc_name, discovery_cc_mapping = get_cost_categories(
-        ce_client, cost_category_name, discovery_start, discovery_end
-    )
+    if ce_client is None:
+        ce_client = boto3.client("ce")
+    if now is None:
+        now = datetime.now(timezone.utc)
+    periods = get_periods(now, target_year, target_month)
     logger.info(
-        "Cost category mapping (%s): %d entries",
-        discovery_key,
-        len(discovery_cc_mapping),
+        "Collecting data for periods: %s",
+        {k: period_label(v[0]) for k, v in periods.items()},
     )
 
-    # Query mapping for every period except prev_month_partial (partial window
-    # within the prior month; used only for MTD comparison aggregates, not CC
-    # assignment) and the discovery period (already queried above).
-    cc_mappings: dict[str, dict[str, str]] = {discovery_key: discovery_cc_mapping}
-    if resolved_cc_name:
-        for period_key, (start, end) in periods.items():
-            if period_key in (discovery_key, "prev_month_partial"):
-                continue
-            _, period_mapping = get_cost_categories(
-                ce_client, resolved_cc_name, start, end
-            )
-            logger.info(
-                "Cost category mapping (%s): %d entries",
-                period_key,
-                len(period_mapping),
-            )
-            cc_mappings[period_key] = period_mapping
-    else:
-        # No CC configured — fill all periods with the empty mapping
-        for period_key in periods:
-            if period_key not in cc_mappings:
-                cc_mappings[period_key] = {}
-
-    # For backward compatibility, expose discovery period's mapping as cc_mapping
-    cc_mapping = discovery_cc_mapping
+    # Collect cost data for all periods
+    results = {
+        period_key: _period_costs(
+            ce_client,
+            period_key,
+            periods,
+            now,
+            is_mtd=is_mtd,
+            daily_cube=daily_cube,
+            restatement_days=restatement_days,
+            group_by=group_by,
+            cost_filter=cost_filter,
+        )
+        for period_key in periods
+    }
 
-    # Detect split charge categories and get allocated totals using the
-    # resolved name so auto-discovered categories are handled correctly.
-    split_charge_categories, split_charge_rules = get_split_charge_categories(
-        ce_client, resolved_cc_name
+    # Collect cost category mappings per period, then the allocated totals
+    categories = _resolve_cost_categories(
+        ce_client, cost_category_name, periods, now, group_by, cost_filter
     )
-    allocated_costs: dict[str, dict[str, float]] = {}
-    if resolved_cc_name:
+    for period_key, result in results.items():
+        mapping = _period_mapping(
+            ce_client, period_key, periods, now, categories, group_by, cost_filter
+        )
+        if mapping is not None:
+            result["cc_mapping"] = mapping
+    if categories["name"]:
+        # prev_month_partial only exists for MTD runs; its allocated costs
+        # let the processor build mtd_comparison cost center totals.
         for period_key, (start, end) in periods.items():
-            # Skip prior partial period for allocated costs — the partial period
-            # is only used for MTD comparison aggregates, not for cost center totals.
-            if period_key == "prev_month_partial":
-                continue
-            allocated_costs[period_key] = get_allocated_costs_by_category(
-                ce_client, resolved_cc_name, start, end
+            results[period_key]["allocated_costs"] = get_allocated_costs_by_category(
+                ce_client, categories["name"], start, end, cost_filter
             )
 
-        # For the MTD prior partial period, also collect category-level allocated costs
-        # so the processor can build mtd_comparison cost center totals.
-        if is_mtd and "prev_month_partial" in periods:
-            partial_start, partial_end = periods["prev_month_partial"]
-            allocated_costs["prev_month_partial"] = get_allocated_costs_by_category(
-                ce_client, resolved_cc_name, partial_start, partial_end
-            )
-
-    # Get cost forecast for MTD periods only.
-    # The forecast covers today → first-of-next-month (remaining days).
-    # CE requires Start >= today, so we use mtd_end (today) as the start.
-    forecast: float | None = None
+    # Get cost forecast for MTD periods only
     if is_mtd and "current" in periods:
-        mtd_end_str = periods["current"][1]  # today (exclusive end of MTD window)
-        # End is the first day of the month after the current MTD month
-        mtd_start_str = periods["current"][0]
-        mtd_start_date = date.fromisoformat(mtd_start_str)
-        if mtd_start_date.month == 12:
-            month_end_exclusive = f"{mtd_start_date.year + 1:04d}-01-01"
-        else:
-            month_end_exclusive = (
-                f"{mtd_start_date.year:04d}-{mtd_start_date.month + 1:02d}-01"
-            )
-        forecast = get_cost_forecast(ce_client, mtd_end_str, month_end_exclusive)
-        logger.info("Cost forecast for remaining period: %s", forecast)
+        results["current"]["forecast"] = _mtd_forecast(ce_client, periods, cost_filter)
+    return _assemble_collected(now, is_mtd, periods, categories, results, cost_filter)
 
-    return {
-        "now": now,
-        "is_mtd": is_mtd,
-        "periods": periods,
-        "period_labels": period_labels,
-        "raw_data": raw_data,
-        "cc_mapping": cc_mapping,
-        "cc_mappings": cc_mappings,
-        "split_charge_categories": split_charge_categories,
-        "split_charge_rules": split_charge_rules,
-        "allocated_costs": allocated_costs,
-        "forecast": forecast,
+
+def submit_collect(
+    pool: Executor,
+    cost_category_name: str = "",
+    now: datetime | None = None,
+    daily_cube: Storage | None = None,
+    restatement_days: int = DEFAULT_RESTATEMENT_DAYS,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+    ce_client: Any = None,
+) -> Callable[[Iterable[str]], dict[str, Any]]:
+    """Submit a daily run's collection to pool, one future per period.
+
+    Takes collect()'s arguments for a daily run. The cost category lookup is
+    submitted first and each period's future waits for it only after its own
+    cost queries, so with a FIFO pool (ThreadPoolExecutor) the waits cannot
+    starve the lookup. Pass one ce_client shared by all periods.
+
+    Returns a function that, given period keys, waits for just those periods
+    and returns collect()'s result restricted to them, so each output can be
+    processed as soon as its own inputs are in.
+    """
+    if ce_client is None:
+        ce_client = boto3.client("ce")
+    if now is None:
+        now = datetime.now(timezone.utc)
+    periods = get_periods(now)
+    logger.info(
+        "Collecting data for periods: %s",
+        {k: period_label(v[0]) for k, v in periods.items()},
+    )
+
+    categories = pool.submit(
+        _resolve_cost_categories,
+        ce_client,
+        cost_category_name,
+        periods,
+        now,
+        group_by,
+        cost_filter,
+    )
+    futures = {
+        period_key: pool.submit(
+            _collect_period,
+            ce_client,
+            period_key,
+            periods,
+            now,
+            categories.result,
+            daily_cube=daily_cube,
+            restatement_days=restatement_days,
+            group_by=group_by,
+            cost_filter=cost_filter,
+        )
+        for period_key in periods
     }
+
+    def collected_for(period_keys: Iterable[str]) -> dict[str, Any]:
+        results = {k: futures[k].result() for k in period_keys if k in futures}
+        return _assemble_collected(
+            now, True, periods, categories.result(), results, cost_filter
+        )
+
+    return collected_for
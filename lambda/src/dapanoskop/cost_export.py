@@ -0,0 +1,751 @@
+"""Cost and Usage Report (CUR 2.0) / FOCUS export collection.
+
+Alternative to the Cost Explorer collector (collector.py) for organizations
+that deliver a CUR 2.0 or FOCUS 1.0 data export to S3. Cost Explorer bills
+every GetCostAndUsage request and allows two group-by dimensions, so
+collect() needs separate queries per period for costs, cost category
+mappings and allocated totals. The export has every dimension on every line
+item, so all three come out of a single scan.
+
+An export's data directory holds one hive partition per billing period:
+
+    s3://<bucket>/<prefix>/<export name>/data/
+        BILLING_PERIOD=2026-01/<export name>-00001.snappy.parquet
+        BILLING_PERIOD=2026-02/...
+
+Only the partitions of the billing months covered by the reporting periods
+are listed and scanned, and only the columns needed for cost, usage type,
+App tag and cost category are read. Net amortized cost is computed in the
+scan projection, so each record batch arrives as (day, App tag, usage type,
+cost category, cost, quantity) rows that are grouped and merged into
+running sums; memory grows with the number of distinct rows per day, not
+with the export size. A local directory (plain path or file://) can stand
+in for S3.
+
+AWS re-delivers the current month's export several times a day, usually
+rewriting only some of its parts. With a storage (the data bucket),
+collection is incremental: cost-export/state.json records the parts of each
+billing period (as listed by the latest delivery manifest) with a size and
+modification time fingerprint, and cost-export/partials/<YYYY-MM>.parquet
+holds the aggregated rows of every part. A run scans only new or changed
+parts, replaces their rows in the partials and merges the partials into the
+period sums. The state also records which inputs every written period was
+generated from, so the handler can skip periods whose inputs are unchanged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import posixpath
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+import boto3
+
+from dapanoskop.collector import (
+    get_cost_forecast,
+    get_periods,
+    get_split_charge_categories,
+    get_split_charge_rules_by_period,
+    month_range,
+    period_label,
+)
+from dapanoskop.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Export columns per format. tag_key / the cost category name are looked up
+# in the tags / cost category map columns.
+FORMATS: dict[str, dict[str, str]] = {
+    "cur2": {
+        "start": "line_item_usage_start_date",
+        "usage_type": "line_item_usage_type",
+        "quantity": "line_item_usage_amount",
+        "tags": "resource_tags",
+        "tag_key": "user_App",
+        "cost_categories": "cost_category",
+    },
+    "focus": {
+        "start": "ChargePeriodStart",
+        "usage_type": "x_UsageType",
+        "quantity": "ConsumedQuantity",
+        "tags": "Tags",
+        "tag_key": "user:App",
+        "cost_categories": "x_CostCategories",
+    },
+}
+
+_GROUP_COLUMNS = ["day", "app", "usage_type", "cost_category"]
+
+STATE_KEY = "cost-export/state.json"
+_PARTIALS_PREFIX = "cost-export/partials/"
+
+# (day, App tag, usage type, cost category) -> [cost, quantity]
+Sums = dict[tuple[Any, ...], list[float]]
+
+
+def _resolve(location: str) -> tuple[Any, str]:
+    """Return (pyarrow filesystem, base path) for an S3 URI or local path."""
+    from pyarrow import fs
+
+    if location.startswith(("s3://", "file://")):
+        return fs.FileSystem.from_uri(location)
+    return fs.LocalFileSystem(), location
+
+
+def _billing_months(periods: dict[str, tuple[str, str]]) -> list[str]:
+    """Billing periods (YYYY-MM) whose usage falls into any reporting period."""
+    months: set[str] = set()
+    for start, end in periods.values():
+        day = date.fromisoformat(start)
+        last = date.fromisoformat(end) - timedelta(days=1)
+        while day <= last:
+            months.add(f"{day.year:04d}-{day.month:02d}")
+            day = date.fromisoformat(month_range(day.year, day.month)[1])
+    return sorted(months)
+
+
+def _manifest_files(filesystem: Any, base: str, month: str) -> set[str] | None:
+    """Data file names listed by the latest delivery manifest of a month.
+
+    Exports write metadata/BILLING_PERIOD=<month>/<name>-Manifest.json next to
+    the data directory once a delivery's parts are complete; parts it does not
+    list belong to an unfinished or superseded delivery. Returns None when the
+    export has no manifest.
+    """
+    from pyarrow import fs
+
+    parent = posixpath.dirname(base.rstrip("/"))
+    infos = filesystem.get_file_info(
+        fs.FileSelector(
+            f"{parent}/metadata/BILLING_PERIOD={month}",
+            recursive=True,
+            allow_not_found=True,
+        )
+    )
+    manifests = sorted(
+        (
+            info
+            for info in infos
+            if info.type == fs.FileType.File
+            and info.base_name.endswith("Manifest.json")
+        ),
+        key=lambda info: (info.mtime_ns or 0, info.path),
+    )
+    if not manifests:
+        return None
+    with filesystem.open_input_stream(manifests[-1].path) as stream:
+        manifest = json.loads(stream.read())
+    return {uri.rsplit("/", 1)[-1] for uri in manifest.get("dataFiles", [])}
+
+
+def _parts(filesystem: Any, base: str, month: str) -> dict[str, str]:
+    """Data files of a billing period partition -> size/mtime fingerprint."""
+    from pyarrow import fs
+
+    infos = filesystem.get_file_info(
+        fs.FileSelector(
+            f"{base.rstrip('/')}/BILLING_PERIOD={month}",
+            recursive=True,
+            allow_not_found=True,
+        )
+    )
+    listed = _manifest_files(filesystem, base, month)
+    return {
+        info.path: f"{info.size}:{info.mtime_ns}"
+        for info in infos
+        if info.type == fs.FileType.File
+        and info.base_name.endswith(".parquet")
+        and (listed is None or info.base_name in listed)
+    }
+
+
+def _dataset(filesystem: Any, base: str, paths: list[str]) -> Any:
+    """Dataset over export data files, with the billing period partition."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.dataset(
+        sorted(paths),
+        filesystem=filesystem,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("BILLING_PERIOD", pa.string())]), flavor="hive"
+        ),
+        partition_base_dir=base.rstrip("/"),
+    )
+
+
+def _cur2_cost(names: set[str]) -> Any:
+    """Scan expression for CUR 2.0 net amortized cost.
+
+    Mirrors Cost Explorer's NetAmortizedCost: covered usage is priced at its
+    Savings Plan / reservation effective cost, unused commitment is charged on
+    the recurring fee line, and upfront fees and negations count as zero.
+    Net (after-discount) columns are used where the export has them.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    zero = ds.scalar(0.0)
+
+    def column(name: str) -> Any:
+        if name not in names:
+            return zero
+        return pc.coalesce(ds.field(name).cast(pa.float64()), zero)
+
+    def net(prefix: str, name: str) -> Any:
+        net_name = f"{prefix}net_{name}"
+        if net_name not in names:
+            return column(f"{prefix}{name}")
+        return pc.coalesce(
+            ds.field(net_name).cast(pa.float64()), column(f"{prefix}{name}")
+        )
+
+    item_type = pc.coalesce(ds.field("line_item_line_item_type"), ds.scalar(""))
+    reservation_arn = (
+        pc.coalesce(ds.field("reservation_reservation_a_r_n"), ds.scalar(""))
+        if "reservation_reservation_a_r_n" in names
+        else ds.scalar("")
+    )
+    cases = [
+        (
+            item_type == "SavingsPlanCoveredUsage",
+            net("savings_plan_", "savings_plan_effective_cost"),
+        ),
+        (
+            item_type == "SavingsPlanRecurringFee",
+            pc.subtract(
+                column("savings_plan_total_commitment_to_date"),
+                column("savings_plan_used_commitment"),
+            ),
+        ),
+        (item_type == "SavingsPlanNegation", zero),
+        (item_type == "SavingsPlanUpfrontFee", zero),
+        (item_type == "DiscountedUsage", net("reservation_", "effective_cost")),
+        (
+            item_type == "RIFee",
+            pc.add(
+                net("reservation_", "unused_amortized_upfront_fee_for_billing_period"),
+                net("reservation_", "unused_recurring_fee"),
+            ),
+        ),
+        ((item_type == "Fee") & (reservation_arn != ""), zero),
+    ]
+    cost = net("line_item_", "unblended_cost")
+    for condition, value in reversed(cases):
+        cost = pc.if_else(condition, value, cost)
+    return cost
+
+
+def _projection(
+    export_format: str, names: set[str], cost_category_name: str
+) -> dict[str, Any]:
+    """Scan projection producing the _GROUP_COLUMNS plus cost and quantity."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    spec = FORMATS[export_format]
+
+    def lookup(column: str, key: str) -> Any:
+        if not key or column not in names:
+            return ds.scalar("")
+        return pc.coalesce(
+            pc.map_lookup(ds.field(column), pa.scalar(key), "first"), ds.scalar("")
+        )
+
+    if export_format == "focus":
+        cost = pc.coalesce(ds.field("EffectiveCost").cast(pa.float64()), ds.scalar(0.0))
+    else:
+        cost = _cur2_cost(names)
+    return {
+        "day": ds.field(spec["start"]).cast(pa.date32()),
+        "app": lookup(spec["tags"], spec["tag_key"]),
+        "usage_type": pc.coalesce(ds.field(spec["usage_type"]), ds.scalar("")),
+        "cost_category": lookup(spec["cost_categories"], cost_category_name),
+        "cost": cost,
+        "quantity": pc.coalesce(
+            ds.field(spec["quantity"]).cast(pa.float64()), ds.scalar(0.0)
+        ),
+    }
+
+
+def _discover_cost_category(dataset: Any, export_format: str, month: str) -> str:
+    """Return the first cost category name (sorted) found in a billing month."""
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    column = FORMATS[export_format]["cost_categories"]
+    if column not in dataset.schema.names:
+        return ""
+    scanner = dataset.scanner(
+        columns=[column], filter=ds.field("BILLING_PERIOD") == month
+    )
+    for batch in scanner.to_batches():
+        keys = pc.unique(batch.column(column).keys)
+        names = sorted(k for k in keys.to_pylist() if k)
+        if names:
+            return names[0]
+    return ""
+
+
+def _aggregate(batches: Any, sums: Sums) -> int:
+    """Merge projected record batches into sums; return the rows read."""
+    import pyarrow as pa
+
+    rows = 0
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        rows += batch.num_rows
+        grouped = (
+            pa.Table.from_batches([batch])
+            .group_by(_GROUP_COLUMNS)
+            .aggregate([("cost", "sum"), ("quantity", "sum")])
+        )
+        for row in grouped.to_pylist():
+            entry = sums[tuple(row[c] for c in _GROUP_COLUMNS)]
+            entry[0] += row["cost_sum"] or 0.0
+            entry[1] += row["quantity_sum"] or 0.0
+    return rows
+
+
+def _scan(
+    dataset: Any,
+    export_format: str,
+    cost_category_name: str,
+    months: list[str],
+    batch_size: int,
+) -> Sums:
+    """Sum cost and quantity per (day, App tag, usage type, cost category)."""
+    import pyarrow.dataset as ds
+
+    names = set(dataset.schema.names)
+    scanner = dataset.scanner(
+        columns=_projection(export_format, names, cost_category_name),
+        filter=ds.field("BILLING_PERIOD").isin(months),
+        batch_size=batch_size,
+    )
+    sums: Sums = defaultdict(lambda: [0.0, 0.0])
+    rows = _aggregate(scanner.to_batches(), sums)
+    logger.info(
+        "Cost export: %d line items in %d billing periods, %d daily groups",
+        rows,
+        len(months),
+        len(sums),
+    )
+    return sums
+
+
+def _partials_table(rows: list[dict[str, Any]]) -> Any:
+    import pyarrow as pa
+
+    return pa.Table.from_pylist(
+        rows,
+        schema=pa.schema(
+            [
+                ("part", pa.string()),
+                ("day", pa.date32()),
+                ("app", pa.string()),
+                ("usage_type", pa.string()),
+                ("cost_category", pa.string()),
+                ("cost", pa.float64()),
+                ("quantity", pa.float64()),
+            ]
+        ),
+    )
+
+
+def _update_partials(
+    storage: Storage,
+    month: str,
+    parts: dict[str, str],
+    scanned: dict[str, Sums],
+) -> Any:
+    """Replace the rows of re-scanned and vanished parts in a month's partials.
+
+    Returns the month's updated partials table.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    key = f"{_PARTIALS_PREFIX}{month}.parquet"
+    body = storage.get(key)
+    tables = []
+    if body is not None:
+        existing = pq.read_table(io.BytesIO(body))
+        keep = [part for part in parts if part not in scanned]
+        tables.append(
+            existing.filter(pc.is_in(existing["part"], pa.array(keep, pa.string())))
+        )
+    tables.append(
+        _partials_table(
+            [
+                {
+                    "part": part,
+                    **dict(zip(_GROUP_COLUMNS, group)),
+                    "cost": cost,
+                    "quantity": quantity,
+                }
+                for part, sums in scanned.items()
+                for group, (cost, quantity) in sums.items()
+            ]
+        )
+    )
+    table = pa.concat_tables(tables)
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+    storage.put(key, buf.getvalue())
+    return table
+
+
+def load_export_state(storage: Storage) -> dict[str, Any]:
+    """Read cost-export/state.json (an empty state if there is none).
+
+    The ETag read is kept under "etag" (not part of the file) for the
+    conditional write in save_export_state().
+    """
+    current = storage.head(STATE_KEY)
+    body = storage.get(STATE_KEY) if current is not None else None
+    state = json.loads(body) if body is not None else {}
+    state.setdefault("months", {})
+    state.setdefault("outputs", {})
+    state["etag"] = current["etag"] if body is not None else None
+    return state
+
+
+def save_export_state(storage: Storage, state: dict[str, Any]) -> None:
+    """Write cost-export/state.json, conditional on the ETag it was read at.
+
+    Raises PreconditionFailedError when another run wrote the state since,
+    so concurrent runs cannot drop each other's parts. Updates state["etag"]
+    to the written version.
+    """
+    etag = state.get("etag")
+    body = {k: v for k, v in state.items() if k != "etag"}
+    state["etag"] = storage.put(
+        STATE_KEY,
+        json.dumps(body, indent=2, sort_keys=True).encode(),
+        content_type="application/json",
+        if_none_match=etag is None,
+        if_match=etag,
+    )
+
+
+def ingest_export(
+    storage: Storage,
+    location: str,
+    months: list[str],
+    export_format: str = "cur2",
+    cost_category_name: str = "",
+    discovery_month: str = "",
+    batch_size: int = 65_536,
+) -> tuple[Sums, dict[str, Any]]:
+    """Incrementally aggregate the given billing months of an export.
+
+    Scans only the parts whose fingerprint differs from the stored state,
+    updates their partials and the state in storage, and returns the sums
+    over all parts of the months together with the saved state. A changed
+    format or a resolved cost category other than the stored one (also when
+    a category is first discovered after none was found) invalidates the
+    stored state, and all parts are scanned again.
+
+    Args:
+        storage: Storage holding the state and partials (the data bucket).
+        location: The export's data directory.
+        months: Billing periods (YYYY-MM) to ingest.
+        export_format: "cur2" or "focus".
+        cost_category_name: Cost Category to aggregate by (default: the
+            stored one, else the first found in discovery_month).
+        discovery_month: Billing period to discover the category from.
+        batch_size: Rows per record batch while streaming.
+    """
+    import pyarrow.parquet as pq
+
+    state = load_export_state(storage)
+    if state.get("format") != export_format:
+        state = {"format": export_format, "etag": state["etag"]}
+
+    filesystem, base = _resolve(location)
+    parts = {month: _parts(filesystem, base, month) for month in months}
+
+    def changed_parts() -> dict[str, list[str]]:
+        return {
+            month: [
+                path
+                for path, fingerprint in month_parts.items()
+                if state.get("months", {}).get(month, {}).get(path) != fingerprint
+            ]
+            for month, month_parts in parts.items()
+        }
+
+    changed = changed_parts()
+    paths = [path for month_paths in changed.values() for path in month_paths]
+
+    resolved = cost_category_name or state.get("cost_category", "")
+    dataset = _dataset(filesystem, base, paths) if paths else None
+    if not resolved and dataset is not None and discovery_month:
+        resolved = _discover_cost_category(dataset, export_format, discovery_month)
+    if "cost_category" in state and state["cost_category"] != resolved:
+        logger.info(
+            "Cost category changed from %r to %r, rescanning the export",
+            state["cost_category"],
+            resolved,
+        )
+        state = {"format": export_format, "etag": state["etag"]}
+        changed = changed_parts()
+        paths = [path for month_paths in changed.values() for path in month_paths]
+        dataset = _dataset(filesystem, base, paths) if paths else None
+    state.setdefault("months", {})
+    state.setdefault("outputs", {})
+    state["cost_category"] = resolved
+
+    scanned: dict[str, Sums] = {}
+    rows = 0
+    if dataset is not None:
+        projection = _projection(export_format, set(dataset.schema.names), resolved)
+        for fragment in dataset.get_fragments():
+            sums: Sums = defaultdict(lambda: [0.0, 0.0])
+            scanner = fragment.scanner(
+                schema=dataset.schema, columns=projection, batch_size=batch_size
+            )
+            rows += _aggregate(scanner.to_batches(), sums)
+            scanned[fragment.path] = sums
+
+    totals: Sums = defaultdict(lambda: [0.0, 0.0])
+    for month in months:
+        stored = state["months"].get(month, {})
+        if changed[month] or set(stored) != set(parts[month]):
+            table = _update_partials(
+                storage,
+                month,
+                parts[month],
+                {p: scanned[p] for p in changed[month]},
+            )
+            state["months"][month] = parts[month]
+        else:
+            body = storage.get(f"{_PARTIALS_PREFIX}{month}.parquet")
+            table = (
+                _partials_table([]) if body is None else pq.read_table(io.BytesIO(body))
+            )
+        for row in table.to_pylist():
+            entry = totals[tuple(row[c] for c in _GROUP_COLUMNS)]
+            entry[0] += row["cost"]
+            entry[1] += row["quantity"]
+    save_export_state(storage, state)
+    logger.info(
+        "Cost export: %d of %d parts changed (%d line items), %d daily groups",
+        len(paths),
+        sum(len(p) for p in parts.values()),
+        rows,
+        len(totals),
+    )
+    return totals, state
+
+
+def export_output_fingerprint(collected: dict[str, Any], period_keys: list[str]) -> str:
+    """Fingerprint of the export inputs of an output built from period_keys.
+
+    Covers the periods' date ranges and the fingerprints of all parts of
+    their billing months, so it changes when any of those parts does.
+    """
+    state = collected["export_state"]
+    periods = {
+        k: collected["periods"][k] for k in period_keys if k in collected["periods"]
+    }
+    payload = {
+        "format": state.get("format"),
+        "cost_category": state.get("cost_category"),
+        "periods": periods,
+        "parts": {m: state["months"].get(m, {}) for m in _billing_months(periods)},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _period_groups(
+    sums: Sums, start: str, end: str
+) -> tuple[list[dict[str, Any]], dict[str, str], dict[str, float]]:
+    """Build CE-shaped groups, the workload mapping and allocated totals.
+
+    Returns (groups, mapping, allocated) for usage days in [start, end), in
+    the shapes of get_cost_and_usage(), get_cost_categories() and
+    get_allocated_costs_by_category().
+    """
+    first, stop = date.fromisoformat(start), date.fromisoformat(end)
+    costs: dict[tuple[str, str], list[float]] = defaultdict(lambda: [0.0, 0.0])
+    mapping: dict[str, str] = {}
+    allocated: dict[str, float] = defaultdict(float)
+    for (day, app, usage_type, cost_category), (cost, quantity) in sums.items():
+        if not first <= day < stop:
+            continue
+        entry = costs[(app, usage_type)]
+        entry[0] += cost
+        entry[1] += quantity
+        allocated[cost_category] += cost
+        if cost_category:
+            mapping[app or "Untagged"] = cost_category
+
+    groups = [
+        {
+            "Keys": [f"App${app}", usage_type],
+            "Metrics": {
+                "NetAmortizedCost": {"Amount": str(cost), "Unit": "USD"},
+                "UsageQuantity": {"Amount": str(quantity), "Unit": "N/A"},
+            },
+        }
+        for (app, usage_type), (cost, quantity) in sorted(costs.items())
+    ]
+    return groups, mapping, dict(allocated)
+
+
+def _period_days(sums: Sums, start: str, end: str) -> dict[str, list[list[Any]]]:
+    """Daily rows for usage days in [start, end), shaped like a daily cube."""
+    first, stop = date.fromisoformat(start), date.fromisoformat(end)
+    costs: dict[tuple[date, str, str], list[float]] = defaultdict(lambda: [0.0, 0.0])
+    for (day, app, usage_type, _), (cost, quantity) in sums.items():
+        if first <= day < stop:
+            entry = costs[(day, app, usage_type)]
+            entry[0] += cost
+            entry[1] += quantity
+    days: dict[str, list[list[Any]]] = {}
+    for (day, app, usage_type), (cost, quantity) in sorted(costs.items()):
+        days.setdefault(day.isoformat(), []).append(
+            [f"App${app}", usage_type, cost, quantity]
+        )
+    return days
+
+
+def collect_from_export(
+    location: str,
+    export_format: str = "cur2",
+    cost_category_name: str = "",
+    target_year: int | None = None,
+    target_month: int | None = None,
+    now: datetime | None = None,
+    batch_size: int = 65_536,
+    storage: Storage | None = None,
+) -> dict[str, Any]:
+    """Collect from a CUR 2.0 / FOCUS export. Returns the same dict as collect().
+
+    Args:
+        location: The export's data directory (s3://..., file://... or a
+            local path) containing the BILLING_PERIOD=YYYY-MM partitions.
+        export_format: "cur2" (CUR 2.0) or "focus" (FOCUS 1.0 with AWS
+            columns).
+        cost_category_name: Cost Category for workload grouping (default:
+            the first one found in the export).
+        target_year: Optional target year for backfill
+        target_month: Optional target month for backfill
+        now: Reference time for period computation (defaults to now)
+        batch_size: Rows per record batch while streaming.
+        storage: Collect incrementally (see ingest_export()) with the state
+            kept in this storage; the result then also has "export_state".
+
+    The usage days of the current and most recently completed month are
+    returned under "daily", like collect() does with daily cubes.
+
+    Split charge rules and the MTD forecast have no counterpart in the
+    export and are still read from the Cost Explorer API.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(
+            f"Unknown cost export format {export_format!r} "
+            f"(expected one of {sorted(FORMATS)})"
+        )
+    is_mtd = target_year is None and target_month is None
+    if now is None:
+        now = datetime.now(timezone.utc)
+    periods = get_periods(now, target_year, target_month)
+    period_labels = {k: period_label(v[0]) for k, v in periods.items()}
+    logger.info("Collecting export data for periods: %s", period_labels)
+
+    months = _billing_months(periods)
+    discovery_key = "current" if "current" in periods else "prev_complete"
+    discovery_month = periods[discovery_key][0][:7]
+    resolved_cc_name = cost_category_name
+    export_state: dict[str, Any] | None = None
+    sums: Sums = {}
+    if storage is not None:
+        sums, export_state = ingest_export(
+            storage,
+            location,
+            months,
+            export_format=export_format,
+            cost_category_name=cost_category_name,
+            discovery_month=discovery_month,
+            batch_size=batch_size,
+        )
+        resolved_cc_name = export_state["cost_category"]
+    else:
+        filesystem, base = _resolve(location)
+        paths = [p for m in months for p in _parts(filesystem, base, m)]
+        if not paths:
+            logger.warning("No cost export files for %s in %s", months, location)
+        else:
+            dataset = _dataset(filesystem, base, paths)
+            if not resolved_cc_name:
+                resolved_cc_name = _discover_cost_category(
+                    dataset, export_format, discovery_month
+                )
+            sums = _scan(dataset, export_format, resolved_cc_name, months, batch_size)
+
+    raw_data: dict[str, list[dict[str, Any]]] = {}
+    daily: dict[str, dict[str, list[list[Any]]]] = {}
+    cc_mappings: dict[str, dict[str, str]] = {}
+    allocated_costs: dict[str, dict[str, float]] = {}
+    for period_key, (start, end) in periods.items():
+        if period_key in ("current", "prev_complete"):
+            daily[period_key] = _period_days(sums, start, end)
+        groups, mapping, allocated = _period_groups(sums, start, end)
+        logger.info("Period %s: %d groups collected", period_key, len(groups))
+        raw_data[period_key] = groups
+        # Same coverage as collect(): without a category every period gets an
+        # empty mapping; with one, the partial comparison window gets none
+        if not resolved_cc_name:
+            cc_mappings[period_key] = {}
+            continue
+        if period_key != "prev_month_partial":
+            cc_mappings[period_key] = mapping
+        allocated_costs[period_key] = allocated
+
+    ce_client = boto3.client("ce")
+    split_charge_categories, split_charge_rules = get_split_charge_categories(
+        ce_client, resolved_cc_name
+    )
+    split_charge_rules_by_period = get_split_charge_rules_by_period(
+        ce_client, resolved_cc_name, periods
+    )
+    forecast: float | None = None
+    if is_mtd and "current" in periods:
+        mtd_start = date.fromisoformat(periods["current"][0])
+        forecast = get_cost_forecast(
+            ce_client,
+            periods["current"][1],
+            month_range(mtd_start.year, mtd_start.month)[1],
+        )
+
+    collected = {
+        "now": now,
+        "is_mtd": is_mtd,
+        "periods": periods,
+        "period_labels": period_labels,
+        "raw_data": raw_data,
+        "cc_mapping": cc_mappings[discovery_key],
+        "cc_mappings": cc_mappings,
+        "split_charge_categories": split_charge_categories,
+        "split_charge_rules": split_charge_rules,
+        "split_charge_rules_by_period": split_charge_rules_by_period,
+        "allocated_costs": allocated_costs,
+        "forecast": forecast,
+        "daily": daily,
+    }
+    if export_state is not None:
+        collected["export_state"] = export_state
+    return collected
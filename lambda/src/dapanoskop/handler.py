@@ -5,30 +5,188 @@ from __future__ import annotations
 import json
 import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import boto3
 
-from dapanoskop.collector import collect
+from dapanoskop.collector import (
+    DEFAULT_RESTATEMENT_DAYS,
+    collect,
+    daily_output_labels,
+    get_monthly_totals,
+    get_periods,
+    month_range,
+    parse_cost_filter,
+    parse_group_by,
+    probe_freshness,
+    submit_collect,
+)
+from dapanoskop.cost_export import (
+    collect_from_export,
+    export_output_fingerprint,
+    save_export_state,
+)
 from dapanoskop.processor import process, update_index, write_to_s3
-from dapanoskop.storage_lens import get_storage_lens_metrics
+from dapanoskop.storage import Storage, get_storage
+from dapanoskop.storage_lens_export import read_storage_lens_export
+from dapanoskop.storage_lens import (
+    BREAKDOWN_DIMENSIONS,
+    discover_storage_lens,
+    get_storage_lens_history,
+    get_storage_lens_metrics,
+    storage_lens_month_end,
+    update_storage_lens_series,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Fingerprint of the CE data the last full daily run was built from
+FRESHNESS_KEY = "freshness.json"
 
-def _enrich_with_storage_lens(
-    processed: dict[str, Any],
+# Collected periods each output of a daily run is built from (the MTD
+# forecast is compared with the prev_complete total)
+_PREV_COMPLETE_INPUTS = ("prev_complete", "prev_month", "yoy_prev_complete")
+_MTD_INPUTS = ("current", "prev_month", "yoy", "prev_month_partial", "prev_complete")
+# Daily-run pool workers reserved for the CE period tasks, besides one per
+# Storage Lens read
+_COLLECT_WORKERS = 4
+
+
+def _collect(
+    cost_category_name: str,
+    cost_export_location: str = "",
+    cost_export_format: str = "cur2",
+    storage: Storage | None = None,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+    **period: Any,
+) -> dict[str, Any]:
+    """Collect a backfill month from the CUR / FOCUS export, else from CE.
+
+    With a storage, the export is ingested incrementally (state and partial
+    aggregates kept in that storage). CE backfills keep no daily cube: CE
+    serves daily data for the last 14 months only, and only daily runs read
+    the cubes (see submit_collect()). group_by (workload dimensions) and
+    cost_filter apply to CE only; the export is always grouped by the App tag
+    and unfiltered.
+    """
+    if cost_export_location:
+        if group_by is not None:
+            logger.warning("WORKLOAD_DIMENSIONS is ignored with a cost export")
+        if cost_filter is not None:
+            logger.warning("COST_FILTER is ignored with a cost export")
+        return collect_from_export(
+            cost_export_location,
+            export_format=cost_export_format,
+            cost_category_name=cost_category_name,
+            storage=storage,
+            **period,
+        )
+    return collect(
+        cost_category_name=cost_category_name,
+        group_by=group_by,
+        cost_filter=cost_filter,
+        **period,
+    )
+
+
+def _export_output_unchanged(
+    storage: Storage,
+    collected: dict[str, Any],
+    label: str,
+    period_keys: list[str] | None = None,
+) -> bool:
+    """Whether period label was already written from the same export parts.
+
+    period_keys are the collected periods the output is built from (default:
+    all). Only applies to incremental export collection. Otherwise stages the
+    new input fingerprint in the export state, saved once the run's writes
+    are done.
+    """
+    state = collected.get("export_state")
+    if state is None:
+        return False
+    fingerprint = export_output_fingerprint(
+        collected, period_keys or list(collected["periods"])
+    )
+    if state["outputs"].get(label) == fingerprint and _month_exists(
+        storage, int(label[:4]), int(label[5:7])
+    ):
+        logger.info("Skipping %s (export inputs unchanged)", label)
+        return True
+    state["outputs"][label] = fingerprint
+    return False
+
+
+def _probe_freshness(
+    cost_filter: dict[str, Any] | None = None,
+    settings: dict[str, Any] | None = None,
+    ce_client: Any = None,
+) -> dict[str, Any] | None:
+    """Run the freshness probe; None if it fails (the run then proceeds).
+
+    settings is the run configuration the outputs depend on; it is part of
+    the fingerprint, so a changed configuration is never skipped.
+    """
+    try:
+        return probe_freshness(
+            cost_filter=cost_filter, settings=settings, ce_client=ce_client
+        )
+    except Exception:
+        logger.warning("Freshness probe failed, running full collection", exc_info=True)
+        return None
+
+
+def _refresh_if_unchanged(storage: Storage, probe: dict[str, Any]) -> bool:
+    """Set collected_at and return True if CE data is unchanged since last run.
+
+    Compares the probe's fingerprint with the one stored by the last full
+    run. When they match and all periods the run would write exist, only the
+    collected_at of their summary.json files is updated.
+    """
+    stored = storage.get(FRESHNESS_KEY)
+    if stored is None or json.loads(stored).get("fingerprint") != probe["fingerprint"]:
+        return False
+    summaries = {
+        label: storage.get(f"{label}/summary.json") for label in probe["labels"]
+    }
+    if any(body is None for body in summaries.values()):
+        return False
+    for label, body in summaries.items():
+        summary = json.loads(body)
+        summary["collected_at"] = probe["checked_at"]
+        storage.put(
+            f"{label}/summary.json",
+            json.dumps(summary, indent=2).encode(),
+            content_type="application/json",
+        )
+    logger.info("Cost Explorer data unchanged, refreshed collected_at only")
+    return True
+
+
+def _fetch_storage_lens(
     storage_lens_config_id: str,
     target_year: int | None = None,
     target_month: int | None = None,
-) -> None:
-    """Add S3 Storage Lens data to the processed summary (in-place).
+    history: dict[str, Any] | None = None,
+    export_location: str = "",
+    breakdown: bool = False,
+) -> dict[str, Any] | None:
+    """Read S3 Storage Lens metrics for a period; None if unavailable.
 
     When target_year/target_month are provided, queries Storage Lens for
     the end of that month instead of using the current date. This ensures
-    backfill produces period-appropriate storage volumes.
+    backfill produces period-appropriate storage volumes. When a history
+    from _fetch_storage_lens_history() is given as well, the month-end values
+    are sliced from it instead of querying CloudWatch. When export_location
+    is set, the Storage Lens metrics export there is read instead of
+    CloudWatch, which adds the per-bucket rows. With breakdown, the CloudWatch
+    read also returns the storage class / region / account breakdown, at the
+    cost of the per-series query (see get_storage_lens_metrics()). Does not
+    depend on the cost data, so daily runs fetch it while collecting.
     """
     logger.info(
         "Querying S3 Storage Lens metrics (config_id=%s)",
@@ -36,7 +194,10 @@ def _enrich_with_storage_lens(
     )
     try:
         # Compute period-appropriate time window for Storage Lens query
-        sl_kwargs: dict[str, Any] = {"config_id": storage_lens_config_id}
+        sl_kwargs: dict[str, Any] = {
+            "config_id": storage_lens_config_id,
+            "breakdown": breakdown,
+        }
         if target_year is not None and target_month is not None:
             # Query around the end of the target month
             if target_month == 12:
@@ -48,42 +209,133 @@ def _enrich_with_storage_lens(
             sl_kwargs["start_time"] = start_dt
             sl_kwargs["end_time"] = end_dt
 
-        metrics = get_storage_lens_metrics(**sl_kwargs)
-        if metrics is not None:
-            # Add to storage_metrics
-            processed["summary"]["storage_metrics"]["storage_lens_total_bytes"] = (
-                metrics["total_bytes"]
-            )
-
-            # Recalculate cost_per_tb using Storage Lens volume (more accurate
-            # than CE-derived GB-Months since it reflects actual storage, not
-            # billing usage quantities that may include non-volume items)
-            storage_metrics = processed["summary"]["storage_metrics"]
-            total_bytes = metrics["total_bytes"]
-            if total_bytes > 0:
-                total_tb = total_bytes / 1_099_511_627_776  # 2^40 bytes per binary TB
-                storage_metrics["cost_per_tb_usd"] = round(
-                    storage_metrics["total_cost_usd"] / total_tb, 2
-                )
-
-            # Add storage_lens object to summary
-            processed["summary"]["storage_lens"] = {
-                "total_bytes": metrics["total_bytes"],
-                "object_count": metrics["object_count"],
-                "storage_lens_date": metrics["timestamp"],
-                "config_id": metrics["config_id"],
-                "org_id": metrics["org_id"],
-            }
-            logger.info(
-                "Storage Lens: %d bytes, %d objects (config: %s)",
-                metrics["total_bytes"],
-                metrics["object_count"],
-                metrics["config_id"],
-            )
+        if export_location:
+            return _read_storage_lens_export(export_location, sl_kwargs.get("end_time"))
+        if history is not None and target_year is not None and target_month is not None:
+            return storage_lens_month_end(history, target_year, target_month)
+        return get_storage_lens_metrics(**sl_kwargs)
     except Exception:
         logger.warning(
             "Failed to read S3 Storage Lens metrics, skipping", exc_info=True
         )
+        return None
+
+
+def _enrich_with_storage_lens(
+    processed: dict[str, Any], metrics: dict[str, Any] | None
+) -> None:
+    """Add S3 Storage Lens metrics from _fetch_storage_lens() to processed.
+
+    Updates the summary in-place; with export metrics, also sets the
+    per-bucket rows (processed["bucket_rows"]). No-op when metrics is None.
+    """
+    if metrics is None:
+        return
+    # Add to storage_metrics
+    processed["summary"]["storage_metrics"]["storage_lens_total_bytes"] = metrics[
+        "total_bytes"
+    ]
+
+    # Recalculate cost_per_tb using Storage Lens volume (more accurate
+    # than CE-derived GB-Months since it reflects actual storage, not
+    # billing usage quantities that may include non-volume items)
+    storage_metrics = processed["summary"]["storage_metrics"]
+    total_bytes = metrics["total_bytes"]
+    if total_bytes > 0:
+        total_tb = total_bytes / 1_099_511_627_776  # 2^40 bytes per binary TB
+        storage_metrics["cost_per_tb_usd"] = round(
+            storage_metrics["total_cost_usd"] / total_tb, 2
+        )
+
+    # Add storage_lens object to summary
+    processed["summary"]["storage_lens"] = {
+        "total_bytes": metrics["total_bytes"],
+        "object_count": metrics["object_count"],
+        "storage_lens_date": metrics["timestamp"],
+        "config_id": metrics["config_id"],
+        "org_id": metrics["org_id"],
+    }
+    # Storage class / region / account breakdown (per-month queries only;
+    # months sliced from the backfill history carry totals only)
+    for key in BREAKDOWN_DIMENSIONS:
+        if key in metrics:
+            processed["summary"]["storage_lens"][key] = metrics[key]
+    if "buckets" in metrics:
+        processed["bucket_rows"] = metrics["buckets"]
+    logger.info(
+        "Storage Lens: %d bytes, %d objects (config: %s)",
+        metrics["total_bytes"],
+        metrics["object_count"],
+        metrics["config_id"],
+    )
+
+
+def _read_storage_lens_export(
+    export_location: str, end_dt: datetime | None
+) -> dict[str, Any] | None:
+    """Read the Storage Lens export report for the day before end_dt.
+
+    Returns the export result shaped like get_storage_lens_metrics() output
+    (timestamp = report date, no org ID), or None without a report.
+    """
+    report_date = (end_dt - timedelta(days=1)).date() if end_dt else None
+    export = read_storage_lens_export(export_location, report_date=report_date)
+    if export is None:
+        return None
+    return {
+        **export,
+        "timestamp": f"{export['report_date']}T00:00:00+00:00",
+        "org_id": "",
+    }
+
+
+def _fetch_storage_lens_history(
+    storage_lens_config_id: str, backfill_months: list[tuple[int, int]]
+) -> dict[str, Any] | None:
+    """Fetch the daily Storage Lens series covering all backfill months at once.
+
+    The range spans the 14-day month-end window of the oldest month up to the
+    end of the newest month. Returns None (callers then query per month) if
+    the series is unavailable.
+    """
+    oldest_year, oldest_month = min(backfill_months)
+    newest_year, newest_month = max(backfill_months)
+    start = datetime(
+        oldest_year + oldest_month // 12, oldest_month % 12 + 1, 1, tzinfo=timezone.utc
+    ) - timedelta(days=14)
+    end = datetime(
+        newest_year + newest_month // 12, newest_month % 12 + 1, 1, tzinfo=timezone.utc
+    )
+    logger.info("Fetching Storage Lens history %s to %s", start.date(), end.date())
+    try:
+        return get_storage_lens_history(start, end, config_id=storage_lens_config_id)
+    except Exception:
+        logger.warning("Failed to fetch S3 Storage Lens history", exc_info=True)
+        return None
+
+
+def _discover_storage_lens(storage_lens_config_id: str) -> None:
+    """Discover Storage Lens once before concurrent reads; failures only log.
+
+    The reads then share the cached configuration and CloudWatch client
+    instead of each creating STS / S3 Control / CloudWatch clients.
+    """
+    try:
+        discover_storage_lens(storage_lens_config_id)
+    except Exception:
+        logger.warning("Failed to discover S3 Storage Lens", exc_info=True)
+
+
+def _update_storage_lens_series(bucket: str, storage_lens_config_id: str) -> None:
+    """Append new days to storage-lens.parquet; failures only log a warning."""
+    try:
+        update_storage_lens_series(
+            get_storage(bucket),
+            storage_lens_config_id,
+            now=datetime.now(timezone.utc),
+        )
+    except Exception:
+        logger.warning("Failed to update Storage Lens time series", exc_info=True)
 
 
 def _sanitize_error_message(error_msg: str) -> str:
@@ -97,16 +349,54 @@ def _sanitize_error_message(error_msg: str) -> str:
     return re.sub(r"\b\d{12}\b", "REDACTED", error_msg)
 
 
-def _month_exists_in_s3(s3_client: Any, bucket: str, year: int, month: int) -> bool:
-    """Check if data already exists for a given month in S3."""
-    period = f"{year:04d}-{month:02d}"
-    prefix = f"{period}/"
+def _month_exists(storage: Storage, year: int, month: int) -> bool:
+    """Check if data already exists for a given month in the data storage."""
+    prefix = f"{year:04d}-{month:02d}/"
+    try:
+        return storage.has_prefix(prefix)
+    except Exception:
+        logger.warning("Failed to check for existing period data", exc_info=True)
+        return False
+
+
+def _fetch_monthly_totals(
+    backfill_months: list[tuple[int, int]],
+    cost_filter: dict[str, Any] | None = None,
+) -> dict[str, float] | None:
+    """CE totals of all backfill months from one query; None on failure."""
+    start = month_range(*min(backfill_months))[0]
+    end = min(
+        month_range(*max(backfill_months))[1],
+        datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+    )
+    if start >= end:
+        return {}
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=1)
-        return "Contents" in response and len(response["Contents"]) > 0
+        return get_monthly_totals(boto3.client("ce"), start, end, cost_filter)
     except Exception:
-        logger.warning("Failed to check S3 for existing period data", exc_info=True)
+        logger.warning("Failed to fetch monthly totals for restatements", exc_info=True)
+        return None
+
+
+def _is_restated(
+    storage: Storage, label: str, totals: dict[str, float], tolerance: float
+) -> bool:
+    """Whether CE's total for label differs from its stored summary.json."""
+    if label not in totals:
+        return False
+    body = storage.get(f"{label}/summary.json")
+    if body is None:
+        return True
+    try:
+        stored = json.loads(body)["totals"]["current_cost_usd"]
+    except (ValueError, KeyError, TypeError):
+        return True
+    if abs(totals[label] - stored) <= tolerance:
         return False
+    logger.info(
+        "%s restated: stored %.2f, Cost Explorer %.2f", label, stored, totals[label]
+    )
+    return True
 
 
 def _generate_backfill_months(months: int) -> list[tuple[int, int]]:
@@ -136,31 +426,71 @@ def _handle_backfill(
     include_efs: bool,
     include_ebs: bool,
     months: int,
-    force: bool,
+    force: bool | str,
     storage_lens_config_id: str = "",
+    storage_lens_export_location: str = "",
+    cost_export_location: str = "",
+    cost_export_format: str = "cur2",
+    tolerance: float = 0.01,
+    group_by: list[dict[str, str]] | None = None,
+    cost_filter: dict[str, Any] | None = None,
+    storage_lens_breakdown: bool = False,
 ) -> dict[str, Any]:
-    """Handle backfill mode: process multiple historical months."""
+    """Handle backfill mode: process multiple historical months.
+
+    force=False skips months that already exist, force=True reprocesses all.
+    force="auto" reprocesses existing months only when their Cost Explorer
+    total (fetched for the whole range in one query) differs from the stored
+    totals.current_cost_usd by more than tolerance USD. With a cost export,
+    force="auto" uses the export's change tracking instead: existing months
+    are collected (incrementally) and reprocessed only when their input
+    fingerprint differs from the one they were written from.
+    """
     logger.info("Starting backfill for %d months (force=%s)", months, force)
 
-    s3 = boto3.client("s3")
+    storage = get_storage(bucket)
     backfill_months = _generate_backfill_months(months)
 
     succeeded: list[str] = []
     failed: list[dict[str, Any]] = []
     skipped: list[str] = []
+    restated: list[str] = []
+
+    monthly_totals: dict[str, float] | None = None
+    if force == "auto" and not cost_export_location:
+        monthly_totals = _fetch_monthly_totals(backfill_months, cost_filter)
+
+    # Storage Lens series for the whole range, fetched once on first use
+    sl_history: dict[str, Any] | None = None
+    sl_history_fetched = False
 
     for year, month in backfill_months:
         period_label = f"{year:04d}-{month:02d}"
         try:
-            # Check if already exists (unless force=True)
-            if not force and _month_exists_in_s3(s3, bucket, year, month):
-                logger.info("Skipping %s (already exists)", period_label)
-                skipped.append(period_label)
-                continue
+            # Check if already exists (unless force=True); in auto mode
+            # existing months are reprocessed only if restated (decided after
+            # collecting when a cost export tracks the changes)
+            check_export = False
+            if force is not True and _month_exists(storage, year, month):
+                if force == "auto" and cost_export_location:
+                    check_export = True
+                elif monthly_totals is not None and _is_restated(
+                    storage, period_label, monthly_totals, tolerance
+                ):
+                    restated.append(period_label)
+                else:
+                    logger.info("Skipping %s (already exists)", period_label)
+                    skipped.append(period_label)
+                    continue
 
             logger.info("Collecting data for %s", period_label)
-            collected = collect(
-                cost_category_name=cost_category_name,
+            collected = _collect(
+                cost_category_name,
+                cost_export_location,
+                cost_export_format,
+                storage=storage,
+                group_by=group_by,
+                cost_filter=cost_filter,
                 target_year=year,
                 target_month=month,
             )
@@ -177,16 +507,40 @@ def _handle_backfill(
                 skipped.append(period_label)
                 continue
 
+            if _export_output_unchanged(storage, collected, period_label):
+                if check_export:
+                    skipped.append(period_label)
+                    continue
+            elif check_export:
+                restated.append(period_label)
+
             logger.info("Processing data for %s", period_label)
             processed = process(
                 collected, include_efs=include_efs, include_ebs=include_ebs
             )
 
             # Enrich with S3 Storage Lens data (auto-discovers if no config ID set)
-            _enrich_with_storage_lens(processed, storage_lens_config_id, year, month)
+            if not sl_history_fetched and not storage_lens_export_location:
+                sl_history = _fetch_storage_lens_history(
+                    storage_lens_config_id, backfill_months
+                )
+                sl_history_fetched = True
+            _enrich_with_storage_lens(
+                processed,
+                _fetch_storage_lens(
+                    storage_lens_config_id,
+                    year,
+                    month,
+                    history=sl_history,
+                    export_location=storage_lens_export_location,
+                    breakdown=storage_lens_breakdown,
+                ),
+            )
 
             logger.info("Writing to S3 for %s", period_label)
             write_to_s3(processed, bucket, update_index_file=False)
+            if "export_state" in collected:
+                save_export_state(storage, collected["export_state"])
 
             succeeded.append(period_label)
             logger.info("Completed %s", period_label)
@@ -214,6 +568,8 @@ def _handle_backfill(
                     }
                 )
 
+    _update_storage_lens_series(bucket, storage_lens_config_id)
+
     # Update index once at the end (always, even if some months failed)
     logger.info("Updating index.json")
     try:
@@ -239,6 +595,7 @@ def _handle_backfill(
                 "succeeded": succeeded,
                 "failed": failed,
                 "skipped": skipped,
+                **({"restated": restated} if force == "auto" else {}),
             }
         ),
     }
@@ -273,6 +630,20 @@ def _build_prev_complete_collected(collected: dict[str, Any]) -> dict[str, Any]:
             "yoy_prev_complete", collected.get("cc_mapping", {})
         )
 
+    # Remap the split charge rules effective in each period the same way
+    rules_src: dict[str, list[dict[str, Any]]] = collected.get(
+        "split_charge_rules_by_period", {}
+    )
+    rules_remapped = {
+        key: rules_src[src_key]
+        for key, src_key in (
+            ("current", "prev_complete"),
+            ("prev_month", "prev_month"),
+            ("yoy", "yoy_prev_complete"),
+        )
+        if src_key in rules_src
+    }
+
     return {
         "now": collected["now"],
         "is_mtd": False,
@@ -295,11 +666,16 @@ def _build_prev_complete_collected(collected: dict[str, Any]) -> dict[str, Any]:
         "cc_mappings": cc_mappings_remapped,
         "split_charge_categories": collected.get("split_charge_categories", []),
         "split_charge_rules": collected.get("split_charge_rules", []),
+        "split_charge_rules_by_period": rules_remapped,
         "allocated_costs": {
             "current": allocated_costs.get("prev_complete", {}),
             "prev_month": allocated_costs.get("prev_month", {}),
             "yoy": allocated_costs.get("yoy_prev_complete", {}),
         },
+        "daily": {
+            "current": collected.get("daily", {}).get("prev_complete", {}),
+        },
+        "cost_filter": collected.get("cost_filter"),
     }
 
 
@@ -309,7 +685,13 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     Event payload:
         backfill (bool): Enable backfill mode (default: False)
         months (int): Number of months to backfill (default: 13)
-        force (bool): Force re-process existing months (default: False)
+        force (bool | "auto"): Force re-process existing months (default:
+            False); "auto" re-processes only restated months. In daily mode,
+            run even if the freshness probe finds no new CE data
+        tolerance (float): Backfill force="auto" tolerance in USD (default 0.01)
+
+    DATA_BUCKET is the output location: an S3 bucket name, or a file:// or
+    memory:// location for local runs (see dapanoskop.storage).
     """
     bucket = os.environ.get("DATA_BUCKET")
     if not bucket:
@@ -319,12 +701,26 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     include_efs = os.environ.get("INCLUDE_EFS", "false").lower() == "true"
     include_ebs = os.environ.get("INCLUDE_EBS", "false").lower() == "true"
     storage_lens_config_id = os.environ.get("STORAGE_LENS_CONFIG_ID", "")
+    storage_lens_breakdown = (
+        os.environ.get("STORAGE_LENS_BREAKDOWN", "false").lower() == "true"
+    )
+    storage_lens_export_location = os.environ.get("STORAGE_LENS_EXPORT_LOCATION", "")
+    cost_export_location = os.environ.get("COST_EXPORT_LOCATION", "")
+    cost_export_format = os.environ.get("COST_EXPORT_FORMAT", "cur2")
+    mtd_restatement_days = int(
+        os.environ.get("MTD_RESTATEMENT_DAYS") or DEFAULT_RESTATEMENT_DAYS
+    )
+    workload_dimensions = os.environ.get("WORKLOAD_DIMENSIONS", "")
+    group_by = parse_group_by(workload_dimensions) if workload_dimensions else None
+    cost_filter = parse_cost_filter(os.environ.get("COST_FILTER", ""))
 
     # Check for backfill mode
     backfill = event.get("backfill", False)
     if backfill:
         months = event.get("months", 13)
         force = event.get("force", False)
+        if force != "auto":
+            force = bool(force)
         return _handle_backfill(
             bucket,
             cost_category_name,
@@ -333,82 +729,214 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
             months,
             force,
             storage_lens_config_id,
+            storage_lens_export_location,
+            cost_export_location,
+            cost_export_format,
+            tolerance=float(event.get("tolerance", 0.01)),
+            group_by=group_by,
+            cost_filter=cost_filter,
+            storage_lens_breakdown=storage_lens_breakdown,
         )
 
     # Normal mode: collect MTD period + most recently completed month
     try:
-        logger.info("Starting data collection (bucket=%s)", bucket)
-        collected = collect(cost_category_name=cost_category_name)
-
-        mtd_period = None
-        written_periods: list[str] = []
-
-        # --- Write MTD period (current in-progress month) ---
-        # On the 1st of the month, _get_periods() omits "current" because
-        # the MTD window has zero width. Skip MTD processing in that case.
-        has_mtd = "current" in collected["raw_data"]
-        if has_mtd:
-            # Guard: skip writing when CE returned no cost groups for MTD
-            if not collected["raw_data"]["current"]:
-                logger.warning(
-                    "Skipping MTD period (no cost data returned by Cost Explorer)"
+        storage = get_storage(bucket)
+
+        # One Cost Explorer client for the run, shared by the probe and the
+        # collection threads (boto3 clients are thread-safe). It is created
+        # before the pool starts, as creating clients is not.
+        ce_client = None if cost_export_location else boto3.client("ce")
+
+        # Skip the full run when CE has not published new data since the last
+        # one (the export collector has its own change tracking). force=True
+        # still probes, to store the new fingerprint.
+        probe = (
+            None
+            if cost_export_location
+            else _probe_freshness(
+                cost_filter,
+                {
+                    "cost_category_name": cost_category_name,
+                    "group_by": group_by,
+                    "include_efs": include_efs,
+                    "include_ebs": include_ebs,
+                    "storage_lens_breakdown": storage_lens_breakdown,
+                },
+                ce_client,
+            )
+        )
+        if (
+            probe is not None
+            and not event.get("force", False)
+            and _refresh_if_unchanged(storage, probe)
+        ):
+            # The Storage Lens series has its own daily data, independent of
+            # the cost data the probe fingerprints
+            _update_storage_lens_series(bucket, storage_lens_config_id)
+            return {
+                "statusCode": 200,
+                "body": json.dumps(
+                    {"message": "unchanged", "period": probe["labels"][0]}
+                ),
+            }
+
+        # Storage Lens reads and the storage-lens.parquet series do not depend
+        # on the cost data and run while Cost Explorer is queried. CE periods
+        # are collected as separate futures, and each output is processed as
+        # soon as the periods it is built from are in; its upload overlaps the
+        # processing of the next one. Storage Lens is discovered up front so
+        # its reads share one cached discovery, and each read (and the series
+        # update) gets its own worker, so the CE period tasks are not queued
+        # behind them.
+        now = datetime.now(timezone.utc)
+        labels = daily_output_labels(get_periods(now))
+        _discover_storage_lens(storage_lens_config_id)
+        with ThreadPoolExecutor(max_workers=len(labels) + 1 + _COLLECT_WORKERS) as pool:
+            lens = {
+                label: pool.submit(
+                    _fetch_storage_lens,
+                    storage_lens_config_id,
+                    int(label[:4]),
+                    int(label[5:7]),
+                    export_location=storage_lens_export_location,
+                    breakdown=storage_lens_breakdown,
+                )
+                for label in labels
+            }
+            series = pool.submit(
+                _update_storage_lens_series, bucket, storage_lens_config_id
+            )
+
+            logger.info("Starting data collection (bucket=%s)", bucket)
+            if cost_export_location:
+                # The export is read in one pass; all outputs wait for it
+                export = pool.submit(
+                    _collect,
+                    cost_category_name,
+                    cost_export_location,
+                    cost_export_format,
+                    storage=storage,
                 )
+
+                def collected_for(period_keys: tuple[str, ...]) -> dict[str, Any]:
+                    return export.result()
+
             else:
-                forecast = collected.get("forecast")
-                logger.info(
-                    "Processing MTD period data (forecast_month_end=%s)",
-                    forecast,
+                collected_for = submit_collect(
+                    pool,
+                    cost_category_name=cost_category_name,
+                    now=now,
+                    daily_cube=storage,
+                    restatement_days=mtd_restatement_days,
+                    group_by=group_by,
+                    cost_filter=cost_filter,
+                    ce_client=ce_client,
                 )
-                processed_mtd = process(
-                    collected,
+
+            def storage_lens_for(label: str) -> dict[str, Any] | None:
+                if label in lens:
+                    return lens[label].result()
+                return _fetch_storage_lens(
+                    storage_lens_config_id,
+                    int(label[:4]),
+                    int(label[5:7]),
+                    export_location=storage_lens_export_location,
+                    breakdown=storage_lens_breakdown,
+                )
+
+            mtd_period = None
+            uploads: dict[str, Future[None]] = {}
+
+            # --- Write most recently completed month ---
+            # Its periods (prev_complete + prev_month + yoy_prev_complete) are
+            # submitted first and do not include the MTD window, so it is
+            # written while the MTD period is still being collected.
+            collected = collected_for(_PREV_COMPLETE_INPUTS)
+            prev_complete_label = collected["period_labels"].get("prev_complete")
+            if prev_complete_label and not _export_output_unchanged(
+                storage,
+                collected,
+                prev_complete_label,
+                list(_PREV_COMPLETE_INPUTS),
+            ):
+                logger.info("Processing prev_complete period: %s", prev_complete_label)
+                prev_collected = _build_prev_complete_collected(collected)
+                processed_prev = process(
+                    prev_collected,
                     include_efs=include_efs,
                     include_ebs=include_ebs,
-                    is_mtd=True,
+                    is_mtd=False,
                 )
-
-                period_label = processed_mtd["summary"]["period"]
-                p_year, p_month = int(period_label[:4]), int(period_label[5:7])
                 _enrich_with_storage_lens(
-                    processed_mtd, storage_lens_config_id, p_year, p_month
+                    processed_prev, storage_lens_for(prev_complete_label)
                 )
 
-                logger.info("Writing MTD period to S3")
-                write_to_s3(processed_mtd, bucket, update_index_file=False)
-                mtd_period = processed_mtd["summary"]["period"]
-                written_periods.append(mtd_period)
-                logger.info("MTD period written: %s", mtd_period)
-        else:
-            logger.info("1st of month — no MTD period to write")
-
-        # --- Write most recently completed month ---
-        # Build a collected-like dict for the prev_complete period using the
-        # data already fetched (prev_complete + prev_month + yoy).
-        prev_complete_label = collected["period_labels"].get("prev_complete")
-        if prev_complete_label:
-            logger.info("Processing prev_complete period: %s", prev_complete_label)
-            prev_collected = _build_prev_complete_collected(collected)
-            processed_prev = process(
-                prev_collected,
-                include_efs=include_efs,
-                include_ebs=include_ebs,
-                is_mtd=False,
-            )
-
-            pc_year = int(prev_complete_label[:4])
-            pc_month = int(prev_complete_label[5:7])
-            _enrich_with_storage_lens(
-                processed_prev, storage_lens_config_id, pc_year, pc_month
-            )
-
-            logger.info("Writing prev_complete period to S3")
-            write_to_s3(processed_prev, bucket, update_index_file=False)
-            written_periods.append(prev_complete_label)
-            logger.info("prev_complete period written: %s", prev_complete_label)
+                logger.info("Writing prev_complete period to S3")
+                uploads[prev_complete_label] = pool.submit(
+                    write_to_s3, processed_prev, bucket, update_index_file=False
+                )
 
-        # Update index once after all writes
-        if written_periods:
-            logger.info("Updating index.json")
-            update_index(bucket)
+            # --- Write MTD period (current in-progress month) ---
+            # On the 1st of the month, get_periods() omits "current" because
+            # the MTD window has zero width. Skip MTD processing in that case.
+            collected = collected_for(_MTD_INPUTS)
+            has_mtd = "current" in collected["raw_data"]
+            if has_mtd:
+                # Guard: skip writing when CE returned no cost groups for MTD
+                if not collected["raw_data"]["current"]:
+                    logger.warning(
+                        "Skipping MTD period (no cost data returned by Cost Explorer)"
+                    )
+                elif _export_output_unchanged(
+                    storage,
+                    collected,
+                    collected["period_labels"]["current"],
+                ):
+                    mtd_period = collected["period_labels"]["current"]
+                else:
+                    forecast = collected.get("forecast")
+                    logger.info(
+                        "Processing MTD period data (forecast_month_end=%s)",
+                        forecast,
+                    )
+                    processed_mtd = process(
+                        collected,
+                        include_efs=include_efs,
+                        include_ebs=include_ebs,
+                        is_mtd=True,
+                    )
+                    mtd_period = processed_mtd["summary"]["period"]
+                    _enrich_with_storage_lens(
+                        processed_mtd, storage_lens_for(mtd_period)
+                    )
+
+                    logger.info("Writing MTD period to S3")
+                    uploads[mtd_period] = pool.submit(
+                        write_to_s3, processed_mtd, bucket, update_index_file=False
+                    )
+            else:
+                logger.info("1st of month — no MTD period to write")
+
+            written_periods: list[str] = []
+            for label, upload in uploads.items():
+                upload.result()
+                written_periods.append(label)
+                logger.info("Period written: %s", label)
+
+            # Update index once after all writes
+            if written_periods:
+                logger.info("Updating index.json")
+                update_index(bucket)
+
+            if "export_state" in collected:
+                save_export_state(storage, collected["export_state"])
+            if probe is not None:
+                storage.put(
+                    FRESHNESS_KEY,
+                    json.dumps(probe, indent=2).encode(),
+                    content_type="application/json",
+                )
+            series.result()
 
         result_period = mtd_period or prev_complete_label or "none"
         logger.info("Pipeline completed: periods written=%s", written_periods)
@@ -3,117 +3,232 @@
 from __future__ import annotations
 
 import calendar
+import functools
 import io
 import json
 import logging
+from collections.abc import Iterator
 from datetime import date, datetime
 from typing import Any
 
-import boto3
-import pyarrow as pa
-import pyarrow.parquet as pq
-
 from dapanoskop.categories import categorize
+from dapanoskop.storage import Storage, get_storage
 
 logger = logging.getLogger(__name__)
 
 _DEFAULT_CC = "Uncategorized"
 _BYTES_PER_GB = 1_073_741_824  # 2^30 bytes per gibibyte (binary)
 _BYTES_PER_TB = 1_099_511_627_776  # 2^40 bytes per tebibyte (binary)
+_HOT_TIER_SUFFIXES = ("TimedStorage-ByteHrs", "TimedStorage-INT-FA-ByteHrs")
+
+# Column names and pyarrow types of the per-period parquet files
+# (SDS-DP-020205 / SDS-DP-020206). Column order is part of the SPA contract.
+_WORKLOAD_SCHEMA = (
+    ("cost_center", "string"),
+    ("workload", "string"),
+    ("period", "string"),
+    ("cost_usd", "float64"),
+)
+_USAGE_TYPE_SCHEMA = (
+    ("workload", "string"),
+    ("usage_type", "string"),
+    ("category", "string"),
+    ("period", "string"),
+    ("cost_usd", "float64"),
+    ("usage_quantity", "float64"),
+)
+# Daily cost per cost center, workload and category, from the daily cubes
+# (SDS-DP-020215); rows are sorted by these columns in this order
+_DAILY_SCHEMA = (
+    ("date", "date32"),
+    ("cost_center", "string"),
+    ("workload", "string"),
+    ("category", "string"),
+    ("cost_usd", "float64"),
+)
+# Per-bucket storage from the Storage Lens export (storage_lens_export.py)
+_BUCKET_SCHEMA = (
+    ("aws_account_number", "string"),
+    ("aws_region", "string"),
+    ("bucket_name", "string"),
+    ("total_bytes", "int64"),
+    ("object_count", "int64"),
+)
+
+
+def workload_name(key: str) -> str:
+    """Return the workload a CE group key names, "Untagged" when empty.
+
+    Tag and cost category keys are "Key$value", and the value may itself
+    contain "$"; dimension values have no prefix.
+    """
+    prefix, sep, value = key.partition("$")
+    return (value if sep else prefix) or "Untagged"
 
 
-def _parse_groups(
+def _iter_groups(
     groups: list[dict[str, Any]],
-) -> list[dict[str, Any]]:
-    """Parse CE API group results into flat records."""
-    rows = []
+) -> Iterator[tuple[str, str, float, float]]:
+    """Yield (workload, usage_type, cost, quantity) for each well-formed CE group."""
     for group in groups:
         keys = group.get("Keys", [])
         if len(keys) != 2:
             continue
-        app_tag = keys[0].removeprefix("App$")
-        usage_type = keys[1]
         metrics = group.get("Metrics", {})
-        cost = float(metrics.get("NetAmortizedCost", {}).get("Amount", 0))
-        quantity = float(metrics.get("UsageQuantity", {}).get("Amount", 0))
-        rows.append(
-            {
-                "workload": app_tag or "Untagged",
-                "usage_type": usage_type,
-                "category": categorize(usage_type),
-                "cost_usd": cost,
-                "usage_quantity": quantity,
-            }
+        # Tag workload keys are "Key$value"; dimension values have no prefix
+        yield (
+            workload_name(keys[0]),
+            keys[1],
+            float(metrics.get("NetAmortizedCost", {}).get("Amount", 0)),
+            float(metrics.get("UsageQuantity", {}).get("Amount", 0)),
         )
-    return rows
+
+
+@functools.lru_cache(maxsize=8192)
+def _classify_usage_type(usage_type: str) -> tuple[str, str | None, bool]:
+    """Classify a usage type once: (category, storage volume kind, is hot tier).
+
+    The storage volume kind is "efs" or "ebs" for EFS/EBS usage types (which
+    may contain "TimedStorage", e.g. EFS:TimedStorage-ByteHrs, but only count
+    when enabled), "s3" for other TimedStorage-* types, and None otherwise.
+    Substring and suffix checks are used because CE returns region-prefixed
+    usage types (e.g. USE1-TimedStorage-ByteHrs).
+    """
+    if "EFS:" in usage_type:
+        kind: str | None = "efs"
+    elif "EBS:" in usage_type:
+        kind = "ebs"
+    elif "TimedStorage" in usage_type:
+        kind = "s3"
+    else:
+        kind = None
+    is_hot = usage_type.endswith(_HOT_TIER_SUFFIXES)
+    return categorize(usage_type), kind, is_hot
+
+
+def _volume_kinds(include_efs: bool, include_ebs: bool) -> frozenset[str]:
+    """Return the storage volume kinds that count towards storage volume."""
+    kinds = {"s3"}
+    if include_efs:
+        kinds.add("efs")
+    if include_ebs:
+        kinds.add("ebs")
+    return frozenset(kinds)
+
+
+def _aggregate_period(
+    groups: list[dict[str, Any]],
+    volume_kinds: frozenset[str],
+    period_label: str | None = None,
+) -> dict[str, Any]:
+    """Aggregate one period's CE groups in a single pass.
+
+    Accumulates workload totals, category totals, storage volume (total and
+    hot tier GB-Months) and tagged/untagged cost in the same scan. When
+    period_label is given, the parquet-ready usage type rows for the period
+    are emitted as well so the raw groups never need to be walked again.
+    """
+    workloads: dict[str, float] = {}
+    categories: dict[str, float] = {}
+    volume_gb_months = 0.0
+    hot_gb_months = 0.0
+    tagged = 0.0
+    untagged = 0.0
+    usage_type_rows: list[dict[str, Any]] = []
+
+    for workload, usage_type, cost, quantity in _iter_groups(groups):
+        category, kind, is_hot = _classify_usage_type(usage_type)
+        workloads[workload] = workloads.get(workload, 0) + cost
+        categories[category] = categories.get(category, 0.0) + cost
+        if kind in volume_kinds:
+            volume_gb_months += quantity
+            if is_hot:
+                hot_gb_months += quantity
+        if workload == "Untagged":
+            untagged += cost
+        else:
+            tagged += cost
+        if period_label is not None:
+            usage_type_rows.append(
+                {
+                    "workload": workload,
+                    "usage_type": usage_type,
+                    "category": category,
+                    "period": period_label,
+                    "cost_usd": round(cost, 2),
+                    "usage_quantity": round(quantity, 6),
+                }
+            )
+
+    return {
+        "workloads": workloads,
+        "categories": categories,
+        "total_cost_usd": sum(workloads.values()),
+        "storage_cost_usd": categories.get("Storage", 0.0),
+        "volume_gb_months": volume_gb_months,
+        "hot_gb_months": hot_gb_months,
+        "tagged_cost_usd": tagged,
+        "untagged_cost_usd": untagged,
+        "usage_type_rows": usage_type_rows,
+    }
+
+
+def _daily_rows(
+    days: dict[str, list[list[Any]]],
+    mapping: dict[str, str],
+) -> list[dict[str, Any]]:
+    """Aggregate daily cube rows to sorted cost-by-day.parquet rows."""
+    costs: dict[tuple[str, str, str, str], float] = {}
+    for day, rows in days.items():
+        for app, usage_type, cost, _ in rows:
+            workload = workload_name(app)
+            key = (
+                day,
+                mapping.get(workload, _DEFAULT_CC),
+                workload,
+                _classify_usage_type(usage_type)[0],
+            )
+            costs[key] = costs.get(key, 0.0) + cost
+    return [
+        {
+            "date": date.fromisoformat(day),
+            "cost_center": cost_center,
+            "workload": workload,
+            "category": category,
+            "cost_usd": round(cost, 6),
+        }
+        for (day, cost_center, workload, category), cost in sorted(costs.items())
+    ]
 
 
 def _compute_storage_metrics(
-    rows: list[dict[str, Any]],
-    prev_rows: list[dict[str, Any]],
-    include_efs: bool,
-    include_ebs: bool,
+    current: dict[str, Any],
+    prev: dict[str, Any],
     mtd_period: tuple[str, str] | None = None,
     prev_is_partial: bool = False,
 ) -> dict[str, Any]:
-    """Compute storage volume and hot tier metrics from usage data.
+    """Compute storage volume and hot tier metrics from period aggregates.
 
     Note: AWS Cost Explorer returns UsageQuantity for TimedStorage-* in GB-Months,
     which represents the average GiB (binary gibibytes, 2^30 bytes) stored during
     the billing period. We convert GB-Months to bytes: GB-Months * 2^30.
 
     Args:
-        rows: Current period parsed rows.
-        prev_rows: Previous period parsed rows (may be partial for MTD comparisons).
-        include_efs: Include EFS in storage volume.
-        include_ebs: Include EBS in storage volume.
+        current: Current period aggregate from _aggregate_period().
+        prev: Previous period aggregate (may be partial for MTD comparisons).
         mtd_period: When provided, scale volume by (days_in_month / mtd_days) to
             correct for CE's prorated GB-Months in partial month windows. Tuple of
             (mtd_start, mtd_end_exclusive) date strings.
-        prev_is_partial: When True, prev_rows come from the prior partial period
+        prev_is_partial: When True, prev comes from the prior partial period
             (same number of days as current MTD), and the same volume scaling is
             applied to the prev volume using the same scale factor.
     """
-    total_cost = 0.0
-    prev_total_cost = 0.0
-    total_gb_months = 0.0
-    hot_gb_months = 0.0
-    prev_total_gb_months = 0.0
-    prev_hot_gb_months = 0.0
-
-    def _is_storage_volume(usage_type: str) -> bool:
-        # Check EFS/EBS prefixes first — they may contain "TimedStorage"
-        # (e.g. EFS:TimedStorage-ByteHrs) but should only count when enabled
-        if "EFS:" in usage_type:
-            return include_efs
-        if "EBS:" in usage_type:
-            return include_ebs
-        # CE returns usage types with region prefixes (e.g. USE1-TimedStorage-ByteHrs)
-        if "TimedStorage" in usage_type:
-            return True
-        return False
-
-    def _is_hot_tier(usage_type: str) -> bool:
-        # Match region-prefixed usage types (e.g. USE1-TimedStorage-ByteHrs)
-        return usage_type.endswith("TimedStorage-ByteHrs") or usage_type.endswith(
-            "TimedStorage-INT-FA-ByteHrs"
-        )
-
-    for row in rows:
-        if row["category"] == "Storage":
-            total_cost += row["cost_usd"]
-        if _is_storage_volume(row["usage_type"]):
-            total_gb_months += row["usage_quantity"]
-            if _is_hot_tier(row["usage_type"]):
-                hot_gb_months += row["usage_quantity"]
-
-    for row in prev_rows:
-        if row["category"] == "Storage":
-            prev_total_cost += row["cost_usd"]
-        if _is_storage_volume(row["usage_type"]):
-            prev_total_gb_months += row["usage_quantity"]
-            if _is_hot_tier(row["usage_type"]):
-                prev_hot_gb_months += row["usage_quantity"]
+    total_cost = current["storage_cost_usd"]
+    prev_total_cost = prev["storage_cost_usd"]
+    total_gb_months = current["volume_gb_months"]
+    hot_gb_months = current["hot_gb_months"]
+    prev_total_gb_months = prev["volume_gb_months"]
+    prev_hot_gb_months = prev["hot_gb_months"]
 
     # MTD volume scaling: CE reports prorated GB-Months for partial month windows.
     # Scale up to full-month equivalent: actual_bytes ≈ gb_months * (days_in_month / mtd_days).
@@ -177,28 +292,12 @@ def _compute_storage_metrics(
     return result
 
 
-def _aggregate_workloads(
-    rows: list[dict[str, Any]],
-) -> dict[str, float]:
-    """Sum cost per workload from parsed rows."""
-    totals: dict[str, float] = {}
-    for row in rows:
-        wl = row["workload"]
-        totals[wl] = totals.get(wl, 0) + row["cost_usd"]
-    return totals
-
-
 def _compute_tagging_coverage(
-    workload_costs: dict[str, float],
+    aggregate: dict[str, Any],
 ) -> dict[str, Any]:
-    """Compute tagged vs untagged cost breakdown."""
-    tagged = 0.0
-    untagged = 0.0
-    for wl, cost in workload_costs.items():
-        if wl == "Untagged" or not wl:
-            untagged += cost
-        else:
-            tagged += cost
+    """Compute tagged vs untagged cost breakdown from a period aggregate."""
+    tagged = aggregate["tagged_cost_usd"]
+    untagged = aggregate["untagged_cost_usd"]
     total = tagged + untagged
     pct = (tagged / total * 100) if total else 0
     return {
@@ -208,154 +307,174 @@ def _compute_tagging_coverage(
     }
 
 
-def _apply_split_charge_redistribution(
-    category_costs: dict[str, float],
-    rules: list[dict[str, Any]],
+def _parse_fixed_fractions(
+    source: str,
+    targets: list[str],
+    parameters: list[dict[str, Any]],
 ) -> dict[str, float]:
-    """Redistribute split charge source costs to target categories.
+    """Parse FIXED split charge Parameters into target -> fraction.
 
-    Applies AWS Cost Category split charge rules to redistribute source
-    category costs to their targets. Supports three methods:
-    - PROPORTIONAL: distribute proportional to existing target costs
-    - EVEN: distribute equally among targets
-    - FIXED: distribute by explicit percentage from Parameters
-
-    Returns a new dict with source costs zeroed and redistributed to targets.
+    AWS CE API returns positional values: Values[i] maps to Targets[i].
+    E.g. Targets=["Ops","Lab","Research"], Values=["15","20","25"]. The legacy
+    "target=percentage" format is also accepted.
     """
-    if not rules:
-        return dict(category_costs)
-
-    # Issue 1: Snapshot original costs so each rule reads from the pre-redistribution
-    # amounts. AWS evaluates each rule against the original costs independently —
-    # without this snapshot, a chained rule (A→B, B→C) would re-redistribute
-    # the cost already moved by the first rule.
-    original_costs = dict(category_costs)
-    result = dict(category_costs)
+    param_map: dict[str, float] = {}
+    for param in parameters:
+        values = param.get("Values", [])
+        if values and "=" in values[0]:
+            # Legacy "target=percentage" format
+            for val in values:
+                t_name, pct_str = val.split("=", 1)
+                t_name = t_name.strip()
+                pct_str = pct_str.strip()
+                try:
+                    param_map[t_name] = float(pct_str) / 100.0
+                except ValueError:
+                    logger.warning(
+                        "Skipping malformed FIXED split charge value %r "
+                        "(non-numeric percentage)",
+                        val,
+                    )
+        else:
+            # Positional format: Values[i] is the percentage for Targets[i]
+            for i, val in enumerate(values):
+                if i >= len(targets):
+                    logger.warning(
+                        "FIXED split charge has more values than targets "
+                        "for source %r, ignoring extra value %r",
+                        source,
+                        val,
+                    )
+                    break
+                try:
+                    param_map[targets[i]] = float(val) / 100.0
+                except ValueError:
+                    logger.warning(
+                        "Skipping malformed FIXED split charge value %r "
+                        "(non-numeric percentage) for target %r",
+                        val,
+                        targets[i],
+                    )
+
+    if param_map:
+        # Warn when percentages don't sum to 100%
+        total_fraction = sum(param_map.values())
+        if abs(total_fraction - 1.0) > 0.001:
+            logger.warning(
+                "FIXED split charge percentages for source %r sum to %.1f%% "
+                "(expected 100%%). Cost difference will be lost.",
+                source,
+                total_fraction * 100,
+            )
+    return param_map
 
-    for rule in rules:
-        source = rule["Source"]
-        # Read source amount from the original snapshot, not the mutated result
-        source_cost = original_costs.get(source, 0.0)
-        if source_cost == 0.0:
-            continue
 
+# A compiled split charge plan is a tuple of rows, one per applicable rule in
+# rule order: (source, targets, fractions). fractions is None for PROPORTIONAL
+# rows, whose weights depend on each period's target costs.
+_SplitChargePlan = tuple[tuple[str, tuple[str, ...], tuple[float, ...] | None], ...]
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_split_charge_plan_cached(rules_json: str) -> _SplitChargePlan:
+    rows = []
+    for rule in json.loads(rules_json):
+        source = rule["Source"]
         targets = rule.get("Targets", [])
         method = rule.get("Method", "PROPORTIONAL")
-        parameters = rule.get("Parameters", [])
-
         if not targets:
             continue
 
         if method == "FIXED":
-            # Parse explicit percentages from Parameters.
-            # AWS CE API returns positional values: Values[i] maps to Targets[i].
-            # E.g. Targets=["Ops","Lab","Research"], Values=["15","20","25"]
-            param_map: dict[str, float] = {}
-            for param in parameters:
-                values = param.get("Values", [])
-                if values and "=" in values[0]:
-                    # Legacy "target=percentage" format
-                    for val in values:
-                        t_name, pct_str = val.split("=", 1)
-                        t_name = t_name.strip()
-                        pct_str = pct_str.strip()
-                        try:
-                            param_map[t_name] = float(pct_str) / 100.0
-                        except ValueError:
-                            logger.warning(
-                                "Skipping malformed FIXED split charge value %r "
-                                "(non-numeric percentage)",
-                                val,
-                            )
-                else:
-                    # Positional format: Values[i] is the percentage for Targets[i]
-                    for i, val in enumerate(values):
-                        if i >= len(targets):
-                            logger.warning(
-                                "FIXED split charge has more values than targets "
-                                "for source %r, ignoring extra value %r",
-                                source,
-                                val,
-                            )
-                            break
-                        try:
-                            param_map[targets[i]] = float(val) / 100.0
-                        except ValueError:
-                            logger.warning(
-                                "Skipping malformed FIXED split charge value %r "
-                                "(non-numeric percentage) for target %r",
-                                val,
-                                targets[i],
-                            )
-
+            param_map = _parse_fixed_fractions(
+                source, targets, rule.get("Parameters", [])
+            )
             if param_map:
-                # Warn when percentages don't sum to 100%
-                total_fraction = sum(param_map.values())
-                if abs(total_fraction - 1.0) > 0.001:
-                    logger.warning(
-                        "FIXED split charge percentages for source %r sum to %.1f%% "
-                        "(expected 100%%). Cost difference will be lost.",
-                        source,
-                        total_fraction * 100,
-                    )
-                for target, fraction in param_map.items():
-                    result[target] = result.get(target, 0.0) + source_cost * fraction
-            else:
-                # Fallback to EVEN if parameters can't be parsed
-                share = source_cost / len(targets)
-                for target in targets:
-                    result[target] = result.get(target, 0.0) + share
-
-        elif method == "EVEN":
-            share = source_cost / len(targets)
-            for target in targets:
-                result[target] = result.get(target, 0.0) + share
+                rows.append((source, tuple(param_map), tuple(param_map.values())))
+                continue
+            # Fallback to EVEN if parameters can't be parsed
+            method = "EVEN"
 
+        if method == "EVEN":
+            rows.append((source, tuple(targets), (1.0 / len(targets),) * len(targets)))
         else:
-            # PROPORTIONAL (default) — read target costs from the original snapshot
-            # so that prior rules don't skew the proportions
-            target_costs = {t: original_costs.get(t, 0.0) for t in targets}
-            total_target_cost = sum(target_costs.values())
-
-            if total_target_cost > 0:
-                for target in targets:
-                    fraction = target_costs[target] / total_target_cost
-                    result[target] = result.get(target, 0.0) + source_cost * fraction
-            else:
-                # Fallback to EVEN when all targets have zero cost
-                share = source_cost / len(targets)
-                for target in targets:
-                    result[target] = result.get(target, 0.0) + share
+            # PROPORTIONAL (default) — weights resolved per period
+            rows.append((source, tuple(targets), None))
+    return tuple(rows)
 
-        # Zero out the source
-        result[source] = 0.0
 
+def _compile_split_charge_plan(rules: list[dict[str, Any]]) -> _SplitChargePlan:
+    """Compile split charge rules into a reusable allocation plan.
+
+    FIXED Parameters (positional and legacy formats) are parsed and validated
+    and EVEN shares resolved once, yielding rows of source -> target
+    fractions (see _apply_split_charge_plan() for why they are not folded into
+    one matrix). Plans are memoized on the rule content, so the current, prev_month
+    and prior partial periods and every backfill month share one compilation.
+    """
+    return _compile_split_charge_plan_cached(json.dumps(rules, sort_keys=True))
+
+
+def _apply_split_charge_plan(
+    plan: _SplitChargePlan,
+    category_costs: dict[str, float],
+) -> dict[str, float]:
+    """Apply a compiled split charge plan to one period's category totals.
+
+    Applies AWS Cost Category split charge rules to redistribute source
+    category costs to their targets (PROPORTIONAL, EVEN or FIXED, see
+    _compile_split_charge_plan()). Every row reads the source amount (and, for
+    PROPORTIONAL rows, the target weights) from the input costs, not from
+    partially redistributed results: AWS evaluates each rule against the
+    original costs independently, so a chained rule (A→B, B→C) must not
+    re-redistribute cost already moved. Rows are applied in rule order, each
+    crediting its targets and then zeroing its source, so a source that an
+    earlier rule credited loses that share. Returns a new dict.
+
+    The rows are applied in a loop rather than as one source -> target matrix
+    product: which credits survive depends on rule order and on which sources
+    carry cost in the period (a zero-cost source is not zeroed, so it keeps
+    what earlier rules credited), and PROPORTIONAL weights are that period's
+    target costs, so neither can be resolved when the plan is compiled. A plan
+    has one row per rule, so the loop is not where processing time goes.
+    """
+    result = dict(category_costs)
+    for source, targets, fractions in plan:
+        source_cost = category_costs.get(source, 0.0)
+        if source_cost == 0.0:
+            continue
+        if fractions is None:
+            # PROPORTIONAL: weight by the period's original target costs, falling
+            # back to EVEN when all targets have zero cost.
+            weights = {t: category_costs.get(t, 0.0) for t in targets}
+            total_weight = sum(weights.values())
+            if total_weight > 0:
+                fractions = tuple(weights[t] / total_weight for t in targets)
+            else:
+                fractions = (1.0 / len(targets),) * len(targets)
+        for target, fraction in zip(targets, fractions):
+            result[target] = result.get(target, 0.0) + source_cost * fraction
+        result[source] = 0.0
     return result
 
 
 def _compute_mtd_comparison(
-    raw_partial: list[dict[str, Any]],
+    partial_costs: dict[str, float],
     partial_dates: tuple[str, str],
     partial_allocated: dict[str, float],
     cc_groups: dict[str, list[str]],
     cc_mapping: dict[str, str],
     split_charge_cats: list[str],
-    split_charge_rules: list[dict[str, Any]],
+    split_charge_plan: _SplitChargePlan,
 ) -> dict[str, Any]:
     """Compute mtd_comparison aggregates from the prior partial period data.
 
     Returns the mtd_comparison dict to embed in summary.json.
     """
     prior_partial_start, prior_partial_end_exclusive = partial_dates
-    partial_rows = _parse_groups(raw_partial)
-    partial_costs = _aggregate_workloads(partial_rows)
 
     # Apply split charge redistribution to partial allocated costs if needed
-    partial_alloc = dict(partial_allocated)
-    if split_charge_rules:
-        partial_alloc = _apply_split_charge_redistribution(
-            partial_alloc, split_charge_rules
-        )
+    partial_alloc = _apply_split_charge_plan(split_charge_plan, partial_allocated)
 
     comparison_centers = []
     for cc_name in sorted(cc_groups):
@@ -425,29 +544,52 @@ def process(
     cc_mappings: dict[str, dict[str, str]] = collected.get("cc_mappings", {})
     split_charge_cats: list[str] = collected.get("split_charge_categories", [])
     split_charge_rules: list[dict[str, Any]] = collected.get("split_charge_rules", [])
+    # Rules of the definition version effective in each period; periods without
+    # an entry fall back to the current rules
+    rules_by_period: dict[str, list[dict[str, Any]]] = collected.get(
+        "split_charge_rules_by_period", {}
+    )
+    split_charge_plan = _compile_split_charge_plan(split_charge_rules)
     allocated_costs: dict[str, dict[str, float]] = collected.get("allocated_costs", {})
 
     def _period_cc_mapping(period_key: str) -> dict[str, str]:
         """Return the CC mapping for a given period, falling back to cc_mapping."""
         return cc_mappings.get(period_key, cc_mapping)
 
-    # Parse primary periods (exclude prev_month_partial — handled separately)
+    def _period_plan(period_key: str) -> _SplitChargePlan:
+        """Return the compiled split charge plan for a period's own rules."""
+        if period_key in rules_by_period:
+            return _compile_split_charge_plan(rules_by_period[period_key])
+        return split_charge_plan
+
+    def _period_sources(period_key: str) -> set[str]:
+        """Return the split charge sources of a period's own rules."""
+        if period_key in rules_by_period:
+            return {rule["Source"] for rule in rules_by_period[period_key]}
+        return set(split_charge_cats)
+
+    # Aggregate every period in a single pass over its groups. Parquet usage type
+    # rows are emitted only for the primary periods (current, prev_month, yoy);
+    # prev_month_partial and prev_complete only feed summary aggregates.
+    volume_kinds = _volume_kinds(include_efs, include_ebs)
     primary_keys = ["current", "prev_month", "yoy"]
-    parsed: dict[str, list[dict[str, Any]]] = {}
+    aggregates: dict[str, dict[str, Any]] = {}
     for period_key in primary_keys:
-        if period_key in raw_data:
-            parsed[period_key] = _parse_groups(raw_data[period_key])
-        else:
-            parsed[period_key] = []
-
-    current_rows = parsed["current"]
-    prev_rows = parsed["prev_month"]
-    yoy_rows = parsed["yoy"]
+        aggregates[period_key] = _aggregate_period(
+            raw_data.get(period_key, []),
+            volume_kinds,
+            period_labels.get(period_key),
+        )
+    has_partial = is_mtd and "prev_month_partial" in raw_data
+    if has_partial:
+        aggregates["prev_month_partial"] = _aggregate_period(
+            raw_data["prev_month_partial"], volume_kinds
+        )
 
     # Workload cost sums per period
-    current_costs = _aggregate_workloads(current_rows)
-    prev_costs = _aggregate_workloads(prev_rows)
-    yoy_costs = _aggregate_workloads(yoy_rows)
+    current_costs = aggregates["current"]["workloads"]
+    prev_costs = aggregates["prev_month"]["workloads"]
+    yoy_costs = aggregates["yoy"]["workloads"]
 
     # Group workloads into cost centers using the current period's mapping.
     # This determines the CC structure (which CCs exist and which workloads belong
@@ -456,10 +598,8 @@ def process(
     current_mapping = _period_cc_mapping("current")
     all_workloads = set(current_costs) | set(prev_costs) | set(yoy_costs)
     partial_costs: dict[str, float] | None = None
-    if is_mtd and "prev_month_partial" in raw_data:
-        partial_costs = _aggregate_workloads(
-            _parse_groups(raw_data["prev_month_partial"])
-        )
+    if has_partial:
+        partial_costs = aggregates["prev_month_partial"]["workloads"]
         all_workloads |= set(partial_costs)
     cc_groups: dict[str, list[str]] = {}
     for wl in all_workloads:
@@ -486,30 +626,34 @@ def process(
     workload_cc_prev = _aggregate_by_cc(prev_costs, prev_mapping)
     workload_cc_yoy = _aggregate_by_cc(yoy_costs, yoy_mapping)
 
-    # Build cost center summaries — apply split charge redistribution to current and
-    # prev_month periods only (not yoy).
+    # Build cost center summaries — apply split charge redistribution to each period
+    # with the rules that were effective in it.
     #
-    # CE's NetAmortizedCost query already encodes the historically-correct split charge
-    # allocation for each period. For the YoY period (12 months ago), the Cost Category
-    # definition may have had different split charge rules — e.g. PROPORTIONAL in Jan 2025
-    # vs FIXED percentages in Jan 2026. Re-applying Jan 2026's rules to Jan 2025's
-    # allocated costs would double-redistribute with the wrong percentages.
-    #
-    # prev_month (last month) uses the same Cost Category definition as current and
-    # CE returns pre-redistribution balances for it, so redistribution is applied there.
-    # yoy_allocated is used as-is and falls back to workload sums via the per-period gate
-    # if the keys don't match (e.g. "No cost category" for pre-category periods).
+    # CE returns pre-redistribution balances, but the Cost Category definition may
+    # have had different split charge rules 12 months ago — e.g. PROPORTIONAL in
+    # Jan 2025 vs FIXED percentages in Jan 2026. Re-applying Jan 2026's rules to
+    # Jan 2025's allocated costs would redistribute with the wrong percentages, so
+    # the YoY period is only redistributed when its own rules were collected
+    # (split_charge_rules_by_period). Otherwise yoy_allocated is used as-is, falls
+    # back to workload sums via the per-period gate if the keys don't match (e.g.
+    # "No cost category" for pre-category periods), and its split charge sources
+    # are redistributed approximately after the loop below.
     current_allocated = allocated_costs.get("current", {})
     prev_allocated = allocated_costs.get("prev_month", {})
     yoy_allocated = allocated_costs.get("yoy", {})
+    yoy_rules_known = "yoy" in rules_by_period
 
-    if split_charge_rules:
-        current_allocated = _apply_split_charge_redistribution(
-            current_allocated, split_charge_rules
-        )
-        prev_allocated = _apply_split_charge_redistribution(
-            prev_allocated, split_charge_rules
-        )
+    current_allocated = _apply_split_charge_plan(
+        _period_plan("current"), current_allocated
+    )
+    prev_allocated = _apply_split_charge_plan(
+        _period_plan("prev_month"), prev_allocated
+    )
+    if yoy_rules_known:
+        yoy_allocated = _apply_split_charge_plan(_period_plan("yoy"), yoy_allocated)
+    current_sources = _period_sources("current")
+    prev_sources = _period_sources("prev_month")
+    yoy_sources = _period_sources("yoy")
 
     # Determine if yoy_allocated covers real cost center names (as opposed to only
     # sentinel keys like "No cost category" from pre-category periods).
@@ -532,7 +676,7 @@ def process(
 
     cost_centers = []
     for cc_name in sorted(cc_groups):
-        is_split_charge = cc_name in split_charge_cats
+        is_split_charge = cc_name in current_sources
         wls = cc_groups[cc_name]
         workloads = []
         for wl_name in wls:
@@ -584,20 +728,23 @@ def process(
             cc_yoy = round(workload_cc_yoy.get(cc_name, 0.0), 2)
 
         # Split charge categories have their cost redistributed to others;
-        # show them with zero cost to avoid double-counting.
+        # show them with zero cost to avoid double-counting. A category is zeroed
+        # in the periods whose own rules make it a source.
         #
-        # For current/prev_month, _apply_split_charge_redistribution() already moved
-        # the source cost to targets before this loop, so zeroing is safe here.
+        # _apply_split_charge_plan() already moved the source cost to targets
+        # before this loop, so zeroing is safe here.
         #
-        # For YoY, redistribution is intentionally skipped (to avoid re-applying the
-        # current period's rules to historically-different allocations). The YoY
-        # source balance is preserved in cc_yoy for now and redistributed in the
-        # post-loop pass below before the split charge zeroing is applied (Bug 1).
+        # Without the YoY period's own rules, redistribution is skipped (to avoid
+        # re-applying the current period's rules to historically-different
+        # allocations). The YoY source balance is preserved in cc_yoy for now and
+        # redistributed in the post-loop pass below before the split charge
+        # zeroing is applied (Bug 1).
         if is_split_charge:
             cc_current = 0.0
+        if cc_name in prev_sources:
             cc_prev = 0.0
-            # cc_yoy is intentionally NOT zeroed here; the post-loop redistribution
-            # pass will move it to targets and then zero it.
+        if yoy_rules_known and cc_name in yoy_sources:
+            cc_yoy = 0.0
 
         cc_entry: dict[str, Any] = {
             "name": cc_name,
@@ -621,7 +768,10 @@ def process(
     # When YoY falls back to workload sums (yoy_alloc_covers_known_cc is False),
     # the workload-based totals are independent — just zero the split charge
     # sources without redistribution (same as the existing current/prev behavior).
-    if yoy_alloc_covers_known_cc and split_charge_rules:
+    #
+    # Both passes only apply when the YoY period's own rules are unknown; with
+    # them, yoy_allocated was redistributed exactly before the loop.
+    if not yoy_rules_known and yoy_alloc_covers_known_cc and split_charge_rules:
         cc_yoy_map = {cc["name"]: cc for cc in cost_centers}
         for rule in split_charge_rules:
             source_name = rule["Source"]
@@ -649,7 +799,11 @@ def process(
     # Zero any split charge sources whose yoy_cost_usd was not consumed by the
     # redistribution pass above (zero-balance sources, or workload-sum fallback path).
     for cc in cost_centers:
-        if cc.get("is_split_charge") and cc["yoy_cost_usd"] != 0.0:
+        if (
+            not yoy_rules_known
+            and cc.get("is_split_charge")
+            and cc["yoy_cost_usd"] != 0.0
+        ):
             cc["yoy_cost_usd"] = 0.0
 
     # Sort cost centers by current cost descending
@@ -660,22 +814,18 @@ def process(
     # For MTD runs, compare storage against the prior partial period (same elapsed days)
     # rather than pm2 (two months ago). Also pass the MTD period dates so volumes can be
     # scaled up from CE's prorated GB-Months to actual-bytes-stored.
-    if is_mtd and "prev_month_partial" in raw_data:
-        storage_prev_rows = _parse_groups(raw_data["prev_month_partial"])
-        mtd_period = periods_raw.get("current")
+    if has_partial:
         storage_metrics = _compute_storage_metrics(
-            current_rows,
-            storage_prev_rows,
-            include_efs,
-            include_ebs,
-            mtd_period=mtd_period,
+            aggregates["current"],
+            aggregates["prev_month_partial"],
+            mtd_period=periods_raw.get("current"),
             prev_is_partial=True,
         )
     else:
         storage_metrics = _compute_storage_metrics(
-            current_rows, prev_rows, include_efs, include_ebs
+            aggregates["current"], aggregates["prev_month"]
         )
-    tagging_coverage = _compute_tagging_coverage(current_costs)
+    tagging_coverage = _compute_tagging_coverage(aggregates["current"])
 
     # Build the summary labels dict — only include the three standard comparison
     # periods (current, prev_month, yoy); prev_complete and prev_month_partial
@@ -688,12 +838,14 @@ def process(
     # and split charge rules. These provide headline numbers immune to CC renames,
     # split charge rule changes, and allocation logic.
     totals: dict[str, Any] = {
-        "current_cost_usd": round(sum(current_costs.values()), 2),
-        "prev_month_cost_usd": round(sum(prev_costs.values()), 2),
-        "yoy_cost_usd": round(sum(yoy_costs.values()), 2),
+        "current_cost_usd": round(aggregates["current"]["total_cost_usd"], 2),
+        "prev_month_cost_usd": round(aggregates["prev_month"]["total_cost_usd"], 2),
+        "yoy_cost_usd": round(aggregates["yoy"]["total_cost_usd"], 2),
     }
-    if partial_costs is not None:
-        totals["mtd_prior_partial_cost_usd"] = round(sum(partial_costs.values()), 2)
+    if has_partial:
+        totals["mtd_prior_partial_cost_usd"] = round(
+            aggregates["prev_month_partial"]["total_cost_usd"], 2
+        )
 
     # For MTD periods, add forecast data when available.
     # forecast_total_usd = full month-end cost projection from GetCostForecast.
@@ -707,10 +859,9 @@ def process(
             forecast_total = forecast_amount
 
             # Compute prev_complete total from raw_data if present
-            prev_complete_groups = raw_data.get("prev_complete", [])
-            prev_complete_rows = _parse_groups(prev_complete_groups)
-            prev_complete_costs = _aggregate_workloads(prev_complete_rows)
-            prev_complete_total = sum(prev_complete_costs.values())
+            prev_complete_total = _aggregate_period(
+                raw_data.get("prev_complete", []), volume_kinds
+            )["total_cost_usd"]
 
             totals["forecast_total_usd"] = round(forecast_total, 2)
             if prev_complete_total:
@@ -733,18 +884,18 @@ def process(
 
     # When this is the in-progress MTD period and prior partial data is present,
     # compute and attach the mtd_comparison aggregates.
-    if is_mtd and "prev_month_partial" in raw_data:
+    if partial_costs is not None:
         partial_dates = periods_raw.get("prev_month_partial", ("", ""))
         partial_allocated = allocated_costs.get("prev_month_partial", {})
 
         mtd_comparison = _compute_mtd_comparison(
-            raw_data["prev_month_partial"],
+            partial_costs,
             partial_dates,
             partial_allocated,
             cc_groups,
             cc_mapping,
-            split_charge_cats,
-            split_charge_rules,
+            sorted(_period_sources("prev_month_partial")),
+            _period_plan("prev_month_partial"),
         )
         # Align mtd_comparison.cost_centers order with the parent cost_centers
         # (sorted by current_cost_usd descending) for consistent UI rendering.
@@ -754,6 +905,10 @@ def process(
         )
         summary["mtd_comparison"] = mtd_comparison
 
+    # Record the server-side Cost Explorer filter the figures are based on
+    if collected.get("cost_filter"):
+        summary["cost_filter"] = collected["cost_filter"]
+
     # Build parquet data (only primary periods)
     parquet_period_map: dict[str, dict[str, float]] = {
         "current": current_costs,
@@ -776,132 +931,160 @@ def process(
                     }
                 )
 
-    usage_type_rows = []
-    for period_key in primary_keys:
-        if period_key not in period_labels:
-            continue
-        label = period_labels[period_key]
-        for row in parsed[period_key]:
-            usage_type_rows.append(
-                {
-                    "workload": row["workload"],
-                    "usage_type": row["usage_type"],
-                    "category": row["category"],
-                    "period": label,
-                    "cost_usd": round(row["cost_usd"], 2),
-                    "usage_quantity": round(row["usage_quantity"], 6),
-                }
-            )
+    usage_type_rows = [
+        row
+        for period_key in primary_keys
+        for row in aggregates[period_key]["usage_type_rows"]
+    ]
+
+    daily_rows = _daily_rows(
+        collected.get("daily", {}).get("current", {}), current_mapping
+    )
 
     return {
         "summary": summary,
         "workload_rows": workload_rows,
         "usage_type_rows": usage_type_rows,
+        "daily_rows": daily_rows,
     }
 
 
-def update_index(bucket: str) -> None:
-    """Scan S3 bucket and update index.json with all available periods."""
-    s3 = boto3.client("s3")
-    paginator = s3.get_paginator("list_objects_v2")
-    periods: list[str] = []
-    for page in paginator.paginate(Bucket=bucket, Delimiter="/"):
-        for prefix_entry in page.get("CommonPrefixes", []):
-            p = prefix_entry["Prefix"].rstrip("/")
-            if len(p) == 7 and p[4] == "-" and p[:4].isdigit() and p[5:].isdigit():
-                periods.append(p)
-    periods.sort(reverse=True)
+def _parquet_bytes(
+    rows: list[dict[str, Any]],
+    schema: tuple[tuple[str, str], ...],
+    sorted_by: int = 0,
+) -> bytes:
+    """Serialize row dicts to an in-memory parquet file.
+
+    pyarrow is imported here rather than at module level: it dominates the
+    package's import time and is only needed once a parquet file is actually
+    written, so cold starts that fail early or only update the index never
+    load it.
+
+    sorted_by is the number of leading schema columns the rows are sorted
+    by. They are then recorded as the sort order and a page index is
+    written, so readers can skip pages by those columns' min/max statistics.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table(
+        {
+            name: pa.array([r[name] for r in rows], type=getattr(pa, type_name)())
+            for name, type_name in schema
+        }
+    )
+    buf = io.BytesIO()
+    if sorted_by:
+        pq.write_table(
+            table,
+            buf,
+            sorting_columns=[pq.SortingColumn(i) for i in range(sorted_by)],
+            write_page_index=True,
+        )
+    else:
+        pq.write_table(table, buf)
+    return buf.getvalue()
 
-    s3.put_object(
-        Bucket=bucket,
-        Key="index.json",
-        Body=json.dumps({"periods": periods}).encode(),
-        ContentType="application/json",
+
+def serialize_outputs(processed: dict[str, Any]) -> list[tuple[str, bytes, str]]:
+    """Serialize a processed period to its output files.
+
+    Returns (key, body, content type) for summary.json and, when they have
+    rows, cost-by-workload.parquet, cost-by-usage-type.parquet,
+    cost-by-day.parquet and storage-by-bucket.parquet, keyed under the
+    period prefix.
+    """
+    prefix = f"{processed['summary']['period']}/"
+    outputs = [
+        (
+            f"{prefix}summary.json",
+            json.dumps(processed["summary"], indent=2).encode(),
+            "application/json",
+        )
+    ]
+    if processed["workload_rows"]:
+        outputs.append(
+            (
+                f"{prefix}cost-by-workload.parquet",
+                _parquet_bytes(processed["workload_rows"], _WORKLOAD_SCHEMA),
+                "application/octet-stream",
+            )
+        )
+    if processed["usage_type_rows"]:
+        outputs.append(
+            (
+                f"{prefix}cost-by-usage-type.parquet",
+                _parquet_bytes(processed["usage_type_rows"], _USAGE_TYPE_SCHEMA),
+                "application/octet-stream",
+            )
+        )
+    if processed.get("daily_rows"):
+        outputs.append(
+            (
+                f"{prefix}cost-by-day.parquet",
+                _parquet_bytes(processed["daily_rows"], _DAILY_SCHEMA, sorted_by=4),
+                "application/octet-stream",
+            )
+        )
+    if processed.get("bucket_rows"):
+        outputs.append(
+            (
+                f"{prefix}storage-by-bucket.parquet",
+                _parquet_bytes(processed["bucket_rows"], _BUCKET_SCHEMA),
+                "application/octet-stream",
+            )
+        )
+    return outputs
+
+
+def write_index(storage: Storage) -> None:
+    """Rewrite index.json with all periods present in the storage."""
+    periods = [
+        p
+        for p in storage.list_prefixes()
+        if len(p) == 7 and p[4] == "-" and p[:4].isdigit() and p[5:].isdigit()
+    ]
+    periods.sort(reverse=True)
+    storage.put(
+        "index.json",
+        json.dumps({"periods": periods}).encode(),
+        content_type="application/json",
     )
 
 
+def write_outputs(
+    processed: dict[str, Any],
+    storage: Storage,
+    update_index_file: bool = True,
+) -> None:
+    """Write summary.json and parquet files of a processed period to storage."""
+    for key, body, content_type in serialize_outputs(processed):
+        storage.put(key, body, content_type=content_type)
+
+    if update_index_file:
+        write_index(storage)
+
+
+def update_index(bucket: str) -> None:
+    """Scan the data bucket and update index.json with all available periods.
+
+    bucket is a storage location (see dapanoskop.storage.get_storage); a
+    plain bucket name selects S3.
+    """
+    write_index(get_storage(bucket))
+
+
 def write_to_s3(
     processed: dict[str, Any],
     bucket: str,
     update_index_file: bool = True,
 ) -> None:
-    """Write summary.json and parquet files to S3.
+    """Write summary.json and parquet files to the data bucket.
 
     Args:
         processed: Processed data from process()
-        bucket: S3 bucket name
+        bucket: Storage location (S3 bucket name, s3://, file:// or memory://)
         update_index_file: Whether to update index.json (default True, set False for batch operations)
     """
-    s3 = boto3.client("s3")
-    summary = processed["summary"]
-    period = summary["period"]
-    prefix = f"{period}/"
-
-    # Write summary.json
-    s3.put_object(
-        Bucket=bucket,
-        Key=f"{prefix}summary.json",
-        Body=json.dumps(summary, indent=2).encode(),
-        ContentType="application/json",
-    )
-
-    # Write cost-by-workload.parquet
-    wl_rows = processed["workload_rows"]
-    if wl_rows:
-        wl_table = pa.table(
-            {
-                "cost_center": pa.array(
-                    [r["cost_center"] for r in wl_rows], type=pa.string()
-                ),
-                "workload": pa.array(
-                    [r["workload"] for r in wl_rows], type=pa.string()
-                ),
-                "period": pa.array([r["period"] for r in wl_rows], type=pa.string()),
-                "cost_usd": pa.array(
-                    [r["cost_usd"] for r in wl_rows], type=pa.float64()
-                ),
-            }
-        )
-        buf = io.BytesIO()
-        pq.write_table(wl_table, buf)
-        s3.put_object(
-            Bucket=bucket,
-            Key=f"{prefix}cost-by-workload.parquet",
-            Body=buf.getvalue(),
-            ContentType="application/octet-stream",
-        )
-
-    # Write cost-by-usage-type.parquet
-    ut_rows = processed["usage_type_rows"]
-    if ut_rows:
-        ut_table = pa.table(
-            {
-                "workload": pa.array(
-                    [r["workload"] for r in ut_rows], type=pa.string()
-                ),
-                "usage_type": pa.array(
-                    [r["usage_type"] for r in ut_rows], type=pa.string()
-                ),
-                "category": pa.array(
-                    [r["category"] for r in ut_rows], type=pa.string()
-                ),
-                "period": pa.array([r["period"] for r in ut_rows], type=pa.string()),
-                "cost_usd": pa.array(
-                    [r["cost_usd"] for r in ut_rows], type=pa.float64()
-                ),
-                "usage_quantity": pa.array(
-                    [r["usage_quantity"] for r in ut_rows], type=pa.float64()
-                ),
-            }
-        )
-        buf = io.BytesIO()
-        pq.write_table(ut_table, buf)
-        s3.put_object(
-            Bucket=bucket,
-            Key=f"{prefix}cost-by-usage-type.parquet",
-            Body=buf.getvalue(),
-            ContentType="application/octet-stream",
-        )
-
-    if update_index_file:
-        update_index(bucket)
+    write_outputs(processed, get_storage(bucket), update_index_file)
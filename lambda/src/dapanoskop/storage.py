@@ -0,0 +1,259 @@
+"""Output storage backends for the pipeline's data files.
+
+The pipeline writes summary.json, parquet files and index.json to an object
+store. Where they go is chosen by a location string (the DATA_BUCKET
+environment variable):
+
+  my-bucket, s3://my-bucket   S3Storage — the deployed configuration
+  file:///path/to/dir         LocalStorage — files under a local directory
+  memory://name               MemoryStorage — a process-wide in-memory store
+
+All backends support the same operations: put (optionally conditional on the
+key not existing, or on its current ETag), get, head, list_prefixes and
+has_prefix. ETags are the quoted MD5 of the object, as S3 returns for
+single-part uploads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Any, Protocol
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+_MEMORY_STORES: dict[str, MemoryStorage] = {}
+
+
+class PreconditionFailedError(Exception):
+    """A conditional put did not match the object's current state."""
+
+
+class Storage(Protocol):
+    location: str
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+        if_none_match: bool = False,
+        if_match: str | None = None,
+    ) -> str: ...
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def head(self, key: str) -> dict[str, Any] | None: ...
+
+    def list_prefixes(self, prefix: str = "") -> list[str]: ...
+
+    def has_prefix(self, prefix: str) -> bool: ...
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+def _check_precondition(
+    key: str, current_etag: str | None, if_none_match: bool, if_match: str | None
+) -> None:
+    if if_none_match and current_etag is not None:
+        raise PreconditionFailedError(f"{key} already exists")
+    if if_match is not None and current_etag != if_match:
+        raise PreconditionFailedError(
+            f"{key} ETag is {current_etag}, expected {if_match}"
+        )
+
+
+def _common_prefixes(keys: Any, prefix: str) -> list[str]:
+    """Emulate ListObjectsV2 CommonPrefixes (delimiter "/") over key names."""
+    prefixes = set()
+    for key in keys:
+        if key.startswith(prefix) and "/" in key[len(prefix) :]:
+            prefixes.add(prefix + key[len(prefix) :].split("/", 1)[0])
+    return sorted(prefixes)
+
+
+class S3Storage:
+    """Objects in an S3 bucket."""
+
+    def __init__(self, bucket: str, client: Any = None) -> None:
+        self.bucket = bucket
+        self.location = f"s3://{bucket}"
+        self.client = client if client is not None else boto3.client("s3")
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+        if_none_match: bool = False,
+        if_match: str | None = None,
+    ) -> str:
+        kwargs: dict[str, Any] = {
+            "Bucket": self.bucket,
+            "Key": key,
+            "Body": body,
+            "ContentType": content_type,
+        }
+        if if_none_match:
+            kwargs["IfNoneMatch"] = "*"
+        if if_match is not None:
+            kwargs["IfMatch"] = if_match
+        try:
+            response = self.client.put_object(**kwargs)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("PreconditionFailed", "ConditionalRequestConflict"):
+                raise PreconditionFailedError(f"{key}: {code}") from e
+            raise
+        return response.get("ETag", _etag(body))
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].read()
+
+    def head(self, key: str) -> dict[str, Any] | None:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return {"etag": response["ETag"], "size": response["ContentLength"]}
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        prefixes: list[str] = []
+        for page in paginator.paginate(
+            Bucket=self.bucket, Prefix=prefix, Delimiter="/"
+        ):
+            for entry in page.get("CommonPrefixes", []):
+                prefixes.append(entry["Prefix"].rstrip("/"))
+        return prefixes
+
+    def has_prefix(self, prefix: str) -> bool:
+        response = self.client.list_objects_v2(
+            Bucket=self.bucket, Prefix=prefix, MaxKeys=1
+        )
+        return "Contents" in response and len(response["Contents"]) > 0
+
+
+class LocalStorage:
+    """Files under a local directory, keys mapped to relative paths."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.location = f"file://{self.root}"
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Key escapes storage root: {key}")
+        return path
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+        if_none_match: bool = False,
+        if_match: str | None = None,
+    ) -> str:
+        path = self._path(key)
+        current = self.head(key)
+        _check_precondition(
+            key, current["etag"] if current else None, if_none_match, if_match
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename so readers never see partial data
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        return _etag(body)
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        return path.read_bytes() if path.is_file() else None
+
+    def head(self, key: str) -> dict[str, Any] | None:
+        body = self.get(key)
+        if body is None:
+            return None
+        return {"etag": _etag(body), "size": len(body)}
+
+    def _keys(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return [
+            p.relative_to(self.root).as_posix()
+            for p in self.root.rglob("*")
+            if p.is_file() and not p.name.endswith(".tmp")
+        ]
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        return _common_prefixes(self._keys(), prefix)
+
+    def has_prefix(self, prefix: str) -> bool:
+        return any(key.startswith(prefix) for key in self._keys())
+
+
+class MemoryStorage:
+    """Objects in a dict; nothing leaves the process."""
+
+    def __init__(self, name: str = "") -> None:
+        self.location = f"memory://{name}"
+        self.objects: dict[str, tuple[bytes, str]] = {}
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+        if_none_match: bool = False,
+        if_match: str | None = None,
+    ) -> str:
+        current = self.head(key)
+        _check_precondition(
+            key, current["etag"] if current else None, if_none_match, if_match
+        )
+        self.objects[key] = (body, content_type)
+        return _etag(body)
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.objects.get(key)
+        return entry[0] if entry else None
+
+    def head(self, key: str) -> dict[str, Any] | None:
+        body = self.get(key)
+        if body is None:
+            return None
+        return {"etag": _etag(body), "size": len(body)}
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        return _common_prefixes(self.objects, prefix)
+
+    def has_prefix(self, prefix: str) -> bool:
+        return any(key.startswith(prefix) for key in self.objects)
+
+
+def get_storage(location: str) -> Storage:
+    """Return the storage backend for a location (see module docstring)."""
+    if location.startswith("file://"):
+        return LocalStorage(location.removeprefix("file://"))
+    if location.startswith("memory://"):
+        name = location.removeprefix("memory://")
+        if name not in _MEMORY_STORES:
+            _MEMORY_STORES[name] = MemoryStorage(name)
+        return _MEMORY_STORES[name]
+    return S3Storage(location.removeprefix("s3://"))
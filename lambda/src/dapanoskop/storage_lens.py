@@ -3,19 +3,133 @@
 Queries CloudWatch metrics published by S3 Storage Lens to retrieve org-wide
 storage volume and object count. Requires an org-wide Storage Lens configuration
 with CloudWatch metrics export enabled.
+
+Storage Lens publishes one CloudWatch series per dimension combination
+(storage class, region, ...). By default the per-metric total is computed
+server-side with a SUM(SEARCH(...)) metric math expression, so CloudWatch
+returns a single pre-summed series per metric. SEARCH only matches series
+that reported data in the last two weeks; when it returns nothing the reader
+falls back to listing every series with list_metrics and querying each with a
+MetricStat, summing them client-side.
+
+Discovery results (account, configuration, org ID, home region, the listed
+series per metric and which query mode returned data) are cached at module
+level for DISCOVERY_CACHE_TTL_SECONDS, so repeated calls within an invocation
+(one per backfill month) and warm Lambda invocations skip straight to
+get_metric_data.
+
+update_storage_lens_series() keeps the daily totals in storage-lens.parquet at
+the root of the data bucket, appending only days newer than the last stored
+one on each run.
 """
 
 from __future__ import annotations
 
+import io
 import logging
-from datetime import datetime, timedelta
-from typing import Any
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any
 
 import boto3
 from botocore.exceptions import ClientError
 
+if TYPE_CHECKING:
+    from dapanoskop.storage import Storage
+
 logger = logging.getLogger(__name__)
 
+_NAMESPACE = "AWS/S3/Storage-Lens"
+# GetMetricData accepts at most 500 queries per request
+_MAX_QUERIES_PER_REQUEST = 500
+
+DISCOVERY_CACHE_TTL_SECONDS = 3600
+
+SERIES_KEY = "storage-lens.parquet"
+# CloudWatch keeps 1-day datapoints for 455 days (15 months)
+_SERIES_FIRST_FETCH_DAYS = 455
+# Each append adds a row group; rewrite as one row group beyond this many
+_SERIES_COMPACT_ROW_GROUPS = 32
+
+# Breakdown key in the result -> Storage Lens dimension it groups by
+BREAKDOWN_DIMENSIONS = {
+    "by_storage_class": "storage_class",
+    "by_region": "aws_region",
+    "by_account": "aws_account_number",
+}
+
+# config ID hint ("" = auto-discover) -> discovery cache entry
+_DISCOVERY_CACHE: dict[str, dict[str, Any]] = {}
+# Serializes discovery, so concurrent readers of a cold cache discover once
+_DISCOVERY_LOCK = threading.Lock()
+
+
+def clear_discovery_cache() -> None:
+    """Forget all cached Storage Lens discovery results."""
+    with _DISCOVERY_LOCK:
+        _DISCOVERY_CACHE.clear()
+
+
+def discover_storage_lens(config_id: str = "") -> bool:
+    """Discover the Storage Lens configuration and cache it with its clients.
+
+    Call before reading Storage Lens from several threads: they then share
+    the cached discovery and CloudWatch client instead of each creating
+    clients. Returns whether a suitable configuration was found.
+    """
+    return _discover(config_id) is not None
+
+
+def _discover(config_id: str) -> dict[str, Any] | None:
+    """Return the discovery cache entry for a config ID hint.
+
+    Runs STS + S3 Control discovery on a miss or after the TTL expired. Only
+    successful discoveries are cached, so a transient error or a configuration
+    created later is retried on the next call. Thread-safe: concurrent
+    callers wait for one discovery.
+
+    Returns:
+        Dict with "config" (config_id, org_id, home_region), "cloudwatch" (a
+        client for the home region), "series" (listed metrics per metric
+        name) and "mode" (query mode that last returned data, or None), or
+        None if no suitable configuration was found.
+    """
+    with _DISCOVERY_LOCK:
+        return _discover_locked(config_id)
+
+
+def _discover_locked(config_id: str) -> dict[str, Any] | None:
+    entry = _DISCOVERY_CACHE.get(config_id)
+    if entry is not None and entry["expires_at"] > time.monotonic():
+        return entry
+
+    try:
+        sts = boto3.client("sts")
+        account_id = sts.get_caller_identity()["Account"]
+    except ClientError as e:
+        logger.error("Failed to get AWS account ID: %s", e)
+        return None
+
+    s3control = boto3.client("s3control")
+    config = _get_org_config_with_export(s3control, account_id, config_id)
+    if not config:
+        logger.warning(
+            "No suitable org-wide Storage Lens configuration found with CloudWatch metrics"
+        )
+        _DISCOVERY_CACHE.pop(config_id, None)
+        return None
+
+    entry = {
+        "config": config,
+        "cloudwatch": boto3.client("cloudwatch", region_name=config["home_region"]),
+        "series": {},
+        "mode": None,
+        "expires_at": time.monotonic() + DISCOVERY_CACHE_TTL_SECONDS,
+    }
+    _DISCOVERY_CACHE[config_id] = entry
+    return entry
+
 
 def _get_org_config_with_export(
     s3control: Any, account_id: str, config_id: str = ""
@@ -127,17 +241,25 @@ def _build_metric_stat_queries(
     cloudwatch: Any,
     org_id: str,
     metric_names: list[str],
+    series: dict[str, list[dict[str, Any]]] | None = None,
 ) -> list[dict[str, Any]]:
     """Build CloudWatch metric data queries using MetricStat.
 
-    Lists all metric combinations and creates queries for each.
+    Lists all metric combinations and creates queries for each. When a
+    series dict is given, metric names already in it are not listed again and
+    newly listed (non-empty) series are stored in it.
     """
     queries: list[dict[str, Any]] = []
     query_id = 0
 
     for metric_name in metric_names:
         # List all metric combinations for this metric
-        metrics = _list_storage_lens_metrics(cloudwatch, org_id, metric_name)
+        if series is not None and metric_name in series:
+            metrics = series[metric_name]
+        else:
+            metrics = _list_storage_lens_metrics(cloudwatch, org_id, metric_name)
+            if series is not None and metrics:
+                series[metric_name] = metrics
 
         if not metrics:
             logger.warning("No metrics found for %s", metric_name)
@@ -162,6 +284,68 @@ def _build_metric_stat_queries(
     return queries
 
 
+def _build_search_queries(org_id: str, metric_names: list[str]) -> list[dict[str, Any]]:
+    """Build one SUM(SEARCH(...)) metric math query per metric name.
+
+    The search matches the same series _list_storage_lens_metrics lists
+    (org-level records of the organization), and CloudWatch sums them per
+    timestamp server-side.
+    """
+    queries: list[dict[str, Any]] = []
+    for i, metric_name in enumerate(metric_names):
+        search = (
+            f'Namespace="{_NAMESPACE}" MetricName="{metric_name}" '
+            f'organization_id="{org_id}" record_type="ORGANIZATION"'
+        )
+        queries.append(
+            {
+                "Id": f"s{i}",
+                "Expression": f"SUM(SEARCH('{search}', 'Average', 86400))",
+                "Label": metric_name,
+            }
+        )
+    return queries
+
+
+def _get_metric_data(
+    cloudwatch: Any,
+    queries: list[dict[str, Any]],
+    start_time: datetime,
+    end_time: datetime,
+) -> list[dict[str, Any]]:
+    """Run get_metric_data for any number of queries.
+
+    Sends the queries in chunks of 500 and follows NextToken within each
+    chunk, merging the pages of every query into one result per Id.
+    """
+    results: dict[str, dict[str, Any]] = {}
+    for offset in range(0, len(queries), _MAX_QUERIES_PER_REQUEST):
+        kwargs: dict[str, Any] = {
+            "MetricDataQueries": queries[offset : offset + _MAX_QUERIES_PER_REQUEST],
+            "StartTime": start_time,
+            "EndTime": end_time,
+        }
+        while True:
+            response = cloudwatch.get_metric_data(**kwargs)
+            for page_result in response["MetricDataResults"]:
+                result = results.setdefault(
+                    page_result["Id"],
+                    {
+                        "Id": page_result["Id"],
+                        "Label": page_result.get("Label", page_result["Id"]),
+                        "Timestamps": [],
+                        "Values": [],
+                    },
+                )
+                result["Timestamps"].extend(page_result["Timestamps"])
+                result["Values"].extend(page_result["Values"])
+            token = response.get("NextToken")
+            if not token:
+                break
+            kwargs["NextToken"] = token
+    return list(results.values())
+
+
 def _convert_metric_data_to_datapoints(
     metric_results: list[dict[str, Any]],
 ) -> dict[str, list[dict[str, Any]]]:
@@ -201,82 +385,133 @@ def _convert_metric_data_to_datapoints(
     return results
 
 
-def get_storage_lens_metrics(
-    config_id: str = "",
-    metric_names: list[str] | None = None,
-    start_time: datetime | None = None,
-    end_time: datetime | None = None,
-) -> dict[str, Any] | None:
-    """Query CloudWatch metrics for S3 Storage Lens.
-
-    Discovers the org-wide Storage Lens configuration with CloudWatch metrics
-    enabled and queries for storage metrics.
-
-    Args:
-        config_id: Optional specific Storage Lens config ID (auto-discovers if empty)
-        metric_names: List of metric names to query (defaults to StorageBytes, ObjectCount)
-        start_time: Start datetime for metrics (defaults to 7 days ago)
-        end_time: End datetime for metrics (defaults to now)
+def _compute_breakdown(
+    metric_results: list[dict[str, Any]], queries: list[dict[str, Any]]
+) -> dict[str, list[dict[str, Any]]]:
+    """Aggregate per-series MetricStat results by storage class, region, account.
 
-    Returns:
-        Dict with total_bytes, object_count, timestamp, config_id, org_id.
-        Returns None if no suitable configuration found or metrics unavailable.
+    Uses each series' value at the latest timestamp of its metric (the one the
+    totals are taken from), so the breakdown entries add up to the totals.
+    Series without that dimension are grouped under "Other".
     """
-    # Get AWS account ID
-    try:
-        sts = boto3.client("sts")
-        account_id = sts.get_caller_identity()["Account"]
-    except ClientError as e:
-        logger.error("Failed to get AWS account ID: %s", e)
-        return None
-
-    # Find Storage Lens configuration
-    s3control = boto3.client("s3control")
-    config = _get_org_config_with_export(s3control, account_id, config_id)
+    dimensions_by_id = {
+        q["Id"]: {
+            d["Name"]: d["Value"] for d in q["MetricStat"]["Metric"]["Dimensions"]
+        }
+        for q in queries
+    }
+    latest: dict[str, datetime] = {}
+    for result in metric_results:
+        if result["Timestamps"]:
+            newest = max(result["Timestamps"])
+            if result["Label"] not in latest or newest > latest[result["Label"]]:
+                latest[result["Label"]] = newest
+
+    groups: dict[str, dict[str, dict[str, Any]]] = {k: {} for k in BREAKDOWN_DIMENSIONS}
+    columns = {"StorageBytes": "total_bytes", "ObjectCount": "object_count"}
+    for result in metric_results:
+        column = columns.get(result["Label"])
+        if column is None or result["Label"] not in latest:
+            continue
+        value = sum(
+            v
+            for ts, v in zip(result["Timestamps"], result["Values"])
+            if ts == latest[result["Label"]]
+        )
+        dims = dimensions_by_id.get(result["Id"], {})
+        for key, dimension in BREAKDOWN_DIMENSIONS.items():
+            name = dims.get(dimension, "Other")
+            entry = groups[key].setdefault(
+                name, {"name": name, "total_bytes": 0, "object_count": 0}
+            )
+            entry[column] += value
 
-    if not config:
-        logger.warning(
-            "No suitable org-wide Storage Lens configuration found with CloudWatch metrics"
+    return {
+        key: sorted(
+            (
+                {
+                    **e,
+                    "total_bytes": int(e["total_bytes"]),
+                    "object_count": int(e["object_count"]),
+                }
+                for e in entries.values()
+            ),
+            key=lambda e: (-e["total_bytes"], e["name"]),
         )
-        return None
+        for key, entries in groups.items()
+    }
 
-    # Set up CloudWatch client in home region
-    cloudwatch = boto3.client("cloudwatch", region_name=config["home_region"])
 
-    # Default to common useful metrics
-    if metric_names is None:
-        metric_names = ["StorageBytes", "ObjectCount"]
+def _query_datapoints(
+    discovery: dict[str, Any],
+    metric_names: list[str],
+    start_time: datetime,
+    end_time: datetime,
+    mode: str,
+    breakdown: dict[str, Any] | None = None,
+) -> dict[str, list[dict[str, Any]]] | None:
+    """Query daily datapoints per metric name for a discovered configuration.
+
+    When a breakdown dict is given, the per-series list path is used (metric
+    math sums away the dimensions) and the dict is filled with
+    _compute_breakdown() of the same get_metric_data results.
+
+    Returns a dict of metric name to datapoints (ascending by timestamp), or
+    None if no queries could be built or CloudWatch returned an error.
+    """
+    config = discovery["config"]
+    cloudwatch = discovery["cloudwatch"]
 
-    # Default time range: last 7 days
-    if end_time is None:
-        end_time = datetime.now()
-    if start_time is None:
-        start_time = end_time - timedelta(days=7)
+    # In auto mode, skip the search when it came up empty last time
+    if breakdown is not None or (mode == "auto" and discovery["mode"] == "list"):
+        mode = "list"
 
-    # Build metric data queries
-    metric_data_queries = _build_metric_stat_queries(
-        cloudwatch, config["org_id"], metric_names
-    )
+    results: dict[str, list[dict[str, Any]]] = {}
+    if mode in ("auto", "search"):
+        try:
+            results = _convert_metric_data_to_datapoints(
+                _get_metric_data(
+                    cloudwatch,
+                    _build_search_queries(config["org_id"], metric_names),
+                    start_time,
+                    end_time,
+                )
+            )
+        except ClientError as e:
+            logger.warning("Storage Lens metric math query failed: %s", e)
+        if any(results.values()):
+            discovery["mode"] = "search"
+        elif mode == "auto":
+            logger.info("Metric math query returned no data, listing series instead")
+
+    if mode == "list" or (mode == "auto" and not any(results.values())):
+        metric_data_queries = _build_metric_stat_queries(
+            cloudwatch, config["org_id"], metric_names, discovery["series"]
+        )
+        if not metric_data_queries:
+            logger.warning("No metric queries built for %s", metric_names)
+            return None
 
-    if not metric_data_queries:
-        logger.warning("No metric queries built for %s", metric_names)
-        return None
+        try:
+            metric_results = _get_metric_data(
+                cloudwatch, metric_data_queries, start_time, end_time
+            )
+        except ClientError as e:
+            logger.error("Failed to query CloudWatch metrics: %s", e)
+            return None
+        results = _convert_metric_data_to_datapoints(metric_results)
+        if breakdown is not None:
+            breakdown.update(_compute_breakdown(metric_results, metric_data_queries))
+        elif any(results.values()):
+            discovery["mode"] = "list"
 
-    # Query CloudWatch
-    try:
-        response = cloudwatch.get_metric_data(
-            MetricDataQueries=metric_data_queries,
-            StartTime=start_time,
-            EndTime=end_time,
-        )
-    except ClientError as e:
-        logger.error("Failed to query CloudWatch metrics: %s", e)
-        return None
+    return results
 
-    # Convert to datapoint format
-    results = _convert_metric_data_to_datapoints(response["MetricDataResults"])
 
-    # Extract latest values
+def _latest_metrics(
+    results: dict[str, list[dict[str, Any]]], config: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Build the get_storage_lens_metrics() result from the latest datapoints."""
     total_bytes = 0
     object_count = 0
     timestamp = None
@@ -310,3 +545,242 @@ def get_storage_lens_metrics(
         "config_id": config["config_id"],
         "org_id": config["org_id"],
     }
+
+
+def get_storage_lens_metrics(
+    config_id: str = "",
+    metric_names: list[str] | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    mode: str = "auto",
+    breakdown: bool = False,
+) -> dict[str, Any] | None:
+    """Query CloudWatch metrics for S3 Storage Lens.
+
+    Discovers the org-wide Storage Lens configuration with CloudWatch metrics
+    enabled and queries for storage metrics.
+
+    Args:
+        config_id: Optional specific Storage Lens config ID (auto-discovers if empty)
+        metric_names: List of metric names to query (defaults to StorageBytes, ObjectCount)
+        start_time: Start datetime for metrics (defaults to 7 days ago)
+        end_time: End datetime for metrics (defaults to now)
+        mode: "search" (server-side SUM(SEARCH) metric math), "list" (one
+            MetricStat query per listed series, summed client-side) or "auto"
+            (search, falling back to list when it returns no data)
+        breakdown: Also return by_storage_class, by_region and by_account
+            lists (name, total_bytes, object_count), aggregated from the same
+            per-series query; implies mode="list"
+
+    Returns:
+        Dict with total_bytes, object_count, timestamp, config_id, org_id
+        (and the breakdown lists if requested).
+        Returns None if no suitable configuration found or metrics unavailable.
+    """
+    discovery = _discover(config_id)
+    if discovery is None:
+        return None
+
+    # Default to common useful metrics
+    if metric_names is None:
+        metric_names = ["StorageBytes", "ObjectCount"]
+
+    # Default time range: last 7 days
+    if end_time is None:
+        end_time = datetime.now()
+    if start_time is None:
+        start_time = end_time - timedelta(days=7)
+
+    breakdowns: dict[str, Any] | None = {} if breakdown else None
+    results = _query_datapoints(
+        discovery, metric_names, start_time, end_time, mode, breakdowns
+    )
+    if results is None:
+        return None
+    metrics = _latest_metrics(results, discovery["config"])
+    if metrics is not None and breakdowns:
+        metrics.update(breakdowns)
+    return metrics
+
+
+def get_storage_lens_history(
+    start_time: datetime,
+    end_time: datetime,
+    config_id: str = "",
+    metric_names: list[str] | None = None,
+    mode: str = "auto",
+) -> dict[str, Any] | None:
+    """Fetch the daily Storage Lens series for a whole date range at once.
+
+    Used by backfill to replace one 14-day query per month with a single
+    (paginated) get_metric_data query; slice per month with
+    storage_lens_month_end(). The fetched series is kept with the discovery
+    cache entry, so a later call for a range it covers is served without
+    querying CloudWatch.
+
+    Returns:
+        Dict with config_id, org_id, start, end and series (metric name to
+        ascending datapoints), or None if no suitable configuration was found
+        or metrics are unavailable.
+    """
+    discovery = _discover(config_id)
+    if discovery is None:
+        return None
+    if metric_names is None:
+        metric_names = ["StorageBytes", "ObjectCount"]
+
+    cached = discovery.get("history")
+    if (
+        cached is not None
+        and cached["start"] <= start_time
+        and cached["end"] >= end_time
+        and all(name in cached["series"] for name in metric_names)
+    ):
+        series = cached["series"]
+    else:
+        series = _query_datapoints(discovery, metric_names, start_time, end_time, mode)
+        if series is None:
+            return None
+        discovery["history"] = {
+            "start": start_time,
+            "end": end_time,
+            "series": series,
+        }
+
+    config = discovery["config"]
+    return {
+        "config_id": config["config_id"],
+        "org_id": config["org_id"],
+        "start": start_time,
+        "end": end_time,
+        "series": {
+            name: [
+                dp
+                for dp in series.get(name, [])
+                if start_time <= dp["Timestamp"] < end_time
+            ]
+            for name in metric_names
+        },
+    }
+
+
+def storage_lens_month_end(
+    history: dict[str, Any], year: int, month: int, window_days: int = 14
+) -> dict[str, Any] | None:
+    """Slice a month's end-of-month values out of get_storage_lens_history().
+
+    Uses the latest datapoints in the window_days before the first day of the
+    following month, matching what get_storage_lens_metrics() returns for
+    that 14-day window.
+
+    Returns:
+        Same dict as get_storage_lens_metrics(), or None without datapoints.
+    """
+    if month == 12:
+        end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        end = datetime(year, month + 1, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=window_days)
+    results = {
+        name: [dp for dp in datapoints if start <= dp["Timestamp"] < end]
+        for name, datapoints in history["series"].items()
+    }
+    return _latest_metrics(results, history)
+
+
+def _series_table(rows: list[dict[str, Any]]) -> Any:
+    import pyarrow as pa
+
+    return pa.table(
+        {
+            "date": pa.array([r["date"] for r in rows], type=pa.date32()),
+            "total_bytes": pa.array([r["total_bytes"] for r in rows], type=pa.int64()),
+            "object_count": pa.array(
+                [r["object_count"] for r in rows], type=pa.int64()
+            ),
+        }
+    )
+
+
+def update_storage_lens_series(
+    storage: Storage, config_id: str = "", now: datetime | None = None
+) -> int:
+    """Append new days to the storage-lens.parquet daily series.
+
+    Reads the last stored date and fetches only the complete days after it
+    (the last 15 months on the first run). Every append is written as a new
+    row group; once there are more than _SERIES_COMPACT_ROW_GROUPS the file is
+    compacted into a single row group. The write is conditional on the ETag
+    read, so concurrent runs cannot drop each other's days.
+
+    Columns: date (date32), total_bytes (int64), object_count (int64).
+
+    Returns:
+        Number of days appended.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    if now is None:
+        now = datetime.now(timezone.utc)
+    end = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+
+    existing = None
+    current = storage.head(SERIES_KEY)
+    body = storage.get(SERIES_KEY) if current is not None else None
+    if body is not None:
+        existing = pq.ParquetFile(io.BytesIO(body))
+        last_date: date = pc.max(existing.read(columns=["date"])["date"]).as_py()
+        start = datetime(
+            last_date.year, last_date.month, last_date.day, tzinfo=timezone.utc
+        ) + timedelta(days=1)
+    else:
+        start = end - timedelta(days=_SERIES_FIRST_FETCH_DAYS)
+
+    if start >= end:
+        return 0
+    history = get_storage_lens_history(start, end, config_id=config_id)
+    if history is None:
+        return 0
+
+    by_date: dict[date, dict[str, Any]] = {}
+    for metric_name, column in (
+        ("StorageBytes", "total_bytes"),
+        ("ObjectCount", "object_count"),
+    ):
+        for dp in history["series"].get(metric_name, []):
+            day = dp["Timestamp"].date()
+            row = by_date.setdefault(
+                day, {"date": day, "total_bytes": 0, "object_count": 0}
+            )
+            row[column] = int(dp["Value"])
+    if not by_date:
+        return 0
+
+    tables = (
+        []
+        if existing is None
+        else [existing.read_row_group(i) for i in range(existing.num_row_groups)]
+    )
+    tables.append(_series_table([by_date[d] for d in sorted(by_date)]))
+    if len(tables) > _SERIES_COMPACT_ROW_GROUPS:
+        tables = [pa.concat_tables(tables).combine_chunks()]
+
+    buf = io.BytesIO()
+    with pq.ParquetWriter(buf, tables[0].schema) as writer:
+        for table in tables:
+            writer.write_table(table)
+    storage.put(
+        SERIES_KEY,
+        buf.getvalue(),
+        if_none_match=current is None,
+        if_match=current["etag"] if current is not None else None,
+    )
+    logger.info(
+        "Appended %d days to %s (%d row groups)",
+        len(by_date),
+        SERIES_KEY,
+        len(tables),
+    )
+    return len(by_date)
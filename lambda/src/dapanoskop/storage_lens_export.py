@@ -0,0 +1,215 @@
+"""S3 Storage Lens metrics export reader for bucket-level storage volume.
+
+Alternative to the CloudWatch reader (storage_lens.py) for Storage Lens
+configurations that export their daily metrics to S3 instead of (or as well
+as) publishing them to CloudWatch. The export has bucket-level detail, which
+CloudWatch only has at org level, and reading it costs no CloudWatch requests.
+
+An export destination holds one directory per report date:
+
+    s3://<bucket>/<prefix>/StorageLens/<org or account>/<config id>/V_1/reports/
+        dt=2026-02-14/<uuid>.csv     (or .par for Apache Parquet exports)
+        dt=2026-02-15/...
+
+Each file has one row per metric and record (account, region, bucket, prefix)
+with the columns version_number, configuration_id, report_date,
+aws_account_number, aws_region, storage_class, record_type, record_value,
+bucket_name, metric_name and metric_value. The reader picks a single report
+date by its directory name and streams the files in record batches, reading
+only the columns it needs and only BUCKET records of the wanted metrics
+(pushed down to the parquet reader). Batches are aggregated per bucket and
+storage class as they arrive, so memory is bounded by the number of buckets,
+not the size of the export. A local directory (plain path or file://) can
+stand in for S3.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Any
+
+from dapanoskop.storage_lens import BREAKDOWN_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Aggregated metric -> result field
+METRICS = {"StorageBytes": "total_bytes", "ObjectCount": "object_count"}
+
+_GROUP_COLUMNS = [
+    "aws_account_number",
+    "aws_region",
+    "bucket_name",
+    "storage_class",
+    "metric_name",
+]
+
+
+def _resolve(location: str) -> tuple[Any, str]:
+    """Return (pyarrow filesystem, base path) for an S3 URI or local path."""
+    from pyarrow import fs
+
+    if location.startswith(("s3://", "file://")):
+        return fs.FileSystem.from_uri(location)
+    return fs.LocalFileSystem(), location
+
+
+def _report_dates(filesystem: Any, base: str) -> list[str]:
+    """List the dt=YYYY-MM-DD report directories under base, oldest first."""
+    from pyarrow import fs
+
+    infos = filesystem.get_file_info(fs.FileSelector(base, allow_not_found=True))
+    return sorted(
+        info.base_name.removeprefix("dt=")
+        for info in infos
+        if info.type == fs.FileType.Directory and info.base_name.startswith("dt=")
+    )
+
+
+def _dataset(filesystem: Any, paths: list[str]) -> Any:
+    import pyarrow as pa
+    import pyarrow.csv as csv
+    import pyarrow.dataset as ds
+
+    if all(p.endswith(".csv") for p in paths):
+        # Account numbers must stay strings (leading zeros)
+        file_format: Any = ds.CsvFileFormat(
+            convert_options=csv.ConvertOptions(
+                column_types={
+                    "aws_account_number": pa.string(),
+                    "metric_value": pa.float64(),
+                }
+            )
+        )
+    else:
+        file_format = "parquet"
+    return ds.dataset(paths, filesystem=filesystem, format=file_format)
+
+
+def _ranked(groups: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(groups.values(), key=lambda e: (-e["total_bytes"], e["name"]))
+
+
+def read_storage_lens_export(
+    location: str,
+    report_date: date | None = None,
+    batch_size: int = 65_536,
+) -> dict[str, Any] | None:
+    """Aggregate bucket-level storage from a Storage Lens metrics export.
+
+    Args:
+        location: The export's reports directory (s3://..., file://... or a
+            local path) containing the dt=YYYY-MM-DD directories.
+        report_date: Read the latest report on or before this date
+            (default: the latest report).
+        batch_size: Rows per record batch while streaming.
+
+    Returns:
+        Dict with report_date, config_id, total_bytes, object_count, buckets
+        (aws_account_number, aws_region, bucket_name, total_bytes,
+        object_count; largest first) and by_storage_class / by_region /
+        by_account lists (name, total_bytes, object_count), or None if no
+        report exists on or before report_date.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    filesystem, base = _resolve(location)
+    dates = _report_dates(filesystem, base)
+    if report_date is not None:
+        dates = [d for d in dates if d <= report_date.isoformat()]
+    if not dates:
+        logger.warning("No Storage Lens export reports found in %s", location)
+        return None
+    selected = dates[-1]
+
+    paths = [
+        info.path
+        for info in filesystem.get_file_info(
+            fs.FileSelector(f"{base.rstrip('/')}/dt={selected}", recursive=True)
+        )
+        if info.type == fs.FileType.File and info.base_name.endswith((".csv", ".par"))
+    ]
+    if not paths:
+        logger.warning("Storage Lens export report %s has no data files", selected)
+        return None
+
+    dataset = _dataset(filesystem, paths)
+    scanner = dataset.scanner(
+        columns=[*_GROUP_COLUMNS, "metric_value", "configuration_id"],
+        filter=(ds.field("record_type") == "BUCKET")
+        & ds.field("metric_name").isin(list(METRICS)),
+        batch_size=batch_size,
+    )
+
+    # (account, region, bucket, storage class, metric) -> summed value
+    sums: dict[tuple[str, ...], float] = defaultdict(float)
+    config_id = ""
+    rows = 0
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        rows += batch.num_rows
+        if not config_id:
+            config_id = batch.column("configuration_id")[0].as_py() or ""
+        table = pa.Table.from_batches([batch]).select([*_GROUP_COLUMNS, "metric_value"])
+        table = table.set_column(
+            table.schema.get_field_index("metric_value"),
+            "metric_value",
+            pc.cast(table.column("metric_value"), pa.float64()),
+        )
+        grouped = table.group_by(_GROUP_COLUMNS).aggregate([("metric_value", "sum")])
+        for row in grouped.to_pylist():
+            key = tuple(row[c] or "" for c in _GROUP_COLUMNS)
+            sums[key] += row["metric_value_sum"] or 0.0
+
+    buckets: dict[tuple[str, str, str], dict[str, Any]] = {}
+    breakdowns: dict[str, dict[str, dict[str, Any]]] = {
+        k: {} for k in BREAKDOWN_DIMENSIONS
+    }
+    for (account, region, bucket, storage_class, metric), value in sums.items():
+        field = METRICS[metric]
+        entry = buckets.setdefault(
+            (account, region, bucket),
+            {
+                "aws_account_number": account,
+                "aws_region": region,
+                "bucket_name": bucket,
+                "total_bytes": 0,
+                "object_count": 0,
+            },
+        )
+        entry[field] += int(value)
+        names = {
+            "storage_class": storage_class,
+            "aws_region": region,
+            "aws_account_number": account,
+        }
+        # The export columns are named like the Storage Lens dimensions
+        for key, column in BREAKDOWN_DIMENSIONS.items():
+            name = names[column] or "Other"
+            group = breakdowns[key].setdefault(
+                name, {"name": name, "total_bytes": 0, "object_count": 0}
+            )
+            group[field] += int(value)
+
+    bucket_rows = sorted(
+        buckets.values(), key=lambda e: (-e["total_bytes"], e["bucket_name"])
+    )
+    logger.info(
+        "Storage Lens export %s: %d rows, %d buckets",
+        selected,
+        rows,
+        len(bucket_rows),
+    )
+    return {
+        "report_date": selected,
+        "config_id": config_id,
+        "total_bytes": sum(b["total_bytes"] for b in bucket_rows),
+        "object_count": sum(b["object_count"] for b in bucket_rows),
+        "buckets": bucket_rows,
+        **{key: _ranked(groups) for key, groups in breakdowns.items()},
+    }
@@ -0,0 +1,624 @@
+"""Seeded synthetic organization and in-memory AWS stand-ins.
+
+Generates deterministic Cost Explorer and Storage Lens responses for an
+organization of configurable size so the pipeline can be driven end to end
+(collect → process → write) without an AWS account, e.g. for benchmarks and
+local runs. The stand-in clients implement only the API calls the pipeline
+makes, with the same request and response shapes as boto3.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable
+
+COST_CATEGORY_NAME = "CostCenter"
+ACCOUNT_ID = "123456789012"
+ORG_ID = "o-synthetic"
+STORAGE_LENS_CONFIG_ID = "synthetic-org-lens"
+
+_REGIONS = ["USE1", "USW2", "EUC1", "EUW1", "APN1", "APS2"]
+_REGION_NAMES = {
+    "USE1": "us-east-1",
+    "USW2": "us-west-2",
+    "EUC1": "eu-central-1",
+    "EUW1": "eu-west-1",
+    "APN1": "ap-northeast-1",
+    "APS2": "ap-southeast-2",
+}
+_S3 = "Amazon Simple Storage Service"
+_EC2 = "Amazon Elastic Compute Cloud - Compute"
+# Base usage type and the SERVICE dimension value it is billed under
+_BASE_USAGE_TYPES = [
+    ("TimedStorage-ByteHrs", _S3),
+    ("TimedStorage-INT-FA-ByteHrs", _S3),
+    ("TimedStorage-INT-IA-ByteHrs", _S3),
+    ("TimedStorage-GlacierByteHrs", _S3),
+    ("Requests-Tier1", _S3),
+    ("Requests-Tier2", _S3),
+    ("BoxUsage:m5.large", _EC2),
+    ("BoxUsage:c6g.xlarge", _EC2),
+    ("SpotUsage:r5.2xlarge", _EC2),
+    ("Lambda-GB-Second", "AWS Lambda"),
+    ("Fargate-vCPU-Hours:perCPU", "Amazon Elastic Container Service"),
+    ("DataTransfer-Out-Bytes", "AWS Data Transfer"),
+    ("NatGateway-Hours", "EC2 - Other"),
+    ("CW:MetricMonitorUsage", "AmazonCloudWatch"),
+    ("EBS:VolumeUsage.gp3", "EC2 - Other"),
+    ("EFS:TimedStorage-ByteHrs", "Amazon Elastic File System"),
+]
+_STORAGE_CLASSES = ["STANDARD", "INTELLIGENT_TIERING", "STANDARD_IA", "GLACIER"]
+_SPLIT_METHODS = ["PROPORTIONAL", "EVEN", "FIXED"]
+
+
+def _usage_types(count: int) -> list[tuple[str, str, str]]:
+    """Return ``count`` distinct, realistically shaped usage types.
+
+    Each is (name, REGION, SERVICE) with the dimension values it is billed
+    under.
+    """
+    usage_types = [
+        (f"{region}-{base}", _REGION_NAMES[region], service)
+        for base, service in _BASE_USAGE_TYPES
+        for region in _REGIONS
+    ]
+    variant = 0
+    while len(usage_types) < count:
+        variant += 1
+        usage_types.extend(
+            (f"{name}.v{variant}", region, service)
+            for name, region, service in usage_types[: count - len(usage_types)]
+        )
+    return usage_types[:count]
+
+
+def _month_start(day: datetime) -> datetime:
+    return day.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _split_period(start: str, end: str, granularity: str) -> list[dict[str, str]]:
+    """Split [start, end) into the time periods CE returns for a granularity."""
+    periods: list[dict[str, str]] = []
+    current = date.fromisoformat(start)
+    last = date.fromisoformat(end)
+    while current < last:
+        if granularity == "DAILY":
+            following = current + timedelta(days=1)
+        else:
+            following = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        following = min(following, last)
+        periods.append({"Start": current.isoformat(), "End": following.isoformat()})
+        current = following
+    return periods
+
+
+def _matches(expression: dict[str, Any], value: Callable[[str, str], str]) -> bool:
+    """Evaluate a CE Filter expression; value(type, key) gives a cell's value."""
+    if "And" in expression:
+        return all(_matches(e, value) for e in expression["And"])
+    if "Or" in expression:
+        return any(_matches(e, value) for e in expression["Or"])
+    if "Not" in expression:
+        return not _matches(expression["Not"], value)
+    for field, kind in (
+        ("Dimensions", "DIMENSION"),
+        ("Tags", "TAG"),
+        ("CostCategories", "COST_CATEGORY"),
+    ):
+        if field in expression:
+            spec = expression[field]
+            actual = value(kind, spec["Key"])
+            if "ABSENT" in spec.get("MatchOptions", []):
+                return not actual
+            return actual in spec.get("Values", [])
+    raise ValueError(f"Unsupported synthetic Filter: {expression}")
+
+
+def _metrics(cost: float, quantity: float, names: list[str]) -> dict[str, Any]:
+    """Return the requested metrics of a group or total."""
+    units = {"NetAmortizedCost": (cost, "USD"), "UsageQuantity": (quantity, "N/A")}
+    return {
+        name: {"Amount": str(units[name][0]), "Unit": units[name][1]}
+        for name in names
+        if name in units
+    }
+
+
+class SyntheticOrg:
+    """A deterministic synthetic AWS organization.
+
+    The org has ``workloads`` App tag values (the first one untagged), each
+    incurring cost on every one of ``usage_types`` usage types, so a monthly
+    App × USAGE_TYPE query returns ``workloads * usage_types`` groups.
+    Workloads are assigned round-robin to ``cost_centers`` cost centers plus
+    ``split_rules`` shared cost centers that are split charge sources, to
+    ``accounts`` member accounts and (by a Team tag) to ``teams`` teams; the
+    untagged workload has no tags. REGION and SERVICE follow from the usage
+    type, and every cost has RECORD_TYPE Usage. Cost data exists for the
+    ``months`` calendar months up to and including the month of ``now``;
+    earlier periods return no groups. Each cell has a monthly rate, spread
+    over the days of the month by a per-day weight, so the costs of any
+    split of a period add up to the cost of the whole period.
+    """
+
+    def __init__(
+        self,
+        workloads: int = 100,
+        usage_types: int = 50,
+        cost_centers: int = 10,
+        split_rules: int = 2,
+        months: int = 14,
+        storage_lens_series: int = 24,
+        seed: int = 0,
+        now: datetime | None = None,
+        accounts: int = 4,
+        teams: int = 5,
+    ) -> None:
+        self.seed = seed
+        self.months = months
+        self.now = now or datetime.now(timezone.utc)
+        self.workloads = [""] + [f"workload-{i:05d}" for i in range(1, workloads)]
+        usage_type_dimensions = _usage_types(usage_types)
+        self.usage_types = [name for name, _, _ in usage_type_dimensions]
+        self._usage_type_dimensions = {
+            "REGION": {name: region for name, region, _ in usage_type_dimensions},
+            "SERVICE": {name: service for name, _, service in usage_type_dimensions},
+        }
+        self.accounts = [f"{200000000000 + i}" for i in range(accounts)]
+        self.account_of = {
+            wl: self.accounts[i % len(self.accounts)]
+            for i, wl in enumerate(self.workloads)
+        }
+        self.tags = {
+            "App": {wl: wl for wl in self.workloads if wl},
+            "Team": {
+                wl: f"team-{i % teams}" for i, wl in enumerate(self.workloads) if wl
+            },
+        }
+        regular = [f"cc-{i:03d}" for i in range(cost_centers)]
+        shared = [f"shared-{i:02d}" for i in range(split_rules)]
+        self.cost_centers = regular + shared
+        self.mapping = {
+            (wl or "Untagged"): self.cost_centers[i % len(self.cost_centers)]
+            for i, wl in enumerate(self.workloads)
+        }
+        self.split_charge_rules = []
+        for i, source in enumerate(shared):
+            targets = regular[i % len(regular) :] + regular[: i % len(regular)]
+            targets = targets[: min(3, len(targets))]
+            method = _SPLIT_METHODS[i % len(_SPLIT_METHODS)]
+            parameters: list[dict[str, Any]] = []
+            if method == "FIXED":
+                share = 100 // len(targets)
+                values = [str(share)] * (len(targets) - 1)
+                values.append(str(100 - share * (len(targets) - 1)))
+                parameters = [{"Type": "ALLOCATION_PERCENTAGES", "Values": values}]
+            self.split_charge_rules.append(
+                {
+                    "Source": source,
+                    "Targets": targets,
+                    "Method": method,
+                    "Parameters": parameters,
+                }
+            )
+        # One CloudWatch series per (storage class, region, member account)
+        self.storage_lens_series = [
+            (
+                _STORAGE_CLASSES[i % len(_STORAGE_CLASSES)],
+                _REGIONS[(i // len(_STORAGE_CLASSES)) % len(_REGIONS)],
+                f"{100000000000 + i // (len(_STORAGE_CLASSES) * len(_REGIONS))}",
+            )
+            for i in range(storage_lens_series)
+        ]
+        self._rates: dict[str, list[tuple[str, str, float, float]]] = {}
+        self._cells: dict[tuple[str, str], list[tuple[str, str, float, float]]] = {}
+
+    @property
+    def group_count(self) -> int:
+        """Groups returned by one monthly App × USAGE_TYPE query."""
+        return len(self.workloads) * len(self.usage_types)
+
+    def first_month(self, months: int) -> str:
+        """Start date of the first of the last months calendar months."""
+        first = _month_start(self.now)
+        for _ in range(months - 1):
+            first = _month_start(first - timedelta(days=1))
+        return first.strftime("%Y-%m-%d")
+
+    def _has_data(self, start: str) -> bool:
+        return start >= self.first_month(self.months)
+
+    def _month_rates(self, month: str) -> list[tuple[str, str, float, float]]:
+        """Return (workload, usage_type, cost, quantity) per 30 days of a month."""
+        if month not in self._rates:
+            rates: list[tuple[str, str, float, float]] = []
+            if self._has_data(month):
+                rng = random.Random(zlib.crc32(f"{self.seed}:{month}".encode()))
+                for workload in self.workloads:
+                    for usage_type in self.usage_types:
+                        cost = rng.lognormvariate(2.0, 1.5)
+                        quantity = rng.lognormvariate(4.0, 2.0)
+                        rates.append((workload, usage_type, cost, quantity))
+            self._rates[month] = rates
+        return self._rates[month]
+
+    def _day_weight(self, day: date) -> float:
+        rng = random.Random(zlib.crc32(f"{self.seed}:{day.isoformat()}".encode()))
+        return rng.uniform(0.8, 1.2) / 30
+
+    def cells(self, start: str, end: str) -> list[tuple[str, str, float, float]]:
+        """Return (workload, usage_type, cost, quantity) for a time period.
+
+        Periods longer than a day are cached.
+        """
+        key = (start, end)
+        if key in self._cells:
+            return self._cells[key]
+        scales: dict[str, float] = {}
+        for period in _split_period(start, end, "DAILY"):
+            day = date.fromisoformat(period["Start"])
+            month = day.replace(day=1).isoformat()
+            scales[month] = scales.get(month, 0.0) + self._day_weight(day)
+        sums: dict[tuple[str, str], list[float]] = {}
+        for month, scale in scales.items():
+            for workload, usage_type, cost, quantity in self._month_rates(month):
+                entry = sums.setdefault((workload, usage_type), [0.0, 0.0])
+                entry[0] += cost * scale
+                entry[1] += quantity * scale
+        cells = [
+            (workload, usage_type, round(cost, 6), round(quantity, 6))
+            for (workload, usage_type), (cost, quantity) in sums.items()
+        ]
+        if (date.fromisoformat(end) - date.fromisoformat(start)).days > 1:
+            self._cells[key] = cells
+        return cells
+
+    def getter(self, kind: str, key: str) -> Callable[[str, str], str]:
+        """Return the function giving a cell's value of a GroupBy definition.
+
+        The function takes (workload, usage_type). Tags and cost categories
+        the cell does not have, or that do not exist, give "".
+
+        Raises:
+            ValueError: On a dimension the synthetic org does not model.
+        """
+        if kind == "TAG":
+            tags = self.tags.get(key, {})
+            return lambda workload, usage_type: tags.get(workload, "")
+        if kind == "COST_CATEGORY":
+            if key != COST_CATEGORY_NAME:
+                return lambda workload, usage_type: ""
+            mapping = self.mapping
+            return lambda workload, usage_type: mapping[workload or "Untagged"]
+        if key == "USAGE_TYPE":
+            return lambda workload, usage_type: usage_type
+        if key == "LINKED_ACCOUNT":
+            return lambda workload, usage_type: self.account_of[workload]
+        if key == "RECORD_TYPE":
+            return lambda workload, usage_type: "Usage"
+        if key in self._usage_type_dimensions:
+            values = self._usage_type_dimensions[key]
+            return lambda workload, usage_type: values[usage_type]
+        raise ValueError(f"Unsupported synthetic dimension: {key!r}")
+
+    def client(self, service_name: str, **kwargs: Any) -> Any:
+        """boto3.client-compatible factory returning in-memory stand-ins."""
+        if service_name == "ce":
+            return SyntheticCostExplorer(self)
+        if service_name == "sts":
+            return _SyntheticSTS()
+        if service_name == "s3control":
+            return _SyntheticS3Control(kwargs.get("region_name") or "us-east-1")
+        if service_name == "cloudwatch":
+            return SyntheticCloudWatch(self)
+        raise ValueError(f"No synthetic stand-in for service {service_name!r}")
+
+
+class SyntheticCostExplorer:
+    """Cost Explorer stand-in serving a SyntheticOrg's cost data.
+
+    Results are split per Granularity (one ResultsByTime entry per day or
+    calendar month) and restricted by Filter like CE does.
+    """
+
+    page_size = 5000
+    # CE serves DAILY granularity for the last 14 months only
+    daily_months = 14
+
+    def __init__(self, org: SyntheticOrg) -> None:
+        self.org = org
+        self.calls = 0
+        self._results: dict[
+            tuple[Any, ...], list[tuple[dict[str, str], list[dict[str, Any]]]]
+        ] = {}
+
+    def _page(
+        self,
+        results: list[tuple[dict[str, str], list[dict[str, Any]]]],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        """Serve page_size groups, across the ResultsByTime entries they span."""
+        offset = int(kwargs.get("NextPageToken") or 0)
+        limit = offset + self.page_size
+        total = sum(len(groups) for _, groups in results)
+        results_by_time = []
+        position = 0
+        for period, groups in results:
+            first, last = position, position + len(groups)
+            position = last
+            if groups and not (first < limit and last > offset):
+                continue
+            if not groups and not (offset <= first < limit or first == total <= limit):
+                continue
+            results_by_time.append(
+                {
+                    "TimePeriod": period,
+                    "Total": {},
+                    "Groups": groups[max(offset - first, 0) : limit - first],
+                    "Estimated": False,
+                }
+            )
+        response: dict[str, Any] = {"ResultsByTime": results_by_time}
+        if limit < total:
+            response["NextPageToken"] = str(limit)
+        return response
+
+    def _cells(
+        self, period: dict[str, str], expression: dict[str, Any] | None
+    ) -> list[tuple[str, str, float, float]]:
+        cells = self.org.cells(period["Start"], period["End"])
+        if not expression:
+            return cells
+        getter = self.org.getter
+        return [
+            (wl, ut, cost, qty)
+            for wl, ut, cost, qty in cells
+            if _matches(expression, lambda kind, key: getter(kind, key)(wl, ut))
+        ]
+
+    def get_cost_and_usage(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        period = kwargs["TimePeriod"]
+        if kwargs["Granularity"] == "DAILY" and period["Start"] < self.org.first_month(
+            self.daily_months
+        ):
+            raise ValueError(
+                f"DAILY data is only available for the last {self.daily_months} months"
+            )
+        group_by = [(g["Type"], g["Key"]) for g in kwargs.get("GroupBy", [])]
+        expression = kwargs.get("Filter")
+        periods = _split_period(period["Start"], period["End"], kwargs["Granularity"])
+        if not group_by:
+            # Ungrouped queries return each period's Total and no groups
+            return {
+                "ResultsByTime": [
+                    {
+                        "TimePeriod": p,
+                        "Total": self._total(p, kwargs["Metrics"], expression),
+                        "Groups": [],
+                        "Estimated": False,
+                    }
+                    for p in periods
+                ]
+            }
+        # Build the full result once per query and serve pages from it
+        key = (
+            period["Start"],
+            period["End"],
+            kwargs["Granularity"],
+            json.dumps(expression, sort_keys=True),
+            *group_by,
+        )
+        if key not in self._results:
+            self._results[key] = [
+                (
+                    p,
+                    self._build_groups(
+                        self._cells(p, expression), group_by, kwargs["Metrics"]
+                    ),
+                )
+                for p in periods
+            ]
+        return self._page(self._results[key], kwargs)
+
+    def _total(
+        self,
+        period: dict[str, str],
+        metrics: list[str],
+        expression: dict[str, Any] | None = None,
+    ) -> dict[str, dict[str, str]]:
+        cells = self._cells(period, expression)
+        return _metrics(sum(c[2] for c in cells), sum(c[3] for c in cells), metrics)
+
+    def _build_groups(
+        self,
+        cells: list[tuple[str, str, float, float]],
+        group_by: list[tuple[str, str]],
+        metrics: list[str],
+    ) -> list[dict[str, Any]]:
+        """Sum cells per GroupBy keys, formatted as CE returns them."""
+        getters = [self.org.getter(kind, key) for kind, key in group_by]
+        # Tags and cost categories come back as "Key$value"
+        prefixes = ["" if kind == "DIMENSION" else f"{key}$" for kind, key in group_by]
+        sums: dict[tuple[str, ...], list[float]] = {}
+        for wl, ut, cost, qty in cells:
+            keys = tuple(p + get(wl, ut) for p, get in zip(prefixes, getters))
+            entry = sums.get(keys)
+            if entry is None:
+                sums[keys] = [cost, qty]
+            else:
+                entry[0] += cost
+                entry[1] += qty
+        return [
+            {"Keys": list(keys), "Metrics": _metrics(cost, qty, metrics)}
+            for keys, (cost, qty) in sums.items()
+        ]
+
+    def _values(self, kind: str, key: str, kwargs: dict[str, Any]) -> list[str]:
+        """Distinct non-empty values of a definition in a request's period."""
+        get = self.org.getter(kind, key)
+        cells = self._cells(kwargs["TimePeriod"], kwargs.get("Filter"))
+        return sorted({get(wl, ut) for wl, ut, _, _ in cells} - {""})
+
+    def get_tags(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        if "TagKey" in kwargs:
+            tags = self._values("TAG", kwargs["TagKey"], kwargs)
+        else:
+            tags = sorted(self.org.tags)
+        return {"Tags": tags, "ReturnSize": len(tags), "TotalSize": len(tags)}
+
+    def get_dimension_values(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        values = self._values("DIMENSION", kwargs["Dimension"], kwargs)
+        return {
+            "DimensionValues": [{"Value": v, "Attributes": {}} for v in values],
+            "ReturnSize": len(values),
+            "TotalSize": len(values),
+        }
+
+    def get_cost_categories(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        if "CostCategoryName" in kwargs:
+            return {"CostCategoryValues": list(self.org.cost_centers)}
+        return {"CostCategoryNames": [COST_CATEGORY_NAME]}
+
+    def list_cost_category_definitions(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return {
+            "CostCategoryReferences": [
+                {
+                    "CostCategoryArn": _cost_category_arn(),
+                    "Name": COST_CATEGORY_NAME,
+                    "EffectiveStart": "2020-01-01T00:00:00Z",
+                }
+            ]
+        }
+
+    def describe_cost_category_definition(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return {
+            "CostCategory": {
+                "CostCategoryArn": _cost_category_arn(),
+                "Name": COST_CATEGORY_NAME,
+                "EffectiveStart": "2020-01-01T00:00:00Z",
+                "SplitChargeRules": self.org.split_charge_rules,
+            }
+        }
+
+    def get_cost_forecast(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        period = kwargs["TimePeriod"]
+        start = _month_start(datetime.fromisoformat(period["Start"]))
+        month_cost = sum(
+            c[2]
+            for c in self.org.cells(
+                start.strftime("%Y-%m-%d"),
+                (start + timedelta(days=30)).strftime("%Y-%m-%d"),
+            )
+        )
+        return {"Total": {"Amount": str(round(month_cost, 2)), "Unit": "USD"}}
+
+
+def _cost_category_arn() -> str:
+    return f"arn:aws:ce::{ACCOUNT_ID}:costcategory/{COST_CATEGORY_NAME}"
+
+
+class _SyntheticSTS:
+    def get_caller_identity(self) -> dict[str, Any]:
+        return {"Account": ACCOUNT_ID}
+
+
+class _SyntheticS3Control:
+    def __init__(self, region: str) -> None:
+        self.region = region
+
+    def list_storage_lens_configurations(self, **kwargs: Any) -> dict[str, Any]:
+        return {
+            "StorageLensConfigurationList": [
+                {
+                    "Id": STORAGE_LENS_CONFIG_ID,
+                    "StorageLensArn": (
+                        f"arn:aws:s3:{self.region}:{ACCOUNT_ID}:"
+                        f"storage-lens/{STORAGE_LENS_CONFIG_ID}"
+                    ),
+                    "IsEnabled": True,
+                }
+            ]
+        }
+
+    def get_storage_lens_configuration(self, **kwargs: Any) -> dict[str, Any]:
+        return {
+            "StorageLensConfiguration": {
+                "Id": STORAGE_LENS_CONFIG_ID,
+                "AwsOrg": {
+                    "Arn": f"arn:aws:organizations::{ACCOUNT_ID}:organization/{ORG_ID}"
+                },
+                "DataExport": {"CloudWatchMetrics": {"IsEnabled": True}},
+                "IsEnabled": True,
+            }
+        }
+
+
+class _ListMetricsPaginator:
+    def __init__(self, cloudwatch: SyntheticCloudWatch) -> None:
+        self.cloudwatch = cloudwatch
+
+    def paginate(self, **kwargs: Any) -> list[dict[str, Any]]:
+        return [{"Metrics": self.cloudwatch.metrics(kwargs["MetricName"])}]
+
+
+class SyntheticCloudWatch:
+    """CloudWatch stand-in serving daily Storage Lens series."""
+
+    def __init__(self, org: SyntheticOrg) -> None:
+        self.org = org
+        self.calls = 0
+
+    def metrics(self, metric_name: str) -> list[dict[str, Any]]:
+        return [
+            {
+                "Namespace": "AWS/S3/Storage-Lens",
+                "MetricName": metric_name,
+                "Dimensions": [
+                    {"Name": "organization_id", "Value": ORG_ID},
+                    {"Name": "record_type", "Value": "ORGANIZATION"},
+                    {"Name": "configuration_id", "Value": STORAGE_LENS_CONFIG_ID},
+                    {"Name": "storage_class", "Value": storage_class},
+                    {"Name": "aws_region", "Value": region},
+                    {"Name": "aws_account_number", "Value": account},
+                ],
+            }
+            for storage_class, region, account in self.org.storage_lens_series
+        ]
+
+    def get_paginator(self, operation_name: str) -> _ListMetricsPaginator:
+        if operation_name != "list_metrics":
+            raise ValueError(f"Unsupported synthetic paginator {operation_name!r}")
+        return _ListMetricsPaginator(self)
+
+    def get_metric_data(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        start: datetime = kwargs["StartTime"]
+        end: datetime = kwargs["EndTime"]
+        first = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if first.tzinfo is None:
+            first = first.replace(tzinfo=timezone.utc)
+        days = [first + timedelta(days=d) for d in range(max((end - start).days, 1))]
+        results = []
+        for query in kwargs["MetricDataQueries"]:
+            rng = random.Random(zlib.crc32(f"{self.org.seed}:{query['Id']}".encode()))
+            base = rng.uniform(1e12, 1e14)
+            results.append(
+                {
+                    "Id": query["Id"],
+                    "Label": query.get("Label", query["Id"]),
+                    "Timestamps": list(reversed(days)),
+                    "Values": [base * (1 + 0.001 * d) for d in range(len(days), 0, -1)],
+                    "StatusCode": "Complete",
+                }
+            )
+        return {"MetricDataResults": results}
@@ -7,6 +7,9 @@ from unittest.mock import patch
 
 import pytest
 
+from dapanoskop.collector import clear_category_cache
+from dapanoskop.storage_lens import clear_discovery_cache
+
 
 @pytest.fixture(autouse=True)
 def _aws_env(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -18,6 +21,18 @@ def _aws_env(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
 
 
+@pytest.fixture(autouse=True)
+def _clear_storage_lens_cache() -> None:
+    """Start every test without cached Storage Lens discovery results."""
+    clear_discovery_cache()
+
+
+@pytest.fixture(autouse=True)
+def _clear_cost_category_cache() -> None:
+    """Start every test without cached Cost Category definitions."""
+    clear_category_cache()
+
+
 @pytest.fixture
 def s3_bucket_env(monkeypatch: pytest.MonkeyPatch) -> str:
     """Set environment variables and return bucket name for handler tests.
@@ -0,0 +1,158 @@
+"""Tests for AWS call record/replay."""
+
+from __future__ import annotations
+
+import gzip
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from dapanoskop import cassette as cassette_module
+from dapanoskop.cassette import CassetteMissError, _redact, record, replay
+
+MOTO_ACCOUNT = "123456789012"
+START = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+
+def _put_metric(cloudwatch: object) -> None:
+    cloudwatch.put_metric_data(  # type: ignore[attr-defined]
+        Namespace="AWS/S3/Storage-Lens",
+        MetricData=[
+            {
+                "MetricName": "StorageBytes",
+                "Dimensions": [{"Name": "organization_id", "Value": "o-abc"}],
+                "Timestamp": START + timedelta(hours=1),
+                "Value": 42.0,
+            }
+        ],
+    )
+
+
+def _calls() -> dict[str, object]:
+    """The AWS calls exercised by the record/replay round trip."""
+    sts = boto3.client("sts")
+    cloudwatch = boto3.client("cloudwatch", region_name="us-east-1")
+    account = sts.get_caller_identity()["Account"]
+    metrics = cloudwatch.get_metric_data(
+        MetricDataQueries=[
+            {
+                "Id": "m0",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": "AWS/S3/Storage-Lens",
+                        "MetricName": "StorageBytes",
+                        "Dimensions": [{"Name": "organization_id", "Value": "o-abc"}],
+                    },
+                    "Period": 86400,
+                    "Stat": "Average",
+                },
+            }
+        ],
+        StartTime=START,
+        EndTime=START + timedelta(days=1),
+    )["MetricDataResults"][0]
+    return {
+        "account": account,
+        "timestamps": metrics["Timestamps"],
+        "values": metrics["Values"],
+    }
+
+
+@mock_aws
+def test_record_redacts_and_skips_other_services(tmp_path: Path) -> None:
+    path = tmp_path / "run.cassette.json.gz"
+    boto3.client("s3").create_bucket(Bucket="out")
+    _put_metric(boto3.client("cloudwatch", region_name="us-east-1"))
+
+    with record(path) as cassette:
+        recorded = _calls()
+        boto3.client("s3").list_objects_v2(Bucket="out")
+
+    assert [(i["service"], i["operation"]) for i in cassette.interactions] == [
+        ("sts", "GetCallerIdentity"),
+        ("cloudwatch", "GetMetricData"),
+    ]
+    text = gzip.open(path, "rt").read()
+    assert MOTO_ACCOUNT not in text
+    assert recorded["account"] == MOTO_ACCOUNT
+    assert recorded["values"] == [42.0]
+
+
+def test_replay_serves_recorded_responses(tmp_path: Path) -> None:
+    path = tmp_path / "run.cassette.json.gz"
+    with mock_aws():
+        _put_metric(boto3.client("cloudwatch", region_name="us-east-1"))
+        with record(path):
+            recorded = _calls()
+
+    with replay(path) as cassette:
+        replayed = _calls()
+
+    assert replayed["account"] != MOTO_ACCOUNT
+    assert replayed["account"].startswith("0000")
+    assert replayed["timestamps"] == recorded["timestamps"]
+    assert isinstance(replayed["timestamps"][0], datetime)
+    assert replayed["values"] == recorded["values"]
+    assert len(cassette.interactions) == 2
+
+
+def test_replay_miss_raises(tmp_path: Path) -> None:
+    path = tmp_path / "run.cassette.json.gz"
+    with mock_aws(), record(path):
+        boto3.client("sts").get_caller_identity()
+
+    with replay(path), pytest.raises(CassetteMissError, match="GetMetricData"):
+        boto3.client("cloudwatch", region_name="us-east-1").get_metric_data(
+            MetricDataQueries=[],
+            StartTime=START,
+            EndTime=START + timedelta(days=1),
+        )
+
+
+def test_replay_reraises_recorded_errors(tmp_path: Path) -> None:
+    path = tmp_path / "run.cassette.json.gz"
+    arn = f"arn:aws:ce::{MOTO_ACCOUNT}:costcategory/missing"
+    with mock_aws(), record(path), pytest.raises(ClientError):
+        boto3.client("ce").describe_cost_category_definition(CostCategoryArn=arn)
+
+    with replay(path) as cassette:
+        redacted_arn = cassette.interactions[0]["params"]["CostCategoryArn"]
+        with pytest.raises(ClientError, match="ResourceNotFoundException"):
+            boto3.client("ce").describe_cost_category_definition(
+                CostCategoryArn=redacted_arn
+            )
+
+
+def test_replay_simulates_latency(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "run.cassette.json.gz"
+    with mock_aws(), record(path) as recorded:
+        boto3.client("sts").get_caller_identity()
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(cassette_module.time, "sleep", sleeps.append)
+    with replay(path, latency_scale=2.0):
+        boto3.client("sts").get_caller_identity()
+
+    assert sleeps == [pytest.approx(recorded.interactions[0]["duration"] * 2)]
+
+
+def test_redact_only_touches_account_ids() -> None:
+    salt = b"salt"
+    value = {
+        "Arn": f"arn:aws:iam::{MOTO_ACCOUNT}:root",
+        "Amount": "12.123456789012",
+        "Count": 123456789012,
+    }
+    redacted = _redact(value, salt)
+    assert MOTO_ACCOUNT not in redacted["Arn"]
+    assert redacted["Amount"] == "12.123456789012"
+    assert redacted["Count"] == 123456789012
+    # Already-redacted IDs are stable, different salts give different IDs
+    assert _redact(redacted, b"other") == redacted
+    assert _redact(value, b"other")["Arn"] != redacted["Arn"]
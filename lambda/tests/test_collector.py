@@ -2,32 +2,43 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from unittest.mock import MagicMock
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
 
+import pytest
 from moto import mock_aws
 
 from dapanoskop.collector import (
-    _get_periods,
+    CATEGORY_CACHE_TTL_SECONDS,
     _get_prior_partial_period,
-    _month_range,
     collect,
     get_allocated_costs_by_category,
     get_cost_and_usage,
     get_cost_categories,
     get_cost_forecast,
+    get_monthly_totals,
+    get_periods,
     get_split_charge_categories,
+    get_split_charge_rules_by_period,
+    month_range,
+    parse_cost_filter,
+    parse_group_by,
+    plan_queries,
+    probe_freshness,
+    sum_daily_cube,
+    update_daily_cube,
 )
+from dapanoskop.storage import MemoryStorage
 
 
 def test_month_range_regular() -> None:
-    start, end = _month_range(2026, 3)
+    start, end = month_range(2026, 3)
     assert start == "2026-03-01"
     assert end == "2026-04-01"
 
 
 def test_month_range_december() -> None:
-    start, end = _month_range(2025, 12)
+    start, end = month_range(2025, 12)
     assert start == "2025-12-01"
     assert end == "2026-01-01"
 
@@ -35,7 +46,7 @@ def test_month_range_december() -> None:
 def test_get_periods_mid_month() -> None:
     """On Feb 10, current period (MTD) should be February, prev_complete is January."""
     now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
-    periods = _get_periods(now)
+    periods = get_periods(now)
 
     # current = in-progress MTD month (Feb 2026, end = today exclusive)
     assert periods["current"][0] == "2026-02-01"
@@ -55,7 +66,7 @@ def test_get_periods_mid_month() -> None:
 def test_get_periods_first_of_month() -> None:
     """On Mar 1, MTD window has zero width — skip current, only prev_complete."""
     now = datetime(2026, 3, 1, 6, 0, 0, tzinfo=timezone.utc)
-    periods = _get_periods(now)
+    periods = get_periods(now)
 
     # No MTD period on the 1st (zero-width window)
     assert "current" not in periods
@@ -70,7 +81,7 @@ def test_get_periods_first_of_month() -> None:
 def test_get_periods_january() -> None:
     """On Jan 15, current (MTD) is January, prev_complete is December."""
     now = datetime(2026, 1, 15, 6, 0, 0, tzinfo=timezone.utc)
-    periods = _get_periods(now)
+    periods = get_periods(now)
 
     assert periods["current"][0] == "2026-01-01"
     assert periods["current"][1] == "2026-01-15"
@@ -85,7 +96,7 @@ def test_get_periods_january() -> None:
 def test_get_periods_january_first() -> None:
     """On Jan 1, MTD window has zero width — skip current, only prev_complete."""
     now = datetime(2026, 1, 1, 6, 0, 0, tzinfo=timezone.utc)
-    periods = _get_periods(now)
+    periods = get_periods(now)
 
     # No MTD period on the 1st (zero-width window)
     assert "current" not in periods
@@ -101,7 +112,7 @@ def test_get_periods_with_target_month() -> None:
     """Explicit target month overrides now parameter (backfill mode)."""
     now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
     # Request data for March 2025
-    periods = _get_periods(now, target_year=2025, target_month=3)
+    periods = get_periods(now, target_year=2025, target_month=3)
 
     assert periods["current"][0] == "2025-03-01"
     assert periods["prev_month"][0] == "2025-02-01"
@@ -114,7 +125,7 @@ def test_get_periods_with_target_month() -> None:
 def test_get_periods_with_target_january() -> None:
     """Target January handles year rollover correctly (backfill mode)."""
     now = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
-    periods = _get_periods(now, target_year=2025, target_month=1)
+    periods = get_periods(now, target_year=2025, target_month=1)
 
     assert periods["current"][0] == "2025-01-01"
     assert periods["prev_month"][0] == "2024-12-01"
@@ -256,6 +267,233 @@ def test_get_cost_and_usage_empty_response() -> None:
     assert results == []
 
 
+def test_parse_group_by() -> None:
+    assert parse_group_by("") == [{"Type": "TAG", "Key": "App"}]
+    assert parse_group_by("TAG:Team, LINKED_ACCOUNT") == [
+        {"Type": "TAG", "Key": "Team"},
+        {"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"},
+    ]
+    for spec in ("USAGE_TYPE", "TAG:", "REGION,REGION"):
+        with pytest.raises(ValueError):
+            parse_group_by(spec)
+
+
+def test_plan_queries_groups_by_the_two_largest_dimensions() -> None:
+    assert plan_queries([3, 2, 40]) == ([0, 2], [1])
+    assert plan_queries([5, 30, 2, 40]) == ([1, 3], [0, 2])
+
+
+def test_get_cost_and_usage_joins_planned_queries() -> None:
+    """Three dimensions: group by the two largest, one query per filter value."""
+    mock_client = MagicMock()
+    mock_client.get_tags.return_value = {"Tags": ["web$blue", "api"]}
+    mock_client.get_dimension_values.side_effect = lambda **kw: {
+        "DimensionValues": [
+            {"Value": v}
+            for v in (
+                ["111", "222"]
+                if kw["Dimension"] == "LINKED_ACCOUNT"
+                else ["BoxUsage", "Requests", "TimedStorage", "DataTransfer"]
+            )
+        ]
+    }
+
+    def query(**kwargs):
+        account = kwargs["Filter"]["Dimensions"]["Values"][0]
+        assert kwargs["GroupBy"] == [
+            {"Type": "TAG", "Key": "Team"},
+            {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
+        ]
+        cost = {"111": "10", "222": "20"}[account]
+        return {
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2026-01-01", "End": "2026-02-01"},
+                    "Groups": [
+                        {
+                            "Keys": ["Team$web$blue", "BoxUsage"],
+                            "Metrics": {"NetAmortizedCost": {"Amount": cost}},
+                        },
+                        {
+                            "Keys": ["Team$", "Requests"],
+                            "Metrics": {"NetAmortizedCost": {"Amount": cost}},
+                        },
+                    ],
+                }
+            ]
+        }
+
+    mock_client.get_cost_and_usage.side_effect = query
+
+    groups = get_cost_and_usage(
+        mock_client,
+        "2026-01-01",
+        "2026-02-01",
+        parse_group_by("TAG:Team,LINKED_ACCOUNT"),
+    )
+
+    assert sorted(
+        (g["Keys"][0], g["Keys"][1], g["Metrics"]["NetAmortizedCost"]["Amount"])
+        for g in groups
+    ) == [
+        ("Team/LINKED_ACCOUNT$Untagged / 111", "Requests", "10"),
+        ("Team/LINKED_ACCOUNT$Untagged / 222", "Requests", "20"),
+        ("Team/LINKED_ACCOUNT$web$blue / 111", "BoxUsage", "10"),
+        ("Team/LINKED_ACCOUNT$web$blue / 222", "BoxUsage", "20"),
+    ]
+    assert mock_client.get_cost_and_usage.call_count == 2
+
+
+def test_get_cost_and_usage_lists_untagged_once() -> None:
+    """CE listing "" itself does not plan the untagged query twice."""
+    mock_client = MagicMock()
+    mock_client.get_tags.side_effect = lambda **kw: {
+        "Tags": [""] if kw["TagKey"] == "Team" else ["", "prod", "dev"]
+    }
+    mock_client.get_dimension_values.return_value = {
+        "DimensionValues": [{"Value": "BoxUsage"}, {"Value": "Requests"}]
+    }
+    mock_client.get_cost_and_usage.return_value = {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-01-01", "End": "2026-02-01"},
+                "Groups": [
+                    {
+                        "Keys": ["Env$prod", "BoxUsage"],
+                        "Metrics": {"NetAmortizedCost": {"Amount": "5"}},
+                    }
+                ],
+            }
+        ]
+    }
+
+    groups = get_cost_and_usage(
+        mock_client,
+        "2026-01-01",
+        "2026-02-01",
+        [{"Type": "TAG", "Key": "Team"}, {"Type": "TAG", "Key": "Env"}],
+    )
+
+    # Team is the smallest dimension, queried once for its only value ""
+    assert mock_client.get_cost_and_usage.call_count == 1
+    assert len(groups) == 1
+
+
+def test_parse_cost_filter() -> None:
+    assert parse_cost_filter("") is None
+    assert parse_cost_filter("REGION=eu-west-1") == {
+        "Dimensions": {"Key": "REGION", "Values": ["eu-west-1"]}
+    }
+    assert parse_cost_filter("RECORD_TYPE!=Tax, Credit,Refund; SERVICE=AWS Lambda") == {
+        "And": [
+            {
+                "Not": {
+                    "Dimensions": {
+                        "Key": "RECORD_TYPE",
+                        "Values": ["Tax", "Credit", "Refund"],
+                    }
+                }
+            },
+            {"Dimensions": {"Key": "SERVICE", "Values": ["AWS Lambda"]}},
+        ]
+    }
+    for spec in ("REGION", "REGION=", "USAGE_TYPE=x", "REGION=a;REGION!=b"):
+        with pytest.raises(ValueError):
+            parse_cost_filter(spec)
+
+
+def test_query_cube_combines_cost_filter_with_planned_filters() -> None:
+    """The cost filter narrows value listing and is And-ed per planned query."""
+    cost_filter = parse_cost_filter("RECORD_TYPE!=Tax;REGION=eu-west-1")
+    mock_client = MagicMock()
+    mock_client.get_tags.return_value = {"Tags": ["web"]}
+    mock_client.get_dimension_values.side_effect = lambda **kw: {
+        "DimensionValues": [
+            {"Value": v}
+            for v in (
+                ["111", "222", "333"]
+                if kw["Dimension"] == "LINKED_ACCOUNT"
+                else ["BoxUsage", "Requests", "TimedStorage"]
+            )
+        ]
+    }
+    mock_client.get_cost_and_usage.return_value = {"ResultsByTime": []}
+
+    get_cost_and_usage(
+        mock_client,
+        "2026-01-01",
+        "2026-02-01",
+        parse_group_by("TAG:Team,LINKED_ACCOUNT"),
+        cost_filter,
+    )
+
+    assert mock_client.get_tags.call_args.kwargs["Filter"] == cost_filter
+    filters = [
+        c.kwargs["Filter"] for c in mock_client.get_cost_and_usage.call_args_list
+    ]
+    # Team (web, untagged) is the smallest dimension and is filtered on
+    assert filters == [
+        {"And": [*cost_filter["And"], {"Tags": {"Key": "Team", **match}}]}
+        for match in ({"MatchOptions": ["ABSENT"]}, {"Values": ["web"]})
+    ]
+
+
+def test_collect_pushes_cost_filter_to_every_query() -> None:
+    """Cost, mapping, allocation and forecast queries all carry the filter."""
+    cost_filter = parse_cost_filter("RECORD_TYPE!=Tax,Credit,Refund")
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.return_value = {"ResultsByTime": []}
+    mock_ce_client.get_cost_categories.return_value = {"CostCategoryValues": []}
+    mock_ce_client.list_cost_category_definitions.return_value = {
+        "CostCategoryReferences": []
+    }
+    mock_ce_client.get_cost_forecast.return_value = {"Total": {"Amount": "10"}}
+
+    now = datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc)
+    with patch("boto3.client", return_value=mock_ce_client):
+        result = collect(
+            cost_category_name="CostCenter", now=now, cost_filter=cost_filter
+        )
+
+    calls = mock_ce_client.get_cost_and_usage.call_args_list
+    group_bys = [c.kwargs["GroupBy"][-1]["Key"] for c in calls]
+    assert {"USAGE_TYPE", "CostCenter"} <= set(group_bys)
+    assert all(c.kwargs["Filter"] == cost_filter for c in calls)
+    assert mock_ce_client.get_cost_forecast.call_args.kwargs["Filter"] == cost_filter
+    assert result["cost_filter"] == cost_filter
+
+
+def test_get_cost_categories_with_tag_group_by() -> None:
+    """Mappings are keyed by the configured tag's values."""
+    mock_client = MagicMock()
+    mock_client.get_cost_and_usage.return_value = {
+        "ResultsByTime": [
+            {
+                "Groups": [
+                    {"Keys": ["Team$web", "CostCenter$Eng"], "Metrics": {}},
+                    {"Keys": ["Team$", "CostCenter$Ops"], "Metrics": {}},
+                    {"Keys": ["Team$a$b", "CostCenter$R$D"], "Metrics": {}},
+                ]
+            }
+        ]
+    }
+
+    _, mapping = get_cost_categories(
+        mock_client,
+        "CostCenter",
+        "2026-01-01",
+        "2026-02-01",
+        group_by=parse_group_by("TAG:Team"),
+    )
+
+    assert mapping == {"web": "Eng", "Untagged": "Ops", "a$b": "R$D"}
+    group_by = mock_client.get_cost_and_usage.call_args.kwargs["GroupBy"]
+    assert group_by == [
+        {"Type": "TAG", "Key": "Team"},
+        {"Type": "COST_CATEGORY", "Key": "CostCenter"},
+    ]
+
+
 def test_get_cost_categories_discovers_first_category() -> None:
     """Test that when category_name is empty, uses first discovered category."""
     mock_client = MagicMock()
@@ -1045,6 +1283,24 @@ def test_collect_includes_forecast_for_mtd_runs() -> None:
     assert result["forecast"] == 3000.0
 
 
+def test_collect_uses_given_now() -> None:
+    """An explicit now (e.g. a replayed run's recording time) drives the periods."""
+    from unittest.mock import patch
+
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.return_value = {"ResultsByTime": [{"Groups": []}]}
+    mock_ce_client.get_cost_categories.return_value = {"CostCategoryNames": []}
+    mock_ce_client.get_cost_forecast.return_value = {"Total": {"Amount": "0"}}
+
+    now = datetime(2025, 7, 20, 8, 0, 0, tzinfo=timezone.utc)
+    with patch("boto3.client", return_value=mock_ce_client):
+        result = collect(cost_category_name="", now=now)
+
+    assert result["now"] == now
+    assert result["period_labels"]["current"] == "2025-07"
+    assert result["period_labels"]["prev_complete"] == "2025-06"
+
+
 def test_collect_backfill_excludes_forecast() -> None:
     """Test that collect() does NOT call GetCostForecast for backfill runs."""
     from unittest.mock import patch
@@ -1175,6 +1431,147 @@ def test_get_split_charge_categories_paginated_arn_discovery() -> None:
     assert second_call[1].get("NextToken") == "page2token"
 
 
+def _category_client(effective_start: str) -> MagicMock:
+    client = MagicMock()
+    client.list_cost_category_definitions.return_value = {
+        "CostCategoryReferences": [
+            {
+                "Name": "CostCenter",
+                "CostCategoryArn": "arn:aws:ce::123456789012:costcategory/abc-123",
+                "EffectiveStart": effective_start,
+            }
+        ]
+    }
+    client.describe_cost_category_definition.return_value = {
+        "CostCategory": {"SplitChargeRules": [{"Source": "Shared", "Targets": ["Eng"]}]}
+    }
+    client.get_cost_categories.return_value = {"CostCategoryNames": ["CostCenter"]}
+    client.get_cost_and_usage.return_value = {
+        "ResultsByTime": [
+            {"Groups": [{"Keys": ["App$web", "CostCenter$Eng"], "Metrics": {}}]}
+        ]
+    }
+    return client
+
+
+def test_cost_category_cache_serves_warm_calls() -> None:
+    """Split charge rules and closed-period mappings are fetched once."""
+    client = _category_client("2026-01-01T00:00:00Z")
+
+    for _ in range(2):
+        assert get_split_charge_categories(client, "CostCenter") == (
+            ["Shared"],
+            [
+                {
+                    "Source": "Shared",
+                    "Targets": ["Eng"],
+                    "Method": "PROPORTIONAL",
+                    "Parameters": [],
+                }
+            ],
+        )
+        assert get_cost_categories(
+            client, "", "2026-01-01", "2026-02-01", closed=True
+        ) == ("CostCenter", {"web": "Eng"})
+    # Open periods are always queried
+    get_cost_categories(client, "CostCenter", "2026-02-01", "2026-02-15")
+    get_cost_categories(client, "CostCenter", "2026-02-01", "2026-02-15")
+
+    assert client.list_cost_category_definitions.call_count == 1
+    assert client.describe_cost_category_definition.call_count == 1
+    assert client.get_cost_categories.call_count == 1 + 1 + 2
+    assert client.get_cost_and_usage.call_count == 1 + 2
+
+
+def test_get_split_charge_rules_by_period_describes_each_version_once() -> None:
+    """Periods get their effective version; each version is described once."""
+    client = _category_client("2026-01-01T00:00:00Z")
+    current = {"Source": "Shared", "Targets": ["Eng"], "Method": "FIXED"}
+    previous = {"Source": "Shared", "Targets": ["Eng"], "Method": "EVEN"}
+
+    def describe(**kwargs):
+        if kwargs.get("EffectiveOn", "2026-01-01") >= "2026-01-01":
+            version = {"EffectiveStart": "2026-01-01T00:00:00Z", "Rules": [current]}
+        elif kwargs["EffectiveOn"] >= "2025-01-01":
+            version = {
+                "EffectiveStart": "2025-01-01T00:00:00Z",
+                "EffectiveEnd": "2026-01-01T00:00:00Z",
+                "Rules": [previous],
+            }
+        else:
+            raise ValueError("ResourceNotFoundException")
+        return {
+            "CostCategory": {
+                "EffectiveStart": version["EffectiveStart"],
+                "EffectiveEnd": version.get("EffectiveEnd"),
+                "SplitChargeRules": version["Rules"],
+            }
+        }
+
+    client.describe_cost_category_definition.side_effect = describe
+    periods = {
+        "current": ("2026-02-01", "2026-02-15"),
+        "prev_complete": ("2026-01-01", "2026-02-01"),
+        "prev_month": ("2025-12-01", "2026-01-01"),
+        "yoy": ("2025-02-01", "2025-02-15"),
+        "yoy_prev_complete": ("2025-01-01", "2025-02-01"),
+        "prev_month_partial": ("2026-01-01", "2026-01-15"),
+    }
+
+    assert get_split_charge_categories(client, "CostCenter")[0] == ["Shared"]
+    rules = get_split_charge_rules_by_period(client, "CostCenter", periods)
+    rules_before = get_split_charge_rules_by_period(
+        client, "CostCenter", {"yoy": ("2024-12-01", "2025-01-01")}
+    )
+
+    method = {key: [r["Method"] for r in value] for key, value in rules.items()}
+    assert method == {
+        "current": ["FIXED"],
+        "prev_complete": ["FIXED"],
+        "prev_month": ["EVEN"],
+        "yoy": ["EVEN"],
+        "yoy_prev_complete": ["EVEN"],
+        "prev_month_partial": ["FIXED"],
+    }
+    # Before the category existed: no rules known for the period
+    assert rules_before == {}
+    # Current version, the 2025 version and the failed 2024 lookup
+    effective_on = [
+        c.kwargs.get("EffectiveOn")
+        for c in client.describe_cost_category_definition.call_args_list
+    ]
+    assert effective_on == [None, "2025-12-01", "2024-12-01"]
+
+
+def test_cost_category_cache_revalidates_effective_start_after_ttl() -> None:
+    """After the TTL the cache is kept only while EffectiveStart is unchanged."""
+    client = _category_client("2026-01-01T00:00:00Z")
+
+    with patch("dapanoskop.collector.time.monotonic") as mock_monotonic:
+        mock_monotonic.return_value = 1000.0
+        get_split_charge_categories(client, "CostCenter")
+        get_cost_categories(client, "CostCenter", "2026-01-01", "2026-02-01", True)
+
+        # Expired, same version: one list call, nothing re-described
+        mock_monotonic.return_value = 1000.0 + CATEGORY_CACHE_TTL_SECONDS + 1
+        get_split_charge_categories(client, "CostCenter")
+        get_cost_categories(client, "CostCenter", "2026-01-01", "2026-02-01", True)
+        assert client.list_cost_category_definitions.call_count == 2
+        assert client.describe_cost_category_definition.call_count == 1
+        assert client.get_cost_and_usage.call_count == 1
+
+        # Expired, definition updated: everything is fetched again
+        mock_monotonic.return_value = 1000.0 + 2 * CATEGORY_CACHE_TTL_SECONDS + 2
+        client.list_cost_category_definitions.return_value["CostCategoryReferences"][0][
+            "EffectiveStart"
+        ] = "2026-02-01T00:00:00Z"
+        get_split_charge_categories(client, "CostCenter")
+        get_cost_categories(client, "CostCenter", "2026-01-01", "2026-02-01", True)
+        assert client.list_cost_category_definitions.call_count == 3
+        assert client.describe_cost_category_definition.call_count == 2
+        assert client.get_cost_and_usage.call_count == 2
+
+
 # --- December edge case: forecast end date wraps to next year ---
 
 
@@ -1219,3 +1616,206 @@ def test_collect_december_mtd_forecast_wraps_year() -> None:
         "December forecast must wrap year: expected 2026-01-01"
     )
     assert forecast_call["TimePeriod"]["Start"] == "2025-12-15"
+
+
+def test_probe_freshness_makes_one_ungrouped_query() -> None:
+    from unittest.mock import patch
+
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.return_value = {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-02-01", "End": "2026-03-01"},
+                "Total": {"NetAmortizedCost": {"Amount": "300", "Unit": "USD"}},
+                "Estimated": False,
+            },
+            {
+                "TimePeriod": {"Start": "2026-03-01", "End": "2026-03-10"},
+                "Total": {"NetAmortizedCost": {"Amount": "12.5", "Unit": "USD"}},
+                "Estimated": True,
+            },
+        ]
+    }
+    results = mock_ce_client.get_cost_and_usage.return_value["ResultsByTime"]
+    now = datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc)
+
+    with patch("boto3.client", return_value=mock_ce_client):
+        probe = probe_freshness(now)
+        same = probe_freshness(now)
+        results[1]["Total"]["NetAmortizedCost"]["Amount"] = "13.0"
+        changed = probe_freshness(now)
+        # A restatement of the completed month alone also counts
+        results[0]["Total"]["NetAmortizedCost"]["Amount"] = "301"
+        restated = probe_freshness(now)
+
+    kwargs = mock_ce_client.get_cost_and_usage.call_args.kwargs
+    assert kwargs["TimePeriod"] == {"Start": "2026-02-01", "End": "2026-03-10"}
+    assert kwargs["Granularity"] == "MONTHLY"
+    assert "GroupBy" not in kwargs
+    assert probe["labels"] == ["2026-03", "2026-02"]
+    assert probe["checked_at"] == "2026-03-10T06:00:00+00:00"
+    assert probe["fingerprint"] == same["fingerprint"]
+    assert probe["fingerprint"] != changed["fingerprint"]
+    assert changed["fingerprint"] != restated["fingerprint"]
+
+
+def test_probe_freshness_fingerprints_run_settings() -> None:
+    from unittest.mock import patch
+
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.return_value = {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2026-03-01", "End": "2026-03-10"},
+                "Total": {"NetAmortizedCost": {"Amount": "12.5", "Unit": "USD"}},
+            }
+        ]
+    }
+    now = datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc)
+    settings = {"cost_category_name": "", "group_by": None, "include_efs": False}
+
+    with patch("boto3.client", return_value=mock_ce_client):
+        probe = probe_freshness(now, settings=settings)
+        same = probe_freshness(now, settings=dict(settings))
+        efs = probe_freshness(now, settings={**settings, "include_efs": True})
+        team = probe_freshness(
+            now, settings={**settings, "group_by": [{"Type": "TAG", "Key": "Team"}]}
+        )
+
+    assert probe["fingerprint"] == same["fingerprint"]
+    assert len({probe["fingerprint"], efs["fingerprint"], team["fingerprint"]}) == 3
+
+
+def test_get_monthly_totals_single_query_across_months() -> None:
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.side_effect = [
+        {
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2025-11-01", "End": "2025-12-01"},
+                    "Total": {"NetAmortizedCost": {"Amount": "10.5", "Unit": "USD"}},
+                }
+            ],
+            "NextPageToken": "page2",
+        },
+        {
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2025-12-01", "End": "2026-01-01"},
+                    "Total": {"NetAmortizedCost": {"Amount": "7", "Unit": "USD"}},
+                }
+            ]
+        },
+    ]
+
+    totals = get_monthly_totals(mock_ce_client, "2025-11-01", "2026-01-01")
+
+    assert totals == {"2025-11": 10.5, "2025-12": 7.0}
+    first = mock_ce_client.get_cost_and_usage.call_args_list[0].kwargs
+    assert first["TimePeriod"] == {"Start": "2025-11-01", "End": "2026-01-01"}
+    assert "GroupBy" not in first
+
+
+def test_update_daily_cube_fetches_only_recent_days() -> None:
+    daily_cost = {"value": 1.0}
+
+    def daily_results(**kwargs):
+        assert kwargs["Granularity"] == "DAILY"
+        day = date.fromisoformat(kwargs["TimePeriod"]["Start"])
+        end = date.fromisoformat(kwargs["TimePeriod"]["End"])
+        results = []
+        while day < end:
+            results.append(
+                {
+                    "TimePeriod": {"Start": day.isoformat()},
+                    "Groups": [
+                        {
+                            "Keys": ["App$web", "BoxUsage"],
+                            "Metrics": {
+                                "NetAmortizedCost": {
+                                    "Amount": str(daily_cost["value"])
+                                },
+                                "UsageQuantity": {"Amount": "2"},
+                            },
+                        }
+                    ],
+                }
+            )
+            day += timedelta(days=1)
+        return {"ResultsByTime": results}
+
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.side_effect = daily_results
+    storage = MemoryStorage()
+
+    def run(start: str, end: str, today: str) -> tuple[float, float]:
+        days = update_daily_cube(
+            mock_ce_client, storage, start, end, 3, date.fromisoformat(today)
+        )
+        groups = sum_daily_cube(days)
+        assert [g["Keys"] for g in groups] == [["App$web", "BoxUsage"]]
+        metrics = groups[0]["Metrics"]
+        return (
+            float(metrics["NetAmortizedCost"]["Amount"]),
+            float(metrics["UsageQuantity"]["Amount"]),
+        )
+
+    def fetched() -> dict[str, str]:
+        return mock_ce_client.get_cost_and_usage.call_args.kwargs["TimePeriod"]
+
+    # First run fetches the whole window
+    assert run("2026-03-01", "2026-03-10", "2026-03-10") == (9.0, 18.0)
+    assert fetched() == {"Start": "2026-03-01", "End": "2026-03-10"}
+
+    # Later runs fetch only the new days and the restatement window before
+    # them; revised days replace the cube's, older days keep their values
+    daily_cost["value"] = 2.0
+    assert run("2026-03-01", "2026-03-20", "2026-03-20") == (6.0 + 13 * 2.0, 38.0)
+    assert fetched() == {"Start": "2026-03-07", "End": "2026-03-20"}
+    assert run("2026-03-01", "2026-03-21", "2026-03-21") == (6.0 + 14 * 2.0, 40.0)
+    assert fetched() == {"Start": "2026-03-17", "End": "2026-03-21"}
+
+    # The completed month is restated until restatement_days after its end
+    assert mock_ce_client.get_cost_and_usage.call_count == 3
+    run("2026-03-01", "2026-04-01", "2026-04-01")
+    assert fetched() == {"Start": "2026-03-18", "End": "2026-04-01"}
+    run("2026-03-01", "2026-04-01", "2026-04-04")
+    assert fetched() == {"Start": "2026-03-29", "End": "2026-04-01"}
+    assert run("2026-03-01", "2026-04-01", "2026-04-05") == (6.0 + 25 * 2.0, 62.0)
+    assert mock_ce_client.get_cost_and_usage.call_count == 5
+
+    # Each month has its own cube
+    assert run("2026-04-01", "2026-04-03", "2026-04-05") == (4.0, 4.0)
+    assert fetched() == {"Start": "2026-04-01", "End": "2026-04-03"}
+    assert sorted(storage.list_prefixes()) == ["cost-cube"]
+
+
+def test_collect_with_daily_cube() -> None:
+    from unittest.mock import patch
+
+    mock_ce_client = MagicMock()
+    mock_ce_client.get_cost_and_usage.return_value = {"ResultsByTime": []}
+    mock_ce_client.get_cost_categories.return_value = {"CostCategoryNames": []}
+    now = datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc)
+
+    with patch("boto3.client", return_value=mock_ce_client):
+        collected = collect(now=now, daily_cube=MemoryStorage(), restatement_days=2)
+
+    calls = mock_ce_client.get_cost_and_usage.call_args_list
+    daily = [
+        call.kwargs["TimePeriod"]
+        for call in calls
+        if call.kwargs["Granularity"] == "DAILY"
+    ]
+    # MTD and the most recently completed month get daily cubes
+    assert daily == [
+        {"Start": "2026-03-01", "End": "2026-03-10"},
+        {"Start": "2026-02-01", "End": "2026-03-01"},
+    ]
+    # MTD groups come from the cube instead of a monthly query
+    assert {"Start": "2026-03-01", "End": "2026-03-10"} not in [
+        call.kwargs["TimePeriod"]
+        for call in calls
+        if call.kwargs["Granularity"] == "MONTHLY"
+    ]
+    assert collected["daily"] == {"current": {}, "prev_complete": {}}
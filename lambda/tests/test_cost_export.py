@@ -0,0 +1,391 @@
+"""Tests for the CUR 2.0 / FOCUS export collector."""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from dapanoskop import cost_export
+from dapanoskop.cost_export import (
+    STATE_KEY,
+    collect_from_export,
+    export_output_fingerprint,
+    load_export_state,
+    save_export_state,
+)
+from dapanoskop.processor import process
+from dapanoskop.storage import MemoryStorage, PreconditionFailedError
+
+_TAGS = pa.map_(pa.string(), pa.string())
+
+# usage day, line item type, usage type, amount, unblended, net unblended,
+# Savings Plan effective cost, App tag, Team cost category
+_CUR2_ROWS = {
+    "2025-12": [
+        ("2025-12-20", "Usage", "BoxUsage", 1, 50.0, None, None, "web", "Alpha"),
+    ],
+    "2026-01": [
+        ("2026-01-15", "Usage", "BoxUsage", 1, 2.0, None, None, "web", "Alpha"),
+    ],
+    "2026-02": [
+        ("2026-02-03", "Usage", "BoxUsage", 10, 5.0, None, None, "web", "Alpha"),
+        ("2026-02-04", "Usage", "BoxUsage", 5, 4.0, 3.0, None, "web", "Alpha"),
+        ("2026-02-05", "SavingsPlanCoveredUsage", "BoxUsage", 20, 8.0, None, 6.0)
+        + ("api", "Beta"),
+        ("2026-02-05", "SavingsPlanNegation", "BoxUsage", 0, -8.0, None, None)
+        + ("api", "Beta"),
+        ("2026-02-06", "Usage", "TimedStorage-ByteHrs", 100, 1.0, None, None)
+        + (None, None),
+    ],
+}
+
+
+def _day(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def _tags(key: str, value: str | None) -> list[tuple[str, str]]:
+    return [(key, value)] if value else []
+
+
+def _write_cur2(data: Path) -> None:
+    for month, rows in _CUR2_ROWS.items():
+        path = data / f"BILLING_PERIOD={month}" / "cur-00001.snappy.parquet"
+        path.parent.mkdir(parents=True)
+        columns = list(zip(*rows))
+        table = pa.table(
+            {
+                "line_item_usage_start_date": pa.array(
+                    [_day(d) for d in columns[0]], pa.timestamp("ms", tz="UTC")
+                ),
+                "line_item_line_item_type": columns[1],
+                "line_item_usage_type": columns[2],
+                "line_item_usage_amount": pa.array(columns[3], pa.float64()),
+                "line_item_unblended_cost": columns[4],
+                "line_item_net_unblended_cost": pa.array(columns[5], pa.float64()),
+                "savings_plan_savings_plan_effective_cost": pa.array(
+                    columns[6], pa.float64()
+                ),
+                "resource_tags": pa.array(
+                    [_tags("user_App", v) for v in columns[7]], _TAGS
+                ),
+                "cost_category": pa.array(
+                    [_tags("Team", v) for v in columns[8]], _TAGS
+                ),
+                "line_item_product_code": ["AmazonEC2"] * len(rows),
+            }
+        )
+        # Small row groups so batching and merging across batches is exercised
+        pq.write_table(table, path, row_group_size=2)
+    (data / "BILLING_PERIOD=2026-02" / "manifest.json").write_text("{}")
+
+
+def _amounts(groups: list[dict]) -> dict[tuple[str, ...], tuple[float, float]]:
+    return {
+        tuple(g["Keys"]): (
+            float(g["Metrics"]["NetAmortizedCost"]["Amount"]),
+            float(g["Metrics"]["UsageQuantity"]["Amount"]),
+        )
+        for g in groups
+    }
+
+
+def _ce_client() -> MagicMock:
+    client = MagicMock()
+    client.list_cost_category_definitions.return_value = {"CostCategoryReferences": []}
+    client.get_cost_forecast.return_value = {"Total": {"Amount": "42.5"}}
+    return client
+
+
+def test_collect_from_cur2_export_backfill_month(tmp_path: Path) -> None:
+    _write_cur2(tmp_path / "data")
+    ce_client = _ce_client()
+
+    with patch("dapanoskop.cost_export.boto3.client", return_value=ce_client):
+        collected = collect_from_export(
+            str(tmp_path / "data"), target_year=2026, target_month=2, batch_size=2
+        )
+
+    assert collected["is_mtd"] is False
+    assert collected["period_labels"] == {
+        "current": "2026-02",
+        "prev_month": "2026-01",
+        "yoy": "2025-02",
+    }
+    # Net unblended where present, SP effective cost, negation counts as zero
+    assert _amounts(collected["raw_data"]["current"]) == {
+        ("App$", "TimedStorage-ByteHrs"): (1.0, 100.0),
+        ("App$api", "BoxUsage"): (6.0, 20.0),
+        ("App$web", "BoxUsage"): (8.0, 15.0),
+    }
+    assert _amounts(collected["raw_data"]["prev_month"]) == {
+        ("App$web", "BoxUsage"): (2.0, 1.0)
+    }
+    assert collected["raw_data"]["yoy"] == []
+    # Category name discovered from the export
+    assert collected["cc_mappings"]["current"] == {"web": "Alpha", "api": "Beta"}
+    assert collected["cc_mapping"] == collected["cc_mappings"]["current"]
+    assert collected["allocated_costs"]["current"] == {
+        "Alpha": 8.0,
+        "Beta": 6.0,
+        "": 1.0,
+    }
+    assert collected["forecast"] is None
+    assert collected["daily"]["current"]["2026-02-05"] == [
+        ["App$api", "BoxUsage", 6.0, 20.0]
+    ]
+    assert sorted(collected["daily"]["current"]) == [
+        "2026-02-03",
+        "2026-02-04",
+        "2026-02-05",
+        "2026-02-06",
+    ]
+    ce_client.get_cost_and_usage.assert_not_called()
+    ce_client.get_cost_forecast.assert_not_called()
+
+    processed = process(collected)
+    assert processed["summary"]["period"] == "2026-02"
+
+
+def test_collect_from_focus_export_mtd(tmp_path: Path) -> None:
+    path = tmp_path / "BILLING_PERIOD=2026-03" / "focus-00001.snappy.parquet"
+    path.parent.mkdir()
+    pq.write_table(
+        pa.table(
+            {
+                "ChargePeriodStart": pa.array(
+                    [_day("2026-03-02"), _day("2026-03-09"), _day("2026-03-10")],
+                    pa.timestamp("ms", tz="UTC"),
+                ),
+                "x_UsageType": ["BoxUsage", "BoxUsage", "BoxUsage"],
+                "ConsumedQuantity": [1.0, 2.0, 4.0],
+                "EffectiveCost": [1.5, 2.5, 100.0],
+                "Tags": pa.array([[("user:App", "web")]] * 3, _TAGS),
+                "x_CostCategories": pa.array([[("Team", "Alpha")]] * 3, _TAGS),
+            }
+        ),
+        path,
+    )
+
+    with patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()):
+        collected = collect_from_export(
+            f"file://{tmp_path}",
+            export_format="focus",
+            cost_category_name="Team",
+            now=datetime(2026, 3, 10, 6, tzinfo=timezone.utc),
+        )
+
+    assert collected["is_mtd"] is True
+    # Today's usage (2026-03-10) is outside the MTD window
+    assert _amounts(collected["raw_data"]["current"]) == {
+        ("App$web", "BoxUsage"): (4.0, 3.0)
+    }
+    assert collected["raw_data"]["prev_month_partial"] == []
+    assert "prev_month_partial" not in collected["cc_mappings"]
+    assert collected["allocated_costs"]["prev_month_partial"] == {}
+    assert collected["cc_mappings"]["current"] == {"web": "Alpha"}
+    assert collected["forecast"] == 42.5
+
+
+def test_collect_from_missing_export(tmp_path: Path) -> None:
+    with patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()):
+        collected = collect_from_export(str(tmp_path), target_year=2026, target_month=2)
+
+    assert collected["raw_data"] == {"current": [], "prev_month": [], "yoy": []}
+    assert collected["cc_mappings"] == {"current": {}, "prev_month": {}, "yoy": {}}
+    assert collected["allocated_costs"] == {}
+
+
+def test_collect_from_export_rejects_unknown_format(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Unknown cost export format"):
+        collect_from_export(str(tmp_path), export_format="cur1")
+
+
+def _write_part(
+    path: Path, day: str, cost: float, app: str = "web", category: str | None = "Alpha"
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(
+        pa.table(
+            {
+                "line_item_usage_start_date": pa.array(
+                    [_day(day)], pa.timestamp("ms", tz="UTC")
+                ),
+                "line_item_line_item_type": ["Usage"],
+                "line_item_usage_type": ["BoxUsage"],
+                "line_item_usage_amount": [1.0],
+                "line_item_unblended_cost": [cost],
+                "resource_tags": pa.array([_tags("user_App", app)], _TAGS),
+                "cost_category": pa.array([_tags("Team", category)], _TAGS),
+            }
+        ),
+        path,
+    )
+
+
+def test_incremental_collect_rescans_only_changed_parts(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    _write_cur2(data)
+    storage = MemoryStorage()
+    scanned: list[str] = []
+    original_aggregate = cost_export._aggregate
+
+    def counting_aggregate(batches, sums):
+        scanned.append("part")
+        return original_aggregate(batches, sums)
+
+    def run() -> dict:
+        with (
+            patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()),
+            patch.object(cost_export, "_aggregate", counting_aggregate),
+        ):
+            return collect_from_export(
+                str(data), target_year=2026, target_month=2, storage=storage
+            )
+
+    first = run()
+    with patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()):
+        full = collect_from_export(str(data), target_year=2026, target_month=2)
+    assert first["raw_data"] == full["raw_data"]
+    assert first["allocated_costs"] == full["allocated_costs"]
+    assert len(scanned) == 2  # one part each for 2026-02 and 2026-01
+    state = json.loads(storage.get(STATE_KEY))
+    assert state["cost_category"] == "Team"
+    assert sorted(state["months"]) == ["2026-01", "2026-02"]
+
+    # Unchanged re-delivery: nothing is scanned, same result
+    scanned.clear()
+    assert run()["raw_data"] == first["raw_data"]
+    assert scanned == []
+
+    # January's part is rewritten and February gets an additional part
+    january = data / "BILLING_PERIOD=2026-01" / "cur-00001.snappy.parquet"
+    _write_part(january, "2026-01-15", 7.0)
+    os.utime(january, ns=(0, 10**18))
+    _write_part(
+        data / "BILLING_PERIOD=2026-02" / "cur-00002.snappy.parquet", "2026-02-10", 1.0
+    )
+    scanned.clear()
+    third = run()
+
+    assert len(scanned) == 2
+    assert _amounts(third["raw_data"]["prev_month"]) == {
+        ("App$web", "BoxUsage"): (7.0, 1.0)
+    }
+    assert _amounts(third["raw_data"]["current"])[("App$web", "BoxUsage")] == (
+        9.0,
+        16.0,
+    )
+    assert third["allocated_costs"]["current"]["Alpha"] == 9.0
+
+
+def test_incremental_collect_rescans_when_category_is_discovered(
+    tmp_path: Path,
+) -> None:
+    data = tmp_path / "data"
+    january = data / "BILLING_PERIOD=2026-01" / "cur-00001.parquet"
+    _write_part(january, "2026-01-15", 2.0, category=None)
+    _write_part(
+        data / "BILLING_PERIOD=2026-02" / "cur-00001.parquet",
+        "2026-02-03",
+        5.0,
+        category=None,
+    )
+    storage = MemoryStorage()
+    scanned: list[str] = []
+    original_aggregate = cost_export._aggregate
+
+    def counting_aggregate(batches, sums):
+        scanned.append("part")
+        return original_aggregate(batches, sums)
+
+    def run() -> dict:
+        with (
+            patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()),
+            patch.object(cost_export, "_aggregate", counting_aggregate),
+        ):
+            return collect_from_export(
+                str(data), target_year=2026, target_month=2, storage=storage
+            )
+
+    assert run()["export_state"]["cost_category"] == ""
+
+    # A later delivery carries the first cost category: every part is
+    # aggregated again under it, not only the new one
+    _write_part(
+        data / "BILLING_PERIOD=2026-02" / "cur-00002.parquet", "2026-02-10", 1.0
+    )
+    _write_part(january, "2026-01-15", 2.0)
+    os.utime(january, ns=(0, 10**18))
+    scanned.clear()
+    collected = run()
+
+    assert len(scanned) == 3
+    assert json.loads(storage.get(STATE_KEY))["cost_category"] == "Team"
+    assert collected["allocated_costs"]["prev_month"] == {"Alpha": 2.0}
+
+
+def test_export_state_write_is_conditional() -> None:
+    storage = MemoryStorage()
+    first = load_export_state(storage)
+    second = load_export_state(storage)
+    first["format"] = "cur2"
+    save_export_state(storage, first)
+    # Saving again continues from the version just written
+    save_export_state(storage, first)
+    assert "etag" not in json.loads(storage.get(STATE_KEY))
+
+    # A run that read the state before the other one wrote it must not
+    # overwrite it
+    with pytest.raises(PreconditionFailedError):
+        save_export_state(storage, second)
+    stale = load_export_state(storage)
+    first["cost_category"] = "Team"
+    save_export_state(storage, first)
+    with pytest.raises(PreconditionFailedError):
+        save_export_state(storage, stale)
+
+
+def test_incremental_collect_follows_delivery_manifest(tmp_path: Path) -> None:
+    data = tmp_path / "export" / "data"
+    _write_part(
+        data / "BILLING_PERIOD=2026-02" / "old-00001.parquet", "2026-02-03", 5.0
+    )
+    _write_part(
+        data / "BILLING_PERIOD=2026-02" / "new-00001.parquet", "2026-02-03", 2.0
+    )
+    manifest = tmp_path / "export" / "metadata" / "BILLING_PERIOD=2026-02"
+    manifest.mkdir(parents=True)
+    (manifest / "export-Manifest.json").write_text(
+        json.dumps(
+            {
+                "dataFiles": [
+                    "s3://exports/export/data/BILLING_PERIOD=2026-02/new-00001.parquet"
+                ]
+            }
+        )
+    )
+
+    with patch("dapanoskop.cost_export.boto3.client", return_value=_ce_client()):
+        collected = collect_from_export(
+            str(data),
+            cost_category_name="Team",
+            target_year=2026,
+            target_month=2,
+            storage=MemoryStorage(),
+        )
+
+    # The part of the superseded delivery is ignored
+    assert _amounts(collected["raw_data"]["current"]) == {
+        ("App$web", "BoxUsage"): (2.0, 1.0)
+    }
+    assert export_output_fingerprint(
+        collected, ["current"]
+    ) != export_output_fingerprint(collected, ["prev_month"])
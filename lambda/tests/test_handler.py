@@ -9,6 +9,22 @@ import pytest
 from moto import mock_aws
 
 
+def _patch_collect(monkeypatch: pytest.MonkeyPatch, mock_collect) -> None:
+    """Serve mock_collect's result to backfills and daily runs.
+
+    Daily runs collect through submit_collect(); its stand-in passes the
+    collect() keyword arguments on and serves the result for every period.
+    """
+    from dapanoskop import handler as handler_module
+
+    def mock_submit_collect(pool, now=None, ce_client=None, **kwargs):
+        collected = mock_collect(**kwargs)
+        return lambda period_keys: collected
+
+    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    monkeypatch.setattr(handler_module, "submit_collect", mock_submit_collect)
+
+
 @mock_aws
 def test_handler_integration(
     s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
@@ -20,9 +36,7 @@ def test_handler_integration(
     # Mock the collector to return test data
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
             "period_labels": {
@@ -54,7 +68,7 @@ def test_handler_integration(
             "cc_mapping": {"web-app": "Engineering"},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -95,8 +109,6 @@ def test_handler_backfill_mode(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
     collected_periods: list[str] = []
 
@@ -104,6 +116,7 @@ def test_handler_backfill_mode(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         # Track which periods were collected
@@ -135,7 +148,7 @@ def test_handler_backfill_mode(
             "cc_mapping": {"web-app": "Engineering"},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -187,14 +200,13 @@ def test_handler_backfill_skip_existing(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
 
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         return {
@@ -222,7 +234,7 @@ def test_handler_backfill_skip_existing(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -255,14 +267,13 @@ def test_handler_backfill_force_reprocess(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
 
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         return {
@@ -290,7 +301,7 @@ def test_handler_backfill_force_reprocess(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -315,14 +326,13 @@ def test_handler_backfill_partial_failure(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
 
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         # Fail on the second month (2025-12)
@@ -354,7 +364,7 @@ def test_handler_backfill_partial_failure(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -389,6 +399,7 @@ def test_handler_backfill_s3_write_failure(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
@@ -418,7 +429,7 @@ def test_handler_backfill_s3_write_failure(
     def mock_write_to_s3(*args, **kwargs):
         raise RuntimeError("S3 write failed")
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
     monkeypatch.setattr(handler_module, "write_to_s3", mock_write_to_s3)
 
     from dapanoskop.handler import handler
@@ -447,16 +458,17 @@ def test_handler_missing_data_bucket_env(monkeypatch: pytest.MonkeyPatch) -> Non
         handler({}, None)
 
 
+@mock_aws
 def test_handler_normal_mode_exception(
     s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     """Test that exceptions in normal mode propagate to caller."""
-    from dapanoskop import handler as handler_module
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=s3_bucket_env)
 
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         raise RuntimeError("Cost Explorer API error")
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -478,8 +490,9 @@ def test_handler_enriches_with_storage_lens(
     from dapanoskop import handler as handler_module
 
     monkeypatch.setenv("STORAGE_LENS_CONFIG_ID", "my-lens-config")
+    monkeypatch.setenv("STORAGE_LENS_BREAKDOWN", "true")
 
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
             "period_labels": {
@@ -503,17 +516,24 @@ def test_handler_enriches_with_storage_lens(
             "cc_mapping": {},
         }
 
+    by_class = [
+        {"name": "STANDARD", "total_bytes": 4_000_000_000_000, "object_count": 10},
+        {"name": "GLACIER", "total_bytes": 1_000_000_000_000, "object_count": 2},
+    ]
+
     def mock_storage_lens(config_id: str = "", **kwargs) -> dict:
         assert config_id == "my-lens-config"
+        assert kwargs["breakdown"] is True
         return {
             "total_bytes": 5_000_000_000_000,
             "object_count": 12_000_000,
             "timestamp": "2026-02-01T00:00:00+00:00",
             "config_id": "my-lens-config",
             "org_id": "o-abc123",
+            "by_storage_class": by_class,
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
     monkeypatch.setattr(handler_module, "get_storage_lens_metrics", mock_storage_lens)
 
     from dapanoskop.handler import handler
@@ -529,6 +549,8 @@ def test_handler_enriches_with_storage_lens(
     assert summary["storage_lens"]["total_bytes"] == 5_000_000_000_000
     assert summary["storage_lens"]["object_count"] == 12_000_000
     assert summary["storage_lens"]["config_id"] == "my-lens-config"
+    assert summary["storage_lens"]["by_storage_class"] == by_class
+    assert "by_region" not in summary["storage_lens"]
 
 
 @mock_aws
@@ -545,7 +567,7 @@ def test_handler_continues_when_storage_lens_fails(
 
     monkeypatch.setenv("STORAGE_LENS_CONFIG_ID", "broken-config")
 
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
             "period_labels": {
@@ -572,7 +594,7 @@ def test_handler_continues_when_storage_lens_fails(
     def mock_storage_lens_fail(config_id: str = "", **kwargs) -> dict:
         raise RuntimeError("Storage Lens unavailable")
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
     monkeypatch.setattr(
         handler_module, "get_storage_lens_metrics", mock_storage_lens_fail
     )
@@ -600,19 +622,18 @@ def test_handler_error_response_no_arn_leak(
     s3 = boto3.client("s3", region_name="us-east-1")
     s3.create_bucket(Bucket=s3_bucket_env)
 
-    from dapanoskop import handler as handler_module
-
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         # Simulate an error with an ARN containing account ID
         raise RuntimeError(
             "AccessDenied: User arn:aws:iam::123456789012:user/test is not authorized"
         )
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -644,14 +665,13 @@ def test_handler_backfill_skips_unavailable_months(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
 
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         # Simulate DataUnavailableException for 2025-11 (too old)
@@ -686,7 +706,7 @@ def test_handler_backfill_skips_unavailable_months(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -731,7 +751,7 @@ def test_handler_storage_lens_recalculates_cost_per_tb(
 
     monkeypatch.setenv("STORAGE_LENS_CONFIG_ID", "my-lens-config")
 
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
             "period_labels": {
@@ -775,7 +795,7 @@ def test_handler_storage_lens_recalculates_cost_per_tb(
             "org_id": "o-abc123",
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
     monkeypatch.setattr(handler_module, "get_storage_lens_metrics", mock_storage_lens)
 
     from dapanoskop.handler import handler
@@ -813,12 +833,11 @@ def test_handler_backfill_index_survives_failures(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         # 2025-12 fails with a real error (not DataUnavailable)
         if target_year == 2025 and target_month == 12:
@@ -850,7 +869,7 @@ def test_handler_backfill_index_survives_failures(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -883,14 +902,13 @@ def test_handler_backfill_skips_empty_ce_response(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     call_count = [0]
 
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         call_count[0] += 1
         # 2025-12 returns empty groups (no cost data yet available)
@@ -924,7 +942,7 @@ def test_handler_backfill_skips_empty_ce_response(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -962,12 +980,11 @@ def test_handler_backfill_empty_ce_response_skipped_even_with_force(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
     def mock_collect(
         cost_category_name: str = "",
         target_year: int | None = None,
         target_month: int | None = None,
+        **kwargs,
     ) -> dict:
         return {
             "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
@@ -987,7 +1004,7 @@ def test_handler_backfill_empty_ce_response_skipped_even_with_force(
             "cc_mapping": {},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -1015,9 +1032,7 @@ def test_handler_normal_mode_writes_mtd_and_prev_complete(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 8, 6, 0, 0, tzinfo=timezone.utc),
             "is_mtd": True,
@@ -1088,7 +1103,7 @@ def test_handler_normal_mode_writes_mtd_and_prev_complete(
             "cc_mapping": {"web-app": "Engineering"},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -1155,10 +1170,8 @@ def test_handler_normal_mode_first_of_month(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
-    def mock_collect(cost_category_name: str = "") -> dict:
-        # On the 1st, _get_periods() omits "current", "yoy", "prev_month_partial"
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
+        # On the 1st, get_periods() omits "current", "yoy", "prev_month_partial"
         return {
             "now": datetime(2026, 3, 1, 6, 0, 0, tzinfo=timezone.utc),
             "is_mtd": True,
@@ -1196,7 +1209,7 @@ def test_handler_normal_mode_first_of_month(
             "cc_mapping": {"web-app": "Engineering"},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -1233,9 +1246,7 @@ def test_handler_normal_mode_skips_empty_mtd(
 
     from datetime import datetime, timezone
 
-    from dapanoskop import handler as handler_module
-
-    def mock_collect(cost_category_name: str = "") -> dict:
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
         return {
             "now": datetime(2026, 2, 8, 6, 0, 0, tzinfo=timezone.utc),
             "is_mtd": True,
@@ -1283,7 +1294,7 @@ def test_handler_normal_mode_skips_empty_mtd(
             "cc_mapping": {"web-app": "Engineering"},
         }
 
-    monkeypatch.setattr(handler_module, "collect", mock_collect)
+    _patch_collect(monkeypatch, mock_collect)
 
     from dapanoskop.handler import handler
 
@@ -1299,16 +1310,17 @@ def test_handler_normal_mode_skips_empty_mtd(
     assert "2026-01/summary.json" in keys
 
 
-# --- P3: handler._month_exists_in_s3 exception path ---
+# --- P3: handler._month_exists exception path ---
 
 
 def test_month_exists_s3_client_error_returns_false() -> None:
-    """_month_exists_in_s3 returns False (not raises) when list_objects_v2 raises."""
+    """_month_exists returns False (not raises) when list_objects_v2 raises."""
     from unittest.mock import MagicMock
 
     from botocore.exceptions import ClientError
 
-    from dapanoskop.handler import _month_exists_in_s3
+    from dapanoskop.handler import _month_exists
+    from dapanoskop.storage import S3Storage
 
     mock_s3 = MagicMock()
     mock_s3.list_objects_v2.side_effect = ClientError(
@@ -1316,5 +1328,853 @@ def test_month_exists_s3_client_error_returns_false() -> None:
         "ListObjectsV2",
     )
 
-    result = _month_exists_in_s3(mock_s3, "my-bucket", 2026, 1)
+    result = _month_exists(S3Storage("my-bucket", mock_s3), 2026, 1)
     assert result is False
+
+
+def test_handler_import_does_not_load_pyarrow() -> None:
+    """Importing the handler must not pay pyarrow's import cost on cold start."""
+    import subprocess
+    import sys
+
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, dapanoskop.handler; print('pyarrow' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == "False"
+
+
+@mock_aws
+def test_handler_backfill_slices_storage_lens_history(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch, freeze_backfill_now
+) -> None:
+    """Backfill fetches the Storage Lens series once and slices month-end values."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timedelta, timezone
+
+    from dapanoskop import handler as handler_module
+
+    def mock_collect(
+        cost_category_name: str = "",
+        target_year: int | None = None,
+        target_month: int | None = None,
+        **kwargs,
+    ) -> dict:
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {
+                "current": f"{target_year:04d}-{target_month:02d}",
+                "prev_month": "2025-12",
+                "yoy": "2025-01",
+            },
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+                "prev_month": [],
+                "yoy": [],
+            },
+            "cc_mapping": {},
+        }
+
+    # Daily StorageBytes = day number since 2025-10-01
+    first_day = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    days = [first_day + timedelta(days=d) for d in range(123)]
+    history_calls: list[tuple[datetime, datetime]] = []
+
+    def mock_history(start_time, end_time, config_id: str = "", **kwargs) -> dict:
+        history_calls.append((start_time, end_time))
+        return {
+            "config_id": "org-config",
+            "org_id": "o-abc123",
+            "start": start_time,
+            "end": end_time,
+            "series": {
+                "StorageBytes": [
+                    {"Timestamp": day, "Value": float(i)} for i, day in enumerate(days)
+                ],
+            },
+        }
+
+    def fail_metrics(**kwargs) -> dict:
+        raise AssertionError("backfill must not query Storage Lens per month")
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "get_storage_lens_history", mock_history)
+    monkeypatch.setattr(handler_module, "get_storage_lens_metrics", fail_metrics)
+
+    result = handler_module.handler({"backfill": True, "months": 3}, None)
+    assert result["statusCode"] == 200
+
+    # One query covering Nov 2025 (minus the 14-day window) to end of Jan 2026
+    assert history_calls == [
+        (
+            datetime(2025, 11, 17, tzinfo=timezone.utc),
+            datetime(2026, 2, 1, tzinfo=timezone.utc),
+        )
+    ]
+    expected_last_day = {"2025-11": 60, "2025-12": 91, "2026-01": 122}
+    for period, value in expected_last_day.items():
+        obj = s3.get_object(Bucket=s3_bucket_env, Key=f"{period}/summary.json")
+        summary = json.loads(obj["Body"].read())
+        assert summary["storage_lens"]["total_bytes"] == value
+
+
+@mock_aws
+def test_handler_reads_storage_lens_export(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    """STORAGE_LENS_EXPORT_LOCATION replaces CloudWatch and adds bucket rows."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    report = tmp_path / "reports" / "dt=2026-01-31" / "part-0.csv"
+    report.parent.mkdir(parents=True)
+    report.write_text(
+        "configuration_id,aws_account_number,aws_region,storage_class,"
+        "record_type,bucket_name,metric_name,metric_value\n"
+        "org-lens,012345678901,eu-west-1,STANDARD,BUCKET,logs,StorageBytes,2000\n"
+        "org-lens,012345678901,eu-west-1,STANDARD,BUCKET,logs,ObjectCount,20\n"
+    )
+    monkeypatch.setenv("STORAGE_LENS_EXPORT_LOCATION", str(tmp_path / "reports"))
+
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {
+                "current": "2026-01",
+                "prev_month": "2025-12",
+                "yoy": "2025-01",
+            },
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+                "prev_month": [],
+                "yoy": [],
+            },
+            "cc_mapping": {},
+        }
+
+    def fail_metrics(**kwargs) -> dict:
+        raise AssertionError("export mode must not query CloudWatch")
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "get_storage_lens_metrics", fail_metrics)
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+
+    obj = s3.get_object(Bucket=s3_bucket_env, Key="2026-01/summary.json")
+    storage_lens = json.loads(obj["Body"].read())["storage_lens"]
+    assert storage_lens["total_bytes"] == 2000
+    assert storage_lens["object_count"] == 20
+    assert storage_lens["storage_lens_date"] == "2026-01-31T00:00:00+00:00"
+    assert storage_lens["config_id"] == "org-lens"
+    assert storage_lens["by_account"][0]["name"] == "012345678901"
+    s3.head_object(Bucket=s3_bucket_env, Key="2026-01/storage-by-bucket.parquet")
+
+
+@mock_aws
+def test_handler_backfill_collects_from_cost_export(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """COST_EXPORT_LOCATION replaces Cost Explorer collection in backfill."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    monkeypatch.setenv("COST_EXPORT_LOCATION", "s3://cur-exports/cur/data")
+    monkeypatch.setenv("COST_EXPORT_FORMAT", "focus")
+    export_calls: list[tuple] = []
+
+    def mock_collect_from_export(location: str, **kwargs) -> dict:
+        export_calls.append((location, kwargs))
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": "2026-01", "prev_month": "2025-12"},
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+                "prev_month": [],
+            },
+            "cc_mapping": {},
+        }
+
+    def fail_collect(**kwargs) -> dict:
+        raise AssertionError("export mode must not query Cost Explorer")
+
+    _patch_collect(monkeypatch, fail_collect)
+    monkeypatch.setattr(handler_module, "collect_from_export", mock_collect_from_export)
+    monkeypatch.setattr(
+        handler_module, "_generate_backfill_months", lambda months: [(2026, 1)]
+    )
+    monkeypatch.setattr(
+        handler_module, "_enrich_with_storage_lens", lambda *args, **kwargs: None
+    )
+    monkeypatch.setattr(
+        handler_module, "_fetch_storage_lens_history", lambda *args: None
+    )
+    monkeypatch.setattr(
+        handler_module, "_update_storage_lens_series", lambda *args: None
+    )
+
+    result = handler_module.handler({"backfill": True, "months": 1}, None)
+
+    assert result["statusCode"] == 200
+    # Collected incrementally, with the state kept in the data bucket
+    assert export_calls[0][1].pop("storage").location == f"s3://{s3_bucket_env}"
+    assert export_calls == [
+        (
+            "s3://cur-exports/cur/data",
+            {
+                "export_format": "focus",
+                "cost_category_name": "",
+                "target_year": 2026,
+                "target_month": 1,
+            },
+        )
+    ]
+    s3.head_object(Bucket=s3_bucket_env, Key="2026-01/summary.json")
+
+
+@mock_aws
+def test_handler_backfill_auto_uses_export_change_tracking(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """With a cost export, force="auto" compares export inputs, not CE totals."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+    from dapanoskop.cost_export import load_export_state
+
+    monkeypatch.setenv("COST_EXPORT_LOCATION", "s3://cur-exports/cur/data")
+    parts = {"cur-00001.parquet": "100:1"}
+
+    def mock_collect_from_export(location: str, storage, **kwargs) -> dict:
+        # Stand-in for the incremental ingest: record the current parts
+        state = load_export_state(storage)
+        state.update(format="cur2", cost_category="")
+        state["months"] = {"2026-01": dict(parts)}
+        save_export_state(storage, state)
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "periods": {"current": ("2026-01-01", "2026-02-01")},
+            "period_labels": {"current": "2026-01"},
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+            },
+            "cc_mapping": {},
+            "export_state": state,
+        }
+
+    def fail_totals(*args, **kwargs) -> dict:
+        raise AssertionError("export mode must not compare CE totals")
+
+    save_export_state = handler_module.save_export_state
+    monkeypatch.setattr(handler_module, "collect_from_export", mock_collect_from_export)
+    monkeypatch.setattr(handler_module, "get_monthly_totals", fail_totals)
+    monkeypatch.setattr(
+        handler_module, "_generate_backfill_months", lambda months: [(2026, 1)]
+    )
+    monkeypatch.setattr(
+        handler_module, "_enrich_with_storage_lens", lambda *args, **kwargs: None
+    )
+    monkeypatch.setattr(
+        handler_module, "_fetch_storage_lens_history", lambda *args: None
+    )
+    monkeypatch.setattr(
+        handler_module, "_update_storage_lens_series", lambda *args: None
+    )
+
+    def backfill(force) -> dict:
+        event = {"backfill": True, "months": 1, "force": force}
+        return json.loads(handler_module.handler(event, None)["body"])
+
+    assert backfill(False)["succeeded"] == ["2026-01"]
+    unchanged = backfill("auto")
+    assert unchanged["skipped"] == ["2026-01"]
+    assert unchanged["restated"] == []
+
+    parts["cur-00001.parquet"] = "120:2"
+    redelivered = backfill("auto")
+    assert redelivered["restated"] == ["2026-01"]
+    assert redelivered["succeeded"] == ["2026-01"]
+    assert backfill("auto")["skipped"] == ["2026-01"]
+
+
+def test_handler_regenerates_only_periods_with_changed_export_parts(
+    monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    """Intraday export re-deliveries rewrite only the periods they touch."""
+    import os
+    from datetime import datetime, timezone
+    from unittest.mock import MagicMock
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from dapanoskop import handler as handler_module
+
+    tags = pa.map_(pa.string(), pa.string())
+
+    def write_part(month: str, day: int, cost: float) -> None:
+        path = tmp_path / "data" / f"BILLING_PERIOD={month}" / "cur-00001.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(
+            pa.table(
+                {
+                    "line_item_usage_start_date": pa.array(
+                        [datetime.fromisoformat(f"{month}-{day:02d}T00:00+00:00")],
+                        pa.timestamp("ms", tz="UTC"),
+                    ),
+                    "line_item_line_item_type": ["Usage"],
+                    "line_item_usage_type": ["BoxUsage:m5.xlarge"],
+                    "line_item_usage_amount": [10.0],
+                    "line_item_unblended_cost": [cost],
+                    "resource_tags": pa.array([[("user_App", "web-app")]], tags),
+                    "cost_category": pa.array([[]], tags),
+                }
+            ),
+            path,
+        )
+        os.utime(path, ns=(0, int(cost * 10**9)))
+
+    write_part("2026-03", 5, 100.0)
+    write_part("2026-02", 5, 80.0)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 3, 10, 6, tzinfo=timezone.utc)
+
+    ce_client = MagicMock()
+    ce_client.list_cost_category_definitions.return_value = {}
+    ce_client.get_cost_forecast.return_value = {"Total": {"Amount": "300"}}
+    monkeypatch.setattr("dapanoskop.cost_export.datetime", FrozenDatetime)
+    monkeypatch.setattr("dapanoskop.cost_export.boto3.client", lambda *a: ce_client)
+    monkeypatch.setenv("DATA_BUCKET", f"memory://{tmp_path.name}")
+    monkeypatch.setenv("COST_EXPORT_LOCATION", str(tmp_path / "data"))
+    for name in ("_fetch_storage_lens", "_update_storage_lens_series"):
+        monkeypatch.setattr(handler_module, name, lambda *args, **kwargs: None)
+    written: list[str] = []
+    original_write = handler_module.write_to_s3
+
+    def recording_write(processed, bucket, update_index_file=True):
+        written.append(processed["summary"]["period"])
+        original_write(processed, bucket, update_index_file)
+
+    monkeypatch.setattr(handler_module, "write_to_s3", recording_write)
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+    assert written == ["2026-02", "2026-03"]
+
+    # Re-run without a new delivery: nothing to regenerate
+    written.clear()
+    result = handler_module.handler({}, None)
+    assert json.loads(result["body"])["period"] == "2026-03"
+    assert written == []
+
+    # Re-delivery of the current month only touches the MTD period
+    write_part("2026-03", 6, 120.0)
+    assert handler_module.handler({}, None)["statusCode"] == 200
+    assert written == ["2026-03"]
+
+
+@mock_aws
+def test_handler_skips_run_when_cost_explorer_data_unchanged(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An unchanged freshness fingerprint only refreshes collected_at."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    collect_calls: list[str] = []
+
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
+        collect_calls.append(cost_category_name)
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": "2026-01", "prev_month": "2025-12"},
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+                "prev_month": [],
+            },
+            "cc_mapping": {},
+        }
+
+    probe = {
+        "checked_at": "2026-02-01T07:00:00+00:00",
+        "labels": ["2026-01"],
+        "fingerprint": "abc",
+    }
+    series_updates: list[str] = []
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "probe_freshness", lambda **kwargs: dict(probe))
+    monkeypatch.setattr(
+        handler_module,
+        "_update_storage_lens_series",
+        lambda bucket, config_id: series_updates.append(bucket),
+    )
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+    assert len(collect_calls) == 1
+    stored = json.loads(
+        s3.get_object(Bucket=s3_bucket_env, Key="freshness.json")["Body"].read()
+    )
+    assert stored["fingerprint"] == "abc"
+
+    # Same fingerprint: no collection, only collected_at moves
+    result = handler_module.handler({}, None)
+    assert json.loads(result["body"]) == {"message": "unchanged", "period": "2026-01"}
+    assert len(collect_calls) == 1
+    # The Storage Lens series still gets its new days
+    assert len(series_updates) == 2
+    summary = json.loads(
+        s3.get_object(Bucket=s3_bucket_env, Key="2026-01/summary.json")["Body"].read()
+    )
+    assert summary["collected_at"] == "2026-02-01T07:00:00+00:00"
+    assert summary["totals"]["current_cost_usd"] == 100.0
+
+    # force=True and a new fingerprint both run the full pipeline
+    handler_module.handler({"force": True}, None)
+    probe["fingerprint"] = "def"
+    handler_module.handler({}, None)
+    assert len(collect_calls) == 3
+
+
+@mock_aws
+def test_handler_runs_when_freshness_probe_fails(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A failing probe never blocks the daily run."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from dapanoskop import handler as handler_module
+
+    def failing_probe(**kwargs) -> dict:
+        raise RuntimeError("throttled")
+
+    def mock_collect(cost_category_name: str = "", **kwargs) -> dict:
+        raise RuntimeError("collect reached")
+
+    monkeypatch.setattr(handler_module, "probe_freshness", failing_probe)
+    _patch_collect(monkeypatch, mock_collect)
+
+    with pytest.raises(RuntimeError, match="collect reached"):
+        handler_module.handler({}, None)
+
+
+@mock_aws
+def test_handler_backfill_auto_reprocesses_only_restated_months(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch, freeze_backfill_now
+) -> None:
+    """force="auto" compares CE monthly totals with the stored summaries."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    collected_periods: list[str] = []
+
+    def mock_collect(
+        cost_category_name: str = "",
+        target_year: int | None = None,
+        target_month: int | None = None,
+        **kwargs,
+    ) -> dict:
+        period = f"{target_year:04d}-{target_month:02d}"
+        collected_periods.append(period)
+        return {
+            "now": datetime(2026, 2, 1, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": period, "prev_month": "2025-10"},
+            "raw_data": {
+                "current": [
+                    {
+                        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+                        "Metrics": {
+                            "NetAmortizedCost": {"Amount": "100", "Unit": "USD"},
+                            "UsageQuantity": {"Amount": "100", "Unit": "Hrs"},
+                        },
+                    }
+                ],
+                "prev_month": [],
+            },
+            "cc_mapping": {},
+        }
+
+    total_calls: list[tuple[str, str]] = []
+
+    def mock_totals(
+        ce_client, start: str, end: str, cost_filter=None
+    ) -> dict[str, float]:
+        total_calls.append((start, end))
+        # December got a late credit; November differs only by rounding
+        return {"2026-01": 100.0, "2025-12": 85.0, "2025-11": 100.004}
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "get_monthly_totals", mock_totals)
+
+    handler_module.handler({"backfill": True, "months": 3}, None)
+    collected_periods.clear()
+
+    result = handler_module.handler(
+        {"backfill": True, "months": 3, "force": "auto"}, None
+    )
+
+    body = json.loads(result["body"])
+    assert total_calls == [("2025-11-01", "2026-02-01")]
+    assert collected_periods == ["2025-12"]
+    assert body["restated"] == ["2025-12"]
+    assert body["succeeded"] == ["2025-12"]
+    assert body["skipped"] == ["2026-01", "2025-11"]
+
+
+@mock_aws
+def test_handler_backfill_auto_skips_existing_when_totals_unavailable(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch, freeze_backfill_now
+) -> None:
+    """Without CE totals, force="auto" behaves like force=False."""
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=s3_bucket_env)
+    s3.put_object(Bucket=s3_bucket_env, Key="2026-01/summary.json", Body=b"{}")
+
+    from dapanoskop import handler as handler_module
+
+    def failing_totals(
+        ce_client, start: str, end: str, cost_filter=None
+    ) -> dict[str, float]:
+        raise RuntimeError("throttled")
+
+    def fail_collect(**kwargs) -> dict:
+        raise AssertionError("existing month must not be collected")
+
+    monkeypatch.setattr(handler_module, "get_monthly_totals", failing_totals)
+    _patch_collect(monkeypatch, fail_collect)
+
+    result = handler_module.handler(
+        {"backfill": True, "months": 1, "force": "auto"}, None
+    )
+
+    assert json.loads(result["body"])["skipped"] == ["2026-01"]
+
+
+@mock_aws
+def test_handler_keeps_daily_cubes_when_configured(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Daily runs keep cubes in the data bucket; backfills keep none."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    calls: list[dict] = []
+
+    def mock_collect(**kwargs) -> dict:
+        calls.append(kwargs)
+        return {
+            "now": datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": "2026-03"},
+            "raw_data": {"current": []},
+            "cc_mapping": {},
+        }
+
+    def failing_probe(**kwargs) -> dict:
+        raise RuntimeError("no probe")
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "probe_freshness", failing_probe)
+    monkeypatch.setattr(
+        handler_module, "_generate_backfill_months", lambda months: [(2026, 2)]
+    )
+    monkeypatch.setenv("MTD_RESTATEMENT_DAYS", "4")
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+    handler_module.handler({"backfill": True, "months": 1}, None)
+
+    daily, backfill = calls
+    assert daily["daily_cube"].location == f"s3://{s3_bucket_env}"
+    assert daily["restatement_days"] == 4
+    assert "target_year" not in daily
+    # Backfills keep no cube (CE has daily data for 14 months only)
+    assert "daily_cube" not in backfill
+    assert (backfill["target_year"], backfill["target_month"]) == (2026, 2)
+
+
+@mock_aws
+def test_handler_passes_workload_dimensions(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """WORKLOAD_DIMENSIONS is parsed into collect()'s group_by."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    calls: list[dict] = []
+
+    def mock_collect(**kwargs) -> dict:
+        calls.append(kwargs)
+        return {
+            "now": datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": "2026-03"},
+            "raw_data": {"current": []},
+            "cc_mapping": {},
+        }
+
+    def failing_probe(**kwargs) -> dict:
+        raise RuntimeError("no probe")
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "probe_freshness", failing_probe)
+    monkeypatch.setenv("WORKLOAD_DIMENSIONS", "TAG:Team,REGION")
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+
+    assert calls[0]["group_by"] == [
+        {"Type": "TAG", "Key": "Team"},
+        {"Type": "DIMENSION", "Key": "REGION"},
+    ]
+    # Daily cubes are kept by default, re-fetching three recent days
+    assert calls[0]["daily_cube"].location == f"s3://{s3_bucket_env}"
+    assert calls[0]["restatement_days"] == 3
+
+
+@mock_aws
+def test_handler_passes_cost_filter(
+    s3_bucket_env: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """COST_FILTER is parsed and pushed to the probe and collect()."""
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=s3_bucket_env)
+
+    from datetime import datetime, timezone
+
+    from dapanoskop import handler as handler_module
+
+    calls: list[dict] = []
+    probes: list[dict] = []
+
+    def mock_collect(**kwargs) -> dict:
+        calls.append(kwargs)
+        return {
+            "now": datetime(2026, 3, 10, 6, 0, 0, tzinfo=timezone.utc),
+            "period_labels": {"current": "2026-03"},
+            "raw_data": {"current": []},
+            "cc_mapping": {},
+        }
+
+    def failing_probe(ce_client=None, **kwargs) -> dict:
+        probes.append(kwargs)
+        raise RuntimeError("no probe")
+
+    _patch_collect(monkeypatch, mock_collect)
+    monkeypatch.setattr(handler_module, "probe_freshness", failing_probe)
+    monkeypatch.setenv("COST_FILTER", "RECORD_TYPE!=Credit,Refund")
+
+    assert handler_module.handler({}, None)["statusCode"] == 200
+
+    cost_filter = {
+        "Not": {"Dimensions": {"Key": "RECORD_TYPE", "Values": ["Credit", "Refund"]}}
+    }
+    assert probes == [
+        {
+            "cost_filter": cost_filter,
+            "settings": {
+                "cost_category_name": "",
+                "group_by": None,
+                "include_efs": False,
+                "include_ebs": False,
+                "storage_lens_breakdown": False,
+            },
+        }
+    ]
+    assert calls[0]["cost_filter"] == cost_filter
+
+
+def test_build_prev_complete_collected_remaps_daily_cube() -> None:
+    from dapanoskop.handler import _build_prev_complete_collected
+
+    days = {"2026-02-01": [["App$web", "BoxUsage", 1.0, 1.0]]}
+    collected = {
+        "now": None,
+        "period_labels": {},
+        "raw_data": {},
+        "daily": {"current": {}, "prev_complete": days},
+    }
+
+    assert _build_prev_complete_collected(collected)["daily"] == {"current": days}
+
+
+def test_build_prev_complete_collected_remaps_split_charge_rules() -> None:
+    from dapanoskop.handler import _build_prev_complete_collected
+
+    rule = {"Source": "Shared", "Targets": ["Eng"], "Method": "EVEN"}
+    collected = {
+        "now": None,
+        "period_labels": {},
+        "raw_data": {},
+        "split_charge_rules_by_period": {
+            "current": [],
+            "prev_complete": [rule],
+            "yoy_prev_complete": [],
+        },
+    }
+
+    assert _build_prev_complete_collected(collected)[
+        "split_charge_rules_by_period"
+    ] == {"current": [rule], "yoy": []}
+
+
+def test_handler_overlaps_storage_lens_and_uploads(
+    monkeypatch: pytest.MonkeyPatch, tmp_path, freeze_backfill_now
+) -> None:
+    """Each output waits only on its own periods; uploads overlap processing."""
+    import threading
+
+    from dapanoskop import collector
+    from dapanoskop import handler as handler_module
+
+    group = {
+        "Keys": ["App$web-app", "BoxUsage:m5.xlarge"],
+        "Metrics": {
+            "NetAmortizedCost": {"Amount": "10", "Unit": "USD"},
+            "UsageQuantity": {"Amount": "1", "Unit": "Hrs"},
+        },
+    }
+    lens_started = threading.Event()
+    prev_processed = threading.Event()
+    mtd_processed = threading.Event()
+    ce_client = object()
+    clients: list[object] = []
+
+    def mock_resolve(client, *args) -> dict:
+        clients.append(client)
+        return {
+            "name": "",
+            "discovery_key": "current",
+            "cc_mapping": {},
+            "split_charge_categories": [],
+            "split_charge_rules": [],
+            "split_charge_rules_by_period": {},
+        }
+
+    def mock_collect_period(client, period_key, periods, now, categories, **kwargs):
+        clients.append(client)
+        assert lens_started.wait(5), "Storage Lens did not run during collection"
+        if period_key == "current":
+            # The completed month must not wait for the MTD period
+            assert prev_processed.wait(5), "prev_complete waited for MTD"
+        categories()
+        groups = [group] if period_key in ("current", "prev_complete") else []
+        return {"groups": groups, "cc_mapping": {}}
+
+    discovered: list[str] = []
+
+    def mock_discover(config_id: str) -> bool:
+        # Resolved once, on the handler thread, before any read is submitted
+        assert not lens_started.is_set()
+        discovered.append(threading.current_thread().name)
+        return True
+
+    def mock_fetch_storage_lens(*args, **kwargs) -> None:
+        lens_started.set()
+
+    original_process = handler_module.process
+
+    def recording_process(collected, **kwargs):
+        processed = original_process(collected, **kwargs)
+        (mtd_processed if kwargs["is_mtd"] else prev_processed).set()
+        return processed
+
+    written: list[str] = []
+
+    def blocking_write(processed, bucket, update_index_file=True):
+        period = processed["summary"]["period"]
+        if period == "2026-01":
+            assert mtd_processed.wait(5), "upload blocked later processing"
+        written.append(period)
+
+    monkeypatch.setenv("DATA_BUCKET", f"file://{tmp_path}")
+    monkeypatch.setattr(handler_module.boto3, "client", lambda *a, **kw: ce_client)
+    monkeypatch.setattr(
+        handler_module, "_probe_freshness", lambda *a: clients.append(a[2])
+    )
+    monkeypatch.setattr(collector, "_resolve_cost_categories", mock_resolve)
+    monkeypatch.setattr(collector, "_collect_period", mock_collect_period)
+    monkeypatch.setattr(handler_module, "discover_storage_lens", mock_discover)
+    monkeypatch.setattr(handler_module, "_fetch_storage_lens", mock_fetch_storage_lens)
+    monkeypatch.setattr(handler_module, "_update_storage_lens_series", lambda *a: None)
+    monkeypatch.setattr(handler_module, "process", recording_process)
+    monkeypatch.setattr(handler_module, "write_to_s3", blocking_write)
+
+    result = handler_module.handler({}, None)
+
+    assert discovered == [threading.current_thread().name]
+
+    assert json.loads(result["body"]) == {"message": "ok", "period": "2026-02"}
+    assert sorted(written) == ["2026-01", "2026-02"]
+    # One CE client, shared by the probe and every collection thread
+    assert len(clients) == 8
+    assert all(client is ce_client for client in clients)
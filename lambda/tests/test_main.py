@@ -0,0 +1,136 @@
+"""Tests for the local CLI entry point (python -m dapanoskop)."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from dapanoskop import handler as handler_module
+from dapanoskop.__main__ import _frozen_datetime, main
+from dapanoskop.cassette import Cassette, CassetteMissError
+
+SYNTHETIC = ["--backend", "synthetic", "--workloads", "8", "--usage-types", "6"]
+
+
+@pytest.fixture(autouse=True)
+def _restore_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """main() sets the handler's environment variables; undo after each test."""
+    for name in (
+        "DATA_BUCKET",
+        "COST_CATEGORY_NAME",
+        "INCLUDE_EFS",
+        "INCLUDE_EBS",
+        "STORAGE_LENS_CONFIG_ID",
+        "STORAGE_LENS_BREAKDOWN",
+        "COST_EXPORT_LOCATION",
+        "COST_EXPORT_FORMAT",
+        "MTD_RESTATEMENT_DAYS",
+        "WORKLOAD_DIMENSIONS",
+        "COST_FILTER",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_daily_synthetic_writes_local_outputs(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    out = tmp_path / "out"
+    assert main(["daily", *SYNTHETIC, "--out", str(out), "--timings"]) == 0
+
+    periods = json.loads((out / "index.json").read_text())["periods"]
+    assert len(periods) == 2  # MTD month + most recently completed month
+    for period in periods:
+        assert (out / period / "summary.json").exists()
+        assert (out / period / "cost-by-usage-type.parquet").exists()
+    assert (out / "storage-lens.parquet").exists()
+
+    report = capsys.readouterr().out
+    for phase in ("collect", "process", "storage-lens", "write"):
+        assert phase in report
+    # Handler collaborators are restored after the run
+    assert handler_module.write_to_s3.__module__ == "dapanoskop.processor"
+
+
+def test_daily_synthetic_with_workload_dimensions(tmp_path: Path) -> None:
+    out = tmp_path / "out"
+    args = ["daily", *SYNTHETIC, "--out", str(out)]
+    dimensions = ["--workload-dimensions", "TAG:Team,LINKED_ACCOUNT"]
+    assert main([*args, *dimensions]) == 0
+
+    period = json.loads((out / "index.json").read_text())["periods"][0]
+    summary = json.loads((out / period / "summary.json").read_text())
+    workloads = {w["name"] for cc in summary["cost_centers"] for w in cc["workloads"]}
+    assert "Untagged / 200000000000" in workloads
+    assert "team-1 / 200000000001" in workloads
+    assert all(" / 2000000000" in name for name in workloads)
+
+
+def test_backfill_synthetic_beyond_daily_data_window(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Months older than CE's 14 months of daily data backfill without cubes."""
+    out = tmp_path / "out"
+    assert main(["backfill", "--months", "16", *SYNTHETIC, "--out", str(out)]) == 0
+
+    body = json.loads(capsys.readouterr().out.strip().splitlines()[-2].split(" ", 1)[1])
+    assert body["failed"] == []
+    # The synthetic org has 14 months of costs, so 13 completed months
+    assert (len(body["succeeded"]), len(body["skipped"])) == (13, 3)
+    assert not (out / "cost-cube").exists()
+
+
+def test_backfill_synthetic_skips_existing(tmp_path: Path) -> None:
+    out = tmp_path / "out"
+    args = ["backfill", "--months", "2", *SYNTHETIC, "--out", str(out)]
+    assert main(args) == 0
+    written = json.loads((out / "index.json").read_text())["periods"]
+    assert len(written) == 2
+
+    mtimes = {p: (out / p / "summary.json").stat().st_mtime_ns for p in written}
+    assert main(args) == 0
+    assert {p: (out / p / "summary.json").stat().st_mtime_ns for p in written} == mtimes
+
+
+def test_profile_and_tracemalloc(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    stats = tmp_path / "run.pstats"
+    args = ["daily", *SYNTHETIC, "--out", str(tmp_path / "out")]
+    assert main([*args, "--profile", str(stats), "--tracemalloc"]) == 0
+
+    assert stats.stat().st_size > 0
+    report = capsys.readouterr().out
+    assert "peak [MiB]" in report
+    assert "cumulative" in report
+
+
+def test_replay_requires_cassette() -> None:
+    with pytest.raises(SystemExit):
+        main(["daily", "--backend", "replay"])
+
+
+def test_replay_serves_only_from_cassette(tmp_path: Path) -> None:
+    cassette = tmp_path / "empty.cassette.json.gz"
+    Cassette().save(cassette)
+    with pytest.raises(CassetteMissError, match="GetCostAndUsage"):
+        main(
+            [
+                "daily",
+                "--backend",
+                "replay",
+                "--cassette",
+                str(cassette),
+                "--out",
+                str(tmp_path / "out"),
+            ]
+        )
+
+
+def test_frozen_datetime() -> None:
+    recorded = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
+    frozen = _frozen_datetime(recorded)
+    assert frozen.now(timezone.utc) == recorded
+    assert frozen.now() == datetime(2026, 2, 10, 12, 0, 0)
@@ -8,7 +8,8 @@ from datetime import datetime, timezone
 from moto import mock_aws
 
 from dapanoskop.processor import (
-    _apply_split_charge_redistribution,
+    _apply_split_charge_plan,
+    _compile_split_charge_plan,
     process,
     update_index,
 )
@@ -111,6 +112,22 @@ def test_untagged_workloads() -> None:
     assert summary["tagging_coverage"]["tagged_percentage"] == 80.0
 
 
+def test_workload_names_keep_dollar_signs() -> None:
+    """Only the tag key prefix is stripped; "$" in the value is kept."""
+    collected = _make_collected(
+        current_groups=[
+            _make_group("web$blue", "BoxUsage:t3.micro", 100, 744),
+            {**_make_group("", "Requests", 50, 1), "Keys": ["111", "Requests"]},
+        ],
+        prev_groups=[],
+        yoy_groups=[],
+    )
+
+    workloads = process(collected)["summary"]["cost_centers"][0]["workloads"]
+
+    assert sorted(w["name"] for w in workloads) == ["111", "web$blue"]
+
+
 def test_storage_metrics() -> None:
     """Test storage metric calculations.
 
@@ -435,6 +452,26 @@ def test_write_to_s3_empty_rows() -> None:
     assert "2026-01/cost-by-usage-type.parquet" not in keys
 
 
+def test_write_outputs_to_memory_storage() -> None:
+    """write_outputs writes the same files to any storage backend, plus the index."""
+    from dapanoskop.processor import write_outputs
+    from dapanoskop.storage import MemoryStorage
+
+    storage = MemoryStorage()
+    group = _make_group("web-app", "BoxUsage:m5.xlarge", 1000, 744)
+    processed = process(_make_collected([group], [group], []))
+    write_outputs(processed, storage)
+
+    assert sorted(storage.objects) == [
+        "2026-01/cost-by-usage-type.parquet",
+        "2026-01/cost-by-workload.parquet",
+        "2026-01/summary.json",
+        "index.json",
+    ]
+    assert json.loads(storage.get("index.json")) == {"periods": ["2026-01"]}
+    assert storage.objects["2026-01/summary.json"][1] == "application/json"
+
+
 @mock_aws
 def test_write_to_s3_parquet_schema() -> None:
     """Test that parquet files have correct column names and types."""
@@ -498,9 +535,9 @@ def test_write_to_s3_parquet_schema() -> None:
     assert ut_table.schema.field("usage_quantity").type == pa.float64()
 
 
-def test_parse_groups_empty_keys() -> None:
-    """Test that _parse_groups handles empty Keys array gracefully."""
-    from dapanoskop.processor import _parse_groups
+def test_aggregate_period_empty_keys() -> None:
+    """Test that _aggregate_period handles empty Keys array gracefully."""
+    from dapanoskop.processor import _aggregate_period, _volume_kinds
 
     groups = [
         {
@@ -512,15 +549,16 @@ def test_parse_groups_empty_keys() -> None:
         }
     ]
 
-    result = _parse_groups(groups)
+    result = _aggregate_period(groups, _volume_kinds(False, False), "2026-01")
 
     # Empty Keys should be skipped (len(keys) != 2)
-    assert result == []
+    assert result["workloads"] == {}
+    assert result["usage_type_rows"] == []
 
 
-def test_parse_groups_single_key() -> None:
-    """Test that _parse_groups handles single key (expects 2) gracefully."""
-    from dapanoskop.processor import _parse_groups
+def test_aggregate_period_single_key() -> None:
+    """Test that _aggregate_period handles single key (expects 2) gracefully."""
+    from dapanoskop.processor import _aggregate_period, _volume_kinds
 
     groups = [
         {
@@ -532,15 +570,16 @@ def test_parse_groups_single_key() -> None:
         }
     ]
 
-    result = _parse_groups(groups)
+    result = _aggregate_period(groups, _volume_kinds(False, False), "2026-01")
 
     # Single key should be skipped (len(keys) != 2)
-    assert result == []
+    assert result["workloads"] == {}
+    assert result["usage_type_rows"] == []
 
 
-def test_parse_groups_missing_keys_field() -> None:
-    """Test that _parse_groups handles missing Keys field gracefully."""
-    from dapanoskop.processor import _parse_groups
+def test_aggregate_period_missing_keys_field() -> None:
+    """Test that _aggregate_period handles missing Keys field gracefully."""
+    from dapanoskop.processor import _aggregate_period, _volume_kinds
 
     groups = [
         {
@@ -551,10 +590,11 @@ def test_parse_groups_missing_keys_field() -> None:
         }
     ]
 
-    result = _parse_groups(groups)
+    result = _aggregate_period(groups, _volume_kinds(False, False), "2026-01")
 
     # Missing Keys should be handled gracefully
-    assert result == []
+    assert result["workloads"] == {}
+    assert result["usage_type_rows"] == []
 
 
 def test_storage_metrics_realistic_scale() -> None:
@@ -650,6 +690,59 @@ def test_storage_metrics_with_efs_and_ebs() -> None:
     assert sm_both["total_volume_bytes"] == 182_536_110_080  # 170 × 2^30 bytes
 
 
+def test_aggregate_period_single_pass_totals() -> None:
+    """_aggregate_period accumulates every per-period summary number in one scan."""
+    from dapanoskop.processor import _aggregate_period, _volume_kinds
+
+    groups = [
+        _make_group("app", "USE1-TimedStorage-ByteHrs", 50, 100),
+        _make_group("app", "EFS:TimedStorage-ByteHrs", 30, 50),
+        _make_group("", "TimedStorage-GlacierStaging", 10, 40),
+        _make_group("app", "BoxUsage:m5.large", 100, 744),
+        _make_group("", "BoxUsage:m5.large", 25, 100),
+    ]
+
+    agg = _aggregate_period(groups, _volume_kinds(False, False), "2026-01")
+
+    assert agg["workloads"] == {"app": 180.0, "Untagged": 35.0}
+    assert agg["categories"] == {"Storage": 90.0, "Compute": 125.0}
+    assert agg["total_cost_usd"] == 215.0
+    assert agg["storage_cost_usd"] == 90.0
+    # EFS is excluded from volume unless enabled
+    assert agg["volume_gb_months"] == 140.0
+    assert agg["hot_gb_months"] == 100.0
+    assert agg["tagged_cost_usd"] == 180.0
+    assert agg["untagged_cost_usd"] == 35.0
+    assert len(agg["usage_type_rows"]) == 5
+    assert {r["period"] for r in agg["usage_type_rows"]} == {"2026-01"}
+
+    with_efs = _aggregate_period(groups, _volume_kinds(True, False))
+    assert with_efs["volume_gb_months"] == 190.0
+    assert with_efs["hot_gb_months"] == 150.0
+    # No label: no parquet rows are materialized
+    assert with_efs["usage_type_rows"] == []
+
+
+def test_classify_usage_type() -> None:
+    """Each usage type resolves to (category, storage volume kind, is hot tier)."""
+    from dapanoskop.processor import _classify_usage_type
+
+    assert _classify_usage_type("USE1-TimedStorage-ByteHrs") == ("Storage", "s3", True)
+    assert _classify_usage_type("TimedStorage-INT-FA-ByteHrs") == (
+        "Storage",
+        "s3",
+        True,
+    )
+    assert _classify_usage_type("TimedStorage-GlacierByteHrs") == (
+        "Storage",
+        "s3",
+        False,
+    )
+    assert _classify_usage_type("EFS:TimedStorage-ByteHrs") == ("Storage", "efs", True)
+    assert _classify_usage_type("EBS:VolumeUsage.gp3") == ("Storage", "ebs", False)
+    assert _classify_usage_type("BoxUsage:m5.large") == ("Compute", None, False)
+
+
 def test_split_charge_categories() -> None:
     """Test that split charge categories are marked and have zero cost."""
     collected = _make_collected(
@@ -849,7 +942,7 @@ def test_redistribution_proportional() -> None:
             "Parameters": [],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # Eng gets 300/(300+100) * 100 = 75, Data gets 100/(300+100) * 100 = 25
     assert result["Eng"] == 375.0
@@ -867,7 +960,7 @@ def test_redistribution_even() -> None:
             "Parameters": [],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     assert result["Eng"] == 350.0
     assert result["Data"] == 150.0
@@ -886,7 +979,7 @@ def test_redistribution_fixed() -> None:
             ],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # Eng gets 70% of 200 = 140, Data gets 30% of 200 = 60
     assert result["Eng"] == 440.0
@@ -904,7 +997,7 @@ def test_redistribution_zero_source_cost() -> None:
             "Parameters": [],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     assert result["Eng"] == 300.0
 
@@ -920,7 +1013,7 @@ def test_redistribution_target_not_in_costs() -> None:
             "Parameters": [],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     assert result["NewTeam"] == 100.0
 
@@ -928,7 +1021,7 @@ def test_redistribution_target_not_in_costs() -> None:
 def test_redistribution_no_rules() -> None:
     """Test that empty rules returns a copy of original costs unchanged."""
     costs = {"Eng": 300.0, "Data": 100.0}
-    result = _apply_split_charge_redistribution(costs, [])
+    result = _apply_split_charge_plan(_compile_split_charge_plan([]), costs)
     assert result == costs
     # Verify it's a copy, not the same object
     assert result is not costs
@@ -945,7 +1038,7 @@ def test_redistribution_proportional_zero_targets_fallback() -> None:
             "Parameters": [],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     assert result["Eng"] == 50.0
     assert result["Data"] == 50.0
@@ -974,7 +1067,7 @@ def test_redistribution_fixed_malformed_value_skipped() -> None:
         }
     ]
     # Should not raise; falls back to EVEN split (param_map ends up empty)
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # EVEN fallback: 100 / 2 = 50 each
     assert result["Eng"] == 50.0
@@ -1012,7 +1105,7 @@ def test_redistribution_fixed_positional_values() -> None:
             ],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Sagemaker"] == 0.0
     # 15% of 1000 = 150
     assert result["Px Operations"] == 350.0
@@ -1041,7 +1134,7 @@ def test_redistribution_fixed_non_numeric_positional_falls_back_to_even() -> Non
             ],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # EVEN fallback: 120 / 3 = 40 each
     assert result["Eng"] == 40.0
@@ -1079,7 +1172,7 @@ def test_redistribution_multi_rule_uses_original_costs() -> None:
             "Parameters": [],
         },
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
 
     # Both sources should be zeroed
     assert result["Shared Services"] == 0.0
@@ -1113,7 +1206,7 @@ def test_redistribution_fixed_percentages_not_summing_to_100() -> None:
             ],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # Eng gets 60% of 200 = 120; total = 300 + 120 = 420
     assert result["Eng"] == 420.0
@@ -1143,7 +1236,7 @@ def test_redistribution_fixed_whitespace_in_values() -> None:
             ],
         }
     ]
-    result = _apply_split_charge_redistribution(costs, rules)
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
     assert result["Shared"] == 0.0
     # Eng: 300 + 70% of 200 = 300 + 140 = 440
     assert result["Eng"] == 440.0
@@ -1151,6 +1244,77 @@ def test_redistribution_fixed_whitespace_in_values() -> None:
     assert result["Data"] == 160.0
 
 
+def test_split_charge_plan_chained_rules() -> None:
+    """A source that is also a target is zeroed after its own rule runs.
+
+    Shared→Platform runs first, then Platform→Eng. Platform's own original cost
+    moves to Eng, and the share Platform received from Shared is dropped with
+    the zeroed source.
+    """
+    costs = {"Shared": 100.0, "Platform": 50.0, "Eng": 200.0}
+    rules = [
+        {"Source": "Shared", "Targets": ["Platform"], "Method": "EVEN"},
+        {"Source": "Platform", "Targets": ["Eng"], "Method": "EVEN"},
+    ]
+    result = _apply_split_charge_plan(_compile_split_charge_plan(rules), costs)
+    assert result == {"Shared": 0.0, "Platform": 0.0, "Eng": 250.0}
+
+
+def test_split_charge_plan_compiled_once_and_reused() -> None:
+    """Identical rules compile to the same plan, reusable across periods."""
+    from dapanoskop.processor import (
+        _apply_split_charge_plan,
+        _compile_split_charge_plan,
+    )
+
+    rules = [
+        {
+            "Source": "Shared",
+            "Targets": ["Eng", "Data"],
+            "Method": "FIXED",
+            "Parameters": [{"Type": "ALLOCATION_PERCENTAGES", "Values": ["75", "25"]}],
+        },
+        {
+            "Source": "Platform",
+            "Targets": ["Eng", "Data"],
+            "Method": "PROPORTIONAL",
+            "Parameters": [],
+        },
+        {"Source": "Orphan", "Targets": [], "Method": "EVEN", "Parameters": []},
+    ]
+    plan = _compile_split_charge_plan(rules)
+    assert _compile_split_charge_plan([dict(r) for r in rules]) is plan
+    # FIXED fractions resolved at compile time; PROPORTIONAL deferred; rules
+    # without targets dropped
+    assert plan == (
+        ("Shared", ("Eng", "Data"), (0.75, 0.25)),
+        ("Platform", ("Eng", "Data"), None),
+    )
+
+    jan = _apply_split_charge_plan(
+        plan, {"Shared": 100.0, "Platform": 40.0, "Eng": 300.0, "Data": 100.0}
+    )
+    assert jan == {"Shared": 0.0, "Platform": 0.0, "Eng": 405.0, "Data": 135.0}
+
+    feb = _apply_split_charge_plan(
+        plan, {"Shared": 200.0, "Platform": 10.0, "Eng": 0.0, "Data": 0.0}
+    )
+    assert feb == {"Shared": 0.0, "Platform": 0.0, "Eng": 155.0, "Data": 55.0}
+
+
+def test_split_charge_plan_no_rules_is_identity() -> None:
+    """An empty plan returns an unchanged copy of the category totals."""
+    from dapanoskop.processor import (
+        _apply_split_charge_plan,
+        _compile_split_charge_plan,
+    )
+
+    costs = {"Eng": 1.0}
+    result = _apply_split_charge_plan(_compile_split_charge_plan([]), costs)
+    assert result == costs
+    assert result is not costs
+
+
 # --- MTD processing tests ---
 
 
@@ -1214,6 +1378,20 @@ def test_process_non_mtd_sets_is_mtd_false() -> None:
     assert result["summary"]["is_mtd"] is False
 
 
+def test_process_records_cost_filter_in_summary() -> None:
+    """The collector's cost filter is written to summary.json for auditing."""
+    collected = _make_collected(
+        current_groups=[_make_group("app", "BoxUsage:m5.xlarge", 100, 10)],
+        prev_groups=[],
+        yoy_groups=[],
+    )
+    assert "cost_filter" not in process(collected)["summary"]
+
+    cost_filter = {"Not": {"Dimensions": {"Key": "RECORD_TYPE", "Values": ["Tax"]}}}
+    collected["cost_filter"] = cost_filter
+    assert process(collected)["summary"]["cost_filter"] == cost_filter
+
+
 def test_process_mtd_includes_mtd_comparison() -> None:
     """process() with is_mtd=True and prev_month_partial data emits mtd_comparison."""
     collected = _make_mtd_collected(
@@ -1436,7 +1614,7 @@ def test_yoy_cost_not_double_redistributed_when_cost_category_rules_changed() ->
       specific case — but the test also covers the case where yoy_allocated still has
       a non-zero source balance, which would cause double-redistribution.
 
-    The fix: only apply _apply_split_charge_redistribution to current_allocated.
+    The fix: only apply _apply_split_charge_plan to current_allocated.
     Historical periods trust CE's own NetAmortizedCost which already applied the
     period-correct rules.
     """
@@ -1606,7 +1784,7 @@ def test_yoy_cost_not_double_redistributed_with_nonzero_yoy_source() -> None:
 def test_yoy_global_total_preserves_split_charge_source_cost() -> None:
     """Bug 1 validation: split charge source cost must not vanish from YoY total.
 
-    For current/prev_month, _apply_split_charge_redistribution() runs BEFORE the
+    For current/prev_month, _apply_split_charge_plan() runs BEFORE the
     cost center loop, moving source costs to targets. The is_split_charge guard then
     safely zeroes the source because its cost already lives in the targets.
 
@@ -1684,6 +1862,60 @@ def test_yoy_global_total_preserves_split_charge_source_cost() -> None:
     )
 
 
+def test_split_charge_rules_by_period_applies_each_periods_rules() -> None:
+    """Each period is redistributed with the rule version effective in it."""
+    groups = [
+        _make_group("eng-app", "BoxUsage:m5.xlarge", 1000, 744),
+        _make_group("data-app", "BoxUsage:m5.xlarge", 1000, 744),
+        _make_group("shared-svc", "BoxUsage:m5.xlarge", 400, 744),
+    ]
+    collected = _make_collected(
+        current_groups=groups,
+        prev_groups=groups,
+        yoy_groups=groups,
+        cc_mapping={
+            "eng-app": "Engineering",
+            "data-app": "Data",
+            "shared-svc": "Shared",
+        },
+    )
+    fixed = {
+        "Source": "Shared",
+        "Targets": ["Engineering", "Data"],
+        "Method": "FIXED",
+        "Parameters": [{"Type": "ALLOCATION_PERCENTAGES", "Values": ["75", "25"]}],
+    }
+    even = {
+        "Source": "Shared",
+        "Targets": ["Engineering", "Data"],
+        "Method": "EVEN",
+        "Parameters": [],
+    }
+    collected["split_charge_categories"] = ["Shared"]
+    collected["split_charge_rules"] = [fixed]
+    # A year ago the definition split Shared evenly
+    collected["split_charge_rules_by_period"] = {
+        "current": [fixed],
+        "prev_month": [fixed],
+        "yoy": [even],
+    }
+    allocated = {"Engineering": 1000.0, "Data": 1000.0, "Shared": 400.0}
+    collected["allocated_costs"] = {
+        "current": dict(allocated),
+        "prev_month": dict(allocated),
+        "yoy": dict(allocated),
+    }
+
+    ccs = {cc["name"]: cc for cc in process(collected)["summary"]["cost_centers"]}
+
+    assert ccs["Engineering"]["current_cost_usd"] == 1300.0
+    assert ccs["Engineering"]["prev_month_cost_usd"] == 1300.0
+    assert ccs["Engineering"]["yoy_cost_usd"] == 1200.0
+    assert ccs["Data"]["yoy_cost_usd"] == 1200.0
+    assert ccs["Shared"]["current_cost_usd"] == 0.0
+    assert ccs["Shared"]["yoy_cost_usd"] == 0.0
+
+
 def test_yoy_double_count_untagged_in_allocated_and_uncategorized() -> None:
     """Bug 2 validation: Untagged costs double-counted via allocated + workload fallback.
 
@@ -2028,3 +2260,69 @@ def test_completed_month_storage_metrics_unchanged() -> None:
 
     # No MTD-specific field
     assert "mtd_prior_partial_storage_cost_usd" not in sm
+
+
+def test_cost_by_day_parquet_from_daily_cube() -> None:
+    """Daily cube rows become a sorted, dictionary-encoded cost-by-day.parquet."""
+    import io
+    from datetime import date
+
+    import pyarrow.parquet as pq
+
+    from dapanoskop.processor import write_outputs
+    from dapanoskop.storage import MemoryStorage
+
+    collected = _make_collected(
+        current_groups=[_make_group("web-app", "BoxUsage:m5.xlarge", 30, 3)],
+        prev_groups=[],
+        yoy_groups=[],
+        cc_mapping={"web-app": "Engineering"},
+    )
+    collected["daily"] = {
+        "current": {
+            "2026-01-02": [
+                ["App$web-app", "BoxUsage:m5.xlarge", 10.0, 1.0],
+                ["App$", "TimedStorage-ByteHrs", 1.5, 9.0],
+                ["App$web-app", "USE1-BoxUsage:m5.xlarge", 2.0, 1.0],
+            ],
+            "2026-01-01": [["App$web-app", "BoxUsage:m5.xlarge", 20.0, 2.0]],
+        }
+    }
+    storage = MemoryStorage()
+    write_outputs(process(collected), storage, update_index_file=False)
+
+    data = storage.get("2026-01/cost-by-day.parquet")
+    assert data is not None
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.read().to_pylist() == [
+        {
+            "date": date(2026, 1, 1),
+            "cost_center": "Engineering",
+            "workload": "web-app",
+            "category": "Compute",
+            "cost_usd": 20.0,
+        },
+        {
+            "date": date(2026, 1, 2),
+            "cost_center": "Engineering",
+            "workload": "web-app",
+            "category": "Compute",
+            "cost_usd": 12.0,
+        },
+        {
+            "date": date(2026, 1, 2),
+            "cost_center": "Uncategorized",
+            "workload": "Untagged",
+            "category": "Storage",
+            "cost_usd": 1.5,
+        },
+    ]
+    row_group = parquet.metadata.row_group(0)
+    assert [c.column_index for c in row_group.sorting_columns] == [0, 1, 2, 3]
+    assert "RLE_DICTIONARY" in row_group.column(1).encodings
+
+    # Without daily data there is no cost-by-day.parquet
+    del collected["daily"]
+    storage = MemoryStorage()
+    write_outputs(process(collected), storage, update_index_file=False)
+    assert storage.get("2026-01/cost-by-day.parquet") is None
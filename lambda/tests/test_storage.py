@@ -0,0 +1,82 @@
+"""Tests for output storage backends."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from dapanoskop.storage import (
+    LocalStorage,
+    MemoryStorage,
+    PreconditionFailedError,
+    S3Storage,
+    get_storage,
+)
+
+
+@pytest.fixture(params=["s3", "local", "memory"])
+def storage(request: pytest.FixtureRequest, tmp_path: Path):
+    if request.param == "s3":
+        with mock_aws():
+            boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="data")
+            yield S3Storage("data")
+    elif request.param == "local":
+        yield LocalStorage(tmp_path)
+    else:
+        yield MemoryStorage()
+
+
+def test_put_get_head(storage) -> None:
+    assert storage.get("2026-01/summary.json") is None
+    assert storage.head("2026-01/summary.json") is None
+
+    etag = storage.put("2026-01/summary.json", b"{}", content_type="application/json")
+    assert storage.get("2026-01/summary.json") == b"{}"
+    head = storage.head("2026-01/summary.json")
+    assert head == {"etag": etag, "size": 2}
+    # All backends use S3's single-part ETag (quoted MD5)
+    assert etag == '"99914b932bd37a50b983c5e7c90ae93b"'
+
+
+def test_list_prefixes_and_has_prefix(storage) -> None:
+    storage.put("2026-01/summary.json", b"a")
+    storage.put("2026-02/summary.json", b"b")
+    storage.put("2026-02/nested/x.parquet", b"c")
+    storage.put("index.json", b"d")
+
+    assert sorted(storage.list_prefixes()) == ["2026-01", "2026-02"]
+    assert storage.list_prefixes("2026-02/") == ["2026-02/nested"]
+    assert storage.has_prefix("2026-01/")
+    assert not storage.has_prefix("2025-12/")
+
+
+def test_conditional_puts(storage) -> None:
+    etag = storage.put("state.json", b"v1", if_none_match=True)
+    with pytest.raises(PreconditionFailedError):
+        storage.put("state.json", b"v2", if_none_match=True)
+    with pytest.raises(PreconditionFailedError):
+        storage.put("state.json", b"v2", if_match='"stale"')
+
+    new_etag = storage.put("state.json", b"v2", if_match=etag)
+    assert new_etag != etag
+    assert storage.get("state.json") == b"v2"
+
+
+def test_local_storage_rejects_escaping_keys(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="escapes"):
+        LocalStorage(tmp_path / "root").put("../outside.json", b"x")
+
+
+def test_get_storage_selects_backend(tmp_path: Path) -> None:
+    assert isinstance(get_storage(f"file://{tmp_path}"), LocalStorage)
+    memory = get_storage("memory://bench")
+    assert isinstance(memory, MemoryStorage)
+    assert get_storage("memory://bench") is memory
+    with mock_aws():
+        s3 = get_storage("s3://my-bucket")
+        assert isinstance(s3, S3Storage)
+        assert s3.bucket == "my-bucket"
+        assert get_storage("my-bucket").location == "s3://my-bucket"
@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
 from botocore.exceptions import ClientError as _ClientError
 
-from dapanoskop.storage_lens import get_storage_lens_metrics
+from dapanoskop.storage import MemoryStorage
+from dapanoskop.storage_lens import (
+    DISCOVERY_CACHE_TTL_SECONDS,
+    SERIES_KEY,
+    clear_discovery_cache,
+    get_storage_lens_history,
+    get_storage_lens_metrics,
+    storage_lens_month_end,
+    update_storage_lens_series,
+)
 
 
 def test_storage_lens_successful_retrieval() -> None:
@@ -326,6 +335,7 @@ def test_storage_lens_empty_metrics() -> None:
         }
 
         mock_cloudwatch = MagicMock()
+        mock_cloudwatch.get_metric_data.return_value = {"MetricDataResults": []}
         # Return empty metrics list
         mock_cloudwatch.get_paginator.return_value.paginate.return_value = [
             {"Metrics": []}
@@ -657,6 +667,7 @@ def test_storage_lens_list_metrics_client_error_returns_none() -> None:
         }
 
         mock_cloudwatch = MagicMock()
+        mock_cloudwatch.get_metric_data.return_value = {"MetricDataResults": []}
         # Paginator raises ClientError on paginate
         paginator = MagicMock()
         paginator.paginate.side_effect = _ClientError(
@@ -847,3 +858,494 @@ def test_storage_lens_all_results_empty_returns_none() -> None:
         )
         result = get_storage_lens_metrics(config_id="")
         assert result is None
+
+
+def _org_config_mocks() -> tuple[MagicMock, MagicMock]:
+    """STS and S3 Control mocks for an org-wide config with CloudWatch export."""
+    mock_sts = MagicMock()
+    mock_sts.get_caller_identity.return_value = {"Account": "123456789012"}
+    mock_s3control = MagicMock()
+    mock_s3control.list_storage_lens_configurations.return_value = {
+        "StorageLensConfigurationList": [
+            {
+                "Id": "org-config",
+                "StorageLensArn": "arn:aws:s3:us-east-1:123456789012:storage-lens/org-config",
+            }
+        ]
+    }
+    mock_s3control.get_storage_lens_configuration.return_value = {
+        "StorageLensConfiguration": {
+            "Id": "org-config",
+            "AwsOrg": {
+                "Arn": "arn:aws:organizations::123456789012:organization/o-abc123"
+            },
+            "DataExport": {"CloudWatchMetrics": {"IsEnabled": True}},
+        }
+    }
+    return mock_sts, mock_s3control
+
+
+def _storage_bytes_series(count: int) -> list[dict]:
+    return [
+        {
+            "Namespace": "AWS/S3/Storage-Lens",
+            "MetricName": "StorageBytes",
+            "Dimensions": [
+                {"Name": "organization_id", "Value": "o-abc123"},
+                {"Name": "record_type", "Value": "ORGANIZATION"},
+                {"Name": "aws_account_number", "Value": f"{i:012d}"},
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def test_storage_lens_search_mode_sums_server_side() -> None:
+    """Search mode sends one SUM(SEARCH) expression per metric, no list_metrics."""
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.return_value = {
+        "MetricDataResults": [
+            {"Id": "s0", "Label": "StorageBytes", "Timestamps": [ts], "Values": [5e9]},
+            {"Id": "s1", "Label": "ObjectCount", "Timestamps": [ts], "Values": [42]},
+        ]
+    }
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        result = get_storage_lens_metrics(config_id="")
+
+    assert result is not None
+    assert result["total_bytes"] == 5_000_000_000
+    assert result["object_count"] == 42
+    mock_cloudwatch.get_paginator.assert_not_called()
+    queries = mock_cloudwatch.get_metric_data.call_args.kwargs["MetricDataQueries"]
+    assert [q["Label"] for q in queries] == ["StorageBytes", "ObjectCount"]
+    assert queries[0]["Expression"].startswith("SUM(SEARCH(")
+    assert 'organization_id="o-abc123"' in queries[0]["Expression"]
+    assert 'MetricName="StorageBytes"' in queries[0]["Expression"]
+
+
+def test_storage_lens_search_without_data_falls_back_to_list() -> None:
+    """An empty metric math result falls back to per-series MetricStat queries."""
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_paginator.return_value.paginate.return_value = [
+        {"Metrics": _storage_bytes_series(2)}
+    ]
+    mock_cloudwatch.get_metric_data.side_effect = [
+        {
+            "MetricDataResults": [
+                {"Id": "s0", "Label": "StorageBytes", "Timestamps": [], "Values": []}
+            ]
+        },
+        {
+            "MetricDataResults": [
+                {
+                    "Id": "m0",
+                    "Label": "StorageBytes",
+                    "Timestamps": [ts],
+                    "Values": [1],
+                },
+                {
+                    "Id": "m1",
+                    "Label": "StorageBytes",
+                    "Timestamps": [ts],
+                    "Values": [2],
+                },
+            ]
+        },
+    ]
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        result = get_storage_lens_metrics(config_id="", metric_names=["StorageBytes"])
+
+    assert result is not None
+    assert result["total_bytes"] == 3
+    fallback = mock_cloudwatch.get_metric_data.call_args.kwargs["MetricDataQueries"]
+    assert all("MetricStat" in q for q in fallback)
+
+
+def test_storage_lens_list_mode_chunks_and_paginates() -> None:
+    """List mode splits >500 series into requests and follows NextToken."""
+    ts1 = datetime(2026, 2, 14, 0, 0, 0, tzinfo=timezone.utc)
+    ts2 = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_paginator.return_value.paginate.return_value = [
+        {"Metrics": _storage_bytes_series(501)}
+    ]
+
+    def get_metric_data(**kwargs):
+        queries = kwargs["MetricDataQueries"]
+        # Every chunk is returned in two pages: older day first, then newer day
+        ts = ts2 if "NextToken" in kwargs else ts1
+        response = {
+            "MetricDataResults": [
+                {"Id": q["Id"], "Label": q["Label"], "Timestamps": [ts], "Values": [1]}
+                for q in queries
+            ]
+        }
+        if "NextToken" not in kwargs:
+            response["NextToken"] = "page-2"
+        return response
+
+    mock_cloudwatch.get_metric_data.side_effect = get_metric_data
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        result = get_storage_lens_metrics(
+            config_id="", metric_names=["StorageBytes"], mode="list"
+        )
+
+    assert result is not None
+    assert result["total_bytes"] == 501
+    assert result["timestamp"] == ts2.isoformat()
+    sizes = [
+        len(c.kwargs["MetricDataQueries"])
+        for c in mock_cloudwatch.get_metric_data.call_args_list
+    ]
+    assert sizes == [500, 500, 1, 1]
+
+
+def test_storage_lens_discovery_cached_across_calls() -> None:
+    """Repeated calls reuse discovery and query with one get_metric_data each."""
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.return_value = {
+        "MetricDataResults": [
+            {"Id": "s0", "Label": "StorageBytes", "Timestamps": [ts], "Values": [7]}
+        ]
+    }
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        for _ in range(3):
+            assert get_storage_lens_metrics(config_id="")["total_bytes"] == 7
+
+    mock_sts.get_caller_identity.assert_called_once()
+    mock_s3control.list_storage_lens_configurations.assert_called_once()
+    mock_s3control.get_storage_lens_configuration.assert_called_once()
+    assert mock_cloudwatch.get_metric_data.call_count == 3
+
+
+def test_storage_lens_concurrent_reads_discover_once() -> None:
+    """Threads reading a cold cache share one discovery and CloudWatch client."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    identity = mock_sts.get_caller_identity.return_value
+
+    def slow_identity() -> dict:
+        # Keep the first discovery in flight while the other threads arrive
+        time.sleep(0.05)
+        return identity
+
+    mock_sts.get_caller_identity.side_effect = slow_identity
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.return_value = {
+        "MetricDataResults": [
+            {"Id": "s0", "Label": "StorageBytes", "Timestamps": [ts], "Values": [7]}
+        ]
+    }
+    start = threading.Barrier(3, timeout=5)
+
+    def read() -> int:
+        start.wait()
+        return get_storage_lens_metrics(config_id="")["total_bytes"]
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(read) for _ in range(3)]
+            totals = [f.result() for f in futures]
+
+    assert totals == [7, 7, 7]
+    mock_sts.get_caller_identity.assert_called_once()
+    clients = [c.args[0] for c in mock_client.call_args_list]
+    assert clients.count("cloudwatch") == 1
+
+
+def test_storage_lens_cached_list_mode_skips_search_and_listing() -> None:
+    """Once search came up empty, later calls go straight to cached MetricStats."""
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_paginator.return_value.paginate.return_value = [
+        {"Metrics": _storage_bytes_series(2)}
+    ]
+
+    def get_metric_data(**kwargs):
+        queries = kwargs["MetricDataQueries"]
+        if "Expression" in queries[0]:
+            return {"MetricDataResults": []}
+        return {
+            "MetricDataResults": [
+                {"Id": q["Id"], "Label": q["Label"], "Timestamps": [ts], "Values": [1]}
+                for q in queries
+            ]
+        }
+
+    mock_cloudwatch.get_metric_data.side_effect = get_metric_data
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        first = get_storage_lens_metrics(config_id="", metric_names=["StorageBytes"])
+        calls_after_first = mock_cloudwatch.get_metric_data.call_count
+        second = get_storage_lens_metrics(config_id="", metric_names=["StorageBytes"])
+
+    assert first["total_bytes"] == second["total_bytes"] == 2
+    assert calls_after_first == 2  # search, then list fallback
+    assert mock_cloudwatch.get_metric_data.call_count == 3
+    mock_cloudwatch.get_paginator.return_value.paginate.assert_called_once()
+
+
+def test_storage_lens_discovery_cache_expires() -> None:
+    """Discovery is repeated after the TTL and after clear_discovery_cache()."""
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.return_value = {"MetricDataResults": []}
+    mock_cloudwatch.get_paginator.return_value.paginate.return_value = [{"Metrics": []}]
+
+    with (
+        patch("dapanoskop.storage_lens.boto3.client") as mock_client,
+        patch("dapanoskop.storage_lens.time.monotonic") as mock_monotonic,
+    ):
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        mock_monotonic.return_value = 1000.0
+        get_storage_lens_metrics(config_id="")
+        get_storage_lens_metrics(config_id="")
+        assert mock_sts.get_caller_identity.call_count == 1
+
+        mock_monotonic.return_value = 1000.0 + DISCOVERY_CACHE_TTL_SECONDS + 1
+        get_storage_lens_metrics(config_id="")
+        assert mock_sts.get_caller_identity.call_count == 2
+
+        clear_discovery_cache()
+        get_storage_lens_metrics(config_id="")
+        assert mock_sts.get_caller_identity.call_count == 3
+
+
+def test_storage_lens_history_sliced_per_month_and_cached() -> None:
+    """One history query serves month-end values and later covered ranges."""
+    first_day = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    days = [first_day + timedelta(days=d) for d in range(62)]
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.return_value = {
+        "MetricDataResults": [
+            {
+                "Id": "s0",
+                "Label": "StorageBytes",
+                "Timestamps": list(reversed(days)),
+                "Values": [float(100 + d) for d in reversed(range(62))],
+            },
+            {"Id": "s1", "Label": "ObjectCount", "Timestamps": [], "Values": []},
+        ]
+    }
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        history = get_storage_lens_history(
+            first_day, datetime(2026, 2, 1, tzinfo=timezone.utc)
+        )
+        again = get_storage_lens_history(
+            datetime(2026, 1, 1, tzinfo=timezone.utc),
+            datetime(2026, 2, 1, tzinfo=timezone.utc),
+        )
+
+    assert mock_cloudwatch.get_metric_data.call_count == 1
+    assert len(again["series"]["StorageBytes"]) == 31
+
+    december = storage_lens_month_end(history, 2025, 12)
+    assert december["total_bytes"] == 130
+    assert december["timestamp"] == days[30].isoformat()
+    assert december["object_count"] == 0
+    assert december["config_id"] == "org-config"
+    assert storage_lens_month_end(history, 2026, 1)["total_bytes"] == 161
+    assert storage_lens_month_end(history, 2025, 10) is None
+
+
+def _daily_history(start_time, end_time, config_id: str = "", **kwargs) -> dict:
+    """get_storage_lens_history stand-in: StorageBytes = day of month * 10."""
+    days = [start_time + timedelta(days=d) for d in range((end_time - start_time).days)]
+    return {
+        "config_id": "org-config",
+        "org_id": "o-abc123",
+        "start": start_time,
+        "end": end_time,
+        "series": {
+            "StorageBytes": [{"Timestamp": d, "Value": d.day * 10.0} for d in days],
+            "ObjectCount": [{"Timestamp": d, "Value": 5.0} for d in days],
+        },
+    }
+
+
+def test_update_storage_lens_series_appends_and_compacts() -> None:
+    """The daily series is seeded once, then grows by one row group per run."""
+    import io
+
+    import pyarrow.parquet as pq
+
+    storage = MemoryStorage()
+    now = datetime(2026, 2, 15, 6, 0, 0, tzinfo=timezone.utc)
+
+    with patch(
+        "dapanoskop.storage_lens.get_storage_lens_history", side_effect=_daily_history
+    ) as mock_history:
+        assert update_storage_lens_series(storage, now=now) == 455
+        first_start, first_end = mock_history.call_args.args
+        assert first_end == datetime(2026, 2, 15, tzinfo=timezone.utc)
+        assert first_end - first_start == timedelta(days=455)
+
+        # Same day again: nothing new, no CloudWatch query
+        assert update_storage_lens_series(storage, now=now) == 0
+        assert mock_history.call_count == 1
+
+        for day in range(1, 33):
+            assert (
+                update_storage_lens_series(storage, now=now + timedelta(days=day)) == 1
+            )
+
+    parquet = pq.ParquetFile(io.BytesIO(storage.get(SERIES_KEY)))
+    # 1 seed + 32 appends = 33 row groups > 32 → compacted into one
+    assert parquet.num_row_groups == 1
+    table = parquet.read().to_pylist()
+    assert len(table) == 455 + 32
+    assert table[-1] == {
+        "date": date(2026, 3, 18),
+        "total_bytes": 180,
+        "object_count": 5,
+    }
+    assert [r["date"] for r in table] == sorted(r["date"] for r in table)
+
+
+def test_update_storage_lens_series_without_config_writes_nothing() -> None:
+    storage = MemoryStorage()
+    with patch("dapanoskop.storage_lens.get_storage_lens_history", return_value=None):
+        assert update_storage_lens_series(storage) == 0
+    assert storage.objects == {}
+
+
+def test_storage_lens_without_breakdown_sends_only_metric_math() -> None:
+    """The default read is one SUM(SEARCH) query per metric, no list_metrics."""
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_metric_data.side_effect = lambda **kwargs: {
+        "MetricDataResults": [
+            {"Id": q["Id"], "Label": q["Label"], "Timestamps": [ts], "Values": [9]}
+            for q in kwargs["MetricDataQueries"]
+        ]
+    }
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        result = get_storage_lens_metrics(config_id="")
+
+    queries = mock_cloudwatch.get_metric_data.call_args.kwargs["MetricDataQueries"]
+    assert [q["Expression"][:11] for q in queries] == ["SUM(SEARCH("] * 2
+    assert not any("MetricStat" in q for q in queries)
+    mock_cloudwatch.get_paginator.assert_not_called()
+    assert result["total_bytes"] == 9
+    assert "by_storage_class" not in result
+
+
+def test_storage_lens_breakdown_from_per_series_results() -> None:
+    """breakdown=True groups the MetricStat series by class, region and account."""
+    older = datetime(2026, 2, 14, 0, 0, 0, tzinfo=timezone.utc)
+    ts = datetime(2026, 2, 15, 0, 0, 0, tzinfo=timezone.utc)
+    mock_sts, mock_s3control = _org_config_mocks()
+
+    def series(name, storage_class, region, account=None):
+        dims = [
+            {"Name": "organization_id", "Value": "o-abc123"},
+            {"Name": "record_type", "Value": "ORGANIZATION"},
+            {"Name": "storage_class", "Value": storage_class},
+            {"Name": "aws_region", "Value": region},
+        ]
+        if account:
+            dims.append({"Name": "aws_account_number", "Value": account})
+        return {
+            "Namespace": "AWS/S3/Storage-Lens",
+            "MetricName": name,
+            "Dimensions": dims,
+        }
+
+    listed = {
+        "StorageBytes": [
+            series("StorageBytes", "STANDARD", "eu-west-1", "111111111111"),
+            series("StorageBytes", "GLACIER", "eu-west-1", "111111111111"),
+            series("StorageBytes", "STANDARD", "us-east-1"),
+        ],
+        "ObjectCount": [
+            series("ObjectCount", "STANDARD", "eu-west-1", "111111111111"),
+        ],
+    }
+    mock_cloudwatch = MagicMock()
+    mock_cloudwatch.get_paginator.return_value.paginate.side_effect = (
+        lambda MetricName, **kwargs: [{"Metrics": listed[MetricName]}]
+    )
+    values = {"m0": 100, "m1": 300, "m2": 50, "m3": 7}
+    mock_cloudwatch.get_metric_data.side_effect = lambda **kwargs: {
+        "MetricDataResults": [
+            {
+                "Id": q["Id"],
+                "Label": q["Label"],
+                "Timestamps": [ts, older],
+                "Values": [values[q["Id"]], 1],
+            }
+            for q in kwargs["MetricDataQueries"]
+        ]
+    }
+
+    with patch("dapanoskop.storage_lens.boto3.client") as mock_client:
+        mock_client.side_effect = _make_s3control_factory(
+            mock_sts, mock_s3control, mock_cloudwatch
+        )
+        result = get_storage_lens_metrics(config_id="", breakdown=True)
+
+    # A single per-series get_metric_data call, no metric math search
+    assert mock_cloudwatch.get_metric_data.call_count == 1
+    queries = mock_cloudwatch.get_metric_data.call_args.kwargs["MetricDataQueries"]
+    assert all("MetricStat" in q and "Expression" not in q for q in queries)
+    assert mock_cloudwatch.get_paginator.call_count == 2
+    assert result["total_bytes"] == 450
+    assert result["object_count"] == 7
+    assert result["by_storage_class"] == [
+        {"name": "GLACIER", "total_bytes": 300, "object_count": 0},
+        {"name": "STANDARD", "total_bytes": 150, "object_count": 7},
+    ]
+    assert result["by_region"] == [
+        {"name": "eu-west-1", "total_bytes": 400, "object_count": 7},
+        {"name": "us-east-1", "total_bytes": 50, "object_count": 0},
+    ]
+    assert result["by_account"] == [
+        {"name": "111111111111", "total_bytes": 400, "object_count": 7},
+        {"name": "Other", "total_bytes": 50, "object_count": 0},
+    ]
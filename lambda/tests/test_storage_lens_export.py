@@ -0,0 +1,136 @@
+"""Tests for the S3 Storage Lens metrics export reader."""
+
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from dapanoskop.storage_lens_export import read_storage_lens_export
+
+COLUMNS = [
+    "version_number",
+    "configuration_id",
+    "report_date",
+    "aws_account_number",
+    "aws_region",
+    "storage_class",
+    "record_type",
+    "record_value",
+    "bucket_name",
+    "metric_name",
+    "metric_value",
+]
+
+
+# account, region, storage class, record type, bucket, metric, value
+_RECORDS = [
+    ("012345678901", "eu-west-1", "STANDARD", "BUCKET", "logs", "StorageBytes", 100),
+    ("012345678901", "eu-west-1", "GLACIER", "BUCKET", "logs", "StorageBytes", 300),
+    ("012345678901", "eu-west-1", "STANDARD", "BUCKET", "logs", "ObjectCount", 4),
+    ("210987654321", "us-east-1", "STANDARD", "BUCKET", "data", "StorageBytes", 50),
+    ("210987654321", "us-east-1", "STANDARD", "BUCKET", "data", "ObjectCount", 1),
+    # Account-level aggregate and an unrelated metric must not be counted
+    ("012345678901", "eu-west-1", "STANDARD", "ACCOUNT", "", "StorageBytes", 400),
+    ("012345678901", "eu-west-1", "STANDARD", "BUCKET", "logs", "PutRequests", 9),
+]
+
+
+def _rows(report_date: str, scale: int = 1) -> list[list[str]]:
+    """Export rows of one report: two buckets, plus records the reader skips."""
+    return [
+        [
+            "V_1",
+            "org-lens",
+            report_date,
+            account,
+            region,
+            storage_class,
+            record_type,
+            bucket or account,
+            bucket,
+            metric,
+            str(value * scale),
+        ]
+        for account, region, storage_class, record_type, bucket, metric, value in (
+            _RECORDS
+        )
+    ]
+
+
+def _write_csv(path: Path, rows: list[list[str]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [",".join(COLUMNS), *(",".join(r) for r in rows)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _write_parquet(path: Path, rows: list[list[str]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    columns = {name: [r[i] for r in rows] for i, name in enumerate(COLUMNS)}
+    columns["metric_value"] = [int(v) for v in columns["metric_value"]]
+    # Small row groups so predicate pushdown and batching are exercised
+    pq.write_table(pa.table(columns), path, row_group_size=2)
+
+
+@pytest.mark.parametrize("writer", [_write_csv, _write_parquet])
+def test_reads_latest_report_by_bucket(tmp_path: Path, writer) -> None:
+    reports = tmp_path / "reports"
+    suffix = ".csv" if writer is _write_csv else ".par"
+    writer(reports / "dt=2026-02-14" / f"a{suffix}", _rows("2026-02-14"))
+    writer(reports / "dt=2026-02-15" / f"a{suffix}", _rows("2026-02-15", scale=2))
+    (reports / "dt=2026-02-15" / "manifest.json").write_text("{}")
+
+    result = read_storage_lens_export(str(reports), batch_size=3)
+
+    assert result["report_date"] == "2026-02-15"
+    assert result["config_id"] == "org-lens"
+    assert result["total_bytes"] == 900
+    assert result["object_count"] == 10
+    assert result["buckets"] == [
+        {
+            "aws_account_number": "012345678901",
+            "aws_region": "eu-west-1",
+            "bucket_name": "logs",
+            "total_bytes": 800,
+            "object_count": 8,
+        },
+        {
+            "aws_account_number": "210987654321",
+            "aws_region": "us-east-1",
+            "bucket_name": "data",
+            "total_bytes": 100,
+            "object_count": 2,
+        },
+    ]
+    assert result["by_storage_class"] == [
+        {"name": "GLACIER", "total_bytes": 600, "object_count": 0},
+        {"name": "STANDARD", "total_bytes": 300, "object_count": 10},
+    ]
+    assert [e["name"] for e in result["by_region"]] == ["eu-west-1", "us-east-1"]
+    assert [e["name"] for e in result["by_account"]] == [
+        "012345678901",
+        "210987654321",
+    ]
+
+
+def test_report_date_selects_latest_on_or_before(tmp_path: Path) -> None:
+    reports = tmp_path / "reports"
+    _write_csv(reports / "dt=2026-01-30" / "a.csv", _rows("2026-01-30"))
+    _write_csv(reports / "dt=2026-02-02" / "a.csv", _rows("2026-02-02", scale=5))
+
+    result = read_storage_lens_export(
+        f"file://{reports}", report_date=date(2026, 1, 31)
+    )
+
+    assert result["report_date"] == "2026-01-30"
+    assert result["total_bytes"] == 450
+    assert read_storage_lens_export(str(reports), report_date=date(2026, 1, 1)) is None
+
+
+def test_missing_or_empty_export(tmp_path: Path) -> None:
+    assert read_storage_lens_export(str(tmp_path / "nothing")) is None
+    (tmp_path / "reports" / "dt=2026-02-15").mkdir(parents=True)
+    assert read_storage_lens_export(str(tmp_path / "reports")) is None
@@ -0,0 +1,266 @@
+"""Tests for the synthetic organization and its AWS stand-ins."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from dapanoskop.collector import (
+    collect,
+    get_cost_and_usage,
+    get_daily_cost_and_usage,
+    get_monthly_totals,
+    probe_freshness,
+    submit_collect,
+    sum_daily_cube,
+    update_daily_cube,
+)
+from dapanoskop.processor import process
+from dapanoskop.storage import MemoryStorage
+from dapanoskop.storage_lens import get_storage_lens_metrics
+from dapanoskop.synthetic import (
+    COST_CATEGORY_NAME,
+    STORAGE_LENS_CONFIG_ID,
+    SyntheticCostExplorer,
+    SyntheticOrg,
+)
+
+NOW = datetime(2026, 2, 10, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def test_org_is_deterministic_per_seed() -> None:
+    a = SyntheticOrg(workloads=5, usage_types=4, seed=1, now=NOW)
+    b = SyntheticOrg(workloads=5, usage_types=4, seed=1, now=NOW)
+    c = SyntheticOrg(workloads=5, usage_types=4, seed=2, now=NOW)
+    assert a.cells("2026-01-01", "2026-02-01") == b.cells("2026-01-01", "2026-02-01")
+    assert a.cells("2026-01-01", "2026-02-01") != c.cells("2026-01-01", "2026-02-01")
+
+
+def test_org_dimensions() -> None:
+    org = SyntheticOrg(
+        workloads=20, usage_types=150, cost_centers=4, split_rules=3, now=NOW
+    )
+    assert org.group_count == 3000
+    assert len(set(org.usage_types)) == 150
+    assert org.workloads[0] == ""  # first workload is untagged
+    assert set(org.mapping.values()) <= set(org.cost_centers)
+    assert [r["Method"] for r in org.split_charge_rules] == [
+        "PROPORTIONAL",
+        "EVEN",
+        "FIXED",
+    ]
+    fixed = org.split_charge_rules[2]["Parameters"][0]["Values"]
+    assert sum(int(v) for v in fixed) == 100
+
+
+def test_org_has_no_data_before_history_window() -> None:
+    org = SyntheticOrg(workloads=2, usage_types=2, months=2, now=NOW)
+    assert org.cells("2026-01-01", "2026-02-01")
+    assert org.cells("2025-12-01", "2026-01-01") == []
+
+
+def test_cost_and_usage_paginates() -> None:
+    org = SyntheticOrg(workloads=30, usage_types=10, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    ce.page_size = 70
+    groups = get_cost_and_usage(ce, "2026-01-01", "2026-02-01")
+    assert len(groups) == org.group_count
+    assert ce.calls == 5
+    assert groups[0]["Keys"] == ["App$", org.usage_types[0]]
+
+
+def test_ungrouped_query_returns_total() -> None:
+    org = SyntheticOrg(workloads=6, usage_types=4, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    totals = get_monthly_totals(ce, "2026-01-01", "2026-02-01")
+    expected = sum(c[2] for c in org.cells("2026-01-01", "2026-02-01"))
+    assert totals == {"2026-01": pytest.approx(expected)}
+
+    with patch("dapanoskop.collector.boto3.client", org.client):
+        probe = probe_freshness(NOW)
+    assert probe["labels"] == ["2026-02", "2026-01"]
+
+
+def _cost(groups: list[dict]) -> float:
+    return sum(float(g["Metrics"]["NetAmortizedCost"]["Amount"]) for g in groups)
+
+
+def test_monthly_query_returns_one_result_per_month() -> None:
+    org = SyntheticOrg(workloads=3, usage_types=2, now=NOW)
+    totals = get_monthly_totals(SyntheticCostExplorer(org), "2025-12-01", "2026-02-10")
+    assert list(totals) == ["2025-12", "2026-01", "2026-02"]
+    january = sum(c[2] for c in org.cells("2026-01-01", "2026-02-01"))
+    assert totals["2026-01"] == pytest.approx(january)
+
+
+def test_daily_cube_restatement_against_synthetic_org() -> None:
+    """DAILY returns one result per day, so restated days are not double-counted."""
+    org = SyntheticOrg(workloads=5, usage_types=4, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    ce.page_size = 7  # pages cut across the per-day results
+    storage = MemoryStorage()
+
+    update_daily_cube(ce, storage, "2026-02-01", "2026-02-07", 3, date(2026, 2, 7))
+    days = update_daily_cube(
+        ce, storage, "2026-02-01", "2026-02-10", 3, date(2026, 2, 10)
+    )
+
+    assert list(days) == [f"2026-02-{d:02d}" for d in range(1, 10)]
+    assert all(len(rows) == org.group_count for rows in days.values())
+    day = org.cells("2026-02-04", "2026-02-05")
+    assert sum(row[2] for row in days["2026-02-04"]) == pytest.approx(
+        sum(c[2] for c in day)
+    )
+    monthly = get_cost_and_usage(ce, "2026-02-01", "2026-02-10")
+    assert _cost(sum_daily_cube(days)) == pytest.approx(_cost(monthly))
+
+
+def test_filter_restricts_costs() -> None:
+    org = SyntheticOrg(workloads=8, usage_types=50, accounts=2, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    account = org.accounts[1]
+    only = {"Dimensions": {"Key": "LINKED_ACCOUNT", "Values": [account]}}
+    not_s3 = {
+        "Not": {
+            "Dimensions": {
+                "Key": "SERVICE",
+                "Values": ["Amazon Simple Storage Service"],
+            }
+        }
+    }
+
+    groups = get_cost_and_usage(
+        ce, "2026-01-01", "2026-02-01", cost_filter={"And": [only, not_s3]}
+    )
+    expected = [
+        c
+        for c in org.cells("2026-01-01", "2026-02-01")
+        if org.account_of[c[0]] == account
+        and org.getter("DIMENSION", "SERVICE")(*c[:2])
+        != "Amazon Simple Storage Service"
+    ]
+    assert len(groups) == len(expected) > 0
+    assert _cost(groups) == pytest.approx(sum(c[2] for c in expected))
+
+    daily = get_daily_cost_and_usage(ce, "2026-01-01", "2026-01-03", cost_filter=only)
+    assert list(daily) == ["2026-01-01", "2026-01-02"]
+    assert {g["Keys"][0] for g in daily["2026-01-01"]} == {
+        f"App${wl}" for wl, acct in org.account_of.items() if acct == account
+    }
+
+
+def test_cost_and_usage_groups_by_any_definitions() -> None:
+    org = SyntheticOrg(workloads=9, usage_types=10, accounts=3, teams=2, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    response = ce.get_cost_and_usage(
+        TimePeriod={"Start": "2026-01-01", "End": "2026-02-01"},
+        Granularity="MONTHLY",
+        Metrics=["NetAmortizedCost"],
+        GroupBy=[
+            {"Type": "TAG", "Key": "Team"},
+            {"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"},
+        ],
+    )
+    groups = response["ResultsByTime"][0]["Groups"]
+
+    keys = {tuple(g["Keys"]) for g in groups}
+    assert ("Team$", org.accounts[0]) in keys  # the untagged workload
+    assert {k[0] for k in keys} == {"Team$", "Team$team-0", "Team$team-1"}
+    assert {k[1] for k in keys} == set(org.accounts)
+    assert set(groups[0]["Metrics"]) == {"NetAmortizedCost"}
+    total = sum(c[2] for c in org.cells("2026-01-01", "2026-02-01"))
+    assert _cost(groups) == pytest.approx(total)
+
+
+def test_tag_and_dimension_values() -> None:
+    org = SyntheticOrg(workloads=9, usage_types=10, accounts=2, teams=2, now=NOW)
+    ce = SyntheticCostExplorer(org)
+    period = {"Start": "2026-01-01", "End": "2026-02-01"}
+
+    assert ce.get_tags(TimePeriod=period)["Tags"] == ["App", "Team"]
+    assert ce.get_tags(TimePeriod=period, TagKey="Team")["Tags"] == [
+        "team-0",
+        "team-1",
+    ]
+    accounts = ce.get_dimension_values(TimePeriod=period, Dimension="LINKED_ACCOUNT")
+    assert [v["Value"] for v in accounts["DimensionValues"]] == org.accounts
+    filtered = ce.get_tags(
+        TimePeriod=period,
+        TagKey="Team",
+        Filter={"Dimensions": {"Key": "LINKED_ACCOUNT", "Values": [org.accounts[1]]}},
+    )
+    assert filtered["Tags"] == ["team-1"]
+    old = {"Start": "2020-01-01", "End": "2020-02-01"}
+    assert ce.get_tags(TimePeriod=old, TagKey="Team")["Tags"] == []
+    with pytest.raises(ValueError, match="Unsupported synthetic dimension"):
+        ce.get_dimension_values(TimePeriod=period, Dimension="INSTANCE_TYPE")
+
+
+def test_unknown_service_rejected() -> None:
+    with pytest.raises(ValueError, match="synthetic stand-in"):
+        SyntheticOrg().client("s3")
+
+
+def test_pipeline_runs_against_synthetic_org() -> None:
+    """collect → process works end to end and cost category totals reconcile."""
+    org = SyntheticOrg(workloads=12, usage_types=8, cost_centers=3, now=NOW)
+    with (
+        patch("dapanoskop.collector.boto3.client", org.client),
+        patch("dapanoskop.collector.datetime") as mock_dt,
+    ):
+        mock_dt.now.return_value = NOW
+        collected = collect(cost_category_name=COST_CATEGORY_NAME)
+
+    assert len(collected["raw_data"]["current"]) == org.group_count
+    assert collected["split_charge_rules"] == org.split_charge_rules
+    result = process(collected)
+
+    summary = result["summary"]
+    assert len(result["usage_type_rows"]) == org.group_count * 3
+    shared = {r["Source"] for r in org.split_charge_rules}
+    split = {cc["name"] for cc in summary["cost_centers"] if cc.get("is_split_charge")}
+    assert split == shared
+    assert summary["period"] == "2026-02"
+    expected = sum(c[2] for c in org.cells("2026-02-01", "2026-02-10"))
+    assert summary["totals"]["current_cost_usd"] == pytest.approx(expected, abs=0.01)
+    assert sum(cc["current_cost_usd"] for cc in summary["cost_centers"]) == (
+        pytest.approx(expected, abs=0.05)
+    )
+
+
+def test_submit_collect_matches_collect() -> None:
+    """Per-period futures assemble what the sequential collect() returns."""
+    org = SyntheticOrg(workloads=6, usage_types=4, cost_centers=3, now=NOW)
+    ce = org.client("ce")
+    expected = collect(
+        COST_CATEGORY_NAME, now=NOW, daily_cube=MemoryStorage(), ce_client=ce
+    )
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        collected_for = submit_collect(
+            pool, COST_CATEGORY_NAME, now=NOW, daily_cube=MemoryStorage(), ce_client=ce
+        )
+        prev = collected_for(["prev_complete", "prev_month", "yoy_prev_complete"])
+        collected = collected_for(expected["periods"])
+
+    assert collected == expected
+    assert set(prev["raw_data"]) == {"prev_complete", "prev_month", "yoy_prev_complete"}
+    assert set(prev["daily"]) == {"prev_complete"}
+    assert prev["forecast"] is None
+
+
+def test_storage_lens_against_synthetic_org() -> None:
+    org = SyntheticOrg(storage_lens_series=30, now=NOW)
+    end = datetime(2026, 2, 10)
+    with patch("dapanoskop.storage_lens.boto3.client", org.client):
+        result = get_storage_lens_metrics(
+            start_time=end - timedelta(days=7), end_time=end
+        )
+
+    assert result is not None
+    assert result["config_id"] == STORAGE_LENS_CONFIG_ID
+    assert result["total_bytes"] > 0
+    assert result["timestamp"] == "2026-02-09T00:00:00+00:00"
@@ -65,16 +65,23 @@ module "auth" {
 module "pipeline" {
   source = "./modules/pipeline"
 
-  data_bucket_arn          = module.data_store.bucket_arn
-  data_bucket_name         = module.data_store.bucket_name
-  cost_category_name       = var.cost_category_name
-  schedule_expression      = var.schedule_expression
-  include_efs              = var.include_efs
-  include_ebs              = var.include_ebs
-  storage_lens_config_id   = var.storage_lens_config_id
-  lambda_s3_bucket         = module.artifacts.lambda_s3_bucket
-  lambda_s3_key            = module.artifacts.lambda_s3_key
-  lambda_s3_object_version = module.artifacts.lambda_s3_object_version
-  permissions_boundary     = var.permissions_boundary
-  tags                     = var.tags
+  data_bucket_arn              = module.data_store.bucket_arn
+  data_bucket_name             = module.data_store.bucket_name
+  cost_category_name           = var.cost_category_name
+  schedule_expression          = var.schedule_expression
+  include_efs                  = var.include_efs
+  include_ebs                  = var.include_ebs
+  storage_lens_config_id       = var.storage_lens_config_id
+  storage_lens_breakdown       = var.storage_lens_breakdown
+  storage_lens_export_location = var.storage_lens_export_location
+  cost_export_location         = var.cost_export_location
+  cost_export_format           = var.cost_export_format
+  mtd_restatement_days         = var.mtd_restatement_days
+  workload_dimensions          = var.workload_dimensions
+  cost_filter                  = var.cost_filter
+  lambda_s3_bucket             = module.artifacts.lambda_s3_bucket
+  lambda_s3_key                = module.artifacts.lambda_s3_key
+  lambda_s3_object_version     = module.artifacts.lambda_s3_object_version
+  permissions_boundary         = var.permissions_boundary
+  tags                         = var.tags
 }
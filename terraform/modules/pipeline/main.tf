@@ -17,6 +17,51 @@ data "aws_region" "current" {}
 
 locals {
   use_s3_source = var.lambda_s3_key != ""
+
+  # s3://bucket/prefix of the Storage Lens metrics export, split for IAM
+  storage_lens_export_bucket = var.storage_lens_export_location != "" ? split("/", trimprefix(var.storage_lens_export_location, "s3://"))[0] : ""
+  storage_lens_export_prefix = trimprefix(trimprefix(var.storage_lens_export_location, "s3://${local.storage_lens_export_bucket}"), "/")
+
+  # Read-only access to the export, only when one is configured
+  storage_lens_export_statements = local.storage_lens_export_bucket != "" ? [
+    {
+      Effect   = "Allow"
+      Action   = "s3:GetObject"
+      Resource = "arn:aws:s3:::${local.storage_lens_export_bucket}/${local.storage_lens_export_prefix}*"
+    },
+    {
+      Effect   = "Allow"
+      Action   = "s3:ListBucket"
+      Resource = "arn:aws:s3:::${local.storage_lens_export_bucket}"
+      Condition = {
+        StringLike = {
+          "s3:prefix" = ["${local.storage_lens_export_prefix}*"]
+        }
+      }
+    },
+  ] : []
+
+  # Same for the CUR 2.0 / FOCUS data export
+  cost_export_bucket = var.cost_export_location != "" ? split("/", trimprefix(var.cost_export_location, "s3://"))[0] : ""
+  cost_export_prefix = trimprefix(trimprefix(var.cost_export_location, "s3://${local.cost_export_bucket}"), "/")
+
+  cost_export_statements = local.cost_export_bucket != "" ? [
+    {
+      Effect   = "Allow"
+      Action   = "s3:GetObject"
+      Resource = "arn:aws:s3:::${local.cost_export_bucket}/${local.cost_export_prefix}*"
+    },
+    {
+      Effect   = "Allow"
+      Action   = "s3:ListBucket"
+      Resource = "arn:aws:s3:::${local.cost_export_bucket}"
+      Condition = {
+        StringLike = {
+          "s3:prefix" = ["${local.cost_export_prefix}*"]
+        }
+      }
+    },
+  ] : []
 }
 
 data "archive_file" "lambda" {
@@ -59,7 +104,7 @@ resource "aws_iam_role_policy" "lambda" {
 
   policy = jsonencode({
     Version = "2012-10-17"
-    Statement = [
+    Statement = concat([
       {
         # Cost Explorer API actions do not support resource-level permissions
         Effect = "Allow"
@@ -69,6 +114,9 @@ resource "aws_iam_role_policy" "lambda" {
           "ce:GetCostForecast",
           "ce:ListCostCategoryDefinitions",
           "ce:DescribeCostCategoryDefinition",
+          # Listing values to plan queries over more than two dimensions
+          "ce:GetDimensionValues",
+          "ce:GetTags",
         ]
         Resource = "*"
       },
@@ -76,6 +124,10 @@ resource "aws_iam_role_policy" "lambda" {
         Effect = "Allow"
         Action = [
           "s3:PutObject",
+          # Read back storage-lens.parquet to append new days (SDS-DP-020304)
+          # the cost export ingestion state (SDS-DP-020105) and the daily
+          # cost cubes (SDS-DP-020107)
+          "s3:GetObject",
         ]
         Resource = "${var.data_bucket_arn}/*"
       },
@@ -112,7 +164,7 @@ resource "aws_iam_role_policy" "lambda" {
         ]
         Resource = "*"
       },
-    ]
+    ], local.storage_lens_export_statements, local.cost_export_statements)
   })
 }
 
@@ -146,14 +198,31 @@ resource "aws_lambda_function" "pipeline" {
   environment {
     variables = merge(
       {
-        DATA_BUCKET        = var.data_bucket_name
-        COST_CATEGORY_NAME = var.cost_category_name
-        INCLUDE_EFS        = tostring(var.include_efs)
-        INCLUDE_EBS        = tostring(var.include_ebs)
+        DATA_BUCKET          = var.data_bucket_name
+        COST_CATEGORY_NAME   = var.cost_category_name
+        INCLUDE_EFS          = tostring(var.include_efs)
+        INCLUDE_EBS          = tostring(var.include_ebs)
+        MTD_RESTATEMENT_DAYS = tostring(var.mtd_restatement_days)
       },
       var.storage_lens_config_id != "" ? {
         STORAGE_LENS_CONFIG_ID = var.storage_lens_config_id
       } : {},
+      var.storage_lens_breakdown ? {
+        STORAGE_LENS_BREAKDOWN = "true"
+      } : {},
+      var.storage_lens_export_location != "" ? {
+        STORAGE_LENS_EXPORT_LOCATION = var.storage_lens_export_location
+      } : {},
+      var.cost_export_location != "" ? {
+        COST_EXPORT_LOCATION = var.cost_export_location
+        COST_EXPORT_FORMAT   = var.cost_export_format
+      } : {},
+      length(var.workload_dimensions) > 0 ? {
+        WORKLOAD_DIMENSIONS = join(",", var.workload_dimensions)
+      } : {},
+      length(var.cost_filter) > 0 ? {
+        COST_FILTER = join(";", var.cost_filter)
+      } : {},
     )
   }
 }
@@ -236,3 +236,44 @@ run "total_statement_count" {
     error_message = "Policy must contain exactly 6 statements (CE, S3 PutObject, S3 ListBucket, Logs, S3 Control, CloudWatch)"
   }
 }
+
+run "storage_lens_export_permissions" {
+  command = plan
+
+  variables {
+    storage_lens_export_location = "s3://lens-exports/org/StorageLens/o-abc123/org-lens/V_1/reports"
+  }
+
+  assert {
+    condition     = length(jsondecode(output.iam_policy_json).Statement) == 8
+    error_message = "Export location must add exactly 2 statements (GetObject, ListBucket)"
+  }
+
+  assert {
+    condition     = jsondecode(output.iam_policy_json).Statement[6].Resource == "arn:aws:s3:::lens-exports/org/StorageLens/o-abc123/org-lens/V_1/reports*"
+    error_message = "Export GetObject must be scoped to the export prefix"
+  }
+
+  assert {
+    condition     = jsondecode(output.iam_policy_json).Statement[7].Resource == "arn:aws:s3:::lens-exports"
+    error_message = "Export ListBucket must be scoped to the export bucket"
+  }
+}
+
+run "cost_export_permissions" {
+  command = plan
+
+  variables {
+    cost_export_location = "s3://billing-exports/cur/dapanoskop/data"
+  }
+
+  assert {
+    condition     = length(jsondecode(output.iam_policy_json).Statement) == 8
+    error_message = "Cost export location must add exactly 2 statements (GetObject, ListBucket)"
+  }
+
+  assert {
+    condition     = jsondecode(output.iam_policy_json).Statement[6].Resource == "arn:aws:s3:::billing-exports/cur/dapanoskop/data*"
+    error_message = "Cost export GetObject must be scoped to the export prefix"
+  }
+}
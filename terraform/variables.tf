@@ -142,6 +142,78 @@ variable "storage_lens_config_id" {
   default     = ""
 }
 
+variable "storage_lens_breakdown" {
+  description = "Add the storage class / region / account breakdown to the Storage Lens data in summary.json. Queries every CloudWatch series separately instead of one pre-summed series per metric, so it costs more API calls."
+  type        = bool
+  default     = false
+}
+
+variable "storage_lens_export_location" {
+  description = "S3 URI of a Storage Lens metrics export reports directory (s3://bucket/prefix/StorageLens/<org>/<config>/V_1/reports). When set, storage volume and per-bucket detail are read from the export instead of CloudWatch."
+  type        = string
+  default     = ""
+
+  validation {
+    condition     = var.storage_lens_export_location == "" || startswith(var.storage_lens_export_location, "s3://")
+    error_message = "storage_lens_export_location must be empty or an s3:// URI."
+  }
+}
+
+variable "cost_export_location" {
+  description = "S3 URI of a CUR 2.0 or FOCUS data export's data directory (s3://bucket/prefix/<export name>/data). When set, costs are collected from the export instead of the Cost Explorer API."
+  type        = string
+  default     = ""
+
+  validation {
+    condition     = var.cost_export_location == "" || startswith(var.cost_export_location, "s3://")
+    error_message = "cost_export_location must be empty or an s3:// URI."
+  }
+}
+
+variable "cost_export_format" {
+  description = "Format of the data export at cost_export_location: cur2 (CUR 2.0) or focus (FOCUS 1.0)."
+  type        = string
+  default     = "cur2"
+
+  validation {
+    condition     = contains(["cur2", "focus"], var.cost_export_format)
+    error_message = "cost_export_format must be cur2 or focus."
+  }
+}
+
+variable "mtd_restatement_days" {
+  description = "Recent days the daily cost cubes (incremental MTD collection, cost-by-day.parquet) re-query on each run, besides new days. 0 re-queries only new days."
+  type        = number
+  default     = 3
+
+  validation {
+    condition     = var.mtd_restatement_days >= 0 && floor(var.mtd_restatement_days) == var.mtd_restatement_days
+    error_message = "mtd_restatement_days must be a non-negative integer."
+  }
+}
+
+variable "workload_dimensions" {
+  description = "Cost Explorer dimensions that define a workload: TAG:<key>, SERVICE, LINKED_ACCOUNT or REGION. Empty uses the App tag. More than one is collected as several two-dimension queries."
+  type        = list(string)
+  default     = []
+
+  validation {
+    condition     = alltrue([for d in var.workload_dimensions : can(regex("^(TAG:.+|SERVICE|LINKED_ACCOUNT|REGION)$", d))])
+    error_message = "workload_dimensions entries must be TAG:<key>, SERVICE, LINKED_ACCOUNT or REGION."
+  }
+}
+
+variable "cost_filter" {
+  description = "Cost Explorer filter clauses applied to every cost query: <DIMENSION>=<values> to include or <DIMENSION>!=<values> to exclude comma-separated values of RECORD_TYPE, LINKED_ACCOUNT, REGION or SERVICE, e.g. [\"RECORD_TYPE!=Tax,Credit,Refund\"]. Empty collects all costs. Ignored when cost_export_location is set: the CUR / FOCUS export is always read unfiltered."
+  type        = list(string)
+  default     = []
+
+  validation {
+    condition     = alltrue([for c in var.cost_filter : can(regex("^(RECORD_TYPE|LINKED_ACCOUNT|REGION|SERVICE)!?=[^;]+$", c))])
+    error_message = "cost_filter entries must be <DIMENSION>=<values> or <DIMENSION>!=<values> with DIMENSION one of RECORD_TYPE, LINKED_ACCOUNT, REGION or SERVICE."
+  }
+}
+
 variable "tags" {
   description = "Map of tags to apply to all taggable resources"
   type        = map(string)